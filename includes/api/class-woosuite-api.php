@@ -98,6 +98,12 @@ class WooSuite_Api {
             'permission_callback' => array( $this, 'check_permission' ),
         ) );
 
+        register_rest_route( $this->namespace, '/security/findings', array(
+            'methods' => 'GET',
+            'callback' => array( $this, 'get_scan_findings' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
         // Quarantine Routes
         register_rest_route( $this->namespace, '/security/quarantine', array(
             'methods' => 'GET',
@@ -124,6 +130,25 @@ class WooSuite_Api {
         ) );
 
         // Ignore Routes
+        // IP / CIDR bans
+        register_rest_route( $this->namespace, '/security/bans', array(
+            'methods' => 'GET',
+            'callback' => array( $this, 'get_ip_bans' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        register_rest_route( $this->namespace, '/security/bans', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'add_ip_bans' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        register_rest_route( $this->namespace, '/security/bans/remove', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'remove_ip_ban' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
         register_rest_route( $this->namespace, '/security/ignore', array(
             'methods' => 'GET',
             'callback' => array( $this, 'get_ignored_paths' ),
@@ -192,9 +217,9 @@ class WooSuite_Api {
             'permission_callback' => array( $this, 'check_permission' ),
         ) );
 
-        register_rest_route( $this->namespace, '/backup/export/chunk', array(
+        register_rest_route( $this->namespace, '/backup/export/step', array(
             'methods' => 'POST',
-            'callback' => array( $this, 'export_chunk_route' ),
+            'callback' => array( $this, 'export_step_route' ),
             'permission_callback' => array( $this, 'check_permission' ),
         ) );
 
@@ -210,12 +235,48 @@ class WooSuite_Api {
             'permission_callback' => array( $this, 'check_permission' ),
         ) );
 
+        register_rest_route( $this->namespace, '/backup/passport', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'create_passport_route' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        register_rest_route( $this->namespace, '/backup/import/validate', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'validate_passport_route' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        register_rest_route( $this->namespace, '/backup/import/fetch-chunk', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'import_fetch_chunk_route' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        register_rest_route( $this->namespace, '/backup/import/process-chunk', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'import_process_chunk_route' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
         register_rest_route( $this->namespace, '/backup/replace', array(
             'methods' => 'POST',
             'callback' => array( $this, 'run_url_replace' ),
             'permission_callback' => array( $this, 'check_permission' ),
         ) );
 
+        register_rest_route( $this->namespace, '/backup/replace/step', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'url_replace_step_route' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        register_rest_route( $this->namespace, '/backup/replace/status', array(
+            'methods' => 'GET',
+            'callback' => array( $this, 'get_url_replace_status_route' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
         register_rest_route( $this->namespace, '/migration/scan', array(
             'methods' => 'POST',
             'callback' => array( $this, 'migration_scan' ),
@@ -265,6 +326,33 @@ class WooSuite_Api {
             'permission_callback' => array( $this, 'check_permission' ),
         ) );
 
+        // SEO Status Index (backfill progress / rebuild)
+        register_rest_route( $this->namespace, '/seo/index', array(
+            'methods' => 'GET',
+            'callback' => array( $this, 'get_seo_index_status' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        register_rest_route( $this->namespace, '/seo/index/rebuild', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'rebuild_seo_index' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        // SEO Generate (Multiple Items, batched prompt) - Server Side
+        register_rest_route( $this->namespace, '/seo/generate', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'generate_content_batch' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
+        // SEO Generate (Many Items, NDJSON stream within a time budget) - Server Side
+        register_rest_route( $this->namespace, '/seo/generate/stream', array(
+            'methods' => 'POST',
+            'callback' => array( $this, 'generate_content_stream' ),
+            'permission_callback' => array( $this, 'check_permission' ),
+        ) );
+
         // SEO Generate (Single Item) - Server Side
         register_rest_route( $this->namespace, '/seo/generate/(?P<id>\d+)', array(
             'methods' => 'POST',
@@ -331,6 +419,22 @@ class WooSuite_Api {
         if ( isset( $params['customModelId'] ) ) {
             update_option( 'woosuite_api_model_custom', sanitize_text_field( $params['customModelId'] ) );
         }
+        if ( isset( $params['groqRpm'] ) ) {
+            update_option( 'woosuite_groq_rpm', max( 0, (int) $params['groqRpm'] ) );
+        }
+        if ( isset( $params['aiConcurrency'] ) ) {
+            update_option( 'woosuite_ai_concurrency', max( 1, min( 16, (int) $params['aiConcurrency'] ) ) );
+        }
+        if ( isset( $params['llmsFullEnabled'] ) ) {
+            $enabled = $params['llmsFullEnabled'] ? 'yes' : 'no';
+            $was_enabled = get_option( 'woosuite_llms_full_enabled', 'no' ) === 'yes';
+            update_option( 'woosuite_llms_full_enabled', $enabled );
+            if ( $enabled === 'yes' && ! $was_enabled ) {
+                // Built in the background; /llms-full.txt answers 503 until the first build is done
+                $llm_txt = new WooSuite_LLM_Txt( $this->plugin_name, $this->version );
+                $llm_txt->start_full_build();
+            }
+        }
 
         return new WP_REST_Response( array( 'success' => true ), 200 );
     }
@@ -349,7 +453,10 @@ class WooSuite_Api {
             'apiKey' => $api_key,
             'useCustomApi' => get_option( 'woosuite_use_custom_api', 'no' ) === 'yes',
             'customApiUrl' => get_option( 'woosuite_api_url_custom', '' ),
-            'customModelId' => get_option( 'woosuite_api_model_custom', '' )
+            'customModelId' => get_option( 'woosuite_api_model_custom', '' ),
+            'groqRpm' => (int) get_option( 'woosuite_groq_rpm', 30 ),
+            'aiConcurrency' => (int) get_option( 'woosuite_ai_concurrency', 4 ),
+            'llmsFullEnabled' => get_option( 'woosuite_llms_full_enabled', 'no' ) === 'yes'
         ), 200 );
     }
 
@@ -412,6 +519,8 @@ class WooSuite_Api {
         $status = $request->get_param('status'); // 'enhanced', 'not_enhanced'
         $search = $request->get_param('search'); // NEW: Search support
         $return_ids_only = $request->get_param('fields') === 'ids';
+        // Optional projection, e.g. fields=id,name,metaDescription (empty = every column)
+        $fields = $return_ids_only ? array() : $this->parse_content_fields( $request->get_param('fields') );
 
         $args = array(
             'posts_per_page' => $limit,
@@ -421,6 +530,11 @@ class WooSuite_Api {
 
         if ( $return_ids_only ) {
             $args['fields'] = 'ids';
+        } else {
+            // Load meta and terms for the whole page in one query each instead of per row
+            // (permalinks of products read product_cat terms)
+            $args['update_post_meta_cache'] = $this->wants_field( $fields, array( 'metaTitle', 'metaDescription', 'llmSummary', 'lastError', 'proposedTitle', 'proposedDescription', 'proposedShortDescription', 'hasHistory', 'imageUrl', 'permalink', 'altText', 'price' ) );
+            $args['update_post_term_cache'] = $this->wants_field( $fields, array( 'tags', 'permalink' ) );
         }
 
         if ( $type === 'image' ) {
@@ -452,8 +566,18 @@ class WooSuite_Api {
         // (Debug logging removed to prevent System Logs spam)
 
         $meta_query = array();
+        $index_conditions = array();
+        // Indexed flags replace the NOT EXISTS meta_query chains once the SEO index is built
+        $use_index = WooSuite_Seo_Index::is_ready();
 
-        if ( $filter === 'unoptimized' ) {
+        if ( $use_index ) {
+            if ( $filter === 'unoptimized' ) {
+                $index_conditions[] = ( $type === 'image' ) ? 'unoptimized_image' : 'unoptimized';
+            }
+            if ( $status === 'enhanced' || $status === 'not_enhanced' ) {
+                $index_conditions[] = $status;
+            }
+        } elseif ( $filter === 'unoptimized' ) {
             if ( $type === 'image' ) {
                 $meta_query[] = array(
                     'relation' => 'OR',
@@ -470,7 +594,9 @@ class WooSuite_Api {
         }
 
         // Status Filter (Enhanced vs Not Enhanced)
-        if ( $status === 'enhanced' ) {
+        if ( $use_index ) {
+            // Handled by $index_conditions
+        } elseif ( $status === 'enhanced' ) {
             // "Enhanced" means the item has been modified by AI (has history) OR has a pending proposal?
             $meta_query[] = array(
                 'relation' => 'OR',
@@ -500,6 +626,9 @@ class WooSuite_Api {
         if ( ! empty( $meta_query ) ) {
             $args['meta_query'] = $meta_query;
         }
+        if ( ! empty( $index_conditions ) ) {
+            $args['woosuite_seo_index'] = $index_conditions;
+        }
 
         $query = new WP_Query( $args );
         $posts = $query->posts;
@@ -510,8 +639,12 @@ class WooSuite_Api {
             return new WP_REST_Response( array( 'ids' => $posts, 'total' => $total, 'pages' => $pages ), 200 );
         }
 
+        $taxonomy = ($type === 'product') ? 'product_tag' : 'post_tag';
         $data = array();
         foreach ( $posts as $post ) {
+            // All meta of this post, served from the cache primed by WP_Query
+            $meta = $args['update_post_meta_cache'] ? get_post_meta( $post->ID ) : array();
+
             $item = array(
                 'id' => $post->ID,
                 'name' => $post->post_title,
@@ -521,42 +654,49 @@ class WooSuite_Api {
                 // Legacy support (fallback)
                 'fallbackDescription' => strip_tags( $post->post_excerpt ?: $post->post_content ),
 
-                'metaTitle' => get_post_meta( $post->ID, '_woosuite_meta_title', true ),
-                'metaDescription' => get_post_meta( $post->ID, '_woosuite_meta_description', true ),
-                'llmSummary' => get_post_meta( $post->ID, '_woosuite_llm_summary', true ),
-                'lastError' => get_post_meta( $post->ID, '_woosuite_seo_last_error', true ),
+                'metaTitle' => $this->meta_value( $meta, '_woosuite_meta_title' ),
+                'metaDescription' => $this->meta_value( $meta, '_woosuite_meta_description' ),
+                'llmSummary' => $this->meta_value( $meta, '_woosuite_llm_summary' ),
+                'lastError' => $this->meta_value( $meta, '_woosuite_seo_last_error' ),
                 'type' => $type,
-                'permalink' => get_permalink( $post->ID ),
-                'proposedTitle' => get_post_meta( $post->ID, '_woosuite_proposed_title', true ),
-                'proposedDescription' => get_post_meta( $post->ID, '_woosuite_proposed_description', true ),
-                'proposedShortDescription' => get_post_meta( $post->ID, '_woosuite_proposed_short_description', true ),
-                'hasHistory' => ! empty( get_post_meta( $post->ID, '_woosuite_history_post_content', true ) ) ||
-                                ! empty( get_post_meta( $post->ID, '_woosuite_history__woosuite_meta_description', true ) ) ||
-                                ! empty( get_post_meta( $post->ID, '_woosuite_history__wp_attachment_image_alt', true ) ) ||
-                                ! empty( get_post_meta( $post->ID, '_woosuite_history_post_title', true ) ) ||
-                                ! empty( get_post_meta( $post->ID, '_woosuite_history_post_excerpt', true ) ),
+                'proposedTitle' => $this->meta_value( $meta, '_woosuite_proposed_title' ),
+                'proposedDescription' => $this->meta_value( $meta, '_woosuite_proposed_description' ),
+                'proposedShortDescription' => $this->meta_value( $meta, '_woosuite_proposed_short_description' ),
+                'hasHistory' => ! empty( $this->meta_value( $meta, '_woosuite_history_post_content' ) ) ||
+                                ! empty( $this->meta_value( $meta, '_woosuite_history__woosuite_meta_description' ) ) ||
+                                ! empty( $this->meta_value( $meta, '_woosuite_history__wp_attachment_image_alt' ) ) ||
+                                ! empty( $this->meta_value( $meta, '_woosuite_history_post_title' ) ) ||
+                                ! empty( $this->meta_value( $meta, '_woosuite_history_post_excerpt' ) ),
                 'tags' => array()
             );
 
-            $taxonomy = ($type === 'product') ? 'product_tag' : 'post_tag';
-            $terms = get_the_terms( $post->ID, $taxonomy );
-            if ( ! is_wp_error( $terms ) && ! empty( $terms ) ) {
-                $item['tags'] = wp_list_pluck( $terms, 'name' );
+            if ( $args['update_post_term_cache'] ) {
+                $terms = get_the_terms( $post->ID, $taxonomy );
+                if ( ! is_wp_error( $terms ) && ! empty( $terms ) ) {
+                    $item['tags'] = wp_list_pluck( $terms, 'name' );
+                }
             }
 
             // Add Image specific data
             if ( $type === 'image' ) {
-                $item['imageUrl'] = wp_get_attachment_url( $post->ID );
+                $item['imageUrl'] = $this->wants_field( $fields, array( 'imageUrl', 'permalink' ) ) ? wp_get_attachment_url( $post->ID ) : '';
                 $item['permalink'] = $item['imageUrl'];
-                $item['altText'] = get_post_meta( $post->ID, '_wp_attachment_image_alt', true );
+                $item['altText'] = $this->meta_value( $meta, '_wp_attachment_image_alt' );
                 if ( empty( $item['description'] ) ) {
                     $item['description'] = $post->post_excerpt; // Caption
                 }
-            } elseif ( $type === 'product' && function_exists( 'wc_get_product' ) ) {
-                 $product = wc_get_product( $post->ID );
-                 if ( $product ) {
-                     $item['price'] = $product->get_price();
-                 }
+            } else {
+                $item['permalink'] = $this->wants_field( $fields, array( 'permalink' ) ) ? get_permalink( $post ) : '';
+                if ( $type === 'product' ) {
+                    // Active price straight from meta; no need to build a WC_Product per row.
+                    // Variable products store one _price row per variation price: show the lowest.
+                    $prices = isset( $meta['_price'] ) ? array_filter( $meta['_price'], 'is_numeric' ) : array();
+                    $item['price'] = $prices ? (string) min( $prices ) : '';
+                }
+            }
+
+            if ( ! empty( $fields ) ) {
+                $item = array_intersect_key( $item, array_flip( $fields ) );
             }
 
             $data[] = $item;
@@ -565,6 +705,22 @@ class WooSuite_Api {
         return new WP_REST_Response( array( 'items' => $data, 'total' => $total, 'pages' => $pages ), 200 );
     }
 
+    private function parse_content_fields( $fields ) {
+        if ( empty( $fields ) || ! is_string( $fields ) ) {
+            return array();
+        }
+        $fields = array_filter( array_map( 'trim', explode( ',', $fields ) ) );
+        return array_values( array_unique( array_merge( array( 'id' ), $fields ) ) );
+    }
+
+    private function wants_field( $fields, $names ) {
+        return empty( $fields ) || count( array_intersect( $fields, $names ) ) > 0;
+    }
+
+    private function meta_value( $meta, $key ) {
+        return isset( $meta[ $key ][0] ) ? maybe_unserialize( $meta[ $key ][0] ) : '';
+    }
+
     public function update_content_item( $request ) {
         $id = $request->get_param( 'id' );
         $params = $request->get_json_params();
@@ -623,30 +779,226 @@ class WooSuite_Api {
         if ( ! $post ) return new WP_REST_Response( array( 'success' => false, 'message' => 'Not found' ), 404 );
 
         $groq = new WooSuite_Groq();
+        // Deliberate regeneration: ask the AI again instead of reusing a cached answer
+        $groq->set_cache_bypass( ! empty( $params['regenerate'] ) );
 
         if ( $post->post_type === 'attachment' ) {
-            $url = wp_get_attachment_url( $id );
-            $result = $groq->generate_image_seo( $url, basename( $url ) );
+            $result = $groq->generate_image_seo( (int) $id, basename( get_attached_file( $id ) ?: wp_get_attachment_url( $id ) ) );
         } else {
-             $item = array(
-                'type' => $post->post_type,
-                'name' => $post->post_title,
-                'description' => strip_tags( $post->post_excerpt ?: $post->post_content ),
-                'rewrite_title' => $rewrite_title
-            );
-             if ( $post->post_type === 'product' && function_exists( 'wc_get_product' ) ) {
-                $product = wc_get_product( $post->ID );
-                if ( $product ) $item['price'] = $product->get_price();
-            }
-            $result = $groq->generate_seo_meta( $item );
+            $result = $groq->generate_seo_meta( $this->build_seo_item( $post, $rewrite_title ) );
         }
 
         if ( is_wp_error( $result ) ) {
+            if ( $result->get_error_code() === 'rate_limit' ) {
+                return $this->rate_limit_response( $result );
+            }
             return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 500 );
         }
 
         // AUTO-SAVE: Immediately save the generated results to the database
         // This ensures that "Generate" actions in the UI are persistent.
+        $this->save_generated_seo( $post, $result );
+
+        return new WP_REST_Response( array( 'success' => true, 'data' => $result ), 200 );
+    }
+
+    /**
+     * Generate SEO for several items at once. Text items share one batched prompt
+     * (WooSuite_Groq::generate_seo_meta_batch); images are still analysed one by one.
+     */
+    public function generate_content_batch( $request ) {
+        $params = $request->get_json_params();
+        $ids = isset( $params['ids'] ) && is_array( $params['ids'] ) ? array_map( 'intval', $params['ids'] ) : array();
+        $rewrite_title = ! empty( $params['rewriteTitle'] );
+
+        if ( empty( $ids ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => 'No IDs provided' ), 400 );
+        }
+
+        // Keep one request well inside PHP and proxy timeouts
+        $ids = array_slice( array_unique( $ids ), 0, 20 );
+
+        $groq = new WooSuite_Groq();
+        $groq->set_cache_bypass( ! empty( $params['regenerate'] ) );
+        $results = array();
+        $generated = array();
+        $items = array();
+
+        foreach ( $ids as $id ) {
+            $post = get_post( $id );
+            if ( ! $post ) {
+                $results[ $id ] = array( 'success' => false, 'message' => 'Not found' );
+            } elseif ( $post->post_type === 'attachment' ) {
+                $generated[ $id ] = $groq->generate_image_seo( $id, basename( get_attached_file( $id ) ?: wp_get_attachment_url( $id ) ) );
+            } else {
+                $items[ $id ] = $this->build_seo_item( $post, $rewrite_title );
+            }
+        }
+
+        if ( count( $items ) === 1 ) {
+            $generated[ key( $items ) ] = $groq->generate_seo_meta( reset( $items ) );
+        } elseif ( ! empty( $items ) ) {
+            $batch = $groq->generate_seo_meta_batch( $items );
+            foreach ( $items as $id => $item ) {
+                $generated[ $id ] = is_wp_error( $batch ) ? $batch : $batch[ $id ];
+            }
+        }
+
+        $rate_limit = null;
+        $succeeded = 0;
+        foreach ( $generated as $id => $result ) {
+            if ( is_wp_error( $result ) ) {
+                if ( $result->get_error_code() === 'rate_limit' ) {
+                    $rate_limit = $result;
+                }
+                $results[ $id ] = array( 'success' => false, 'code' => $result->get_error_code(), 'message' => $result->get_error_message() );
+                continue;
+            }
+
+            $this->save_generated_seo( get_post( $id ), $result );
+            $results[ $id ] = array( 'success' => true, 'data' => $result );
+            $succeeded++;
+        }
+
+        // Nothing got through: let the client back off for the limiter's Retry-After
+        if ( $rate_limit && $succeeded === 0 ) {
+            return $this->rate_limit_response( $rate_limit );
+        }
+
+        $data = array( 'success' => true, 'results' => $results );
+        if ( $rate_limit ) {
+            $error_data = $rate_limit->get_error_data();
+            $data['retry_after'] = isset( $error_data['retry_after'] ) ? (int) $error_data['retry_after'] : 60;
+        }
+
+        return new WP_REST_Response( $data, 200 );
+    }
+
+    /**
+     * Generate SEO for a long list of IDs in one request, so Optimize All boots
+     * WordPress once per ~20s instead of once per item. The IDs are worked through
+     * in passes like the background worker (batched prompts, concurrent requests)
+     * and each item's result is streamed as one NDJSON line once it is saved.
+     * The last line lists the IDs the budget or the rate limiter left over, for the
+     * client to send again: {"done":true,"remaining":[...],"retryAfter":0}
+     */
+    public function generate_content_stream( $request ) {
+        $params = $request->get_json_params();
+        $ids = isset( $params['ids'] ) && is_array( $params['ids'] ) ? array_map( 'intval', $params['ids'] ) : array();
+        $ids = array_slice( array_values( array_unique( array_filter( $ids ) ) ), 0, 500 );
+        $rewrite_title = ! empty( $params['rewriteTitle'] );
+
+        if ( empty( $ids ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => 'No IDs provided' ), 400 );
+        }
+
+        $deadline = time() + 20; // Well inside max_execution_time and proxy read timeouts
+        $batch_size = max( 1, (int) get_option( 'woosuite_seo_batch_size', 5 ) );
+        $concurrency = max( 1, min( 16, (int) get_option( 'woosuite_ai_concurrency', 4 ) ) );
+
+        $groq = new WooSuite_Groq();
+        $groq->set_cache_bypass( ! empty( $params['regenerate'] ) );
+
+        // A stopped browser tab still gets the pass in flight saved
+        ignore_user_abort( true );
+        if ( function_exists( 'set_time_limit' ) ) set_time_limit( 60 );
+
+        // Lines must reach the browser as they are written: no PHP, zlib or nginx buffering
+        @ini_set( 'zlib.output_compression', '0' );
+        while ( ob_get_level() > 0 ) {
+            ob_end_clean();
+        }
+        status_header( 200 );
+        header( 'Content-Type: application/x-ndjson; charset=UTF-8' );
+        header( 'Cache-Control: no-cache, no-store' );
+        header( 'X-Accel-Buffering: no' );
+
+        $emit = function( $line ) {
+            echo wp_json_encode( $line ) . "\n";
+            flush();
+        };
+
+        // Tag counts are recounted once at the end instead of after every item
+        wp_defer_term_counting( true );
+
+        $remaining = $ids;
+        $retry_after = 0;
+        while ( ! empty( $remaining ) && ! $retry_after && time() < $deadline && ! connection_aborted() ) {
+            $pass = array_splice( $remaining, 0, $batch_size * $concurrency );
+            _prime_post_caches( $pass, false, true );
+            $groq->set_max_wait( max( 1, min( 10, $deadline - time() ) ) );
+
+            $jobs = array();
+            $items = array();
+            foreach ( $pass as $id ) {
+                $post = get_post( $id );
+                if ( ! $post ) {
+                    $emit( array( 'id' => $id, 'success' => false, 'message' => 'Not found' ) );
+                } elseif ( $post->post_type === 'attachment' ) {
+                    $jobs[ "image:$id" ] = array( 'image_seo', $id, basename( get_attached_file( $id ) ?: wp_get_attachment_url( $id ) ) );
+                } else {
+                    $items[ $id ] = $this->build_seo_item( $post, $rewrite_title );
+                }
+            }
+            foreach ( array_chunk( $items, $batch_size, true ) as $chunk ) {
+                if ( count( $chunk ) === 1 ) {
+                    $jobs[ 'text:' . key( $chunk ) ] = array( 'seo_meta', reset( $chunk ) );
+                } else {
+                    $jobs[ 'batch:' . implode( ',', array_keys( $chunk ) ) ] = array( 'seo_meta_batch', $chunk );
+                }
+            }
+
+            // Throttled items go back to the front of the list, in order
+            $throttled = array();
+            $groq->run_concurrent( $jobs, $concurrency, function( $key, $result ) use ( $emit, &$throttled, &$retry_after ) {
+                list( $kind, $job_ids ) = explode( ':', $key, 2 );
+                foreach ( explode( ',', $job_ids ) as $id ) {
+                    $id = (int) $id;
+                    $item_result = $result;
+                    if ( $kind === 'batch' && ! is_wp_error( $result ) ) {
+                        $item_result = isset( $result[ $id ] ) ? $result[ $id ] : new WP_Error( 'api_empty', 'No result for this item in the batch.' );
+                    }
+
+                    if ( is_wp_error( $item_result ) ) {
+                        if ( $item_result->get_error_code() === 'rate_limit' ) {
+                            $error_data = $item_result->get_error_data();
+                            $retry_after = max( $retry_after, isset( $error_data['retry_after'] ) ? max( 1, (int) $error_data['retry_after'] ) : 60 );
+                            $throttled[] = $id;
+                            continue;
+                        }
+                        $emit( array( 'id' => $id, 'success' => false, 'code' => $item_result->get_error_code(), 'message' => $item_result->get_error_message() ) );
+                        continue;
+                    }
+
+                    $this->save_generated_seo( get_post( $id ), $item_result );
+                    $emit( array( 'id' => $id, 'success' => true, 'data' => $item_result ) );
+                }
+            } );
+            $remaining = array_merge( array_values( array_intersect( $pass, $throttled ) ), $remaining );
+        }
+
+        wp_defer_term_counting( false );
+
+        $emit( array( 'done' => true, 'remaining' => $remaining, 'retryAfter' => $retry_after ) );
+        exit;
+    }
+
+    private function build_seo_item( $post, $rewrite_title = false ) {
+        $item = array(
+            'type' => $post->post_type,
+            'name' => $post->post_title,
+            'description' => strip_tags( $post->post_excerpt ?: $post->post_content ),
+            'rewrite_title' => $rewrite_title
+        );
+        if ( $post->post_type === 'product' && function_exists( 'wc_get_product' ) ) {
+            $product = wc_get_product( $post->ID );
+            if ( $product ) $item['price'] = $product->get_price();
+        }
+        return $item;
+    }
+
+    private function save_generated_seo( $post, $result ) {
+        $id = $post->ID;
 
         if ( ! empty( $result['title'] ) ) {
             $this->save_meta_history( $id, '_woosuite_meta_title' );
@@ -681,8 +1033,6 @@ class WooSuite_Api {
                 wp_set_object_terms( $id, $tags, $taxonomy, false ); // false = Replace
             }
         }
-
-        return new WP_REST_Response( array( 'success' => true, 'data' => $result ), 200 );
     }
 
     public function rewrite_content_item( $request ) {
@@ -733,6 +1083,7 @@ class WooSuite_Api {
             }
 
             $groq = new WooSuite_Groq();
+            $groq->set_cache_bypass( ! empty( $params['regenerate'] ) );
             // Pass context to prevent hallucinations
             $result = $groq->rewrite_content( $text, $field, $tone, $final_instructions, $context );
 
@@ -742,6 +1093,9 @@ class WooSuite_Api {
                 array_unshift($debug_logs, "[ERROR] Rewrite failed for ID $id: " . $result->get_error_message());
                 update_option('woosuite_debug_log', array_slice($debug_logs, 0, 50));
 
+                if ( $result->get_error_code() === 'rate_limit' ) {
+                    return $this->rate_limit_response( $result );
+                }
                 return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 500 );
             }
 
@@ -941,15 +1295,16 @@ class WooSuite_Api {
     }
 
     public function get_stats( $request ) {
-        global $wpdb;
-
-        // Threats Blocked: Count rows in security logs where blocked = 1
-        $table_logs = $wpdb->prefix . 'woosuite_security_logs';
-        $threats_blocked = 0;
-        // Check if table exists first
-        if ( $wpdb->get_var("SHOW TABLES LIKE '$table_logs'") === $table_logs ) {
-             $threats_blocked = (int) $wpdb->get_var( "SELECT COUNT(*) FROM $table_logs WHERE blocked = 1" );
+        // Counters are maintained incrementally (WooSuite_Counters); one small SELECT here.
+        // ?recount=1 (or counters never seeded) recomputes them from the source tables.
+        $counters = WooSuite_Counters::get_all();
+        if ( $request->get_param( 'recount' ) || ! get_option( 'woosuite_counters_reconciled' ) ) {
+            // reconcile() returns only the recounted values; keep the others (ai_cache_*) too
+            $counters = array_merge( $counters, WooSuite_Counters::reconcile() );
         }
+        $counter = function( $name ) use ( $counters ) {
+            return isset( $counters[ $name ] ) ? max( 0, (int) $counters[ $name ] ) : 0;
+        };
 
         // Last Backup
         $last_backup = get_option( 'woosuite_last_backup_time', 'Never' );
@@ -962,44 +1317,24 @@ class WooSuite_Api {
         }
 
         $stats = array(
-            'orders' => 0,
+            'orders' => class_exists( 'WooCommerce' ) ? $counter( 'orders' ) : 0,
             'seo_score' => 0,
-            'threats_blocked' => $threats_blocked,
+            'threats_blocked' => $counter( 'threats_blocked' ),
             'ai_searches' => 0, // Feature deprecated
             'last_backup' => $last_backup,
+            'last_recount' => (int) get_option( 'woosuite_counters_reconciled', 0 ),
+            'ai_cache' => array(
+                'hits' => $counter( 'ai_cache_hits' ),
+                'misses' => $counter( 'ai_cache_misses' ),
+            ),
         );
 
-        if ( class_exists( 'WooCommerce' ) ) {
-             // Get order counts
-             $order_counts = wc_get_order_status_counts();
-             $stats['orders'] = array_sum($order_counts);
-        }
-
-        // SEO Score: Accurate count including Images, Posts, Pages, Products
-        // We use direct SQL for performance
-        $post_types = "'post', 'page', 'product'";
-        $total_content = (int) $wpdb->get_var( "SELECT COUNT(ID) FROM $wpdb->posts WHERE post_type IN ($post_types) AND post_status = 'publish'" );
-        $optimized_content = (int) $wpdb->get_var( "
-            SELECT COUNT(DISTINCT post_id) FROM $wpdb->postmeta
-            WHERE meta_key IN ('_woosuite_meta_description', '_yoast_wpseo_metadesc', 'rank_math_description')
-            AND meta_value != ''
-        " );
-
-        // Images
-        $total_images = (int) $wpdb->get_var( "SELECT COUNT(ID) FROM $wpdb->posts WHERE post_type = 'attachment' AND post_mime_type LIKE 'image/%' AND post_status = 'inherit'" );
-        $optimized_images = (int) $wpdb->get_var( "
-            SELECT COUNT(DISTINCT post_id) FROM $wpdb->postmeta
-            WHERE meta_key = '_wp_attachment_image_alt'
-            AND meta_value != ''
-        " );
-
-        $total_items = $total_content + $total_images;
-        $total_optimized = $optimized_content + $optimized_images;
+        // SEO Score: Images, Posts, Pages, Products with a description / alt text
+        $total_items = $counter( 'content_total' ) + $counter( 'images_total' );
+        $total_optimized = $counter( 'content_optimized' ) + $counter( 'images_optimized' );
 
         if ( $total_items > 0 ) {
-            $stats['seo_score'] = round( ($total_optimized / $total_items) * 100 );
-        } else {
-             $stats['seo_score'] = 0;
+            $stats['seo_score'] = round( ( min( $total_optimized, $total_items ) / $total_items ) * 100 );
         }
 
         return new WP_REST_Response( $stats, 200 );
@@ -1014,6 +1349,7 @@ class WooSuite_Api {
     }
 
     public function get_security_status( $request ) {
+        $counters = WooSuite_Counters::get_all();
         $status = array(
             'firewall_enabled' => get_option( 'woosuite_firewall_enabled', 'yes' ) === 'yes',
             'spam_enabled' => get_option( 'woosuite_spam_protection_enabled', 'yes' ) === 'yes',
@@ -1024,7 +1360,7 @@ class WooSuite_Api {
             'login_max_retries' => (int) get_option( 'woosuite_login_max_retries', 3 ),
             'last_scan' => get_option( 'woosuite_last_scan_time', 'Never' ),
             'last_scan_source' => get_option( 'woosuite_last_scan_source', 'auto' ),
-            'threats_blocked' => (int) get_option( 'woosuite_threats_blocked_count', 0 ),
+            'threats_blocked' => isset( $counters['threats_blocked'] ) ? $counters['threats_blocked'] : 0,
             'alerts' => get_option( 'woosuite_security_alerts', null )
         );
         return new WP_REST_Response( $status, 200 );
@@ -1072,10 +1408,38 @@ class WooSuite_Api {
     }
 
     public function get_deep_scan_status( $request ) {
-        $status = get_option( 'woosuite_security_scan_status', array( 'status' => 'idle' ) );
-        $results = get_option( 'woosuite_security_scan_results', array() );
-        $status['results'] = $results;
-        return new WP_REST_Response( $status, 200 );
+        // Findings are paged separately: GET /security/findings
+        return new WP_REST_Response( WooSuite_Security_Scanner::get_status(), 200 );
+    }
+
+    public function get_scan_findings( $request ) {
+        // run = a run ID, or 'deep' / 'core' for the latest run of that type
+        $run = $request->get_param( 'run' ) ? $request->get_param( 'run' ) : 'deep';
+        if ( is_numeric( $run ) ) {
+            $run_id = (int) $run;
+        } else {
+            $latest = WooSuite_Scan_Store::get_latest_run( in_array( $run, array( 'deep', 'core' ), true ) ? $run : 'deep' );
+            $run_id = $latest ? (int) $latest['id'] : 0;
+        }
+
+        $page = max( 1, (int) $request->get_param( 'page' ) );
+        $per_page = $request->get_param( 'per_page' ) ? (int) $request->get_param( 'per_page' ) : 50;
+
+        $findings = WooSuite_Scan_Store::get_findings( $run_id, array(
+            'page' => $page,
+            'per_page' => $per_page,
+            'status' => $request->get_param( 'status' ) ? sanitize_text_field( $request->get_param( 'status' ) ) : 'open',
+            'severity' => sanitize_text_field( (string) $request->get_param( 'severity' ) ),
+            'search' => sanitize_text_field( (string) $request->get_param( 'search' ) ),
+        ) );
+
+        return new WP_REST_Response( array(
+            'run_id' => $run_id,
+            'items' => $findings['items'],
+            'total' => $findings['total'],
+            'page' => $page,
+            'pages' => (int) ceil( $findings['total'] / max( 1, min( 200, $per_page ) ) ),
+        ), 200 );
     }
 
     // --- Quarantine & Ignore Callbacks ---
@@ -1110,6 +1474,8 @@ class WooSuite_Api {
             return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 500 );
         }
 
+        WooSuite_Scan_Store::set_finding_status( str_replace( ABSPATH, '', $file ), 'quarantined' );
+
         return new WP_REST_Response( array( 'success' => true ), 200 );
     }
 
@@ -1131,6 +1497,12 @@ class WooSuite_Api {
              return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 500 );
         }
 
+        // The file is back: its findings show up again
+        $original_path = base64_decode( str_replace( '.quarantined', '', $id ), true );
+        if ( $original_path ) {
+            WooSuite_Scan_Store::set_finding_status( str_replace( ABSPATH, '', $original_path ), 'open', false, 'quarantined' );
+        }
+
         return new WP_REST_Response( array( 'success' => true ), 200 );
     }
 
@@ -1155,6 +1527,42 @@ class WooSuite_Api {
         return new WP_REST_Response( array( 'success' => true ), 200 );
     }
 
+    public function get_ip_bans( $request ) {
+        return new WP_REST_Response( array( 'bans' => WooSuite_Ip_Store::get_bans() ), 200 );
+    }
+
+    /**
+     * Ban one or more IPs / CIDR ranges, e.g. { "ranges": ["203.0.113.0/24"], "reason": "AS64500", "duration": 0 }.
+     * duration is in minutes, 0 = permanent.
+     */
+    public function add_ip_bans( $request ) {
+        $params = $request->get_json_params();
+        $ranges = isset( $params['ranges'] ) ? $params['ranges'] : array();
+        if ( is_string( $ranges ) ) {
+            $ranges = preg_split( '/[\s,]+/', $ranges, -1, PREG_SPLIT_NO_EMPTY );
+        }
+        if ( empty( $ranges ) || ! is_array( $ranges ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => 'At least one IP or CIDR range is required' ), 400 );
+        }
+        $reason = isset( $params['reason'] ) ? sanitize_text_field( $params['reason'] ) : '';
+        $duration = isset( $params['duration'] ) ? max( 0, (int) $params['duration'] ) * 60 : 0;
+
+        $invalid = WooSuite_Ip_Store::ban_ranges( array_map( 'sanitize_text_field', $ranges ), $duration, $reason );
+        if ( count( $invalid ) === count( $ranges ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => 'Invalid IP or CIDR range', 'invalid' => $invalid ), 400 );
+        }
+
+        return new WP_REST_Response( array( 'success' => true, 'invalid' => $invalid ), 200 );
+    }
+
+    public function remove_ip_ban( $request ) {
+        $params = $request->get_json_params();
+        $id = isset( $params['id'] ) ? (int) $params['id'] : 0;
+        if ( ! $id ) return new WP_REST_Response( array( 'success' => false, 'message' => 'Ban ID is required' ), 400 );
+
+        return new WP_REST_Response( array( 'success' => WooSuite_Ip_Store::unban( $id ) ), 200 );
+    }
+
     public function get_ignored_paths( $request ) {
         $ignored = get_option( 'woosuite_security_ignored_paths', array() );
         return new WP_REST_Response( array( 'ignored' => $ignored ), 200 );
@@ -1188,6 +1596,7 @@ class WooSuite_Api {
             $ignored[] = $path;
             update_option( 'woosuite_security_ignored_paths', $ignored );
         }
+        WooSuite_Scan_Store::set_finding_status( $path, 'ignored', true, 'open' );
 
         return new WP_REST_Response( array( 'success' => true ), 200 );
     }
@@ -1228,6 +1637,7 @@ class WooSuite_Api {
                      $ignored[] = $path;
                      $count++;
                  }
+                 WooSuite_Scan_Store::set_finding_status( $path, 'ignored', true, 'open' );
              }
              if ( $count > 0 ) {
                  update_option( 'woosuite_security_ignored_paths', $ignored );
@@ -1260,6 +1670,7 @@ class WooSuite_Api {
                  if ( file_exists( $full_path ) && is_file( $full_path ) ) {
                      if ( unlink( $full_path ) ) {
                          $count++;
+                         WooSuite_Scan_Store::set_finding_status( $path, 'deleted' );
                      }
                  }
              }
@@ -1327,29 +1738,19 @@ class WooSuite_Api {
         return new WP_REST_Response( array( 'tables' => $tables ), 200 );
     }
 
-    public function export_chunk_route( $request ) {
-        $params = $request->get_json_params();
-        $table = isset( $params['table'] ) ? sanitize_text_field( $params['table'] ) : '';
-        $offset = isset( $params['offset'] ) ? intval( $params['offset'] ) : 0;
-        $limit = isset( $params['limit'] ) ? intval( $params['limit'] ) : 1000;
-        $search = isset( $params['search'] ) ? sanitize_text_field( $params['search'] ) : '';
-        $replace = isset( $params['replace'] ) ? sanitize_text_field( $params['replace'] ) : '';
-
-        if ( empty( $table ) ) {
-            return new WP_REST_Response( array( 'success' => false, 'message' => 'Table missing' ), 400 );
-        }
-
-        if ( ! class_exists( 'WooSuite_Backup' ) ) {
-            require_once plugin_dir_path( dirname( __FILE__ ) ) . 'class-woosuite-backup.php';
+    /**
+     * Run the PHP export job for one time budget (many batches per call); WP-Cron continues it between calls.
+     */
+    public function export_step_route( $request ) {
+        $status = WooSuite_Db_Export::step();
+        if ( ! $status ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => 'No export session active.' ), 400 );
         }
-        $backup = new WooSuite_Backup( $this->plugin_name, $this->version );
-        $result = $backup->export_table_chunk( $table, $offset, $limit, $search, $replace );
-
-        if ( is_wp_error( $result ) ) {
-            return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 500 );
+        if ( $status['status'] === 'failed' ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => $status['message'] ), 500 );
         }
 
-        return new WP_REST_Response( array( 'success' => true, 'count' => $result['count'] ), 200 );
+        return new WP_REST_Response( array( 'success' => true, 'progress' => $status ), 200 );
     }
 
     public function finalize_export_route( $request ) {
@@ -1372,6 +1773,71 @@ class WooSuite_Api {
         return new WP_REST_Response( $status, 200 );
     }
 
+    public function create_passport_route( $request ) {
+        $backup = new WooSuite_Backup( $this->plugin_name, $this->version );
+        $passport = $backup->create_passport();
+
+        if ( is_wp_error( $passport ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => $passport->get_error_message() ), 400 );
+        }
+
+        return new WP_REST_Response( $passport, 200 );
+    }
+
+    public function validate_passport_route( $request ) {
+        $params = $request->get_json_params();
+        $backup = new WooSuite_Backup( $this->plugin_name, $this->version );
+        $report = $backup->validate_passport( isset( $params['passport'] ) ? $params['passport'] : null );
+
+        if ( is_wp_error( $report ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => $report->get_error_message() ), 400 );
+        }
+
+        return new WP_REST_Response( $report, 200 );
+    }
+
+    /**
+     * Download the next 5MB of a plain dump, or one segment of a segmented archive (`segment`).
+     */
+    public function import_fetch_chunk_route( $request ) {
+        $params = $request->get_json_params();
+        $url = isset( $params['url'] ) ? esc_url_raw( $params['url'] ) : '';
+        if ( empty( $url ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => 'Missing download URL.' ), 400 );
+        }
+
+        $backup = new WooSuite_Backup( $this->plugin_name, $this->version );
+        if ( isset( $params['segment'] ) ) {
+            $result = $backup->import_fetch_segment( $url, intval( $params['segment'] ) );
+        } else {
+            $result = $backup->import_chunk_download( $url, isset( $params['offset'] ) ? intval( $params['offset'] ) : 0 );
+        }
+
+        if ( is_wp_error( $result ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'code' => $result->get_error_code(), 'message' => $result->get_error_message() ), 500 );
+        }
+
+        return new WP_REST_Response( $result, 200 );
+    }
+
+    public function import_process_chunk_route( $request ) {
+        $params = $request->get_json_params();
+        $backup = new WooSuite_Backup( $this->plugin_name, $this->version );
+        $result = $backup->process_import_chunk(
+            isset( $params['offset'] ) ? intval( $params['offset'] ) : 0,
+            WooSuite_Sql_Import::STEP_BUDGET,
+            isset( $params['old_domain'] ) ? sanitize_text_field( $params['old_domain'] ) : '',
+            isset( $params['new_domain'] ) ? sanitize_text_field( $params['new_domain'] ) : '',
+            isset( $params['segment'] ) ? intval( $params['segment'] ) : null
+        );
+
+        if ( is_wp_error( $result ) ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 500 );
+        }
+
+        return new WP_REST_Response( $result, 200 );
+    }
+
     public function run_url_replace( $request ) {
         $params = $request->get_json_params();
         $old = isset( $params['old_domain'] ) ? sanitize_text_field( $params['old_domain'] ) : '';
@@ -1385,55 +1851,103 @@ class WooSuite_Api {
             require_once plugin_dir_path( dirname( __FILE__ ) ) . 'class-woosuite-backup.php';
         }
         $backup = new WooSuite_Backup( $this->plugin_name, $this->version );
-        $result = $backup->replace_urls( $old, $new );
+        $result = $backup->replace_urls( $old, $new, ! empty( $params['dry_run'] ) );
 
         if ( is_wp_error( $result ) ) {
-            return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 500 );
+            return new WP_REST_Response( array( 'success' => false, 'message' => $result->get_error_message() ), 400 );
         }
 
-        return new WP_REST_Response( $result, 200 );
+        return new WP_REST_Response( array( 'success' => true, 'progress' => $result ), 200 );
+    }
+
+    /**
+     * Run the search/replace job for one time budget; WP-Cron continues it between calls.
+     */
+    public function url_replace_step_route( $request ) {
+        $status = WooSuite_Search_Replace::step();
+        if ( ! $status ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => 'No search/replace job active.' ), 400 );
+        }
+        if ( $status['status'] === 'failed' ) {
+            return new WP_REST_Response( array( 'success' => false, 'message' => $status['message'] ), 500 );
+        }
+
+        return new WP_REST_Response( array( 'success' => true, 'progress' => $status ), 200 );
+    }
+
+    public function get_url_replace_status_route( $request ) {
+        $status = WooSuite_Search_Replace::get_status();
+        return new WP_REST_Response( $status ? $status : array( 'status' => 'idle' ), 200 );
     }
 
+    /**
+     * One deep link scan step: links that resolve locally come back as issues
+     * straight away, the rest go to the AI in one batch.
+     */
     public function migration_scan( $request ) {
         $params = $request->get_json_params();
         $old_domain = isset( $params['old_domain'] ) ? sanitize_text_field( $params['old_domain'] ) : '';
-        $offset = isset( $params['offset'] ) ? intval( $params['offset'] ) : 0;
-        $limit = isset( $params['limit'] ) ? intval( $params['limit'] ) : 10;
+        $cursor = isset( $params['cursor'] ) && is_array( $params['cursor'] ) ? $params['cursor'] : array();
 
         if ( empty( $old_domain ) ) {
             return new WP_REST_Response( array( 'success' => false, 'message' => 'Missing old_domain.' ), 400 );
         }
 
         try {
-            if ( ! class_exists( 'WooSuite_Backup' ) ) {
-                require_once plugin_dir_path( dirname( __FILE__ ) ) . 'class-woosuite-backup.php';
-            }
-            $backup = new WooSuite_Backup( $this->plugin_name, $this->version );
-            $content_batch = $backup->scan_for_links( $old_domain, $offset, $limit );
-
-            if ( empty( $content_batch ) ) {
-                return new WP_REST_Response( array( 'success' => true, 'issues' => array(), 'has_more' => false ), 200 );
-            }
-
-            $groq = new WooSuite_Groq();
-            $analysis = $groq->analyze_deep_links( $content_batch, $old_domain );
-
-            if ( is_wp_error( $analysis ) ) {
-                error_log( 'WooSuite Migration Scan API Error: ' . $analysis->get_error_message() );
-                return new WP_REST_Response( array( 'success' => false, 'message' => $analysis->get_error_message() ), 500 );
+            // A new scan rebuilds the slug index (posts may have changed since the last one)
+            if ( empty( $cursor ) ) {
+                delete_transient( WooSuite_Link_Classifier::INDEX_TRANSIENT );
             }
 
-            // Normalize: Extract issues from wrapper if present (JSON Object mode returns { issues: [...] })
-            $issues = isset( $analysis['issues'] ) ? $analysis['issues'] : $analysis;
+            $classifier = new WooSuite_Link_Classifier( $old_domain );
+            $result = $classifier->scan( $cursor );
+            $issues = $result['issues'];
+            $ai_error = '';
+
+            if ( $result['ambiguous'] ) {
+                $links = array();
+                foreach ( array_keys( $result['ambiguous'] ) as $id => $url ) {
+                    $links[] = array(
+                        'id' => $id,
+                        'url' => str_replace( '\\/', '/', $url ),
+                        'context' => $result['ambiguous'][ $url ]['context'],
+                        'candidates' => $result['ambiguous'][ $url ]['candidates'],
+                    );
+                }
 
-            // Strict Type Check - AI must return an array
-            if ( ! is_array( $issues ) ) {
-                error_log( 'WooSuite Migration Scan Critical: Invalid AI Response Type: ' . gettype( $issues ) . ' (Raw: ' . print_r($analysis, true) . ')' );
-                // If it's null, it usually means json_decode failed silently or returned nothing.
-                return new WP_REST_Response( array( 'success' => false, 'message' => 'AI returned invalid data format. Please try again.' ), 500 );
+                $groq = new WooSuite_Groq();
+                $analysis = $groq->analyze_deep_links( $links, $old_domain, home_url() );
+
+                if ( is_wp_error( $analysis ) ) {
+                    error_log( 'WooSuite Migration Scan API Error: ' . $analysis->get_error_message() );
+                    // The client retries the same cursor; the local pass is cheap to redo
+                    if ( $analysis->get_error_code() === 'rate_limit' ) {
+                        return $this->rate_limit_response( $analysis );
+                    }
+                    $ai_error = $analysis->get_error_message();
+                    $issues = array_merge( $issues, WooSuite_Link_Classifier::unresolved_issues( $result['ambiguous'] ) );
+                } else {
+                    // Normalize: Extract links from wrapper if present (JSON Object mode returns { links: [...] })
+                    $answers = isset( $analysis['links'] ) ? $analysis['links'] : $analysis;
+                    if ( is_array( $answers ) ) {
+                        $issues = array_merge( $issues, WooSuite_Link_Classifier::issues_from_answers( $result['ambiguous'], $answers ) );
+                    } else {
+                        $ai_error = 'AI returned invalid data format.';
+                        $issues = array_merge( $issues, WooSuite_Link_Classifier::unresolved_issues( $result['ambiguous'] ) );
+                    }
+                }
             }
 
-            return new WP_REST_Response( array( 'success' => true, 'issues' => $issues, 'has_more' => count($content_batch) >= $limit ), 200 );
+            return new WP_REST_Response( array(
+                'success' => true,
+                'issues' => $issues,
+                'cursor' => $result['cursor'],
+                'has_more' => $result['has_more'],
+                'scanned' => $result['scanned'],
+                'resolved_locally' => count( $result['issues'] ),
+                'sent_to_ai' => count( $result['ambiguous'] ),
+                'ai_error' => $ai_error,
+            ), 200 );
         } catch ( Exception $e ) {
             // Prevent white screen of death and log the actual error
             error_log( 'WooSuite Migration Scan Crash: ' . $e->getMessage() . "\n" . $e->getTraceAsString() );
@@ -1475,6 +1989,10 @@ class WooSuite_Api {
             $wpdb->query( "DELETE FROM $wpdb->options WHERE option_name LIKE '_transient_%'" );
             $wpdb->query( "DELETE FROM $wpdb->options WHERE option_name LIKE '_site_transient_%'" );
             $message = 'Transients cleared.';
+        } elseif ( $action === 'clear_ai_cache' ) {
+            $stats = WooSuite_Ai_Cache::get_stats();
+            $deleted = WooSuite_Ai_Cache::flush();
+            $message = sprintf( 'AI response cache cleared (%d entries, %s%% hit rate).', $deleted, $stats['hit_rate'] );
         } elseif ( $action === 'delete_revisions' ) {
             $wpdb->query( "DELETE FROM $wpdb->posts WHERE post_type = 'revision'" );
             $message = 'Post revisions deleted.';
@@ -1503,6 +2021,7 @@ class WooSuite_Api {
         if ( $index !== false ) {
             unset( $ignored[$index] );
             update_option( 'woosuite_security_ignored_paths', array_values( $ignored ) );
+            WooSuite_Scan_Store::set_finding_status( $path, 'open', true, 'ignored' );
         }
 
         return new WP_REST_Response( array( 'success' => true ), 200 );
@@ -1637,14 +2156,10 @@ class WooSuite_Api {
             return new WP_REST_Response( array( 'success' => false, 'message' => 'Worker class not found' ), 500 );
         }
         $worker = new WooSuite_Seo_Worker();
+        // Queue runners (loopback workers, WP-Cron watchdog, `wp woosuite worker`) pick the tasks up again
         $worker->resume_batch();
 
-        // Attempt to run one batch cycle immediately (Manual Trigger)
-        // This helps if WP Cron is stuck or disabled.
-        // The worker will run for ~25s and then return.
-        $worker->process_batch();
-
-        return new WP_REST_Response( array( 'success' => true, 'message' => 'Batch resumed and triggered' ), 200 );
+        return new WP_REST_Response( array( 'success' => true, 'message' => 'Batch resumed', 'status' => WooSuite_Seo_Worker::get_status() ), 200 );
     }
 
     public function start_seo_batch( $request ) {
@@ -1662,39 +2177,36 @@ class WooSuite_Api {
         global $wpdb;
         $wpdb->query( "DELETE FROM $wpdb->postmeta WHERE meta_key = '_woosuite_seo_failed'" );
         $wpdb->query( "DELETE FROM $wpdb->postmeta WHERE meta_key = '_woosuite_seo_last_error'" );
+        WooSuite_Seo_Index::clear_flag( 'failed' );
 
         if ( ! class_exists( 'WooSuite_Seo_Worker' ) ) {
             return new WP_REST_Response( array( 'success' => false, 'message' => 'Worker class not found' ), 500 );
         }
         $worker = new WooSuite_Seo_Worker();
-        $worker->start_batch( $filters );
+        // Queues a task per item and starts loopback workers: no browser tab needed
+        $job_id = $worker->start_batch( $filters );
 
-        // KICKSTART: Run one batch cycle immediately to bypass potential WP Cron issues
-        $worker->process_batch();
-
-        return new WP_REST_Response( array( 'success' => true, 'message' => 'Batch started' ), 200 );
+        return new WP_REST_Response( array( 'success' => true, 'message' => 'Batch started', 'jobId' => $job_id, 'status' => WooSuite_Seo_Worker::get_status() ), 200 );
     }
 
     public function stop_seo_batch( $request ) {
-        update_option( 'woosuite_seo_batch_stop_signal', true );
-        // Force update status locally to ensure immediate UI feedback
-        $status = get_option( 'woosuite_seo_batch_status', array() );
-        $status['status'] = 'stopped';
-        $status['message'] = 'Process stopped by user.';
-        update_option( 'woosuite_seo_batch_status', $status );
+        $worker = new WooSuite_Seo_Worker();
+        // Workers finish the items they hold and claim no more
+        $worker->stop_batch( 'Process stopped by user.' );
 
         return new WP_REST_Response( array( 'success' => true, 'message' => 'Stopping...' ), 200 );
     }
 
     public function reset_seo_batch( $request ) {
         global $wpdb;
-        update_option( 'woosuite_seo_batch_stop_signal', true );
-        update_option( 'woosuite_seo_batch_status', array( 'status' => 'idle' ) );
+        WooSuite_Job_Queue::cancel_jobs( 'seo', 'Reset.' );
 
         // Clear failure flags AND 'processed' timestamp so items can be retried
         $wpdb->query( "DELETE FROM $wpdb->postmeta WHERE meta_key = '_woosuite_seo_failed'" );
         $wpdb->query( "DELETE FROM $wpdb->postmeta WHERE meta_key = '_woosuite_seo_last_error'" );
         $wpdb->query( "DELETE FROM $wpdb->postmeta WHERE meta_key = '_woosuite_seo_processed_at'" );
+        WooSuite_Seo_Index::clear_flag( 'failed' );
+        WooSuite_Seo_Index::clear_flag( 'processed_at' );
 
         // Clear Logs - Reset to empty array to fix crash
         update_option( 'woosuite_debug_log', array() );
@@ -1703,8 +2215,20 @@ class WooSuite_Api {
     }
 
     public function get_seo_batch_status( $request ) {
-        $status = get_option( 'woosuite_seo_batch_status', array( 'status' => 'idle' ) );
-        return new WP_REST_Response( $status, 200 );
+        return new WP_REST_Response( WooSuite_Seo_Worker::get_status(), 200 );
+    }
+
+    public function get_seo_index_status( $request ) {
+        global $wpdb;
+        $state = WooSuite_Seo_Index::get_state();
+        $state['ready'] = WooSuite_Seo_Index::is_ready();
+        $state['maxId'] = (int) $wpdb->get_var( "SELECT MAX(ID) FROM $wpdb->posts" );
+        return new WP_REST_Response( $state, 200 );
+    }
+
+    public function rebuild_seo_index( $request ) {
+        WooSuite_Seo_Index::schedule_backfill();
+        return new WP_REST_Response( array( 'success' => true, 'message' => 'Index rebuild scheduled' ), 200 );
     }
 
     public function run_seo_scan( $request ) {
@@ -1757,6 +2281,23 @@ class WooSuite_Api {
         return $query->found_posts;
     }
 
+    /**
+     * 429 with Retry-After, so browser loops wait exactly as long as the shared limiter needs.
+     */
+    private function rate_limit_response( $error ) {
+        $data = $error->get_error_data();
+        $retry_after = isset( $data['retry_after'] ) ? max( 1, (int) $data['retry_after'] ) : 60;
+
+        $response = new WP_REST_Response( array(
+            'success' => false,
+            'code' => 'rate_limit',
+            'message' => $error->get_error_message(),
+            'retry_after' => $retry_after
+        ), 429 );
+        $response->header( 'Retry-After', $retry_after );
+        return $response;
+    }
+
     public function check_permission() {
         return current_user_can( 'manage_options' );
     }
@@ -0,0 +1,89 @@
+<?php
+
+/**
+ * The WooSuite backup archive: a .sql.gz made of independent gzip members
+ * ("segments") plus a JSON manifest next to it.
+ *
+ * Segment 0 holds the dump header and every CREATE TABLE; each further segment
+ * holds the rows of one table key range as extended INSERTs, starting with its
+ * own SET statements, so it can be imported on its own once the schema segment
+ * has run. The manifest lists every segment with its table, byte offset and
+ * length in the archive, row count, uncompressed size and the SHA-256 of its
+ * compressed bytes. A destination fetches the manifest, downloads segments with
+ * Range requests (re-fetching only one that fails its checksum) and imports them
+ * independently. `gunzip < archive | mysql` still works, since concatenated gzip
+ * members are one valid stream.
+ */
+class WooSuite_Backup_Archive {
+
+    const FORMAT = 'woosuite-archive';
+    const VERSION = 1;
+
+    /**
+     * Manifest path for an archive (db-backup-x.sql.gz -> db-backup-x.manifest.json).
+     */
+    public static function manifest_path( $archive ) {
+        return preg_replace( '/\.sql(\.gz)?$/', '', $archive ) . '.manifest.json';
+    }
+
+    public static function write_manifest( $archive, $manifest ) {
+        $manifest = array_merge( array( 'format' => self::FORMAT, 'version' => self::VERSION ), $manifest );
+        return file_put_contents( self::manifest_path( $archive ), wp_json_encode( $manifest ) ) !== false;
+    }
+
+    /**
+     * @return array|WP_Error
+     */
+    public static function read_manifest( $path ) {
+        $manifest = file_exists( $path ) ? json_decode( file_get_contents( $path ), true ) : null;
+        if ( ! is_array( $manifest ) || ! isset( $manifest['format'], $manifest['segments'] ) || $manifest['format'] !== self::FORMAT ) {
+            return new WP_Error( 'invalid_manifest', 'Backup manifest is missing or invalid.' );
+        }
+        if ( isset( $manifest['version'] ) && (int) $manifest['version'] > self::VERSION ) {
+            return new WP_Error( 'invalid_manifest', 'Backup was made by a newer WooSuite version.' );
+        }
+        return $manifest;
+    }
+
+    public static function get_segment( $manifest, $id ) {
+        foreach ( $manifest['segments'] as $segment ) {
+            if ( (int) $segment['id'] === (int) $id ) {
+                return $segment;
+            }
+        }
+        return null;
+    }
+
+    /**
+     * SHA-256 of $length bytes of a file from $offset, read in 1 MB blocks.
+     */
+    public static function hash_range( $file, $offset, $length ) {
+        $fp = fopen( $file, 'rb' );
+        if ( ! $fp ) {
+            return '';
+        }
+        fseek( $fp, $offset );
+        $ctx = hash_init( 'sha256' );
+        while ( $length > 0 && ! feof( $fp ) ) {
+            $data = fread( $fp, min( 1048576, $length ) );
+            if ( $data === false || $data === '' ) {
+                break;
+            }
+            hash_update( $ctx, $data );
+            $length -= strlen( $data );
+        }
+        fclose( $fp );
+        return $length === 0 ? hash_final( $ctx ) : '';
+    }
+
+    /**
+     * Check a segment, either as its own file ($offset 0) or inside a whole archive.
+     */
+    public static function verify_segment( $file, $segment, $offset = 0 ) {
+        clearstatcache();
+        if ( ! file_exists( $file ) || filesize( $file ) < $offset + $segment['length'] ) {
+            return false;
+        }
+        return hash_equals( $segment['sha256'], self::hash_range( $file, $offset, $segment['length'] ) );
+    }
+}
@@ -0,0 +1,750 @@
+<?php
+
+/**
+ * Server-side PHP database export (used when mysqldump is unavailable or URLs
+ * are replaced on the way out), written as a segmented archive (see
+ * WooSuite_Backup_Archive).
+ *
+ * Each table is walked by primary key (WHERE pk > last ORDER BY pk), so each
+ * batch costs the same however deep into wp_postmeta it is. Table list, primary
+ * keys and row estimates are read once when the job starts and kept in the
+ * woosuite_export_job option. The work is split into units in
+ * wp_woosuite_export_units: one per table, and integer-keyed tables bigger than
+ * UNIT_ROWS are cut into key ranges. Workers (the cron chain, loopback requests,
+ * POST /backup/export/step, `wp woosuite db-export`) lease a unit with one
+ * conditional UPDATE and export it side by side, like the deep scan's folders.
+ *
+ * A worker writes up to SEGMENT_BYTES of extended INSERTs (capped below
+ * max_allowed_packet) into its own gzip part file, then appends it to the
+ * archive under a MySQL named lock and records it in wp_woosuite_export_segments
+ * together with the unit's new cursor, in one transaction. The archive's valid
+ * length is the end of the last recorded segment; bytes past it (a worker died
+ * mid-append) are truncated by the next append. When the last unit is done the
+ * manifest is written next to the archive.
+ */
+class WooSuite_Db_Export {
+
+    const JOB_OPTION = 'woosuite_export_job';
+    const CRON_HOOK = 'woosuite_export_step';
+    const WORKER_ACTION = 'woosuite_export_worker';
+    const ARCHIVE_LOCK = 'woosuite_export_archive';
+
+    const STEP_BUDGET = 20;
+    const BATCH_ROWS = 2000;
+
+    // Upper bound for one INSERT; the destination's max_allowed_packet may be smaller than ours
+    const MAX_STATEMENT = 4194304;
+
+    // Uncompressed SQL per segment, so a bad segment is cheap to re-fetch
+    const SEGMENT_BYTES = 16777216;
+
+    // Integer-keyed tables with more rows are split into key ranges of about this size
+    const UNIT_ROWS = 200000;
+    const MAX_UNITS_PER_TABLE = 32;
+
+    // Extra seconds before a leased unit is handed to another worker (its worker died)
+    const LEASE_GRACE = 60;
+
+    const SEGMENT_PREAMBLE = "SET SQL_MODE = \"NO_AUTO_VALUE_ON_ZERO\";\nSET time_zone = \"+00:00\";\nSET FOREIGN_KEY_CHECKS = 0;\n";
+
+    public static function get_schema( $charset_collate ) {
+        $units = self::table( 'units' );
+        $segments = self::table( 'segments' );
+
+        return array(
+            "CREATE TABLE $units (
+			id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+			table_index int(10) unsigned NOT NULL,
+			key_from bigint(20) DEFAULT NULL,
+			key_to bigint(20) DEFAULT NULL,
+			last_key text NOT NULL,
+			row_offset bigint(20) unsigned NOT NULL DEFAULT 0,
+			rows_done bigint(20) unsigned NOT NULL DEFAULT 0,
+			lease int(10) unsigned NOT NULL DEFAULT 0,
+			owner varchar(40) NOT NULL DEFAULT '',
+			PRIMARY KEY  (id),
+			KEY lease (lease)
+		) $charset_collate;",
+            "CREATE TABLE $segments (
+			id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+			unit_id bigint(20) unsigned NOT NULL DEFAULT 0,
+			table_name varchar(64) NOT NULL DEFAULT '',
+			kind varchar(10) NOT NULL DEFAULT 'data',
+			byte_offset bigint(20) unsigned NOT NULL DEFAULT 0,
+			byte_length bigint(20) unsigned NOT NULL DEFAULT 0,
+			row_count bigint(20) unsigned NOT NULL DEFAULT 0,
+			sql_bytes bigint(20) unsigned NOT NULL DEFAULT 0,
+			sha256 char(64) NOT NULL DEFAULT '',
+			PRIMARY KEY  (id),
+			KEY byte_offset (byte_offset)
+		) $charset_collate;",
+        );
+    }
+
+    private static function table( $name ) {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_export_' . $name;
+    }
+
+    /**
+     * Create the job and its work units, and write the schema segment.
+     *
+     * @param string $filepath Target file (.sql.gz, or .sql when zlib is missing).
+     * @param array  $options  search, replace, tables (only these, default all).
+     */
+    public static function start( $filepath, $options = array() ) {
+        global $wpdb;
+        self::cancel();
+
+        $only = isset( $options['tables'] ) ? (array) $options['tables'] : array();
+        $skip = array( self::table( 'units' ), self::table( 'segments' ) );
+        $tables = array();
+        $rows_total = 0;
+        foreach ( (array) $wpdb->get_results( "SHOW TABLE STATUS", ARRAY_A ) as $status ) {
+            // Views have no engine and no rows of their own; the job's own bookkeeping is not restored
+            if ( empty( $status['Engine'] ) || in_array( $status['Name'], $skip, true ) || ( $only && ! in_array( $status['Name'], $only, true ) ) ) {
+                continue;
+            }
+            $name = $status['Name'];
+            $keys = $wpdb->get_results( "SHOW KEYS FROM `$name` WHERE Key_name = 'PRIMARY'", ARRAY_A );
+            usort( $keys, function( $a, $b ) {
+                return (int) $a['Seq_in_index'] - (int) $b['Seq_in_index'];
+            } );
+            $pk = array_column( (array) $keys, 'Column_name' );
+
+            // Only integer keys are split into ranges (string keys do not compare numerically)
+            $int_pk = false;
+            if ( count( $pk ) === 1 ) {
+                $column = $wpdb->get_row( $wpdb->prepare( "SHOW COLUMNS FROM `$name` LIKE %s", $wpdb->esc_like( $pk[0] ) ), ARRAY_A );
+                $int_pk = $column && preg_match( '/int\b/i', $column['Type'] );
+            }
+
+            $tables[] = array(
+                'name' => $name,
+                'pk' => $pk,
+                'int_pk' => (bool) $int_pk,
+                'rows' => (int) $status['Rows'],
+            );
+            $rows_total += (int) $status['Rows'];
+        }
+
+        $packet = (int) $wpdb->get_var( "SELECT @@max_allowed_packet" );
+        $statement_bytes = (int) apply_filters( 'woosuite_export_statement_bytes', min( $packet > 0 ? $packet - 1024 : self::MAX_STATEMENT, self::MAX_STATEMENT ) );
+
+        $search = isset( $options['search'] ) ? (string) $options['search'] : '';
+        $replace = isset( $options['replace'] ) ? (string) $options['replace'] : '';
+
+        $job = array(
+            'file' => $filepath,
+            'gzip' => substr( $filepath, -3 ) === '.gz',
+            'tables' => $tables,
+            'units_total' => 0,
+            'rows_total' => $rows_total,
+            'search' => $search,
+            'replace' => $replace,
+            'statement_bytes' => max( 65536, $statement_bytes ),
+            'segment_bytes' => max( 1048576, (int) apply_filters( 'woosuite_export_segment_bytes', self::SEGMENT_BYTES ) ),
+            'status' => 'running',
+            'message' => '',
+            'token' => wp_generate_password( 32, false ),
+            'started_at' => microtime( true ),
+            'finished_at' => 0,
+        );
+
+        $units = array();
+        foreach ( $tables as $index => $table ) {
+            foreach ( self::split_table( $table ) as $range ) {
+                $units[] = '(' . (int) $index . ', '
+                    . ( $range[0] === null ? 'NULL' : (int) $range[0] ) . ', '
+                    . ( $range[1] === null ? 'NULL' : (int) $range[1] ) . ", '', 0, 0, 0, '')";
+            }
+        }
+        foreach ( array_chunk( $units, 200 ) as $chunk ) {
+            $wpdb->query( "INSERT INTO " . self::table( 'units' ) . " (table_index, key_from, key_to, last_key, row_offset, rows_done, lease, owner) VALUES " . implode( ',', $chunk ) );
+        }
+        $job['units_total'] = count( $units );
+
+        // Schema segment: header and every CREATE TABLE, so data segments can load in any order after it
+        $header = "-- WooSuite SQL Dump" . ( $search !== '' ? " (With URL Replacement)" : '' ) . "\n-- Generated: " . date( 'Y-m-d H:i:s' ) . "\n";
+        if ( $search !== '' ) {
+            $header .= "-- Search: {$search} -> Replace: {$replace}\n";
+        }
+        $header .= "\n" . self::SEGMENT_PREAMBLE;
+
+        $part = self::part_path( $job, 'schema' );
+        $out = self::open( $part, $job['gzip'] );
+        if ( ! $out ) {
+            return self::fail( $job, 'Cannot write export file.' );
+        }
+        $sql_bytes = self::write( $out, $job, $header );
+        foreach ( $tables as $table ) {
+            $sql_bytes += self::write( $out, $job, self::table_header( $table['name'] ) );
+        }
+        self::close( $out, $job );
+
+        update_option( self::JOB_OPTION, $job, false );
+        self::commit_segment( $job, null, array( 'part' => $part, 'table' => '', 'kind' => 'schema', 'row_count' => 0, 'sql_bytes' => $sql_bytes, 'finished' => true ), false );
+
+        wp_schedule_single_event( time(), self::CRON_HOOK );
+        return $job;
+    }
+
+    /**
+     * Key ranges (from inclusive, to exclusive, null = open) for one table's units.
+     */
+    private static function split_table( $table ) {
+        global $wpdb;
+        if ( ! $table['int_pk'] || $table['rows'] <= self::UNIT_ROWS ) {
+            return array( array( null, null ) );
+        }
+
+        $pk = $table['pk'][0];
+        $bounds = $wpdb->get_row( "SELECT MIN(`$pk`) AS low, MAX(`$pk`) AS high FROM `{$table['name']}`", ARRAY_A );
+        if ( ! $bounds || $bounds['low'] === null ) {
+            return array( array( null, null ) );
+        }
+
+        $count = min( self::MAX_UNITS_PER_TABLE, (int) ceil( $table['rows'] / self::UNIT_ROWS ) );
+        $width = max( 1, (int) ceil( ( $bounds['high'] - $bounds['low'] + 1 ) / $count ) );
+        $ranges = array();
+        for ( $i = 0; $i < $count; $i++ ) {
+            $ranges[] = array(
+                $i === 0 ? null : $bounds['low'] + $i * $width,
+                $i === $count - 1 ? null : $bounds['low'] + ( $i + 1 ) * $width,
+            );
+        }
+        return $ranges;
+    }
+
+    public static function get_job() {
+        // Other workers change the job; skip the per-request option cache
+        wp_cache_delete( self::JOB_OPTION, 'options' );
+        $job = get_option( self::JOB_OPTION );
+        return is_array( $job ) ? $job : null;
+    }
+
+    /**
+     * Cron tick / step route: work for one time budget, then chain the next tick
+     * and start loopback workers while units remain.
+     *
+     * @return array|null Status (see get_status()).
+     */
+    public static function step( $budget = null ) {
+        if ( self::run_worker( $budget ) ) {
+            wp_schedule_single_event( time(), self::CRON_HOOK );
+            self::dispatch_workers();
+        }
+        return self::get_status();
+    }
+
+    /**
+     * Loopback worker (admin-ajax, authenticated by the per-job token).
+     */
+    public static function handle_loopback() {
+        $token = isset( $_POST['token'] ) ? sanitize_text_field( wp_unslash( $_POST['token'] ) ) : '';
+        $job = self::get_job();
+        if ( ! $job || ! hash_equals( $job['token'], $token ) ) {
+            wp_die( '', '', array( 'response' => 403 ) );
+        }
+
+        ignore_user_abort( true );
+        if ( self::run_worker() ) {
+            self::dispatch_workers();
+        }
+        wp_die();
+    }
+
+    /**
+     * Lease units and export them until $budget seconds are used up.
+     *
+     * @return bool True while unfinished units remain.
+     */
+    public static function run_worker( $budget = null ) {
+        $job = self::get_job();
+        if ( ! $job || $job['status'] !== 'running' ) {
+            return false;
+        }
+
+        if ( $budget === null ) {
+            $max = (int) ini_get( 'max_execution_time' );
+            $budget = ( $max > 0 ) ? min( self::STEP_BUDGET, max( 5, (int) ( $max / 2 ) ) ) : self::STEP_BUDGET;
+        }
+        $deadline = microtime( true ) + $budget;
+
+        while ( microtime( true ) < $deadline ) {
+            $unit = self::claim_unit( time() + (int) ceil( $budget ) + self::LEASE_GRACE );
+            if ( ! $unit ) {
+                break;
+            }
+            $table = $job['tables'][ $unit['table_index'] ];
+
+            do {
+                $segment = self::write_segment( $job, $table, $unit, $deadline );
+                if ( ! $segment ) {
+                    self::fail( $job, 'Cannot write export segment.' );
+                    return false;
+                }
+                $release = ! $segment['finished'] && microtime( true ) >= $deadline;
+
+                // If another worker took the unit over (our lease expired), it redoes this work
+                if ( ! self::commit_segment( $job, $unit, $segment, $release ) ) {
+                    continue 2;
+                }
+            } while ( ! $segment['finished'] && ! $release );
+        }
+
+        if ( self::count_units() > 0 ) {
+            return true;
+        }
+        self::complete();
+        return false;
+    }
+
+    /**
+     * Start loopback workers for units nobody holds, up to woosuite_export_workers in parallel.
+     */
+    private static function dispatch_workers() {
+        global $wpdb;
+        $job = self::get_job();
+        if ( ! $job || $job['status'] !== 'running' ) {
+            return;
+        }
+        $max_workers = max( 1, (int) get_option( 'woosuite_export_workers', 3 ) );
+
+        $units = self::table( 'units' );
+        $row = $wpdb->get_row( $wpdb->prepare( "SELECT SUM(lease <= %d) AS free, SUM(lease > %d) AS leased FROM $units", time(), time() ), ARRAY_A );
+
+        // The cron chain (or the step route) is one worker; loopbacks add the rest
+        $spawn = min( (int) $row['free'], $max_workers - (int) $row['leased'] - 1 );
+        for ( $i = 0; $i < $spawn; $i++ ) {
+            wp_remote_post( admin_url( 'admin-ajax.php?action=' . self::WORKER_ACTION ), array(
+                'timeout' => 0.01,
+                'blocking' => false,
+                'sslverify' => false,
+                'body' => array( 'token' => $job['token'] ),
+            ) );
+        }
+    }
+
+    /**
+     * Lease the first free (or expired) unit. One UPDATE, so two workers can never hold the same unit.
+     */
+    private static function claim_unit( $lease_until ) {
+        global $wpdb;
+        $units = self::table( 'units' );
+        $owner = uniqid( '', true );
+
+        $claimed = $wpdb->query( $wpdb->prepare(
+            "UPDATE $units SET lease = %d, owner = %s WHERE lease <= %d ORDER BY id LIMIT 1",
+            $lease_until, $owner, time()
+        ) );
+        if ( ! $claimed ) {
+            return null;
+        }
+        return $wpdb->get_row( $wpdb->prepare( "SELECT * FROM $units WHERE owner = %s", $owner ), ARRAY_A );
+    }
+
+    private static function count_units() {
+        global $wpdb;
+        return (int) $wpdb->get_var( "SELECT COUNT(*) FROM " . self::table( 'units' ) );
+    }
+
+    /**
+     * Export a unit from its cursor into a new part file until the segment is
+     * full, the unit is done or time is up. Moves the unit's cursor along.
+     *
+     * @return array|false Segment (part is '' when there were no rows).
+     */
+    private static function write_segment( $job, $table, &$unit, $deadline ) {
+        $name = $table['name'];
+        $part = self::part_path( $job, $unit['owner'] );
+        $out = null;
+        $row_count = 0;
+        $sql_bytes = 0;
+
+        do {
+            $rows = self::fetch_batch( $table, $unit );
+            if ( $rows === null ) {
+                // Table dropped since the job started
+                $rows = array();
+            }
+            if ( $rows ) {
+                if ( ! $out ) {
+                    $out = self::open( $part, $job['gzip'] );
+                    if ( ! $out ) {
+                        return false;
+                    }
+                    $sql_bytes += self::write( $out, $job, "-- Data for table `$name`\n" . self::SEGMENT_PREAMBLE );
+                }
+                $sql_bytes += self::write( $out, $job, self::insert_statements( $name, $rows, $job ) );
+                $row_count += count( $rows );
+
+                $last = end( $rows );
+                if ( $table['pk'] ) {
+                    $cursor = array();
+                    foreach ( $table['pk'] as $column ) {
+                        $cursor[] = $last[ $column ];
+                    }
+                    $unit['last_key'] = wp_json_encode( $cursor );
+                } else {
+                    $unit['row_offset'] += count( $rows );
+                }
+            }
+            $finished = count( $rows ) < self::BATCH_ROWS;
+        } while ( ! $finished && $sql_bytes < $job['segment_bytes'] && microtime( true ) < $deadline );
+
+        if ( $out ) {
+            self::close( $out, $job );
+        }
+
+        return array(
+            'part' => $out ? $part : '',
+            'table' => $name,
+            'kind' => 'data',
+            'row_count' => $row_count,
+            'sql_bytes' => $sql_bytes,
+            'finished' => $finished,
+        );
+    }
+
+    /**
+     * Append a part file to the archive and record it with the unit's new cursor
+     * (or drop the finished unit). False, with nothing kept, if the unit's lease
+     * was lost in the meantime.
+     */
+    private static function commit_segment( $job, $unit, $segment, $release ) {
+        global $wpdb;
+        $units = self::table( 'units' );
+
+        $wpdb->get_var( $wpdb->prepare( 'SELECT GET_LOCK(%s, %d)', self::ARCHIVE_LOCK, 30 ) );
+
+        $end = self::archive_end();
+        self::truncate( $job['file'], $end );
+
+        $ok = true;
+        $length = 0;
+        if ( $segment['part'] ) {
+            $length = filesize( $segment['part'] );
+            $in = fopen( $segment['part'], 'rb' );
+            $out = fopen( $job['file'], 'ab' );
+            $ok = $in && $out && stream_copy_to_stream( $in, $out ) === $length;
+            if ( $in ) {
+                fclose( $in );
+            }
+            if ( $out ) {
+                fclose( $out );
+            }
+        }
+
+        if ( $ok ) {
+            $wpdb->query( 'START TRANSACTION' );
+            if ( $segment['part'] ) {
+                $ok = false !== $wpdb->insert( self::table( 'segments' ), array(
+                    'unit_id' => $unit ? (int) $unit['id'] : 0,
+                    'table_name' => $segment['table'],
+                    'kind' => $segment['kind'],
+                    'byte_offset' => $end,
+                    'byte_length' => $length,
+                    'row_count' => $segment['row_count'],
+                    'sql_bytes' => $segment['sql_bytes'],
+                    'sha256' => hash_file( 'sha256', $segment['part'] ),
+                ) );
+            }
+            if ( $ok && $unit ) {
+                if ( $segment['finished'] ) {
+                    $ok = (bool) $wpdb->query( $wpdb->prepare( "DELETE FROM $units WHERE id = %d AND owner = %s", $unit['id'], $unit['owner'] ) );
+                } else {
+                    $ok = (bool) $wpdb->query( $wpdb->prepare(
+                        "UPDATE $units SET last_key = %s, row_offset = %d, rows_done = rows_done + %d, lease = IF(%d, 0, lease), owner = IF(%d, '', owner) WHERE id = %d AND owner = %s",
+                        $unit['last_key'], $unit['row_offset'], $segment['row_count'], (int) $release, (int) $release, $unit['id'], $unit['owner']
+                    ) );
+                }
+            }
+            $wpdb->query( $ok ? 'COMMIT' : 'ROLLBACK' );
+        }
+        if ( ! $ok ) {
+            self::truncate( $job['file'], $end );
+        }
+
+        $wpdb->get_var( $wpdb->prepare( 'SELECT RELEASE_LOCK(%s)', self::ARCHIVE_LOCK ) );
+        if ( $segment['part'] ) {
+            @unlink( $segment['part'] );
+        }
+        return $ok;
+    }
+
+    /**
+     * End of the last recorded segment, i.e. the archive's valid length.
+     */
+    private static function archive_end() {
+        global $wpdb;
+        return (int) $wpdb->get_var( "SELECT COALESCE(MAX(byte_offset + byte_length), 0) FROM " . self::table( 'segments' ) );
+    }
+
+    private static function truncate( $file, $length ) {
+        clearstatcache();
+        if ( file_exists( $file ) && filesize( $file ) > $length ) {
+            $fp = fopen( $file, 'r+b' );
+            ftruncate( $fp, $length );
+            fclose( $fp );
+        }
+    }
+
+    /**
+     * Write the manifest and mark the job complete (only the worker that gets there first).
+     */
+    private static function complete() {
+        global $wpdb;
+        $wpdb->get_var( $wpdb->prepare( 'SELECT GET_LOCK(%s, %d)', self::ARCHIVE_LOCK, 30 ) );
+
+        $job = self::get_job();
+        if ( $job && $job['status'] === 'running' ) {
+            $rows = $wpdb->get_results( "SELECT * FROM " . self::table( 'segments' ) . " ORDER BY byte_offset", ARRAY_A );
+
+            $tables = array();
+            foreach ( $job['tables'] as $table ) {
+                $tables[ $table['name'] ] = array( 'name' => $table['name'], 'rows' => 0, 'segments' => 0 );
+            }
+            $segments = array();
+            foreach ( (array) $rows as $row ) {
+                $segments[] = array(
+                    'id' => (int) $row['id'],
+                    'kind' => $row['kind'],
+                    'table' => $row['table_name'],
+                    'offset' => (int) $row['byte_offset'],
+                    'length' => (int) $row['byte_length'],
+                    'rows' => (int) $row['row_count'],
+                    'sql_bytes' => (int) $row['sql_bytes'],
+                    'sha256' => $row['sha256'],
+                );
+                if ( isset( $tables[ $row['table_name'] ] ) ) {
+                    $tables[ $row['table_name'] ]['rows'] += (int) $row['row_count'];
+                    $tables[ $row['table_name'] ]['segments']++;
+                }
+            }
+
+            WooSuite_Backup_Archive::write_manifest( $job['file'], array(
+                'archive' => basename( $job['file'] ),
+                'archive_bytes' => self::archive_end(),
+                'compression' => $job['gzip'] ? 'gzip' : 'none',
+                'created_at' => time(),
+                'source_url' => home_url(),
+                'table_prefix' => $wpdb->prefix,
+                'search' => $job['search'],
+                'replace' => $job['replace'],
+                'tables' => array_values( $tables ),
+                'segments' => $segments,
+            ) );
+
+            $job['status'] = 'complete';
+            $job['finished_at'] = microtime( true );
+            update_option( self::JOB_OPTION, $job, false );
+
+            // Same marker the mysqldump path leaves (see WooSuite_Backup::get_export_status)
+            file_put_contents( dirname( $job['file'] ) . '/done.flag', '1' );
+        }
+
+        $wpdb->get_var( $wpdb->prepare( 'SELECT RELEASE_LOCK(%s)', self::ARCHIVE_LOCK ) );
+    }
+
+    private static function fail( $job, $message ) {
+        $job['status'] = 'failed';
+        $job['message'] = $message;
+        update_option( self::JOB_OPTION, $job, false );
+        return $job;
+    }
+
+    /**
+     * Progress for the status route, without the table list.
+     */
+    public static function get_status() {
+        global $wpdb;
+        $job = self::get_job();
+        if ( ! $job ) {
+            return null;
+        }
+
+        $units = $wpdb->get_results( $wpdb->prepare( "SELECT table_index, lease > %d AS leased FROM " . self::table( 'units' ), time() ), ARRAY_A );
+        $pending_tables = array();
+        $active_tables = array();
+        $workers = 0;
+        foreach ( (array) $units as $unit ) {
+            $pending_tables[ $unit['table_index'] ] = true;
+            if ( $unit['leased'] ) {
+                $active_tables[ $job['tables'][ $unit['table_index'] ]['name'] ] = true;
+                $workers++;
+            }
+        }
+
+        $done = $wpdb->get_row( "SELECT COUNT(*) AS segments, COALESCE(SUM(row_count), 0) AS row_count, COALESCE(SUM(sql_bytes), 0) AS sql_bytes,
+            COALESCE(MAX(byte_offset + byte_length), 0) AS file_bytes FROM " . self::table( 'segments' ), ARRAY_A );
+
+        $elapsed = ( $job['finished_at'] ? $job['finished_at'] : microtime( true ) ) - $job['started_at'];
+        return array(
+            'status' => $job['status'],
+            'message' => $job['message'],
+            'current_table' => implode( ', ', array_keys( $active_tables ) ),
+            'workers' => $workers,
+            'tables_done' => count( $job['tables'] ) - count( $pending_tables ),
+            'tables_total' => count( $job['tables'] ),
+            'units_done' => $job['units_total'] - count( (array) $units ),
+            'units_total' => $job['units_total'],
+            'segments' => (int) $done['segments'],
+            'rows_done' => (int) $done['row_count'],
+            'rows_total' => max( (int) $done['row_count'], $job['rows_total'] ),
+            'sql_bytes' => (int) $done['sql_bytes'],
+            'file_bytes' => (int) $done['file_bytes'],
+            'mb_per_sec' => $elapsed > 0 ? round( $done['sql_bytes'] / 1048576 / $elapsed, 2 ) : 0,
+        );
+    }
+
+    /**
+     * Drop the job, its units and segment records and leftover part files (the archive is the caller's).
+     */
+    public static function cancel() {
+        global $wpdb;
+        $job = self::get_job();
+        if ( $job ) {
+            array_map( 'unlink', glob( dirname( $job['file'] ) . '/*.part' ) );
+        }
+        delete_option( self::JOB_OPTION );
+        wp_clear_scheduled_hook( self::CRON_HOOK );
+        $wpdb->query( "DELETE FROM " . self::table( 'units' ) );
+        $wpdb->query( "DELETE FROM " . self::table( 'segments' ) );
+    }
+
+    /**
+     * `wp woosuite db-export [--tables=<a,b>] [--search=<old>] [--replace=<new>] [--resume]`
+     *
+     * Several processes with --resume share the job (each leases its own units).
+     */
+    public static function cli_export( $args, $assoc_args ) {
+        if ( empty( $assoc_args['resume'] ) ) {
+            $backup = new WooSuite_Backup( 'woosuite-ai', defined( 'WOOSUITE_AI_VERSION' ) ? WOOSUITE_AI_VERSION : '' );
+            $options = array(
+                'search' => isset( $assoc_args['search'] ) ? $assoc_args['search'] : '',
+                'replace' => isset( $assoc_args['replace'] ) ? $assoc_args['replace'] : '',
+            );
+            if ( ! empty( $assoc_args['tables'] ) ) {
+                $options['tables'] = explode( ',', $assoc_args['tables'] );
+            }
+            $backup->start_php_export( $options );
+            wp_clear_scheduled_hook( self::CRON_HOOK );
+        }
+
+        while ( self::run_worker( 60 ) ) {
+            $status = self::get_status();
+            WP_CLI::log( sprintf(
+                '%d/%d tables, %d/%d rows, %d segments, %s MB/s',
+                $status['tables_done'], $status['tables_total'], $status['rows_done'], $status['rows_total'], $status['segments'], $status['mb_per_sec']
+            ) );
+            sleep( 1 ); // Remaining units may be leased by other workers
+        }
+
+        $status = self::get_status();
+        if ( ! $status || $status['status'] !== 'complete' ) {
+            WP_CLI::error( $status ? $status['message'] : 'No export session active.' );
+        }
+        $job = self::get_job();
+        WP_CLI::success( sprintf(
+            'Exported %d rows in %d segments to %s (%s MB).',
+            $status['rows_done'], $status['segments'], $job['file'], round( $status['file_bytes'] / 1048576, 2 )
+        ) );
+    }
+
+    private static function table_header( $name ) {
+        global $wpdb;
+        $create = $wpdb->get_row( "SHOW CREATE TABLE `$name`", ARRAY_N );
+        $sql = "\n-- Structure for table `$name`\n";
+        $sql .= "DROP TABLE IF EXISTS `$name`;\n";
+        $sql .= ( $create ? $create[1] : '' ) . ";\n";
+        return $sql;
+    }
+
+    /**
+     * Next batch of a unit after its cursor (keyset, within the unit's key range),
+     * or by offset for tables without a primary key.
+     */
+    private static function fetch_batch( $table, $unit ) {
+        global $wpdb;
+        $name = $table['name'];
+
+        if ( ! $table['pk'] ) {
+            return $wpdb->get_results( $wpdb->prepare( "SELECT * FROM `$name` LIMIT %d, %d", $unit['row_offset'], self::BATCH_ROWS ), ARRAY_A );
+        }
+
+        $columns = '`' . implode( '`, `', $table['pk'] ) . '`';
+        $where = array();
+        if ( $unit['last_key'] !== '' ) {
+            $cursor = json_decode( $unit['last_key'], true );
+            $placeholders = implode( ', ', array_fill( 0, count( $cursor ), '%s' ) );
+            $where[] = $wpdb->prepare( "($columns) > ($placeholders)", $cursor );
+        } elseif ( $unit['key_from'] !== null ) {
+            $where[] = "$columns >= " . (int) $unit['key_from'];
+        }
+        if ( $unit['key_to'] !== null ) {
+            $where[] = "$columns < " . (int) $unit['key_to'];
+        }
+        $where = $where ? 'WHERE ' . implode( ' AND ', $where ) : '';
+
+        return $wpdb->get_results( "SELECT * FROM `$name` $where ORDER BY $columns LIMIT " . self::BATCH_ROWS, ARRAY_A );
+    }
+
+    /**
+     * Rows as extended INSERTs, each statement kept under the job's statement size.
+     */
+    private static function insert_statements( $name, $rows, $job ) {
+        global $wpdb;
+        $do_replace = ( $job['search'] !== '' && $job['replace'] !== '' && $job['search'] !== $job['replace'] );
+        $prefix = "INSERT INTO `$name` VALUES ";
+        $sql = '';
+        $statement = 0;
+
+        foreach ( $rows as $row ) {
+            $values = array();
+            foreach ( $row as $value ) {
+                if ( $value === null ) {
+                    $values[] = 'NULL';
+                    continue;
+                }
+                if ( $do_replace ) {
+                    $value = WooSuite_Backup::replace_value( $value, $job['search'], $job['replace'] );
+                }
+                // _real_escape() swaps % for a placeholder that only query() turns back
+                $values[] = "'" . $wpdb->remove_placeholder_escape( $wpdb->_real_escape( $value ) ) . "'";
+            }
+            $tuple = '(' . implode( ',', $values ) . ')';
+
+            if ( $statement > 0 && $statement + strlen( $tuple ) + 2 > $job['statement_bytes'] ) {
+                $sql .= ";\n";
+                $statement = 0;
+            }
+            if ( $statement === 0 ) {
+                $sql .= $prefix . $tuple;
+                $statement = strlen( $prefix ) + strlen( $tuple );
+            } else {
+                $sql .= ',' . $tuple;
+                $statement += 1 + strlen( $tuple );
+            }
+        }
+
+        return $sql . ";\n";
+    }
+
+    private static function part_path( $job, $owner ) {
+        return dirname( $job['file'] ) . '/segment-' . preg_replace( '/[^A-Za-z0-9]/', '', $owner ) . '.part';
+    }
+
+    private static function open( $path, $gzip ) {
+        return $gzip ? gzopen( $path, 'wb6' ) : fopen( $path, 'wb' );
+    }
+
+    private static function write( $out, $job, $data ) {
+        $job['gzip'] ? gzwrite( $out, $data ) : fwrite( $out, $data );
+        return strlen( $data );
+    }
+
+    private static function close( $out, $job ) {
+        $job['gzip'] ? gzclose( $out ) : fclose( $out );
+    }
+}
@@ -0,0 +1,335 @@
+<?php
+
+/**
+ * Deep link scan after a migration: finds links to the old domain and rewrites
+ * the ones that resolve locally, so the AI only sees the links it has to judge.
+ *
+ * Sources are read by ID cursor (post_content, postmeta, term descriptions),
+ * each query prefiltered with LIKE '%old-domain%'. Links are pulled out with a
+ * URL pattern rather than a DOM parser, because they also sit in block JSON
+ * (`https:\/\/old...`), serialized meta and srcset lists, then split with
+ * wp_parse_url. A path is classified as:
+ *   - same_path: it exists on this site as it is (uploaded file, a permalink
+ *     with the same path, home, core paths);
+ *   - resolved:  it does not, but its slug names exactly one post or term (the
+ *     permalink structure changed), or it is a resized image whose original
+ *     exists;
+ *   - ambiguous: no or several candidates; these go to the AI in one batch per
+ *     scan step, with the candidates found.
+ * Slugs are looked up in an index of published posts and terms, built once per
+ * scan and kept in a transient.
+ */
+class WooSuite_Link_Classifier {
+
+    const INDEX_TRANSIENT = 'woosuite_link_index';
+
+    const SCAN_BUDGET = 15;
+    const SOURCE_ROWS = 200;
+
+    // Unique unresolved URLs per AI call; a step also stops once it has this many
+    const AI_BATCH = 40;
+    const MAX_CANDIDATES = 5;
+
+    private $old_domain;
+    private $home;
+    private $home_path;
+    private $uploads_dir;
+    private $index;
+    private $pattern;
+
+    /**
+     * @param string     $old_domain Host of the old site (with or without www.).
+     * @param array|null $index      slug => refs ('p:<post id>', 't:<term id>:<taxonomy>'), built when null.
+     */
+    public function __construct( $old_domain, $index = null ) {
+        $this->old_domain = preg_replace( '/^www\./i', '', trim( $old_domain ) );
+        $this->home = untrailingslashit( home_url() );
+        $this->home_path = untrailingslashit( (string) wp_parse_url( $this->home, PHP_URL_PATH ) );
+        $uploads = wp_upload_dir();
+        $this->uploads_dir = $uploads['basedir'];
+        $this->index = $index;
+
+        // scheme-relative or absolute, slashes optionally JSON-escaped; the host must end where the URL's host ends
+        $this->pattern = '~(?:https?:)?(?:\\\\?/){2}(?:www\.)?' . preg_quote( $this->old_domain, '~' )
+            . '(?![\w.-])(?::\d+)?(?:(?:\\\\/|[^\s"\'<>()\[\]{}\\\\])*)~i';
+    }
+
+    /**
+     * Distinct old-domain URLs in a piece of text, as written there.
+     */
+    public function extract( $text ) {
+        if ( ! preg_match_all( $this->pattern, $text, $matches ) ) {
+            return array();
+        }
+        $urls = array();
+        foreach ( $matches[0] as $url ) {
+            // Entities and sentence punctuation end the URL
+            $url = preg_replace( '/&(quot|#0?39|#34|apos|lt|gt);.*$/s', '', $url );
+            $url = rtrim( $url, '.,;:!?' );
+            $urls[ $url ] = true;
+        }
+        return array_keys( $urls );
+    }
+
+    /**
+     * @return array kind (same_path|resolved|ambiguous), fix (for the first two), candidates (URLs, for ambiguous).
+     */
+    public function classify( $original ) {
+        $escaped = strpos( $original, '\\/' ) !== false;
+        $url = str_replace( array( '\\/', '&amp;' ), array( '/', '&' ), $original );
+        $parts = wp_parse_url( ( strpos( $url, '//' ) === 0 ? 'http:' : '' ) . $url );
+        $path = ! empty( $parts['path'] ) ? $parts['path'] : '/';
+
+        $suffix = ( isset( $parts['query'] ) ? '?' . $parts['query'] : '' ) . ( isset( $parts['fragment'] ) ? '#' . $parts['fragment'] : '' );
+        if ( strpos( $original, '&amp;' ) !== false ) {
+            $suffix = str_replace( '&', '&amp;', $suffix );
+        }
+
+        $result = $this->resolve_path( $path );
+        if ( $result['kind'] !== 'ambiguous' ) {
+            $fix = $result['url'] . $suffix;
+            if ( strpos( $original, '//' ) === 0 ) {
+                $fix = preg_replace( '~^https?:~', '', $fix );
+            }
+            $result['fix'] = $escaped ? str_replace( '/', '\\/', $fix ) : $fix;
+        }
+        unset( $result['url'] );
+        return $result;
+    }
+
+    private function resolve_path( $path ) {
+        $same = array( 'kind' => 'same_path', 'url' => $this->home . $path );
+
+        if ( $path === '/' || preg_match( '~^/(wp-admin|wp-json|feed)(/|$)|^/wp-login\.php~', $path ) ) {
+            return $same;
+        }
+
+        // Files: uploads (or a resized copy of an upload), themes, plugins, core
+        if ( strpos( $path, '/wp-content/uploads/' ) === 0 ) {
+            $relative = rawurldecode( substr( $path, strlen( '/wp-content/uploads/' ) ) );
+            if ( is_file( $this->uploads_dir . '/' . $relative ) ) {
+                return $same;
+            }
+            $original = preg_replace( '/-(\d+x\d+|scaled)(\.\w+)$/', '$2', $relative );
+            if ( $original !== $relative && is_file( $this->uploads_dir . '/' . $original ) ) {
+                return array( 'kind' => 'resolved', 'url' => $this->home . '/wp-content/uploads/' . str_replace( '%2F', '/', rawurlencode( $original ) ) );
+            }
+            return array( 'kind' => 'ambiguous', 'candidates' => array() );
+        }
+        if ( preg_match( '~^/(wp-content|wp-includes)/~', $path ) ) {
+            $file = ( strpos( $path, '/wp-content/' ) === 0 ) ? WP_CONTENT_DIR . substr( $path, strlen( '/wp-content' ) ) : ABSPATH . ltrim( $path, '/' );
+            return is_file( rawurldecode( $file ) ) ? $same : array( 'kind' => 'ambiguous', 'candidates' => array() );
+        }
+
+        // Pages, posts, products and term archives by slug (pagination and feeds dropped)
+        $segments = array_values( array_filter( explode( '/', $path ), 'strlen' ) );
+        while ( $segments && ( end( $segments ) === 'feed' || ( is_numeric( end( $segments ) ) && count( $segments ) > 1 && $segments[ count( $segments ) - 2 ] === 'page' ) ) ) {
+            array_splice( $segments, end( $segments ) === 'feed' ? -1 : -2 );
+        }
+        $slug = $segments ? sanitize_title( rawurldecode( end( $segments ) ) ) : '';
+        $index = $this->get_index();
+        $refs = ( $slug !== '' && isset( $index[ $slug ] ) ) ? array_slice( $index[ $slug ], 0, self::MAX_CANDIDATES ) : array();
+
+        $candidates = array();
+        foreach ( $refs as $ref ) {
+            $link = $this->permalink( $ref );
+            if ( ! $link ) {
+                continue;
+            }
+            $link_path = (string) wp_parse_url( $link, PHP_URL_PATH );
+            if ( $this->home_path !== '' && strpos( $link_path, $this->home_path ) === 0 ) {
+                $link_path = substr( $link_path, strlen( $this->home_path ) );
+            }
+            if ( untrailingslashit( $link_path ) === untrailingslashit( $path ) ) {
+                return $same;
+            }
+            $candidates[] = $link;
+        }
+
+        if ( count( $candidates ) === 1 ) {
+            return array( 'kind' => 'resolved', 'url' => $candidates[0] );
+        }
+        return array( 'kind' => 'ambiguous', 'candidates' => $candidates );
+    }
+
+    private function permalink( $ref ) {
+        $ref = explode( ':', $ref );
+        if ( $ref[0] === 'p' ) {
+            return get_permalink( (int) $ref[1] );
+        }
+        $link = get_term_link( (int) $ref[1], $ref[2] );
+        return is_wp_error( $link ) ? '' : $link;
+    }
+
+    private function get_index() {
+        if ( $this->index === null ) {
+            $this->index = get_transient( self::INDEX_TRANSIENT );
+            if ( ! is_array( $this->index ) ) {
+                $this->index = self::build_index();
+                set_transient( self::INDEX_TRANSIENT, $this->index, HOUR_IN_SECONDS );
+            }
+        }
+        return $this->index;
+    }
+
+    /**
+     * slug => refs of published posts (any public type, no attachments) and terms.
+     */
+    private static function build_index() {
+        global $wpdb;
+        $types = array_diff( get_post_types( array( 'public' => true ) ), array( 'attachment' ) );
+        $placeholders = implode( ', ', array_fill( 0, count( $types ), '%s' ) );
+
+        $index = array();
+        $posts = $wpdb->get_results( $wpdb->prepare(
+            "SELECT ID, post_name FROM {$wpdb->posts} WHERE post_status = 'publish' AND post_name <> '' AND post_type IN ($placeholders)",
+            array_values( $types )
+        ), ARRAY_A );
+        foreach ( (array) $posts as $post ) {
+            $index[ $post['post_name'] ][] = 'p:' . $post['ID'];
+        }
+
+        $terms = $wpdb->get_results( "SELECT t.term_id, t.slug, tt.taxonomy FROM {$wpdb->terms} t INNER JOIN {$wpdb->term_taxonomy} tt ON tt.term_id = t.term_id", ARRAY_A );
+        foreach ( (array) $terms as $term ) {
+            $index[ $term['slug'] ][] = 't:' . $term['term_id'] . ':' . $term['taxonomy'];
+        }
+        return $index;
+    }
+
+    /**
+     * Where the scan reads from, in order: location => [table, id column, text column, extra condition].
+     */
+    private static function sources() {
+        global $wpdb;
+        return array(
+            'post_content' => array( $wpdb->posts, 'ID', 'post_content', "AND post_status IN ('publish', 'draft', 'private', 'future', 'inherit')" ),
+            'postmeta' => array( $wpdb->postmeta, 'meta_id', 'meta_value', '' ),
+            'term_description' => array( $wpdb->term_taxonomy, 'term_taxonomy_id', 'description', '' ),
+        );
+    }
+
+    /**
+     * One scan step: read sources from $cursor until the time budget is used or
+     * AI_BATCH unresolved URLs are waiting, and classify what was found.
+     *
+     * @param array $cursor source (location) and after (last ID read); empty to start.
+     * @return array issues (fixed locally), ambiguous (url => occurrences, context, candidates), cursor, has_more, scanned.
+     */
+    public function scan( $cursor = array(), $budget = self::SCAN_BUDGET ) {
+        global $wpdb;
+
+        $sources = self::sources();
+        $locations = array_keys( $sources );
+        $source = ( isset( $cursor['source'] ) && isset( $sources[ $cursor['source'] ] ) ) ? $cursor['source'] : $locations[0];
+        $after = isset( $cursor['after'] ) ? (int) $cursor['after'] : 0;
+
+        $like = '%' . $wpdb->esc_like( $this->old_domain ) . '%';
+        $deadline = microtime( true ) + $budget;
+        $issues = array();
+        $ambiguous = array();
+        $scanned = 0;
+        $has_more = true;
+
+        while ( microtime( true ) < $deadline && count( $ambiguous ) < self::AI_BATCH ) {
+            list( $table, $id_column, $text_column, $extra ) = $sources[ $source ];
+            $rows = $wpdb->get_results( $wpdb->prepare(
+                "SELECT `$id_column` AS id, `$text_column` AS text FROM $table WHERE `$id_column` > %d AND `$text_column` LIKE %s $extra ORDER BY `$id_column` LIMIT %d",
+                $after, $like, self::SOURCE_ROWS
+            ), ARRAY_A );
+
+            foreach ( (array) $rows as $row ) {
+                $after = (int) $row['id'];
+                $scanned++;
+                foreach ( $this->extract( $row['text'] ) as $url ) {
+                    $result = $this->classify( $url );
+                    if ( $result['kind'] === 'ambiguous' ) {
+                        if ( ! isset( $ambiguous[ $url ] ) ) {
+                            $at = strpos( $row['text'], $url );
+                            $ambiguous[ $url ] = array(
+                                'occurrences' => array(),
+                                'context' => wp_strip_all_tags( substr( $row['text'], max( 0, $at - 150 ), strlen( $url ) + 300 ) ),
+                                'candidates' => $result['candidates'],
+                            );
+                        }
+                        $ambiguous[ $url ]['occurrences'][] = array( 'source_id' => (int) $row['id'], 'location' => $source );
+                        continue;
+                    }
+                    $issues[] = array(
+                        'source_id' => (int) $row['id'],
+                        'location' => $source,
+                        'original_string' => $url,
+                        'suggested_fix' => $result['fix'],
+                        'confidence' => $result['kind'] === 'same_path' ? 'High' : 'Medium',
+                        'method' => 'local',
+                    );
+                }
+            }
+
+            if ( count( (array) $rows ) < self::SOURCE_ROWS ) {
+                $next = array_search( $source, $locations, true ) + 1;
+                if ( $next >= count( $locations ) ) {
+                    $has_more = false;
+                    break;
+                }
+                $source = $locations[ $next ];
+                $after = 0;
+            }
+        }
+
+        return array(
+            'issues' => $issues,
+            'ambiguous' => $ambiguous,
+            'cursor' => array( 'source' => $source, 'after' => $after ),
+            'has_more' => $has_more,
+            'scanned' => $scanned,
+        );
+    }
+
+    /**
+     * Turn the AI's answers for the ambiguous URLs of a step into issues, one per occurrence.
+     *
+     * @param array $ambiguous From scan().
+     * @param array $answers   [ { id, suggested_fix, confidence } ], id being the URL's position in $ambiguous.
+     */
+    public static function issues_from_answers( $ambiguous, $answers ) {
+        $urls = array_keys( $ambiguous );
+        $issues = array();
+        foreach ( (array) $answers as $answer ) {
+            if ( ! isset( $answer['id'], $urls[ (int) $answer['id'] ] ) || empty( $answer['suggested_fix'] ) ) {
+                continue;
+            }
+            $url = $urls[ (int) $answer['id'] ];
+            $fix = (string) $answer['suggested_fix'];
+            if ( strpos( $url, '\\/' ) !== false ) {
+                $fix = str_replace( array( '\\/', '/' ), array( '/', '\\/' ), $fix );
+            }
+            foreach ( $ambiguous[ $url ]['occurrences'] as $occurrence ) {
+                $issues[] = array_merge( $occurrence, array(
+                    'original_string' => $url,
+                    'suggested_fix' => $fix,
+                    'confidence' => isset( $answer['confidence'] ) ? (string) $answer['confidence'] : 'Low',
+                    'method' => 'ai',
+                ) );
+            }
+        }
+        return $issues;
+    }
+
+    /**
+     * Ambiguous URLs as issues without a fix, for review when the AI could not be asked.
+     */
+    public static function unresolved_issues( $ambiguous ) {
+        $issues = array();
+        foreach ( $ambiguous as $url => $link ) {
+            foreach ( $link['occurrences'] as $occurrence ) {
+                $issues[] = array_merge( $occurrence, array(
+                    'original_string' => $url,
+                    'suggested_fix' => '',
+                    'confidence' => 'Unresolved',
+                    'method' => 'unresolved',
+                ) );
+            }
+        }
+        return $issues;
+    }
+}
@@ -0,0 +1,362 @@
+<?php
+
+/**
+ * Site-wide search/replace (domain change after a migration), run as a
+ * resumable server-side job.
+ *
+ * Each table is read by primary key (WHERE (pk) > (last) ORDER BY pk) and only
+ * rows where one of its text columns is LIKE '%old%' come back, with just the
+ * key and the text columns; MySQL does the filtering, so PHP never sees the
+ * rows that have nothing to replace. Matching values go through
+ * WooSuite_Backup::replace_value (serialized data stays valid). One page of
+ * updates and the job's new cursor are written in one transaction, so a step
+ * that dies is redone from the last committed page.
+ *
+ * The job (table list with keys and text columns, cursor, per-table counts)
+ * lives in the woosuite_replace_job option. Steps run from POST
+ * /backup/replace/step, the WP-Cron chain or `wp woosuite search-replace`; a
+ * named lock keeps two of them off the same cursor. A dry run walks the same
+ * pages and only counts what would change.
+ */
+class WooSuite_Search_Replace {
+
+    const JOB_OPTION = 'woosuite_replace_job';
+    const CRON_HOOK = 'woosuite_replace_step';
+    const STEP_LOCK = 'woosuite_replace_step';
+
+    const STEP_BUDGET = 20;
+    const BATCH_ROWS = 500;
+
+    // run() result while another step holds STEP_LOCK (truthy: work remains)
+    const LOCKED = 'locked';
+
+    /**
+     * Create the job.
+     *
+     * @param array $options dry_run, tables (only these, default all).
+     * @return array|WP_Error Status.
+     */
+    public static function start( $search, $replace, $options = array() ) {
+        global $wpdb;
+
+        if ( $search === '' || $replace === '' || $search === $replace ) {
+            return new WP_Error( 'invalid_params', 'Invalid domain parameters.' );
+        }
+        self::cancel();
+
+        $only = isset( $options['tables'] ) ? (array) $options['tables'] : array();
+        $tables = array();
+        $skipped = array();
+        foreach ( (array) $wpdb->get_results( "SHOW TABLE STATUS", ARRAY_A ) as $status ) {
+            // Views have no engine; the export job's bookkeeping is not site content
+            if ( empty( $status['Engine'] ) || strpos( $status['Name'], $wpdb->prefix . 'woosuite_export_' ) === 0 || ( $only && ! in_array( $status['Name'], $only, true ) ) ) {
+                continue;
+            }
+            $name = $status['Name'];
+
+            $pk = array();
+            $columns = array();
+            foreach ( (array) $wpdb->get_results( "SHOW COLUMNS FROM `$name`", ARRAY_A ) as $column ) {
+                if ( $column['Key'] === 'PRI' ) {
+                    $pk[] = $column['Field'];
+                } elseif ( preg_match( '/(char|text|blob)/i', $column['Type'] ) && ! ( $name === $wpdb->posts && $column['Field'] === 'guid' ) ) {
+                    $columns[] = $column['Field'];
+                }
+            }
+            if ( ! $columns ) {
+                continue;
+            }
+            // Rows without a key cannot be updated one by one
+            if ( ! $pk ) {
+                $skipped[] = $name;
+                continue;
+            }
+
+            // Composite keys in index order, as the keyset cursor compares them
+            $keys = $wpdb->get_results( "SHOW KEYS FROM `$name` WHERE Key_name = 'PRIMARY'", ARRAY_A );
+            usort( $keys, function( $a, $b ) {
+                return (int) $a['Seq_in_index'] - (int) $b['Seq_in_index'];
+            } );
+
+            $tables[] = array(
+                'name' => $name,
+                'pk' => array_column( (array) $keys, 'Column_name' ),
+                'columns' => $columns,
+                'rows' => (int) $status['Rows'],
+            );
+        }
+
+        $job = array(
+            'search' => $search,
+            'replace' => $replace,
+            'dry_run' => ! empty( $options['dry_run'] ),
+            'tables' => $tables,
+            'skipped' => $skipped,
+            'table_index' => 0,
+            'last_key' => '',
+            'report' => array(),
+            'rows_scanned' => 0,
+            'status' => 'running',
+            'message' => '',
+            'started_at' => microtime( true ),
+            'finished_at' => 0,
+        );
+        update_option( self::JOB_OPTION, $job, false );
+
+        wp_schedule_single_event( time(), self::CRON_HOOK );
+        return self::get_status();
+    }
+
+    public static function get_job() {
+        wp_cache_delete( self::JOB_OPTION, 'options' );
+        $job = get_option( self::JOB_OPTION );
+        return is_array( $job ) ? $job : null;
+    }
+
+    /**
+     * Cron tick / step route: work for one time budget, then chain the next tick.
+     *
+     * @return array|null Status (see get_status()).
+     */
+    public static function step( $budget = null ) {
+        if ( self::run( $budget ) ) {
+            wp_schedule_single_event( time(), self::CRON_HOOK );
+        }
+        return self::get_status();
+    }
+
+    /**
+     * Process pages until $budget seconds are used up.
+     *
+     * @return bool|string True while tables remain, self::LOCKED if another step holds the cursor.
+     */
+    public static function run( $budget = null ) {
+        global $wpdb;
+
+        $job = self::get_job();
+        if ( ! $job || $job['status'] !== 'running' ) {
+            return false;
+        }
+
+        // Another step holds the cursor; it will chain the next tick
+        if ( ! $wpdb->get_var( $wpdb->prepare( "SELECT GET_LOCK(%s, 0)", self::STEP_LOCK ) ) ) {
+            return self::LOCKED;
+        }
+
+        if ( $budget === null ) {
+            $max = (int) ini_get( 'max_execution_time' );
+            $budget = ( $max > 0 ) ? min( self::STEP_BUDGET, max( 5, (int) ( $max / 2 ) ) ) : self::STEP_BUDGET;
+        }
+        $deadline = microtime( true ) + $budget;
+
+        // The step that held the lock before us may have moved the cursor
+        $job = self::get_job();
+        while ( $job['status'] === 'running' && microtime( true ) < $deadline ) {
+            if ( $job['table_index'] >= count( $job['tables'] ) ) {
+                self::complete( $job );
+                break;
+            }
+            $next = self::process_page( $job );
+            if ( ! is_wp_error( $next ) ) {
+                $job = $next;
+            } else {
+                // The cursor stays before the failed page
+                $job['status'] = 'failed';
+                $job['message'] = $next->get_error_message();
+                $job['finished_at'] = microtime( true );
+                update_option( self::JOB_OPTION, $job, false );
+            }
+        }
+
+        $wpdb->query( $wpdb->prepare( "SELECT RELEASE_LOCK(%s)", self::STEP_LOCK ) );
+        return $job['status'] === 'running';
+    }
+
+    /**
+     * One page of matching rows of the current table. The advanced job is saved
+     * with the page's updates, in one transaction.
+     *
+     * @return array|WP_Error The advanced job, or an error if an update failed (nothing written).
+     */
+    private static function process_page( $job ) {
+        global $wpdb;
+        $table = $job['tables'][ $job['table_index'] ];
+        $name = $table['name'];
+        $keys = '`' . implode( '`, `', $table['pk'] ) . '`';
+
+        $like = '%' . $wpdb->esc_like( $job['search'] ) . '%';
+        $match = array();
+        foreach ( $table['columns'] as $column ) {
+            $match[] = $wpdb->prepare( "`$column` LIKE %s", $like );
+        }
+        $where = array( '(' . implode( ' OR ', $match ) . ')' );
+        if ( $job['last_key'] !== '' ) {
+            $cursor = json_decode( $job['last_key'], true );
+            $where[] = $wpdb->prepare( "($keys) > (" . implode( ', ', array_fill( 0, count( $cursor ), '%s' ) ) . ")", $cursor );
+        }
+        // The job's own option holds the search string
+        if ( $name === $wpdb->options ) {
+            $where[] = $wpdb->prepare( "option_name <> %s", self::JOB_OPTION );
+        }
+
+        $rows = $wpdb->get_results(
+            "SELECT $keys, `" . implode( '`, `', $table['columns'] ) . "` FROM `$name` WHERE " . implode( ' AND ', $where ) . " ORDER BY $keys LIMIT " . self::BATCH_ROWS,
+            ARRAY_A
+        );
+
+        $updates = array();
+        $cells = 0;
+        foreach ( (array) $rows as $row ) {
+            $data = array();
+            foreach ( $table['columns'] as $column ) {
+                $value = WooSuite_Backup::replace_value( $row[ $column ], $job['search'], $job['replace'] );
+                if ( $value !== $row[ $column ] ) {
+                    $data[ $column ] = $value;
+                }
+            }
+            if ( $data ) {
+                $updates[] = array( $data, array_intersect_key( $row, array_flip( $table['pk'] ) ) );
+                $cells += count( $data );
+            }
+        }
+
+        if ( $updates ) {
+            if ( ! isset( $job['report'][ $name ] ) ) {
+                $job['report'][ $name ] = array( 'rows' => 0, 'cells' => 0 );
+            }
+            $job['report'][ $name ]['rows'] += count( $updates );
+            $job['report'][ $name ]['cells'] += $cells;
+        }
+        $job['rows_scanned'] += count( (array) $rows );
+
+        if ( count( (array) $rows ) < self::BATCH_ROWS ) {
+            $job['table_index']++;
+            $job['last_key'] = '';
+        } else {
+            $last = end( $rows );
+            $job['last_key'] = wp_json_encode( array_values( array_intersect_key( $last, array_flip( $table['pk'] ) ) ) );
+        }
+
+        if ( $job['dry_run'] || ! $updates ) {
+            update_option( self::JOB_OPTION, $job, false );
+            return $job;
+        }
+
+        $wpdb->query( 'START TRANSACTION' );
+        foreach ( $updates as $update ) {
+            if ( $wpdb->update( $name, $update[0], $update[1] ) === false ) {
+                $error = new WP_Error( 'update_failed', "Update of $name failed: " . $wpdb->last_error );
+                $wpdb->query( 'ROLLBACK' );
+                return $error;
+            }
+        }
+        update_option( self::JOB_OPTION, $job, false );
+        $wpdb->query( 'COMMIT' );
+        return $job;
+    }
+
+    private static function complete( &$job ) {
+        $job['status'] = 'complete';
+        $job['finished_at'] = microtime( true );
+        update_option( self::JOB_OPTION, $job, false );
+        wp_clear_scheduled_hook( self::CRON_HOOK );
+
+        // Object caches still hold the old values
+        if ( ! $job['dry_run'] ) {
+            wp_cache_flush();
+        }
+    }
+
+    /**
+     * Progress and the per-table counts (rows and values changed, or that would change in a dry run).
+     */
+    public static function get_status() {
+        $job = self::get_job();
+        if ( ! $job ) {
+            return null;
+        }
+
+        $rows_changed = 0;
+        $cells_changed = 0;
+        $tables = array();
+        foreach ( $job['report'] as $name => $counts ) {
+            $rows_changed += $counts['rows'];
+            $cells_changed += $counts['cells'];
+            $tables[] = array( 'table' => $name, 'rows' => $counts['rows'], 'cells' => $counts['cells'] );
+        }
+        usort( $tables, function( $a, $b ) {
+            return $b['rows'] - $a['rows'];
+        } );
+
+        $current = isset( $job['tables'][ $job['table_index'] ] ) ? $job['tables'][ $job['table_index'] ]['name'] : '';
+        $elapsed = ( $job['finished_at'] ? $job['finished_at'] : microtime( true ) ) - $job['started_at'];
+        return array(
+            'status' => $job['status'],
+            'message' => $job['message'],
+            'dry_run' => $job['dry_run'],
+            'search' => $job['search'],
+            'replace' => $job['replace'],
+            'current_table' => $job['status'] === 'running' ? $current : '',
+            'tables_done' => min( $job['table_index'], count( $job['tables'] ) ),
+            'tables_total' => count( $job['tables'] ),
+            'rows_scanned' => $job['rows_scanned'],
+            'rows_changed' => $rows_changed,
+            'cells_changed' => $cells_changed,
+            'tables' => $tables,
+            'skipped' => $job['skipped'],
+            'elapsed' => round( $elapsed, 1 ),
+        );
+    }
+
+    public static function cancel() {
+        delete_option( self::JOB_OPTION );
+        wp_clear_scheduled_hook( self::CRON_HOOK );
+    }
+
+    /**
+     * `wp woosuite search-replace <old> <new> [--dry-run] [--tables=<a,b>] [--resume]`
+     */
+    public static function cli_replace( $args, $assoc_args ) {
+        if ( empty( $assoc_args['resume'] ) ) {
+            if ( count( $args ) < 2 ) {
+                WP_CLI::error( 'Usage: wp woosuite search-replace <old> <new> [--dry-run] [--tables=<a,b>]' );
+            }
+            $options = array( 'dry_run' => ! empty( $assoc_args['dry-run'] ) );
+            if ( ! empty( $assoc_args['tables'] ) ) {
+                $options['tables'] = explode( ',', $assoc_args['tables'] );
+            }
+            $started = self::start( $args[0], $args[1], $options );
+            if ( is_wp_error( $started ) ) {
+                WP_CLI::error( $started->get_error_message() );
+            }
+            wp_clear_scheduled_hook( self::CRON_HOOK );
+        }
+
+        while ( $result = self::run( 60 ) ) {
+            if ( $result === self::LOCKED ) {
+                sleep( 1 ); // A cron tick or step request holds the cursor
+                continue;
+            }
+            $status = self::get_status();
+            WP_CLI::log( sprintf(
+                '%d/%d tables, %d matching rows read, %d rows %s',
+                $status['tables_done'], $status['tables_total'], $status['rows_scanned'], $status['rows_changed'], $status['dry_run'] ? 'to change' : 'changed'
+            ) );
+        }
+
+        $status = self::get_status();
+        if ( ! $status || $status['status'] !== 'complete' ) {
+            WP_CLI::error( $status ? $status['message'] : 'No search/replace job active.' );
+        }
+        if ( $status['tables'] ) {
+            WP_CLI\Utils\format_items( 'table', $status['tables'], array( 'table', 'rows', 'cells' ) );
+        }
+        foreach ( $status['skipped'] as $name ) {
+            WP_CLI::warning( "$name has no primary key and was skipped." );
+        }
+        WP_CLI::success( sprintf(
+            '%s %d values in %d rows (%s -> %s).',
+            $status['dry_run'] ? 'Dry run: would replace' : 'Replaced', $status['cells_changed'], $status['rows_changed'], $status['search'], $status['replace']
+        ) );
+    }
+}
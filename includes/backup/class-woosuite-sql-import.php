@@ -0,0 +1,509 @@
+<?php
+
+/**
+ * Streaming SQL import for Migration Station and `wp woosuite db-import`.
+ *
+ * Reads a dump (plain or gzip, including a WooSuite segment) in READ_BLOCK
+ * pieces and splits it into statements with a tokenizer that tracks quotes,
+ * backslash escapes and comments, so a `;` or a newline inside a string value
+ * does not end a statement. Offsets are positions in the uncompressed SQL,
+ * which is what a caller passes back to resume.
+ *
+ * gzip input is inflated here (inflate_add) rather than through gzopen, so the
+ * reader knows where each gzip member starts in the compressed file. Resuming
+ * seeks to the start of the member holding the offset (the checkpoint saved by
+ * the previous step) and inflates only from there, instead of re-inflating
+ * the whole file up to the offset on every step. WooSuite archives are one
+ * member per segment; a single-member .sql.gz resumed over HTTP still inflates
+ * from the start, and `wp woosuite db-import` keeps one reader open instead.
+ *
+ * Statements run with autocommit, foreign key and unique checks off and are
+ * committed every TXN_STATEMENTS statements or TXN_BYTES of SQL. The domain
+ * rewrite is one pass over each statement that contains the old domain:
+ * serialized strings (`s:N:\"...\";` as they appear escaped in the dump) get
+ * their byte counts fixed as they are rewritten, without unserializing.
+ * Throughput is kept in the woosuite_import_stats option.
+ */
+class WooSuite_Sql_Import {
+
+    const STATS_OPTION = 'woosuite_import_stats';
+    const CHECKPOINT_OPTION = 'woosuite_import_checkpoint';
+
+    const STEP_BUDGET = 20;
+    const READ_BLOCK = 1048576;
+
+    // One COMMIT per this many statements or bytes of SQL (DDL commits on its own)
+    const TXN_STATEMENTS = 500;
+    const TXN_BYTES = 16777216;
+
+    private $fp;
+    private $gzip = false;
+    private $block;
+    private $context = null; // inflate context of the current gzip member
+    private $pending = '';   // Compressed bytes read but not inflated yet
+    private $member_in = 0;  // Compressed bytes the current member has used
+    private $member_at = 0;  // Compressed offset where the current (or next) member starts
+    private $inflated = 0;   // Uncompressed bytes produced so far
+    private $marks = array(); // Member starts seen: array( at, base ), base = uncompressed offset
+    private $buffer = '';
+    private $base = 0;  // Position of $buffer[0] in the uncompressed SQL
+    private $start = 0; // Start of the statement being scanned
+    private $pos = 0;
+    private $quote = '';
+    private $eof = false;
+
+    /**
+     * @param array|null $checkpoint A member start at or before $offset (see checkpoint()).
+     */
+    public function __construct( $file, $offset = 0, $block = self::READ_BLOCK, $checkpoint = null ) {
+        $this->fp = @fopen( $file, 'rb' );
+        $this->block = $block;
+        if ( ! $this->fp ) {
+            return;
+        }
+
+        $this->gzip = ( fread( $this->fp, 2 ) === "\x1f\x8b" );
+        rewind( $this->fp );
+        if ( $this->gzip && ! function_exists( 'inflate_init' ) ) {
+            $this->close();
+            return;
+        }
+        if ( $offset <= 0 ) {
+            return;
+        }
+
+        if ( ! $this->gzip ) {
+            fseek( $this->fp, $offset );
+            $this->base = $offset;
+            return;
+        }
+
+        if ( is_array( $checkpoint ) && $checkpoint['base'] <= $offset ) {
+            fseek( $this->fp, $checkpoint['at'] );
+            $this->member_at = $checkpoint['at'];
+            $this->inflated = $checkpoint['base'];
+        }
+        // Inflate from the member start up to $offset and keep the rest
+        while ( $this->inflated < $offset ) {
+            $data = $this->read();
+            if ( $data === false ) {
+                break;
+            }
+            if ( $this->inflated > $offset ) {
+                $this->buffer = substr( $data, strlen( $data ) - ( $this->inflated - $offset ) );
+            }
+        }
+        $this->base = $offset;
+    }
+
+    public function is_open() {
+        return (bool) $this->fp;
+    }
+
+    public function close() {
+        if ( $this->fp ) {
+            fclose( $this->fp );
+            $this->fp = null;
+        }
+    }
+
+    /**
+     * Where to resume from offset(): the start of the gzip member holding it, or null.
+     *
+     * @return array|null at (compressed offset), base (uncompressed offset).
+     */
+    public function checkpoint() {
+        $offset = $this->offset();
+        $best = null;
+        foreach ( $this->marks as $mark ) {
+            if ( $mark['base'] <= $offset ) {
+                $best = $mark;
+            }
+        }
+        return $best;
+    }
+
+    /**
+     * Uncompressed offset just past the last statement returned.
+     */
+    public function offset() {
+        return $this->base + $this->start;
+    }
+
+    /**
+     * Next statement without its `;`, or null at the end of the input.
+     */
+    public function next_statement() {
+        while ( true ) {
+            $len = strlen( $this->buffer );
+            while ( $this->pos < $len ) {
+                if ( $this->quote !== '' ) {
+                    // Backticks have no backslash escapes
+                    $this->pos += strcspn( $this->buffer, $this->quote === '`' ? '`' : '\\' . $this->quote, $this->pos );
+                    if ( $this->pos >= $len ) {
+                        break;
+                    }
+                    if ( $this->pos + 1 >= $len && ! $this->eof ) {
+                        break; // \x or '' split across reads
+                    }
+                    if ( $this->buffer[ $this->pos ] === '\\' || ( $this->pos + 1 < $len && $this->buffer[ $this->pos + 1 ] === $this->quote ) ) {
+                        $this->pos += 2;
+                        continue;
+                    }
+                    $this->quote = '';
+                    $this->pos++;
+                    continue;
+                }
+
+                $this->pos += strcspn( $this->buffer, "'\"`;-#/", $this->pos );
+                if ( $this->pos >= $len ) {
+                    break;
+                }
+
+                $char = $this->buffer[ $this->pos ];
+                if ( $char === ';' ) {
+                    $sql = trim( substr( $this->buffer, $this->start, $this->pos - $this->start ) );
+                    $this->start = ++$this->pos;
+                    if ( $sql !== '' ) {
+                        return $sql;
+                    }
+                    continue;
+                }
+                if ( $char === "'" || $char === '"' || $char === '`' ) {
+                    $this->quote = $char;
+                    $this->pos++;
+                    continue;
+                }
+
+                // "-- " and # run to the end of the line, /* */ to its close. Leading comments are
+                // dropped from the statement; a /*!...*/ is MySQL syntax and stays.
+                if ( $this->pos + 2 >= $len && ! $this->eof ) {
+                    break;
+                }
+                $next = (string) substr( $this->buffer, $this->pos + 1, 2 );
+                if ( $char === '#' || ( $char === '-' && strncmp( $next, '-', 1 ) === 0 && ( strlen( $next ) < 2 || ctype_space( $next[1] ) ) ) ) {
+                    $end = strpos( $this->buffer, "\n", $this->pos );
+                } elseif ( $char === '/' && strncmp( $next, '*', 1 ) === 0 ) {
+                    $end = strpos( $this->buffer, '*/', $this->pos + 2 );
+                    $end = ( $end === false ) ? false : $end + 1;
+                } else {
+                    $this->pos++;
+                    continue;
+                }
+                if ( $end === false ) {
+                    if ( ! $this->eof ) {
+                        break;
+                    }
+                    $end = $len - 1;
+                }
+                $leading = $this->pos - $this->start;
+                if ( $next !== '*!' && strspn( $this->buffer, " \t\r\n", $this->start, $leading ) === $leading ) {
+                    $this->start = $end + 1;
+                }
+                $this->pos = $end + 1;
+            }
+
+            if ( $this->eof ) {
+                // Last statement without a trailing ;
+                $sql = trim( substr( $this->buffer, $this->start ) );
+                $this->start = $this->pos = strlen( $this->buffer );
+                return $sql === '' ? null : $sql;
+            }
+            $this->fill();
+        }
+    }
+
+    private function fill() {
+        $this->buffer = (string) substr( $this->buffer, $this->start );
+        $this->base += $this->start;
+        $this->pos -= $this->start;
+        $this->start = 0;
+
+        // checkpoint() only needs the last member start at or before the statement start
+        while ( count( $this->marks ) > 1 && $this->marks[1]['base'] <= $this->base ) {
+            array_shift( $this->marks );
+        }
+
+        $data = $this->read();
+        if ( $data === false || $data === '' ) {
+            $this->eof = true;
+        } else {
+            $this->buffer .= $data;
+        }
+    }
+
+    /**
+     * Next piece of SQL from the file, or false at the end. gzip members are
+     * inflated one after the other; their starts are recorded in $marks.
+     */
+    private function read() {
+        if ( ! $this->fp ) {
+            return false;
+        }
+        if ( ! $this->gzip ) {
+            $data = fread( $this->fp, $this->block );
+            return ( $data === '' ) ? false : $data;
+        }
+
+        while ( true ) {
+            while ( strlen( $this->pending ) < 2 && ! feof( $this->fp ) ) {
+                $this->pending .= (string) fread( $this->fp, $this->block );
+            }
+            if ( $this->pending === '' ) {
+                return false;
+            }
+
+            if ( $this->context === null ) {
+                // A new member; anything else (e.g. zero padding) ends the input
+                if ( strncmp( $this->pending, "\x1f\x8b", 2 ) !== 0 ) {
+                    return false;
+                }
+                $this->context = inflate_init( ZLIB_ENCODING_GZIP );
+                $this->member_in = 0;
+                $this->marks[] = array( 'at' => $this->member_at, 'base' => $this->inflated );
+            }
+
+            $data = @inflate_add( $this->context, $this->pending, ZLIB_SYNC_FLUSH );
+            if ( $data === false ) {
+                return false;
+            }
+            $read = inflate_get_read_len( $this->context );
+            $used = $read - $this->member_in;
+            $this->member_in = $read;
+
+            if ( inflate_get_status( $this->context ) === ZLIB_STREAM_END ) {
+                // The rest of this read belongs to the next member
+                $this->pending = (string) substr( $this->pending, $used );
+                $this->member_at += $read;
+                $this->context = null;
+            } else {
+                $this->pending = '';
+            }
+
+            $this->inflated += strlen( $data );
+            if ( $data !== '' ) {
+                return $data;
+            }
+        }
+    }
+
+    /**
+     * Replace $old with $new in one SQL statement. Serialized strings keep
+     * their byte counts right (nested ones too); a length that does not match
+     * its string is left as it was and the text is replaced like any other.
+     * Works on the escaped text: \x and '' count as one byte.
+     */
+    public static function rewrite( $sql, $old, $new ) {
+        $out = '';
+        $pos = 0;
+        while ( strpos( $sql, $old, $pos ) !== false && preg_match( '/s:(\d+):(\\\\?)"/', $sql, $m, PREG_OFFSET_CAPTURE, $pos ) ) {
+            $open = $m[0][1] + strlen( $m[0][0] );
+            $quote = $m[2][0] . '"';
+            $close = self::skip_bytes( $sql, $open, (int) $m[1][0] );
+
+            if ( $close === false || substr( $sql, $close, strlen( $quote ) + 1 ) !== $quote . ';' ) {
+                $out .= str_replace( $old, $new, substr( $sql, $pos, $open - $pos ) );
+                $pos = $open;
+                continue;
+            }
+
+            $inner = substr( $sql, $open, $close - $open );
+            $count = (int) $m[1][0];
+            if ( strpos( $inner, $old ) !== false ) {
+                $replaced = self::rewrite( $inner, $old, $new );
+                $count += strlen( $replaced ) - strlen( $inner );
+                $inner = $replaced;
+            }
+
+            $out .= str_replace( $old, $new, substr( $sql, $pos, $m[0][1] - $pos ) ) . 's:' . $count . ':' . $quote . $inner . $quote . ';';
+            $pos = $close + strlen( $quote ) + 1;
+        }
+        return $out . str_replace( $old, $new, (string) substr( $sql, $pos ) );
+    }
+
+    /**
+     * Position after $count unescaped bytes from $at, or false if the statement ends first.
+     */
+    private static function skip_bytes( $sql, $at, $count ) {
+        $length = strlen( $sql );
+        while ( $count > 0 ) {
+            if ( $at >= $length ) {
+                return false;
+            }
+            $run = strcspn( $sql, "\\'", $at, $count );
+            $at += $run;
+            $count -= $run;
+            if ( $count > 0 ) {
+                if ( $at + 1 >= $length ) {
+                    return false;
+                }
+                $at += 2;
+                $count--;
+            }
+        }
+        return $at;
+    }
+
+    /**
+     * Run statements from $file, starting at $offset, for up to $budget seconds.
+     *
+     * @return array|WP_Error offset, done, queries, errors and the import's throughput so far.
+     */
+    public static function run( $file, $offset = 0, $budget = self::STEP_BUDGET, $old_domain = '', $new_domain = '' ) {
+        if ( ! file_exists( $file ) ) return new WP_Error( 'missing_file', 'Import file not found.' );
+
+        // The previous step saved where the gzip member holding $offset starts
+        $saved = get_option( self::CHECKPOINT_OPTION );
+        $checkpoint = ( is_array( $saved ) && $saved === array_merge( $saved, self::file_key( $file ) ) ) ? $saved : null;
+
+        $reader = new self( $file, $offset, self::READ_BLOCK, $checkpoint );
+        if ( ! $reader->is_open() ) return new WP_Error( 'file_error', 'Cannot open file.' );
+
+        $result = self::import( $reader, $budget, $old_domain, $new_domain );
+        $mark = $reader->checkpoint();
+        $reader->close();
+
+        if ( $mark && ! $result['done'] ) {
+            update_option( self::CHECKPOINT_OPTION, array_merge( $mark, self::file_key( $file ) ), false );
+        } else {
+            delete_option( self::CHECKPOINT_OPTION );
+        }
+        return $result;
+    }
+
+    /**
+     * Identifies the file a checkpoint belongs to (a re-downloaded file is a new one).
+     */
+    private static function file_key( $file ) {
+        clearstatcache( true, $file );
+        return array( 'file' => $file, 'size' => filesize( $file ), 'mtime' => filemtime( $file ) );
+    }
+
+    /**
+     * Run statements from an open reader, from where it stands, for up to $budget seconds.
+     */
+    private static function import( $reader, $budget, $old_domain, $new_domain ) {
+        global $wpdb;
+
+        $offset = $reader->offset();
+        $do_replace = ( ! empty( $old_domain ) && ! empty( $new_domain ) && $old_domain !== $new_domain );
+        $started = microtime( true );
+        $deadline = $started + $budget;
+
+        $suppress = $wpdb->suppress_errors( true );
+        $wpdb->query( 'SET SESSION foreign_key_checks = 0' );
+        $wpdb->query( 'SET SESSION unique_checks = 0' );
+        $wpdb->query( 'SET autocommit = 0' );
+
+        $queries = 0;
+        $errors = array();
+        $batch = 0;
+        $batch_bytes = 0;
+        $done = false;
+
+        while ( microtime( true ) < $deadline ) {
+            $sql = $reader->next_statement();
+            if ( $sql === null ) {
+                $done = true;
+                break;
+            }
+
+            if ( $do_replace && strpos( $sql, $old_domain ) !== false ) {
+                $sql = self::rewrite( $sql, $old_domain, $new_domain );
+            }
+
+            // The dump is already escaped; skip wpdb's per-query charset scan
+            $wpdb->check_current_query = false;
+            if ( $wpdb->query( $sql ) === false ) {
+                $errors[] = $wpdb->last_error;
+            }
+            $queries++;
+            $batch++;
+            $batch_bytes += strlen( $sql );
+
+            if ( $batch >= self::TXN_STATEMENTS || $batch_bytes >= self::TXN_BYTES ) {
+                $wpdb->query( 'COMMIT' );
+                $batch = 0;
+                $batch_bytes = 0;
+            }
+        }
+
+        $wpdb->query( 'COMMIT' );
+        $wpdb->query( 'SET autocommit = 1' );
+        $wpdb->query( 'SET SESSION unique_checks = 1' );
+        $wpdb->query( 'SET SESSION foreign_key_checks = 1' );
+        $wpdb->suppress_errors( $suppress );
+
+        $end = $reader->offset();
+
+        $stats = self::get_stats();
+        $stats['statements'] += $queries;
+        $stats['bytes'] += $end - $offset;
+        $stats['seconds'] += microtime( true ) - $started;
+        $stats['errors'] += count( $errors );
+        if ( $errors ) {
+            $stats['last_error'] = end( $errors );
+        }
+        update_option( self::STATS_OPTION, $stats, false );
+
+        return array_merge( self::format_stats( $stats ), array(
+            'offset' => $end,
+            'done' => $done,
+            'queries' => $queries,
+        ) );
+    }
+
+    public static function get_stats() {
+        return array_merge(
+            array( 'statements' => 0, 'bytes' => 0, 'seconds' => 0, 'errors' => 0, 'last_error' => '' ),
+            (array) get_option( self::STATS_OPTION, array() )
+        );
+    }
+
+    public static function reset_stats() {
+        delete_option( self::STATS_OPTION );
+        delete_option( self::CHECKPOINT_OPTION );
+    }
+
+    private static function format_stats( $stats ) {
+        return array(
+            'statements_total' => (int) $stats['statements'],
+            'bytes_total' => (int) $stats['bytes'],
+            'errors' => (int) $stats['errors'],
+            'last_error' => $stats['last_error'],
+            'statements_per_sec' => $stats['seconds'] > 0 ? round( $stats['statements'] / $stats['seconds'], 1 ) : 0,
+            'mb_per_sec' => $stats['seconds'] > 0 ? round( $stats['bytes'] / 1048576 / $stats['seconds'], 2 ) : 0,
+        );
+    }
+
+    /**
+     * `wp woosuite db-import <file> [--old-domain=<old>] [--new-domain=<new>]`
+     */
+    public static function cli_import( $args, $assoc_args ) {
+        if ( empty( $args[0] ) || ! file_exists( $args[0] ) ) {
+            WP_CLI::error( 'Import file not found.' );
+        }
+
+        self::reset_stats();
+        $old = isset( $assoc_args['old-domain'] ) ? $assoc_args['old-domain'] : '';
+        $new = isset( $assoc_args['new-domain'] ) ? $assoc_args['new-domain'] : '';
+        // One reader for the whole file: a single-member .sql.gz is inflated once
+        $reader = new self( $args[0] );
+        if ( ! $reader->is_open() ) {
+            WP_CLI::error( 'Cannot open file.' );
+        }
+        do {
+            $result = self::import( $reader, 60, $old, $new );
+            WP_CLI::log( sprintf(
+                '%d statements, %s MB, %s statements/s, %s MB/s, %d errors',
+                $result['statements_total'], round( $result['bytes_total'] / 1048576, 1 ), $result['statements_per_sec'], $result['mb_per_sec'], $result['errors']
+            ) );
+        } while ( ! $result['done'] );
+        $reader->close();
+
+        if ( $result['errors'] ) {
+            WP_CLI::warning( sprintf( '%d statements failed, last: %s', $result['errors'], $result['last_error'] ) );
+        }
+        WP_CLI::success( sprintf( 'Imported %d statements from %s.', $result['statements_total'], $args[0] ) );
+    }
+}
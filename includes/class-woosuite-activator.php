@@ -2,29 +2,15 @@
 
 class WooSuite_Activator {
 
-	public static function activate() {
-		global $wpdb;
-
-		$table_name = $wpdb->prefix . 'woosuite_security_logs';
-		$charset_collate = $wpdb->get_charset_collate();
-
-		$sql = "CREATE TABLE $table_name (
-			id bigint(20) NOT NULL AUTO_INCREMENT,
-			event varchar(255) NOT NULL,
-			ip_address varchar(45) NOT NULL,
-			severity varchar(20) NOT NULL,
-			blocked tinyint(1) NOT NULL DEFAULT 1,
-			created_at datetime DEFAULT CURRENT_TIMESTAMP,
-			PRIMARY KEY  (id)
-		) $charset_collate;";
+	// Bump when a table schema changes; maybe_upgrade() re-runs dbDelta.
+	const DB_VERSION = '1.10';
 
-		require_once( ABSPATH . 'wp-admin/includes/upgrade.php' );
-		dbDelta( $sql );
+	public static function activate() {
+		self::create_tables();
 
 		// Set default options if they don't exist
 		add_option( 'woosuite_firewall_enabled', 'yes' );
 		add_option( 'woosuite_spam_protection_enabled', 'yes' );
-		add_option( 'woosuite_threats_blocked_count', 0 );
 
         // Schedule Automatic Scan
         if ( ! wp_next_scheduled( 'woosuite_scheduled_scan' ) ) {
@@ -38,4 +24,107 @@ class WooSuite_Activator {
 
         flush_rewrite_rules();
 	}
+
+	public static function create_tables() {
+		global $wpdb;
+
+		$charset_collate = $wpdb->get_charset_collate();
+
+		require_once( ABSPATH . 'wp-admin/includes/upgrade.php' );
+
+		// Security event log (indexed for the dashboard / AI analysis queries) and its daily rollup
+		require_once WOOSUITE_AI_PATH . 'includes/security/class-woosuite-security-log.php';
+		dbDelta( WooSuite_Security_Log::get_schema( $charset_collate ) );
+		if ( ! wp_next_scheduled( WooSuite_Security_Log::ROLLUP_HOOK ) ) {
+			wp_schedule_event( time(), 'daily', WooSuite_Security_Log::ROLLUP_HOOK );
+		}
+		// Firewall violation counters and IP / CIDR bans (see WooSuite_Ip_Store)
+		require_once WOOSUITE_AI_PATH . 'includes/security/class-woosuite-ip-store.php';
+		dbDelta( WooSuite_Ip_Store::get_schema( $charset_collate ) );
+		if ( ! wp_next_scheduled( WooSuite_Ip_Store::PRUNE_HOOK ) ) {
+			wp_schedule_event( time(), 'hourly', WooSuite_Ip_Store::PRUNE_HOOK );
+		}
+
+		// SEO status index (see WooSuite_Seo_Index)
+		require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-seo-index.php';
+		dbDelta( WooSuite_Seo_Index::get_schema( $charset_collate ) );
+		if ( ! WooSuite_Seo_Index::is_ready() ) {
+			WooSuite_Seo_Index::schedule_backfill();
+		}
+
+		// Dashboard counters (see WooSuite_Counters), seeded by a first recount
+		require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-counters.php';
+		dbDelta( WooSuite_Counters::get_schema( $charset_collate ) );
+		if ( ! wp_next_scheduled( WooSuite_Counters::RECONCILE_HOOK ) ) {
+			wp_schedule_event( time(), 'hourly', WooSuite_Counters::RECONCILE_HOOK );
+		}
+
+		// Parsed AI responses keyed by request (see WooSuite_Ai_Cache)
+		require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-ai-cache.php';
+		dbDelta( WooSuite_Ai_Cache::get_schema( $charset_collate ) );
+
+		// Background jobs and their leased tasks (see WooSuite_Job_Queue); replace the SEO batch options
+		require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-job-queue.php';
+		dbDelta( WooSuite_Job_Queue::get_schema( $charset_collate ) );
+
+		// Deep scan file fingerprints and AI verdict cache (see WooSuite_Security_Scanner)
+		require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-security-scanner.php';
+		dbDelta( WooSuite_Security_Scanner::get_schema( $charset_collate ) );
+
+		// Scan runs, work units and findings (see WooSuite_Scan_Store); replaces the scan options
+		require_once WOOSUITE_AI_PATH . 'includes/security/class-woosuite-scan-store.php';
+		dbDelta( WooSuite_Scan_Store::get_schema( $charset_collate ) );
+
+		// PHP export work units and archive segments (see WooSuite_Db_Export)
+		require_once WOOSUITE_AI_PATH . 'includes/backup/class-woosuite-db-export.php';
+		dbDelta( WooSuite_Db_Export::get_schema( $charset_collate ) );
+
+		self::migrate( get_option( 'woosuite_db_version', '' ) );
+
+		update_option( 'woosuite_db_version', self::DB_VERSION );
+	}
+
+	/**
+	 * One-time cleanup of state that newer tables replaced. Each step runs only when
+	 * the install comes from a version older than the one that introduced it, so
+	 * reactivating or a later schema bump never touches live data.
+	 *
+	 * @param string $from Stored woosuite_db_version ('' on a fresh install).
+	 */
+	private static function migrate( $from ) {
+		// Scan options replaced by WooSuite_Scan_Store
+		if ( version_compare( $from, '1.4', '<' ) ) {
+			foreach ( array( 'woosuite_security_scan_status', 'woosuite_security_scan_queue', 'woosuite_security_scan_results', 'woosuite_last_scan_results' ) as $legacy_option ) {
+				delete_option( $legacy_option );
+			}
+		}
+
+		// Superseded by the threats_blocked counter
+		if ( version_compare( $from, '1.5', '<' ) ) {
+			delete_option( 'woosuite_threats_blocked_count' );
+		}
+
+		// Option lock of the first PHP export, replaced by leased work units
+		if ( version_compare( $from, '1.7', '<' ) ) {
+			delete_option( 'woosuite_export_lock' );
+		}
+
+		// SEO batch options and cron chains replaced by WooSuite_Job_Queue
+		if ( version_compare( $from, '1.9', '<' ) ) {
+			foreach ( array( 'woosuite_seo_batch_status', 'woosuite_seo_batch_filters', 'woosuite_seo_batch_stop_signal', 'woosuite_security_scan_token' ) as $legacy_option ) {
+				delete_option( $legacy_option );
+			}
+			wp_clear_scheduled_hook( 'woosuite_seo_batch_process' );
+			wp_clear_scheduled_hook( 'woosuite_security_deep_scan_process' );
+		}
+	}
+
+	/**
+	 * Create/alter tables after a plugin update (activation hooks do not run on updates).
+	 */
+	public static function maybe_upgrade() {
+		if ( get_option( 'woosuite_db_version' ) !== self::DB_VERSION ) {
+			self::create_tables();
+		}
+	}
 }
@@ -0,0 +1,152 @@
+<?php
+
+/**
+ * Persistent cache of parsed AI responses (wp_woosuite_ai_cache).
+ *
+ * WooSuite_Groq keys each cacheable call by a SHA-1 of its request body (model,
+ * messages and parameters), so a retry, a resumed batch or a re-run of Optimize
+ * All that sends the same prompt is answered from here instead of spending
+ * requests and tokens again. Image SEO is keyed by the image's content hash
+ * (see WooSuite_Image_Input). Entries expire after TTL, and past MAX_ENTRIES the
+ * least recently used ones are evicted. Hits and misses are counted in
+ * WooSuite_Counters (ai_cache_hits / ai_cache_misses).
+ */
+class WooSuite_Ai_Cache {
+
+    const TTL = 30 * DAY_IN_SECONDS;
+
+    const MAX_ENTRIES = 10000;
+
+    // About one write in this many also prunes expired and least recently used rows
+    const PRUNE_EVERY = 50;
+
+    public static function table_name() {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_ai_cache';
+    }
+
+    public static function get_schema( $charset_collate ) {
+        $table_name = self::table_name();
+        return "CREATE TABLE $table_name (
+			cache_key char(40) NOT NULL,
+			op varchar(32) NOT NULL DEFAULT '',
+			response longtext NOT NULL,
+			bytes int(10) unsigned NOT NULL DEFAULT 0,
+			hits int(10) unsigned NOT NULL DEFAULT 0,
+			created_at int(10) unsigned NOT NULL DEFAULT 0,
+			accessed_at int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (cache_key),
+			KEY accessed_at (accessed_at)
+		) $charset_collate;";
+    }
+
+    public static function is_enabled() {
+        return get_option( 'woosuite_ai_cache_enabled', 'yes' ) === 'yes';
+    }
+
+    /**
+     * Cache key for a request body (array) or an already unique string.
+     */
+    public static function key( $request ) {
+        return sha1( is_string( $request ) ? $request : wp_json_encode( $request ) );
+    }
+
+    /**
+     * Cached result for $key, or null on a miss (also when the cache is off).
+     */
+    public static function get( $key ) {
+        global $wpdb;
+        if ( ! self::is_enabled() ) {
+            return null;
+        }
+
+        $table_name = self::table_name();
+        $now = time();
+        $response = $wpdb->get_var( $wpdb->prepare(
+            "SELECT response FROM $table_name WHERE cache_key = %s AND created_at > %d",
+            $key, $now - self::TTL
+        ) );
+        $value = $response !== null ? json_decode( $response, true ) : null;
+
+        if ( ! is_array( $value ) ) {
+            WooSuite_Counters::increment( 'ai_cache_misses' );
+            return null;
+        }
+
+        $wpdb->query( $wpdb->prepare(
+            "UPDATE $table_name SET hits = hits + 1, accessed_at = %d WHERE cache_key = %s",
+            $now, $key
+        ) );
+        WooSuite_Counters::increment( 'ai_cache_hits' );
+        return $value;
+    }
+
+    /**
+     * Store a parsed result. Only successful results are cached (never a WP_Error).
+     */
+    public static function set( $key, $op, $value ) {
+        global $wpdb;
+        if ( ! self::is_enabled() || ! is_array( $value ) ) {
+            return;
+        }
+
+        $response = wp_json_encode( $value );
+        if ( $response === false ) {
+            return;
+        }
+
+        $table_name = self::table_name();
+        $now = time();
+        $wpdb->query( $wpdb->prepare(
+            "REPLACE INTO $table_name (cache_key, op, response, bytes, hits, created_at, accessed_at) VALUES (%s, %s, %s, %d, 0, %d, %d)",
+            $key, substr( $op, 0, 32 ), $response, strlen( $response ), $now, $now
+        ) );
+
+        if ( mt_rand( 1, self::PRUNE_EVERY ) === 1 ) {
+            self::prune();
+        }
+    }
+
+    /**
+     * Drop expired rows, then the least recently used ones above MAX_ENTRIES.
+     */
+    public static function prune() {
+        global $wpdb;
+        $table_name = self::table_name();
+
+        $wpdb->query( $wpdb->prepare( "DELETE FROM $table_name WHERE created_at <= %d", time() - self::TTL ) );
+
+        $excess = (int) $wpdb->get_var( "SELECT COUNT(*) FROM $table_name" ) - self::MAX_ENTRIES;
+        if ( $excess > 0 ) {
+            $wpdb->query( $wpdb->prepare( "DELETE FROM $table_name ORDER BY accessed_at ASC LIMIT %d", $excess ) );
+        }
+    }
+
+    /**
+     * @return int Rows deleted.
+     */
+    public static function flush() {
+        global $wpdb;
+        $table_name = self::table_name();
+        return (int) $wpdb->query( "DELETE FROM $table_name" );
+    }
+
+    public static function get_stats() {
+        global $wpdb;
+        $table_name = self::table_name();
+        $row = $wpdb->get_row( "SELECT COUNT(*) AS entries, COALESCE(SUM(bytes), 0) AS bytes FROM $table_name", ARRAY_A );
+
+        $counters = WooSuite_Counters::get_all();
+        $hits = isset( $counters['ai_cache_hits'] ) ? $counters['ai_cache_hits'] : 0;
+        $misses = isset( $counters['ai_cache_misses'] ) ? $counters['ai_cache_misses'] : 0;
+
+        return array(
+            'enabled' => self::is_enabled(),
+            'entries' => $row ? (int) $row['entries'] : 0,
+            'bytes' => $row ? (int) $row['bytes'] : 0,
+            'hits' => $hits,
+            'misses' => $misses,
+            'hit_rate' => ( $hits + $misses ) > 0 ? round( 100 * $hits / ( $hits + $misses ), 1 ) : 0,
+        );
+    }
+}
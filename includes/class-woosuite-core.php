@@ -34,21 +34,46 @@ class WooSuite_Core {
         // Load the Frontend Output class
         require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-frontend.php';
 
+        // Load the on-disk cache for generated files (sitemaps, llms.txt)
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-file-cache.php';
+
         // Load the Sitemap class
         require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-sitemap.php';
 
         // Load the LLM Txt class
         require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-llm-txt.php';
 
+        // Load Activator (schema upgrades after plugin updates)
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-activator.php';
+
+        // Load the background job queue (SEO batches and deep scans run on its workers)
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-job-queue.php';
+
         // Load Groq & SEO Worker
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-seo-index.php';
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-counters.php';
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-rate-limiter.php';
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-ai-cache.php';
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-image-input.php';
         require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-groq.php';
         require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-seo-worker.php';
 
         // Load Security Scanner
         require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-security-scanner.php';
 
-        // Load Security Quarantine
+        // Load Security Quarantine, scan storage, event log & IP store
         require_once WOOSUITE_AI_PATH . 'includes/security/class-woosuite-security-quarantine.php';
+        require_once WOOSUITE_AI_PATH . 'includes/security/class-woosuite-scan-store.php';
+        require_once WOOSUITE_AI_PATH . 'includes/security/class-woosuite-security-log.php';
+        require_once WOOSUITE_AI_PATH . 'includes/security/class-woosuite-ip-store.php';
+
+        // Load Backup, PHP database export, SQL import, search/replace & deep link classifier
+        require_once WOOSUITE_AI_PATH . 'includes/class-woosuite-backup.php';
+        require_once WOOSUITE_AI_PATH . 'includes/backup/class-woosuite-backup-archive.php';
+        require_once WOOSUITE_AI_PATH . 'includes/backup/class-woosuite-db-export.php';
+        require_once WOOSUITE_AI_PATH . 'includes/backup/class-woosuite-sql-import.php';
+        require_once WOOSUITE_AI_PATH . 'includes/backup/class-woosuite-search-replace.php';
+        require_once WOOSUITE_AI_PATH . 'includes/backup/class-woosuite-link-classifier.php';
 	}
 
     private function define_frontend_hooks() {
@@ -66,6 +91,14 @@ class WooSuite_Core {
         $plugin_llm->init();
     }
 
+    private function define_backup_hooks() {
+        // Migration Passport downloads bypass the REST API so nothing buffers the file
+        if ( isset( $_GET['woosuite_action'] ) && $_GET['woosuite_action'] === 'stream_backup' ) {
+            $plugin_backup = new WooSuite_Backup( $this->plugin_name, $this->version );
+            add_action( 'init', array( $plugin_backup, 'handle_stream_request' ) );
+        }
+    }
+
     private function define_security_hooks() {
         $plugin_security = new WooSuite_Security( $this->plugin_name, $this->version );
         $plugin_security->init();
@@ -85,15 +118,42 @@ class WooSuite_Core {
     }
 
 	public function run() {
+        add_action( 'plugins_loaded', array( 'WooSuite_Activator', 'maybe_upgrade' ) );
+
         $this->define_security_hooks();
         $this->define_frontend_hooks();
         $this->define_sitemap_hooks();
         $this->define_llm_txt_hooks();
+        $this->define_backup_hooks();
 
-        // Initialize SEO Worker (Listener)
-        new WooSuite_Seo_Worker();
+        // Keep the SEO status index and Dashboard counters in sync (Listeners)
+        new WooSuite_Seo_Index();
+        new WooSuite_Counters();
 
-        // Initialize Security Scanner (Listener)
+        // Initialize SEO Worker and Security Scanner (job queue handlers)
+        new WooSuite_Seo_Worker();
         new WooSuite_Security_Scanner();
+
+        // Job queue runners: loopback workers and the once-a-minute watchdog tick
+        add_filter( 'cron_schedules', array( 'WooSuite_Job_Queue', 'add_cron_schedule' ) );
+        add_action( WooSuite_Job_Queue::CRON_HOOK, array( 'WooSuite_Job_Queue', 'tick' ) );
+        add_action( 'wp_ajax_' . WooSuite_Job_Queue::WORKER_ACTION, array( 'WooSuite_Job_Queue', 'handle_loopback' ) );
+        add_action( 'wp_ajax_nopriv_' . WooSuite_Job_Queue::WORKER_ACTION, array( 'WooSuite_Job_Queue', 'handle_loopback' ) );
+
+        // PHP database export job (driven by the Backup UI, continued by WP-Cron and loopback workers)
+        add_action( WooSuite_Db_Export::CRON_HOOK, array( 'WooSuite_Db_Export', 'step' ) );
+        add_action( 'wp_ajax_' . WooSuite_Db_Export::WORKER_ACTION, array( 'WooSuite_Db_Export', 'handle_loopback' ) );
+        add_action( 'wp_ajax_nopriv_' . WooSuite_Db_Export::WORKER_ACTION, array( 'WooSuite_Db_Export', 'handle_loopback' ) );
+
+        // Site-wide search/replace job (started from POST /backup/replace, continued by WP-Cron)
+        add_action( WooSuite_Search_Replace::CRON_HOOK, array( 'WooSuite_Search_Replace', 'step' ) );
+
+        if ( defined( 'WP_CLI' ) && WP_CLI ) {
+            WP_CLI::add_command( 'woosuite worker', array( 'WooSuite_Job_Queue', 'cli_worker' ) );
+            WP_CLI::add_command( 'woosuite deep-scan', array( 'WooSuite_Security_Scanner', 'cli_scan' ) );
+            WP_CLI::add_command( 'woosuite db-export', array( 'WooSuite_Db_Export', 'cli_export' ) );
+            WP_CLI::add_command( 'woosuite db-import', array( 'WooSuite_Sql_Import', 'cli_import' ) );
+            WP_CLI::add_command( 'woosuite search-replace', array( 'WooSuite_Search_Replace', 'cli_replace' ) );
+        }
 	}
 }
@@ -0,0 +1,266 @@
+<?php
+
+/**
+ * Incrementally maintained Dashboard counters (GET /stats).
+ *
+ * Each counter is one row in wp_woosuite_counters, bumped atomically with
+ * INSERT ... ON DUPLICATE KEY UPDATE when the thing it counts changes:
+ * SEO descriptions and alt text (meta hooks), publish/trash/delete of content
+ * and images, blocked firewall events and new orders. The hourly
+ * woosuite_reconcile_counters job recomputes every value from scratch so drift
+ * (raw SQL writes, imports, other plugins) is corrected, and /stats?recount=1
+ * runs the same recount on demand.
+ */
+class WooSuite_Counters {
+
+    const RECONCILE_HOOK = 'woosuite_reconcile_counters';
+
+    const TEXT_TYPES = array( 'post', 'page', 'product' );
+
+    // Any non-empty value counts an item as having a meta description
+    const DESCRIPTION_KEYS = array( '_woosuite_meta_description', '_yoast_wpseo_metadesc', 'rank_math_description' );
+
+    // Optimized state before a pending meta write, keyed by post ID
+    private $before = array();
+
+    // Per request and post: has_description() when first seen, and the
+    // content_optimized delta already applied by meta hooks. wp_insert_post()
+    // writes meta_input after the row is saved as 'publish' but before
+    // transition_post_status, so the transition settles the difference.
+    private $description_at_start = array();
+    private $applied = array();
+
+    // Posts being deleted: their meta rows go too, but the delete hook already adjusted the counters
+    private $deleting = array();
+
+    public function __construct() {
+        foreach ( array( 'add', 'update', 'delete' ) as $action ) {
+            add_filter( "{$action}_post_metadata", array( $this, 'before_meta_change' ), 10, 3 );
+        }
+        add_action( 'added_post_meta', array( $this, 'after_meta_change' ), 10, 3 );
+        add_action( 'updated_post_meta', array( $this, 'after_meta_change' ), 10, 3 );
+        add_action( 'deleted_post_meta', array( $this, 'after_meta_change' ), 10, 3 );
+
+        add_action( 'transition_post_status', array( $this, 'on_status_change' ), 10, 3 );
+        add_action( 'before_delete_post', array( $this, 'on_delete' ) );
+        add_action( 'add_attachment', array( $this, 'on_add_attachment' ) );
+        add_action( 'delete_attachment', array( $this, 'on_delete' ) );
+
+        add_action( 'woocommerce_new_order', array( $this, 'on_new_order' ) );
+        add_action( self::RECONCILE_HOOK, array( __CLASS__, 'reconcile' ) );
+    }
+
+    public static function table_name() {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_counters';
+    }
+
+    public static function get_schema( $charset_collate ) {
+        $table_name = self::table_name();
+        return "CREATE TABLE $table_name (
+			name varchar(64) NOT NULL,
+			value bigint(20) NOT NULL DEFAULT 0,
+			updated_at int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (name)
+		) $charset_collate;";
+    }
+
+    public static function increment( $name, $delta = 1 ) {
+        global $wpdb;
+        if ( $delta == 0 ) {
+            return;
+        }
+        $table_name = self::table_name();
+        $wpdb->query( $wpdb->prepare(
+            "INSERT INTO $table_name (name, value, updated_at) VALUES (%s, %d, %d)
+             ON DUPLICATE KEY UPDATE value = value + VALUES(value), updated_at = VALUES(updated_at)",
+            $name, $delta, time()
+        ) );
+    }
+
+    /**
+     * All counters in one query, e.g. array( 'threats_blocked' => 12, ... ).
+     */
+    public static function get_all() {
+        global $wpdb;
+        $table_name = self::table_name();
+        $rows = $wpdb->get_results( "SELECT name, value FROM $table_name", ARRAY_A );
+
+        $counters = array();
+        foreach ( (array) $rows as $row ) {
+            $counters[ $row['name'] ] = (int) $row['value'];
+        }
+        return $counters;
+    }
+
+    /**
+     * Recompute every counter from the source tables (the old per-request queries).
+     */
+    public static function reconcile() {
+        global $wpdb;
+
+        $types = "'" . implode( "','", self::TEXT_TYPES ) . "'";
+        $keys = "'" . implode( "','", self::DESCRIPTION_KEYS ) . "'";
+        $values = array();
+
+        $values['content_total'] = (int) $wpdb->get_var( "SELECT COUNT(ID) FROM $wpdb->posts WHERE post_type IN ($types) AND post_status = 'publish'" );
+        $values['content_optimized'] = (int) $wpdb->get_var( "
+            SELECT COUNT(DISTINCT p.ID) FROM $wpdb->posts p
+            INNER JOIN $wpdb->postmeta m ON m.post_id = p.ID
+            WHERE p.post_type IN ($types) AND p.post_status = 'publish'
+            AND m.meta_key IN ($keys) AND m.meta_value != ''
+        " );
+
+        $values['images_total'] = (int) $wpdb->get_var( "SELECT COUNT(ID) FROM $wpdb->posts WHERE post_type = 'attachment' AND post_mime_type LIKE 'image/%' AND post_status = 'inherit'" );
+        $values['images_optimized'] = (int) $wpdb->get_var( "
+            SELECT COUNT(DISTINCT p.ID) FROM $wpdb->posts p
+            INNER JOIN $wpdb->postmeta m ON m.post_id = p.ID
+            WHERE p.post_type = 'attachment' AND p.post_mime_type LIKE 'image/%' AND p.post_status = 'inherit'
+            AND m.meta_key = '_wp_attachment_image_alt' AND m.meta_value != ''
+        " );
+
+        $table_logs = $wpdb->prefix . 'woosuite_security_logs';
+        $values['threats_blocked'] = 0;
+        if ( $wpdb->get_var( "SHOW TABLES LIKE '$table_logs'" ) === $table_logs ) {
+            $values['threats_blocked'] = (int) $wpdb->get_var( "SELECT COUNT(*) FROM $table_logs WHERE blocked = 1" );
+        }
+        if ( class_exists( 'WooSuite_Security_Log' ) ) {
+            // Rows past the retention window live on as daily aggregates
+            $values['threats_blocked'] += WooSuite_Security_Log::rolled_up_blocked();
+        }
+
+        $values['orders'] = 0;
+        if ( function_exists( 'wc_get_order_status_counts' ) ) {
+            $values['orders'] = (int) array_sum( wc_get_order_status_counts() );
+        }
+
+        $table_name = self::table_name();
+        $now = time();
+        foreach ( $values as $name => $value ) {
+            $wpdb->query( $wpdb->prepare(
+                "INSERT INTO $table_name (name, value, updated_at) VALUES (%s, %d, %d)
+                 ON DUPLICATE KEY UPDATE value = VALUES(value), updated_at = VALUES(updated_at)",
+                $name, $value, $now
+            ) );
+        }
+        update_option( 'woosuite_counters_reconciled', $now, false );
+
+        return $values;
+    }
+
+    // --- SEO meta ---
+
+    public function before_meta_change( $check, $object_id, $meta_key ) {
+        if ( $this->is_counted_key( $meta_key ) && ! isset( $this->deleting[ $object_id ] ) ) {
+            $this->before[ $object_id ] = $this->counter_state( $object_id );
+            if ( ! isset( $this->description_at_start[ $object_id ] ) ) {
+                $this->description_at_start[ $object_id ] = $this->has_description( $object_id );
+            }
+        }
+        return $check; // Never short-circuit the write
+    }
+
+    public function after_meta_change( $meta_ids, $object_id, $meta_key ) {
+        if ( ! isset( $this->before[ $object_id ] ) || ! $this->is_counted_key( $meta_key ) ) {
+            return;
+        }
+
+        $before = $this->before[ $object_id ];
+        unset( $this->before[ $object_id ] );
+
+        $after = $this->counter_state( $object_id );
+
+        if ( $before && $after && $before[0] === $after[0] && $before[1] !== $after[1] ) {
+            $delta = $after[1] ? 1 : -1;
+            self::increment( $after[0], $delta );
+            if ( $after[0] === 'content_optimized' ) {
+                $this->applied[ $object_id ] = ( isset( $this->applied[ $object_id ] ) ? $this->applied[ $object_id ] : 0 ) + $delta;
+            }
+        }
+    }
+
+    // --- Content and images ---
+
+    public function on_status_change( $new_status, $old_status, $post ) {
+        if ( ! in_array( $post->post_type, self::TEXT_TYPES, true ) || $new_status === $old_status ) {
+            return;
+        }
+        if ( $new_status !== 'publish' && $old_status !== 'publish' ) {
+            return;
+        }
+
+        $id = $post->ID;
+        $applied = isset( $this->applied[ $id ] ) ? $this->applied[ $id ] : 0;
+
+        if ( $new_status === 'publish' ) {
+            // Counted from now on: contribute what it has now
+            $target = $this->has_description( $id ) ? 1 : 0;
+        } else {
+            // No longer counted: remove what it contributed before this request
+            $had = isset( $this->description_at_start[ $id ] ) ? $this->description_at_start[ $id ] : $this->has_description( $id );
+            $target = $had ? -1 : 0;
+        }
+
+        self::increment( 'content_total', ( $new_status === 'publish' ) ? 1 : -1 );
+        self::increment( 'content_optimized', $target - $applied );
+        $this->applied[ $id ] = $target;
+    }
+
+    public function on_add_attachment( $post_id ) {
+        if ( wp_attachment_is_image( $post_id ) ) {
+            self::increment( 'images_total' );
+        }
+    }
+
+    public function on_delete( $post_id ) {
+        $state = $this->counter_state( $post_id );
+        if ( ! $state ) {
+            return;
+        }
+        $this->deleting[ $post_id ] = true;
+
+        $total = ( $state[0] === 'content_optimized' ) ? 'content_total' : 'images_total';
+        self::increment( $total, -1 );
+        if ( $state[1] ) {
+            self::increment( $state[0], -1 );
+        }
+    }
+
+    public function on_new_order( $order_id ) {
+        self::increment( 'orders' );
+    }
+
+    /**
+     * Which "optimized" counter a post belongs to and whether it is optimized,
+     * or null if the post is not counted (wrong type or not published).
+     *
+     * @return array|null array( counter name, bool )
+     */
+    private function counter_state( $post_id ) {
+        $post = get_post( $post_id );
+        if ( ! $post ) {
+            return null;
+        }
+
+        if ( in_array( $post->post_type, self::TEXT_TYPES, true ) && $post->post_status === 'publish' ) {
+            return array( 'content_optimized', $this->has_description( $post_id ) );
+        }
+        if ( $post->post_type === 'attachment' && $post->post_status === 'inherit' && wp_attachment_is_image( $post ) ) {
+            return array( 'images_optimized', get_post_meta( $post_id, '_wp_attachment_image_alt', true ) !== '' );
+        }
+        return null;
+    }
+
+    private function has_description( $post_id ) {
+        foreach ( self::DESCRIPTION_KEYS as $key ) {
+            if ( get_post_meta( $post_id, $key, true ) !== '' ) {
+                return true;
+            }
+        }
+        return false;
+    }
+
+    private function is_counted_key( $meta_key ) {
+        return $meta_key === '_wp_attachment_image_alt' || in_array( $meta_key, self::DESCRIPTION_KEYS, true );
+    }
+}
@@ -6,6 +6,15 @@ class WooSuite_Deactivator {
 		if ( $timestamp ) {
 			wp_unschedule_event( $timestamp, 'woosuite_scheduled_scan' );
 		}
+		wp_clear_scheduled_hook( 'woosuite_reconcile_counters' );
+		wp_clear_scheduled_hook( 'woosuite_security_log_rollup' );
+		wp_clear_scheduled_hook( 'woosuite_ip_store_prune' );
+		wp_clear_scheduled_hook( 'woosuite_export_step' );
+		wp_clear_scheduled_hook( 'woosuite_replace_step' );
+		wp_clear_scheduled_hook( 'woosuite_llms_txt_refresh' );
+		wp_clear_scheduled_hook( 'woosuite_llms_txt_scheduled' );
+		wp_clear_scheduled_hook( 'woosuite_llms_full_build' );
+		wp_clear_scheduled_hook( 'woosuite_job_queue_tick' );
         flush_rewrite_rules();
 	}
 }
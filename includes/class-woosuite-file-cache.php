@@ -0,0 +1,134 @@
+<?php
+
+/**
+ * Generated public files (sitemaps, llms.txt) cached under
+ * wp-content/uploads/woosuite-cache and served with ETag / Last-Modified.
+ *
+ * Files are written to a temp file through a callback that receives the
+ * handle (so generators can stream row by row) and renamed into place, so a
+ * concurrent reader never sees a partial file.
+ */
+class WooSuite_File_Cache {
+
+    private $dir;
+
+    public function __construct( $subdir = '' ) {
+        $upload = wp_upload_dir( null, false );
+        $this->dir = trailingslashit( $upload['basedir'] ) . 'woosuite-cache' . ( $subdir ? '/' . $subdir : '' );
+    }
+
+    public function path( $key ) {
+        return $this->dir . '/' . sanitize_file_name( $key );
+    }
+
+    /**
+     * Path of a cached file, or false if missing or older than $max_age seconds.
+     */
+    public function get( $key, $max_age = 0 ) {
+        $path = $this->path( $key );
+        if ( ! is_file( $path ) ) {
+            return false;
+        }
+        if ( $max_age > 0 && filemtime( $path ) < time() - $max_age ) {
+            return false;
+        }
+        return $path;
+    }
+
+    /**
+     * Generate a file via $writer( $handle ) and atomically move it into place.
+     *
+     * @return string|false Path of the new file.
+     */
+    public function put( $key, $writer ) {
+        if ( ! wp_mkdir_p( $this->dir ) ) {
+            return false;
+        }
+        if ( ! file_exists( $this->dir . '/index.php' ) ) {
+            @file_put_contents( $this->dir . '/index.php', '<?php // Silence is golden.' );
+        }
+
+        $path = $this->path( $key );
+        $tmp = $path . '.' . uniqid( '', true ) . '.tmp';
+        $handle = @fopen( $tmp, 'wb' );
+        if ( ! $handle ) {
+            return false;
+        }
+
+        try {
+            call_user_func( $writer, $handle );
+        } catch ( Throwable $e ) {
+            fclose( $handle );
+            @unlink( $tmp );
+            throw $e;
+        }
+
+        fclose( $handle );
+        if ( ! @rename( $tmp, $path ) ) {
+            @unlink( $tmp );
+            return false;
+        }
+        return $path;
+    }
+
+    /**
+     * Handle for a file built across several requests (e.g. a cron job appending
+     * batches). $append = false starts over. Publish it with commit_partial().
+     */
+    public function open_partial( $key, $append = true ) {
+        if ( ! wp_mkdir_p( $this->dir ) ) {
+            return false;
+        }
+        return @fopen( $this->path( $key ) . '.partial', $append ? 'ab' : 'wb' );
+    }
+
+    public function commit_partial( $key ) {
+        $partial = $this->path( $key ) . '.partial';
+        return is_file( $partial ) && @rename( $partial, $this->path( $key ) );
+    }
+
+    public function delete( $key ) {
+        $path = $this->path( $key );
+        if ( is_file( $path ) ) {
+            @unlink( $path );
+        }
+    }
+
+    public function delete_prefix( $prefix ) {
+        foreach ( (array) glob( $this->dir . '/' . sanitize_file_name( $prefix ) . '*' ) as $path ) {
+            if ( is_file( $path ) ) {
+                @unlink( $path );
+            }
+        }
+    }
+
+    /**
+     * Send a cached file with validators; answers 304 when the client's copy is current.
+     */
+    public function serve( $path, $content_type ) {
+        $mtime = filemtime( $path );
+        $size = filesize( $path );
+        $etag = '"' . md5( $path . $mtime . $size ) . '"';
+        $last_modified = gmdate( 'D, d M Y H:i:s', $mtime ) . ' GMT';
+
+        header( 'Content-Type: ' . $content_type );
+        header( 'ETag: ' . $etag );
+        header( 'Last-Modified: ' . $last_modified );
+        header( 'Cache-Control: public, max-age=300' );
+
+        $if_none_match = isset( $_SERVER['HTTP_IF_NONE_MATCH'] ) ? trim( $_SERVER['HTTP_IF_NONE_MATCH'] ) : '';
+        $if_modified_since = isset( $_SERVER['HTTP_IF_MODIFIED_SINCE'] ) ? strtotime( $_SERVER['HTTP_IF_MODIFIED_SINCE'] ) : false;
+
+        $not_modified = $if_none_match !== ''
+            ? in_array( $etag, array_map( 'trim', explode( ',', $if_none_match ) ), true )
+            : ( $if_modified_since && $if_modified_since >= $mtime );
+
+        if ( $not_modified ) {
+            status_header( 304 );
+            return;
+        }
+
+        header( 'Content-Length: ' . $size );
+        readfile( $path );
+    }
+}
@@ -5,6 +5,13 @@ class WooSuite_Groq {
     private $api_key;
     private $api_url = 'https://api.groq.com/openai/v1/chat/completions';
     private $model_id;
+    private $limiter;
+
+    // How long call_api may block waiting for the shared rate limiter
+    private $max_wait = 10;
+
+    // Skip cached responses (deliberate regeneration); fresh results still replace the cached ones
+    private $bypass_cache = false;
 
     // Model Constants
     const MODEL_MAIN = 'meta-llama/llama-4-scout-17b-16e-instruct'; // Unified Text & Vision (Production)
@@ -13,6 +20,9 @@ class WooSuite_Groq {
     const MODEL_VISION = 'meta-llama/llama-4-scout-17b-16e-instruct'; // Vision (Scout is Multimodal)
     const MODEL_GUARD = 'meta-llama/llama-guard-4-12b'; // Safety
 
+    // Part of the Image SEO cache key: bump when the image prompt or its output changes
+    const IMAGE_SEO_PROMPT_VERSION = 1;
+
     public function __construct( $api_key = null ) {
         // Allow passing key explicitly for testing connection before saving
         if ( ! empty( $api_key ) ) {
@@ -40,6 +50,16 @@ class WooSuite_Groq {
                 $this->model_id = $custom_model;
             }
         }
+
+        $this->limiter = new WooSuite_Rate_Limiter();
+    }
+
+    public function set_max_wait( $seconds ) {
+        $this->max_wait = $seconds;
+    }
+
+    public function set_cache_bypass( $bypass ) {
+        $this->bypass_cache = (bool) $bypass;
     }
 
     private function get_model( $default_model ) {
@@ -68,6 +88,10 @@ class WooSuite_Groq {
     }
 
     public function generate_seo_meta( $item ) {
+        return $this->run( $this->seo_meta_call( $item ) );
+    }
+
+    private function seo_meta_call( $item ) {
         if ( empty( $this->api_key ) ) {
             return new WP_Error( 'missing_key', 'Groq API Key is missing.' );
         }
@@ -134,7 +158,142 @@ class WooSuite_Groq {
             'response_format' => array( 'type' => 'json_object' )
         );
 
-        return $this->call_api( $body, true );
+        return $this->prepare( $body, true, 'seo_meta' );
+    }
+
+    /**
+     * Generate SEO meta for several items in one request.
+     *
+     * @param array $items Keyed by a stable item key (post ID); same shape as generate_seo_meta().
+     * @return array|WP_Error Results keyed like $items (each an array or WP_Error), or a
+     *                        rate_limit WP_Error if the batch request itself was throttled.
+     */
+    public function generate_seo_meta_batch( $items ) {
+        return $this->run( $this->seo_meta_batch_call( $items ) );
+    }
+
+    private function seo_meta_batch_call( $items ) {
+        if ( empty( $this->api_key ) ) {
+            return new WP_Error( 'missing_key', 'Groq API Key is missing.' );
+        }
+
+        // Items answered before (by any batch) are not sent again
+        $results = array();
+        $cache_keys = array();
+        foreach ( $items as $key => $item ) {
+            $cache_keys[ $key ] = WooSuite_Ai_Cache::key( array( 'seo_meta_batch', $this->get_model( self::MODEL_MAIN ), $item ) );
+            $cached = $this->bypass_cache ? null : WooSuite_Ai_Cache::get( $cache_keys[ $key ] );
+            if ( $cached !== null ) {
+                $results[ $key ] = $cached;
+            }
+        }
+        $items = array_diff_key( $items, $results );
+        if ( empty( $items ) ) {
+            return array( 'cached' => $results );
+        }
+
+        $rewrite_title = false;
+        $blocks = array();
+        foreach ( $items as $key => $item ) {
+            // Keep each item short so a batch stays well inside the context window
+            $description = mb_substr( $item['description'], 0, 1500 );
+            $block = "[item key=\"$key\"]\nType: {$item['type']}\nName: {$item['name']}\nDescription: $description";
+            if ( isset( $item['price'] ) ) {
+                $block .= "\nPrice: {$item['price']}";
+            }
+            $blocks[] = $block;
+            if ( ! empty( $item['rewrite_title'] ) ) {
+                $rewrite_title = true;
+            }
+        }
+
+        $rewrite_instruction = "";
+        $simplified_field = "";
+        if ( $rewrite_title ) {
+            $rewrite_instruction = "5. simplifiedTitle: A clean, concise product name (max 6 words). Remove keyword stuffing. E.g., 'Modern Velvet Office Chair'.";
+            $simplified_field = ",\n                        \"simplifiedTitle\": \"Clean product name\"";
+        }
+
+        $count = count( $items );
+        $content = implode( "\n\n", $blocks );
+
+        $prompt = "
+            You are an SEO expert. Generate metadata for each of these $count items.
+
+            $content
+
+            Instructions (apply to every item independently):
+            1. Title: Keyword rich, max 60 chars. Summarize the product name.
+            2. Description: Enticing, max 160 chars.
+            3. LLM Summary: Fact-dense, under 50 words.
+            4. Tags: Relevant keywords, max 5, comma separated.
+            $rewrite_instruction
+
+            NEGATIVE CONSTRAINTS (CRITICAL):
+            - Do NOT include shipping, warranty, or logistics info (e.g. 'DHL', 'Free Shipping').
+            - Do NOT include competitor names (e.g. 'Amazon', 'eBay', 'Walmart').
+            - Do NOT include random numbers or SKU codes unless part of the model name.
+
+            Return strictly JSON with exactly one entry per item, copying each item's key unchanged:
+            {
+                \"items\": [
+                    {
+                        \"key\": \"item key\",
+                        \"title\": \"Max 60 chars meta title\",
+                        \"description\": \"Max 160 chars meta description\",
+                        \"llmSummary\": \"Concise summary for AI (max 50 words)\",
+                        \"tags\": \"comma, separated, tags, max 5\"$simplified_field
+                    }
+                ]
+            }
+        ";
+
+        $body = array(
+            'model' => $this->get_model( self::MODEL_MAIN ),
+            'messages' => array(
+                array(
+                    'role' => 'system',
+                    'content' => 'You are a helpful SEO assistant that outputs strictly JSON.'
+                ),
+                array(
+                    'role' => 'user',
+                    'content' => $prompt
+                )
+            ),
+            'max_tokens' => 300 * $count,
+            'response_format' => array( 'type' => 'json_object' )
+        );
+
+        return $this->prepare( $body, true, '', function( $response ) use ( $items, $results, $cache_keys, $count ) {
+            if ( is_wp_error( $response ) && $response->get_error_code() === 'rate_limit' ) {
+                return $response;
+            }
+
+            $entries = ( ! is_wp_error( $response ) && isset( $response['items'] ) && is_array( $response['items'] ) ) ? $response['items'] : array();
+            foreach ( $entries as $entry ) {
+                if ( ! is_array( $entry ) || ! isset( $entry['key'] ) || ! isset( $items[ (string) $entry['key'] ] ) ) {
+                    continue;
+                }
+                if ( empty( $entry['title'] ) || empty( $entry['description'] ) ) {
+                    continue;
+                }
+                $key = (string) $entry['key'];
+                unset( $entry['key'] );
+                $results[ $key ] = $entry;
+                WooSuite_Ai_Cache::set( $cache_keys[ $key ], 'seo_meta_batch', $entry );
+            }
+
+            // Items the model dropped, truncated or mangled go back to the single-item prompt
+            $missing = array_diff_key( $items, $results );
+            if ( ! empty( $missing ) ) {
+                $this->log_error( 'Batch SEO: ' . count( $missing ) . " of $count items unparsed, retrying individually." );
+            }
+            foreach ( $missing as $key => $item ) {
+                $results[ $key ] = $this->generate_seo_meta( $item );
+            }
+
+            return $results;
+        } );
     }
 
     public function analyze_migration_readiness( $system_report, $old_domain = '', $new_domain = '' ) {
@@ -328,7 +487,7 @@ class WooSuite_Groq {
             'response_format' => array( 'type' => 'json_object' )
         );
 
-        return $this->call_api( $body, true );
+        return $this->call_api( $body, true, 'rewrite' );
     }
 
     public function analyze_security_threat( $code_snippet, $filename ) {
@@ -371,41 +530,42 @@ class WooSuite_Groq {
             'response_format' => array( 'type' => 'json_object' )
         );
 
-        return $this->call_api( $body, true );
+        return $this->call_api( $body, true, 'security_threat' );
     }
 
-    public function analyze_deep_links( $content_batch, $old_domain ) {
+    /**
+     * Judge old-domain links the local classifier could not resolve.
+     *
+     * @param array $links [ { id, url, context, candidates } ].
+     */
+    public function analyze_deep_links( $links, $old_domain, $new_home ) {
         if ( empty( $this->api_key ) && strpos( $this->api_url, 'groq.com' ) !== false ) {
             return new WP_Error( 'missing_key', 'Groq API Key is missing.' );
         }
 
-        $json_batch = json_encode( $content_batch );
+        $json_links = json_encode( $links );
 
         $prompt = "
             You are a WordPress Database Expert specializing in migration.
 
-            Task: Detect broken or absolute links to the OLD DOMAIN: '$old_domain' inside the following content batch.
-
-            Context: The user is migrating to a new domain. Standard search/replace might miss links inside JSON blobs, serialized arrays, or complex HTML attributes.
+            Task: The site moved from '$old_domain' to '$new_home'. Each link below still points to the old domain,
+            and its path does not exist on the new site as it is (or matches several pages).
 
-            Content Batch (JSON):
-            $json_batch
+            Links (JSON, with surrounding text and the new site's pages whose slug matches, if any):
+            $json_links
 
             Instructions:
-            1. Scan the content for any occurrence of '$old_domain'.
-            2. If found, identify the exact 'original_string' (the full URL or the substring needing replacement).
-            3. Propose a 'suggested_fix' (replace with relative URL or placeholder '{{NEW_DOMAIN}}').
-            4. If the link is inside a serialized string (s:5:\"...\"), flag it as 'serialized'.
-            5. If no issues found in an item, omit it.
+            1. For each link, propose a 'suggested_fix': one of its candidates if one clearly fits the context,
+               otherwise the same path on '$new_home'.
+            2. Keep query strings and fragments.
+            3. Omit a link if it should stay as it is (e.g. it refers to the old site on purpose).
 
             Output strictly JSON object:
             {
-                \"issues\": [
+                \"links\": [
                     {
-                        \"source_id\": 123,
-                        \"location\": \"post_content\",
-                        \"original_string\": \"http://old-domain.com/image.jpg\",
-                        \"suggested_fix\": \"/wp-content/uploads/image.jpg\",
+                        \"id\": 0,
+                        \"suggested_fix\": \"$new_home/shop/blue-shirt/\",
                         \"confidence\": \"High\"
                     }
                 ]
@@ -427,37 +587,41 @@ class WooSuite_Groq {
             'response_format' => array( 'type' => 'json_object' )
         );
 
-        return $this->call_api( $body, true );
+        return $this->call_api( $body, true, 'deep_links' );
+    }
+
+    /**
+     * Alt text and title for an image.
+     *
+     * @param int|string $image Attachment ID (read from disk, see WooSuite_Image_Input) or image URL.
+     */
+    public function generate_image_seo( $image, $filename, $product_context = null ) {
+        return $this->run( $this->image_seo_call( $image, $filename ) );
     }
 
-    public function generate_image_seo( $url, $filename, $product_context = null ) {
+    private function image_seo_call( $image, $filename ) {
         if ( empty( $this->api_key ) && strpos( $this->api_url, 'groq.com' ) !== false ) {
             return new WP_Error( 'missing_key', 'Groq API Key is missing.' );
         }
 
-        // 1. Check Image Size
-        $head = wp_remote_head( $url, array( 'timeout' => 5, 'sslverify' => false ) );
-        if ( ! is_wp_error( $head ) ) {
-             $size = wp_remote_retrieve_header( $head, 'content-length' );
-             if ( $size && $size > 4194304 ) { // 4MB
-                 return new WP_Error( 'image_too_large', 'Image is too large for AI analysis (>4MB). Skipping.' );
-             }
-        }
+        $input = new WooSuite_Image_Input( $image );
 
-        // 2. Fetch image
-        $image_response = wp_remote_get( $url, array( 'timeout' => 20, 'sslverify' => false ) );
-        if ( is_wp_error( $image_response ) || wp_remote_retrieve_response_code( $image_response ) !== 200 ) {
-            return new WP_Error( 'image_fetch_error', 'Could not fetch image from server: ' . $url );
+        // Keyed by the picture (not the filename in the prompt), the vision model and the prompt
+        // version: the same file shared by several products is analysed once
+        $hash = $input->get_hash();
+        if ( is_wp_error( $hash ) ) {
+            return $hash;
         }
-
-        $image_data = wp_remote_retrieve_body( $image_response );
-        if ( empty( $image_data ) ) {
-            return new WP_Error( 'image_empty', 'Image data is empty.' );
+        $cache_key = WooSuite_Ai_Cache::key( 'image_seo:' . $this->get_model( self::MODEL_VISION ) . ':v' . self::IMAGE_SEO_PROMPT_VERSION . ':' . $hash );
+        $cached = $this->bypass_cache ? null : WooSuite_Ai_Cache::get( $cache_key );
+        if ( $cached !== null ) {
+            return array( 'cached' => $cached );
         }
 
-        $base64_data = base64_encode( $image_data );
-        $mime_type = wp_remote_retrieve_header( $image_response, 'content-type' ) ?: 'image/jpeg';
-        $data_url = "data:$mime_type;base64,$base64_data";
+        $data_url = $input->get_data_url();
+        if ( is_wp_error( $data_url ) ) {
+            return $data_url;
+        }
 
         // Sanitize filename
         $clean_filename = $filename;
@@ -496,7 +660,12 @@ class WooSuite_Groq {
             'response_format' => array( 'type' => 'json_object' )
         );
 
-        return $this->call_api( $body, true );
+        return $this->prepare( $body, true, '', function( $result ) use ( $cache_key ) {
+            if ( ! is_wp_error( $result ) && ! empty( $result['altText'] ) ) {
+                WooSuite_Ai_Cache::set( $cache_key, 'image_seo', $result );
+            }
+            return $result;
+        } );
     }
 
     private function log_error( $message ) {
@@ -509,27 +678,203 @@ class WooSuite_Groq {
         update_option( 'woosuite_debug_log', $logs );
     }
 
-    private function call_api( $body, $json_mode = true ) {
-        $response = wp_remote_post( $this->api_url, array(
+    private function call_api( $body, $json_mode = true, $cache_op = '' ) {
+        return $this->run( $this->prepare( $body, $json_mode, $cache_op ) );
+    }
+
+    /**
+     * A call ready to send: the request body plus how to read its response.
+     * 'cached' holds the answer instead when the cache already has it.
+     *
+     * @param string        $cache_op Cache the parsed result under this operation name
+     *                                (see WooSuite_Ai_Cache); empty for calls that must not be cached.
+     * @param callable|null $finish   Turns the parsed result (or WP_Error) into the method's result.
+     */
+    private function prepare( $body, $json_mode = true, $cache_op = '', $finish = null ) {
+        $call = array(
+            'body' => $body,
+            'json_mode' => $json_mode,
+            'cache_op' => $cache_op,
+            'cache_key' => $cache_op !== '' ? WooSuite_Ai_Cache::key( array( $body, $json_mode ) ) : null,
+            'finish' => $finish,
+        );
+        if ( $call['cache_key'] && ! $this->bypass_cache ) {
+            $cached = WooSuite_Ai_Cache::get( $call['cache_key'] );
+            if ( $cached !== null ) {
+                $call['cached'] = $cached;
+            }
+        }
+        return $call;
+    }
+
+    /**
+     * Send one prepared call and return its result.
+     */
+    private function run( $call ) {
+        if ( is_wp_error( $call ) ) {
+            return $call;
+        }
+        if ( array_key_exists( 'cached', $call ) ) {
+            return $call['cached'];
+        }
+
+        // Shared site-wide budget (see WooSuite_Rate_Limiter)
+        $wait = $this->limiter->wait( $this->estimate_tokens( $call['body'] ), $this->max_wait );
+        if ( $wait > 0 ) {
+            return $this->rate_limit_error( $wait );
+        }
+
+        return $this->complete( $call, wp_remote_post( $this->api_url, $this->request_args( $call['body'] ) ) );
+    }
+
+    /**
+     * Run several calls with up to $concurrency requests in flight (Requests::request_multiple,
+     * curl_multi under the hood), each one still taking its share of the shared rate limiter.
+     * Calls go out in waves; $on_result gets each result as soon as its response is in.
+     * After a 429, or once the limiter has no budget left, the calls not sent yet
+     * are reported as rate_limit errors and not sent.
+     *
+     * @param array    $jobs      Keyed; each array( 'seo_meta', $item ), array( 'seo_meta_batch', $items )
+     *                            or array( 'image_seo', $image, $filename ).
+     * @param callable $on_result function( $key, $result ).
+     */
+    public function run_concurrent( $jobs, $concurrency, $on_result ) {
+        $requests = class_exists( 'WpOrg\\Requests\\Requests' ) ? 'WpOrg\\Requests\\Requests' : ( class_exists( 'Requests' ) ? 'Requests' : null );
+        // Proxied sites go through wp_remote_post, which knows the proxy settings
+        $proxy = class_exists( 'WP_HTTP_Proxy' ) ? new WP_HTTP_Proxy() : null;
+        $sequential = $concurrency < 2 || ! $requests || ( $proxy && $proxy->is_enabled() );
+
+        $pending = array();
+        foreach ( $jobs as $key => $job ) {
+            $call = $this->job_call( $job );
+            if ( is_wp_error( $call ) || array_key_exists( 'cached', $call ) ) {
+                call_user_func( $on_result, $key, $this->run( $call ) );
+            } else {
+                $pending[ $key ] = $call;
+            }
+        }
+
+        $throttled = null;
+        while ( ! empty( $pending ) && ! $throttled ) {
+            if ( $sequential ) {
+                $key = key( $pending );
+                $result = $this->run( array_shift( $pending ) );
+                if ( is_wp_error( $result ) && $result->get_error_code() === 'rate_limit' ) {
+                    $throttled = $result;
+                }
+                call_user_func( $on_result, $key, $result );
+                continue;
+            }
+
+            // Budget for the next wave: wait for the first call only, then take what is free now
+            $wave = array();
+            foreach ( $pending as $key => $call ) {
+                if ( count( $wave ) >= $concurrency ) {
+                    break;
+                }
+                $tokens = $this->estimate_tokens( $call['body'] );
+                $wait = empty( $wave ) ? $this->limiter->wait( $tokens, $this->max_wait ) : $this->limiter->acquire( $tokens );
+                if ( $wait > 0 ) {
+                    if ( empty( $wave ) ) {
+                        $throttled = $this->rate_limit_error( $wait );
+                    }
+                    break;
+                }
+                $wave[ $key ] = $call;
+                unset( $pending[ $key ] );
+            }
+            if ( empty( $wave ) ) {
+                break;
+            }
+
+            $multi = array();
+            foreach ( $wave as $key => $call ) {
+                $args = $this->request_args( $call['body'] );
+                $multi[ $key ] = array(
+                    'url' => $this->api_url,
+                    'type' => 'POST',
+                    'headers' => $args['headers'],
+                    'data' => $args['body'],
+                    'options' => array(
+                        'timeout' => $args['timeout'],
+                        'verify' => ABSPATH . WPINC . '/certificates/ca-bundle.crt',
+                        // Called by the transport as each response arrives
+                        'complete' => function( $response, $key ) use ( $wave, $on_result, &$throttled ) {
+                            if ( $response instanceof Exception ) {
+                                $response = new WP_Error( 'http_request_failed', $response->getMessage() );
+                            } else {
+                                $response = ( new WP_HTTP_Requests_Response( $response ) )->to_array();
+                            }
+                            $result = $this->complete( $wave[ $key ], $response );
+                            if ( is_wp_error( $result ) && $result->get_error_code() === 'rate_limit' ) {
+                                $throttled = $result;
+                            }
+                            call_user_func( $on_result, $key, $result );
+                        },
+                    ),
+                );
+            }
+            $requests::request_multiple( $multi );
+        }
+
+        foreach ( $pending as $key => $call ) {
+            call_user_func( $on_result, $key, $throttled ? $throttled : $this->rate_limit_error( $this->limiter->get_retry_after() ) );
+        }
+    }
+
+    private function job_call( $job ) {
+        switch ( $job[0] ) {
+            case 'seo_meta':
+                return $this->seo_meta_call( $job[1] );
+            case 'seo_meta_batch':
+                return $this->seo_meta_batch_call( $job[1] );
+            case 'image_seo':
+                return $this->image_seo_call( $job[1], $job[2] );
+        }
+        return new WP_Error( 'invalid_job', 'Unknown AI job: ' . $job[0] );
+    }
+
+    private function request_args( $body ) {
+        return array(
             'headers' => array(
                 'Content-Type' => 'application/json',
                 'Authorization' => 'Bearer ' . $this->api_key
             ),
             'body'    => json_encode( $body ),
             'timeout' => 60
-        ) );
+        );
+    }
 
+    private function rate_limit_error( $wait ) {
+        return new WP_Error( 'rate_limit', 'Groq API Rate Limit Reached. Please wait a moment.', array( 'retry_after' => (int) max( 1, ceil( $wait ) ) ) );
+    }
+
+    /**
+     * Parse a response, cache it if the call is cacheable and apply the call's finish step.
+     */
+    private function complete( $call, $response ) {
+        $result = $this->parse_response( $response, $call['json_mode'] );
+        if ( $call['cache_key'] && ! is_wp_error( $result ) ) {
+            WooSuite_Ai_Cache::set( $call['cache_key'], $call['cache_op'], $result );
+        }
+        return $call['finish'] ? call_user_func( $call['finish'], $result ) : $result;
+    }
+
+    private function parse_response( $response, $json_mode ) {
         if ( is_wp_error( $response ) ) {
             $this->log_error( 'Connection Error: ' . $response->get_error_message() );
             return $response;
         }
 
+        $this->limiter->record_response( $response );
+
         $code = wp_remote_retrieve_response_code( $response );
         $raw_body = wp_remote_retrieve_body( $response );
 
         if ( $code === 429 ) {
-            $this->log_error( 'Groq Rate Limit Reached (429).' );
-            return new WP_Error( 'rate_limit', 'Groq API Rate Limit Reached. Please wait a moment.' );
+            $retry_after = max( (float) wp_remote_retrieve_header( $response, 'retry-after' ), $this->limiter->get_retry_after() );
+            $this->log_error( 'Groq Rate Limit Reached (429). Retry after ' . ceil( $retry_after ) . 's.' );
+            return $this->rate_limit_error( $retry_after );
         }
 
         if ( $code !== 200 ) {
@@ -574,6 +919,29 @@ class WooSuite_Groq {
         return array( 'status' => $code, 'raw_response' => $data, 'content' => $content );
     }
 
+    /**
+     * Rough prompt + completion token count, for the TPM bucket.
+     */
+    private function estimate_tokens( $body ) {
+        $chars = 0;
+        $images = 0;
+        foreach ( $body['messages'] as $message ) {
+            if ( is_string( $message['content'] ) ) {
+                $chars += strlen( $message['content'] );
+                continue;
+            }
+            foreach ( $message['content'] as $part ) {
+                if ( $part['type'] === 'text' ) {
+                    $chars += strlen( $part['text'] );
+                } else {
+                    $images++;
+                }
+            }
+        }
+        $completion = isset( $body['max_tokens'] ) ? $body['max_tokens'] : 500;
+        return (int) ceil( $chars / 4 ) + $images * 1200 + $completion;
+    }
+
     private function extract_json_from_text( $text ) {
         // 1. Try Markdown Code Block (Generic)
         if ( preg_match( '/```(?:json)?\s*(.*?)```/s', $text, $matches ) ) {
@@ -0,0 +1,193 @@
+<?php
+
+/**
+ * Image input for vision calls (WooSuite_Groq::generate_image_seo).
+ *
+ * Attachments are read from disk, not through their public URL: the largest
+ * uncropped intermediate size that fits MAX_EDGE is sent, or a downscaled copy
+ * when WordPress has none. get_hash() is the SHA-1 of the attached file, so the
+ * same picture uploaded for several products (variations, duplicates) shares
+ * one cached result. Images that are not on disk (offloaded media, plain URLs)
+ * are still fetched over HTTP.
+ */
+class WooSuite_Image_Input {
+
+    // Longest edge sent to the vision model; it downsamples bigger images anyway
+    const MAX_EDGE = 1024;
+
+    // Intermediate sizes smaller than this lose too much detail
+    const MIN_EDGE = 512;
+
+    const MAX_BYTES = 4194304; // 4MB
+
+    private $attachment_id = 0;
+    private $url = '';
+    private $file = '';
+
+    // Body of a remote image, kept between get_hash() and get_data_url()
+    private $remote = null;
+    private $hash = null;
+
+    /**
+     * @param int|string $image Attachment ID or image URL.
+     */
+    public function __construct( $image ) {
+        if ( is_numeric( $image ) ) {
+            $this->attachment_id = (int) $image;
+            $this->url = (string) wp_get_attachment_url( $this->attachment_id );
+            $file = get_attached_file( $this->attachment_id );
+            if ( $file && is_readable( $file ) ) {
+                $this->file = $file;
+            }
+        } else {
+            $this->url = (string) $image;
+        }
+    }
+
+    /**
+     * Content hash of the full-size image (before any downscaling).
+     *
+     * @return string|WP_Error
+     */
+    public function get_hash() {
+        if ( $this->hash === null ) {
+            if ( $this->file ) {
+                $this->hash = sha1_file( $this->file );
+            } else {
+                $remote = $this->fetch_remote();
+                if ( is_wp_error( $remote ) ) {
+                    return $remote;
+                }
+                $this->hash = sha1( $remote['body'] );
+            }
+        }
+        return $this->hash;
+    }
+
+    /**
+     * data: URL of the image to send.
+     *
+     * @return string|WP_Error
+     */
+    public function get_data_url() {
+        if ( ! $this->file ) {
+            $remote = $this->fetch_remote();
+            if ( is_wp_error( $remote ) ) {
+                return $remote;
+            }
+            return 'data:' . $remote['mime'] . ';base64,' . base64_encode( $remote['body'] );
+        }
+
+        $source = $this->pick_source();
+        if ( is_wp_error( $source ) ) {
+            return $source;
+        }
+
+        $data = file_get_contents( $source['path'] );
+        if ( ! empty( $source['temporary'] ) ) {
+            @unlink( $source['path'] );
+        }
+        if ( empty( $data ) ) {
+            return new WP_Error( 'image_empty', 'Image data is empty.' );
+        }
+
+        return 'data:' . $source['mime'] . ';base64,' . base64_encode( $data );
+    }
+
+    /**
+     * File to send: an intermediate size, the attached file if it is small
+     * enough, or a downscaled temporary copy.
+     *
+     * @return array|WP_Error { path, mime, temporary }
+     */
+    private function pick_source() {
+        $meta = wp_get_attachment_metadata( $this->attachment_id );
+        $dir = dirname( $this->file );
+
+        if ( ! empty( $meta['width'] ) && ! empty( $meta['height'] ) ) {
+            $ratio = $meta['width'] / $meta['height'];
+            $best = null;
+            $sizes = ! empty( $meta['sizes'] ) && is_array( $meta['sizes'] ) ? $meta['sizes'] : array();
+            foreach ( $sizes as $size ) {
+                if ( empty( $size['file'] ) || empty( $size['width'] ) || empty( $size['height'] ) ) {
+                    continue;
+                }
+                $edge = max( $size['width'], $size['height'] );
+                // Same aspect ratio: cropped sizes (thumbnails) cut part of the picture off
+                if ( $edge < self::MIN_EDGE || $edge > self::MAX_EDGE || abs( $size['width'] / $size['height'] - $ratio ) > 0.02 * $ratio ) {
+                    continue;
+                }
+                if ( ( $best === null || $edge > max( $best['width'], $best['height'] ) ) && is_readable( $dir . '/' . $size['file'] ) ) {
+                    $best = $size;
+                }
+            }
+            if ( $best ) {
+                return array(
+                    'path' => $dir . '/' . $best['file'],
+                    'mime' => ! empty( $best['mime-type'] ) ? $best['mime-type'] : $this->mime_type( $best['file'] ),
+                );
+            }
+            if ( max( $meta['width'], $meta['height'] ) <= self::MAX_EDGE ) {
+                return $this->whole_file();
+            }
+        }
+
+        $editor = wp_get_image_editor( $this->file );
+        if ( ! is_wp_error( $editor ) && ! is_wp_error( $editor->resize( self::MAX_EDGE, self::MAX_EDGE, false ) ) ) {
+            $editor->set_quality( 80 );
+            // Unique per call: concurrent requests for the same image must not share (and unlink) one file
+            $saved = $editor->save( trailingslashit( get_temp_dir() ) . 'woosuite-vision-' . $this->get_hash() . '-' . getmypid() . '-' . uniqid() . '.jpg', 'image/jpeg' );
+            if ( ! is_wp_error( $saved ) && ! empty( $saved['path'] ) ) {
+                return array( 'path' => $saved['path'], 'mime' => $saved['mime-type'], 'temporary' => true );
+            }
+        }
+
+        // No image editor on this server
+        return $this->whole_file();
+    }
+
+    private function whole_file() {
+        if ( filesize( $this->file ) > self::MAX_BYTES ) {
+            return new WP_Error( 'image_too_large', 'Image is too large for AI analysis (>4MB). Skipping.' );
+        }
+        return array( 'path' => $this->file, 'mime' => $this->mime_type( $this->file ) );
+    }
+
+    private function mime_type( $file ) {
+        $type = wp_check_filetype( $file );
+        return ! empty( $type['type'] ) ? $type['type'] : 'image/jpeg';
+    }
+
+    private function fetch_remote() {
+        if ( $this->remote !== null ) {
+            return $this->remote;
+        }
+        if ( ! $this->url ) {
+            return new WP_Error( 'image_fetch_error', 'Image not found.' );
+        }
+
+        $head = wp_remote_head( $this->url, array( 'timeout' => 5, 'sslverify' => false ) );
+        if ( ! is_wp_error( $head ) ) {
+            $size = wp_remote_retrieve_header( $head, 'content-length' );
+            if ( $size && $size > self::MAX_BYTES ) {
+                return new WP_Error( 'image_too_large', 'Image is too large for AI analysis (>4MB). Skipping.' );
+            }
+        }
+
+        $response = wp_remote_get( $this->url, array( 'timeout' => 20, 'sslverify' => false ) );
+        if ( is_wp_error( $response ) || wp_remote_retrieve_response_code( $response ) !== 200 ) {
+            return new WP_Error( 'image_fetch_error', 'Could not fetch image from server: ' . $this->url );
+        }
+
+        $body = wp_remote_retrieve_body( $response );
+        if ( empty( $body ) ) {
+            return new WP_Error( 'image_empty', 'Image data is empty.' );
+        }
+
+        $this->remote = array(
+            'body' => $body,
+            'mime' => wp_remote_retrieve_header( $response, 'content-type' ) ?: 'image/jpeg',
+        );
+        return $this->remote;
+    }
+}
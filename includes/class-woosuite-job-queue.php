@@ -0,0 +1,521 @@
+<?php
+
+/**
+ * Background job queue (wp_woosuite_jobs, wp_woosuite_tasks).
+ *
+ * A job is one background run (e.g. an SEO batch) with its progress counters;
+ * its tasks are the items to work on. Workers claim tasks with a lease (a single
+ * conditional UPDATE, so two workers never hold the same task), keep it alive
+ * with heartbeat() while they work and finish() each task. A task whose lease
+ * runs out (its worker died) is claimed again by the next worker, and failed
+ * after MAX_ATTEMPTS expired claims.
+ *
+ * Runners drain every registered handler (the SEO worker and the deep scan):
+ * loopback requests to admin-ajax, which start a successor while work remains,
+ * a once-a-minute WP-Cron tick that restarts them if the chain dies, and the
+ * long-lived `wp woosuite worker` command. Up to woosuite_job_workers (default 3)
+ * loopback runners work in parallel.
+ */
+class WooSuite_Job_Queue {
+
+    const WORKER_ACTION = 'woosuite_job_worker';
+    const CRON_HOOK = 'woosuite_job_queue_tick';
+    const CRON_SCHEDULE = 'woosuite_every_minute';
+
+    // Seconds a claim is held without a heartbeat
+    const LEASE = 120;
+
+    // Claims that expired before the task was finished; the next one fails it
+    const MAX_ATTEMPTS = 3;
+
+    // Seconds of work per loopback request or cron tick (capped at half of max_execution_time)
+    const TICK_BUDGET = 20;
+
+    // Finished jobs kept per type (older ones and their tasks are dropped)
+    const KEEP_JOBS = 10;
+
+    // type => array( 'run' => callable( $budget ): bool, 'summary' => callable(): array( 'free', 'workers' ) )
+    private static $handlers = array();
+
+    public static function get_schema( $charset_collate ) {
+        $jobs = self::table( 'jobs' );
+        $tasks = self::table( 'tasks' );
+
+        return array(
+            "CREATE TABLE $jobs (
+			id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+			type varchar(32) NOT NULL,
+			status varchar(20) NOT NULL,
+			args longtext NOT NULL,
+			message varchar(255) NOT NULL DEFAULT '',
+			total int(10) unsigned NOT NULL DEFAULT 0,
+			done int(10) unsigned NOT NULL DEFAULT 0,
+			failed int(10) unsigned NOT NULL DEFAULT 0,
+			paused_until int(10) unsigned NOT NULL DEFAULT 0,
+			created_at int(10) unsigned NOT NULL DEFAULT 0,
+			updated_at int(10) unsigned NOT NULL DEFAULT 0,
+			finished_at int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (id),
+			KEY type (type,status)
+		) $charset_collate;",
+            "CREATE TABLE $tasks (
+			id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+			job_id bigint(20) unsigned NOT NULL,
+			item_id bigint(20) unsigned NOT NULL,
+			status varchar(10) NOT NULL DEFAULT 'queued',
+			attempts tinyint(3) unsigned NOT NULL DEFAULT 0,
+			lease int(10) unsigned NOT NULL DEFAULT 0,
+			owner varchar(40) NOT NULL DEFAULT '',
+			error varchar(255) NOT NULL DEFAULT '',
+			PRIMARY KEY  (id),
+			KEY claim (job_id,status,lease),
+			KEY owner (owner)
+		) $charset_collate;",
+        );
+    }
+
+    private static function table( $name ) {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_' . $name;
+    }
+
+    // --- Jobs ---
+
+    /**
+     * Open a job (status 'running') and prune old jobs of that type.
+     *
+     * @return int Job ID.
+     */
+    public static function create_job( $type, $args = array(), $message = '' ) {
+        global $wpdb;
+        $jobs = self::table( 'jobs' );
+
+        $wpdb->insert( $jobs, array(
+            'type' => $type,
+            'status' => 'running',
+            'args' => wp_json_encode( $args ),
+            'message' => substr( $message, 0, 255 ),
+            'created_at' => time(),
+            'updated_at' => time(),
+        ) );
+        $job_id = (int) $wpdb->insert_id;
+
+        $old = $wpdb->get_col( $wpdb->prepare(
+            "SELECT id FROM $jobs WHERE type = %s ORDER BY id DESC LIMIT 1000 OFFSET %d",
+            $type, self::KEEP_JOBS
+        ) );
+        if ( $old ) {
+            $ids = implode( ',', array_map( 'intval', $old ) );
+            $wpdb->query( "DELETE FROM " . self::table( 'tasks' ) . " WHERE job_id IN ($ids)" );
+            $wpdb->query( "DELETE FROM $jobs WHERE id IN ($ids)" );
+        }
+
+        return $job_id;
+    }
+
+    /**
+     * Queue one task per item ID, in multi-row INSERTs.
+     */
+    public static function add_tasks( $job_id, $item_ids ) {
+        global $wpdb;
+        $tasks = self::table( 'tasks' );
+
+        foreach ( array_chunk( array_map( 'intval', $item_ids ), 500 ) as $chunk ) {
+            $rows = array();
+            foreach ( $chunk as $item_id ) {
+                $rows[] = $wpdb->prepare( "(%d, %d)", $job_id, $item_id );
+            }
+            $wpdb->query( "INSERT INTO $tasks (job_id, item_id) VALUES " . implode( ',', $rows ) );
+        }
+
+        $wpdb->query( $wpdb->prepare(
+            "UPDATE " . self::table( 'jobs' ) . " SET total = total + %d, updated_at = %d WHERE id = %d",
+            count( $item_ids ), time(), $job_id
+        ) );
+    }
+
+    public static function get_job( $job_id ) {
+        global $wpdb;
+        $jobs = self::table( 'jobs' );
+        return self::decode_job( $wpdb->get_row( $wpdb->prepare( "SELECT * FROM $jobs WHERE id = %d", $job_id ), ARRAY_A ) );
+    }
+
+    public static function get_latest_job( $type ) {
+        global $wpdb;
+        $jobs = self::table( 'jobs' );
+        return self::decode_job( $wpdb->get_row( $wpdb->prepare( "SELECT * FROM $jobs WHERE type = %s ORDER BY id DESC LIMIT 1", $type ), ARRAY_A ) );
+    }
+
+    private static function decode_job( $row ) {
+        if ( ! $row ) {
+            return null;
+        }
+        foreach ( array( 'id', 'total', 'done', 'failed', 'paused_until', 'created_at', 'updated_at', 'finished_at' ) as $key ) {
+            $row[ $key ] = (int) $row[ $key ];
+        }
+        $args = json_decode( $row['args'], true );
+        $row['args'] = is_array( $args ) ? $args : array();
+        return $row;
+    }
+
+    /**
+     * Latest job of $type if workers should be on it: running, or paused and due
+     * again (flipped back to running here).
+     */
+    public static function get_active_job( $type ) {
+        global $wpdb;
+        $job = self::get_latest_job( $type );
+        if ( ! $job ) {
+            return null;
+        }
+
+        if ( $job['status'] === 'paused' && $job['paused_until'] <= time() ) {
+            $wpdb->query( $wpdb->prepare(
+                "UPDATE " . self::table( 'jobs' ) . " SET status = 'running', paused_until = 0, updated_at = %d WHERE id = %d AND status = 'paused'",
+                time(), $job['id']
+            ) );
+            $job['status'] = 'running';
+            $job['paused_until'] = 0;
+        }
+
+        return $job['status'] === 'running' ? $job : null;
+    }
+
+    public static function update_job( $job_id, $fields ) {
+        global $wpdb;
+        if ( isset( $fields['message'] ) ) {
+            $fields['message'] = substr( $fields['message'], 0, 255 );
+        }
+        $fields['updated_at'] = time();
+        return $wpdb->update( self::table( 'jobs' ), $fields, array( 'id' => (int) $job_id ) );
+    }
+
+    /**
+     * Add to a job's done / failed counters in place.
+     */
+    public static function add_to_job( $job_id, $counters ) {
+        global $wpdb;
+        $set = array();
+        foreach ( array( 'done', 'failed' ) as $column ) {
+            if ( ! empty( $counters[ $column ] ) ) {
+                $set[] = "$column = $column + " . (int) $counters[ $column ];
+            }
+        }
+        if ( $set ) {
+            $wpdb->query( $wpdb->prepare(
+                "UPDATE " . self::table( 'jobs' ) . " SET " . implode( ', ', $set ) . ", updated_at = %d WHERE id = %d",
+                time(), $job_id
+            ) );
+        }
+    }
+
+    /**
+     * Stop handing out tasks until $until, then wake a runner up.
+     */
+    public static function pause_job( $job_id, $until, $message ) {
+        self::update_job( $job_id, array( 'status' => 'paused', 'paused_until' => (int) $until, 'message' => $message ) );
+        wp_schedule_single_event( (int) $until, self::CRON_HOOK );
+    }
+
+    /**
+     * Mark a running job complete and drop its finished tasks (failed ones are
+     * kept with their error). True only for the caller that actually flipped it.
+     */
+    public static function complete_job( $job_id, $message = '' ) {
+        global $wpdb;
+        $flipped = (bool) $wpdb->query( $wpdb->prepare(
+            "UPDATE " . self::table( 'jobs' ) . " SET status = 'complete', message = %s, updated_at = %d, finished_at = %d WHERE id = %d AND status = 'running'",
+            $message, time(), time(), $job_id
+        ) );
+        if ( $flipped ) {
+            $wpdb->query( $wpdb->prepare( "DELETE FROM " . self::table( 'tasks' ) . " WHERE job_id = %d AND status = 'done'", $job_id ) );
+        }
+        return $flipped;
+    }
+
+    /**
+     * Cancel the unfinished jobs of a type (a new run replaces them) and drop their tasks.
+     */
+    public static function cancel_jobs( $type, $message = 'Cancelled.' ) {
+        global $wpdb;
+        $jobs = self::table( 'jobs' );
+        $ids = array_map( 'intval', $wpdb->get_col( $wpdb->prepare(
+            "SELECT id FROM $jobs WHERE type = %s AND status IN ('running', 'paused', 'stopped')",
+            $type
+        ) ) );
+        if ( empty( $ids ) ) {
+            return;
+        }
+
+        $ids = implode( ',', $ids );
+        $wpdb->query( $wpdb->prepare( "UPDATE $jobs SET status = 'cancelled', message = %s, updated_at = %d WHERE id IN ($ids)", $message, time() ) );
+        $wpdb->query( "DELETE FROM " . self::table( 'tasks' ) . " WHERE job_id IN ($ids)" );
+    }
+
+    // --- Tasks ---
+
+    /**
+     * Lease up to $limit free (or expired) tasks of a job.
+     *
+     * @return array Task rows (id, item_id, attempts, owner); one owner per claim.
+     */
+    public static function claim( $job_id, $limit, $lease = self::LEASE ) {
+        global $wpdb;
+        $tasks = self::table( 'tasks' );
+        $owner = uniqid( '', true );
+
+        $claimed = $wpdb->query( $wpdb->prepare(
+            "UPDATE $tasks SET lease = %d, owner = %s, attempts = attempts + 1 WHERE job_id = %d AND status = 'queued' AND lease <= %d ORDER BY id LIMIT %d",
+            time() + $lease, $owner, $job_id, time(), $limit
+        ) );
+        if ( ! $claimed ) {
+            return array();
+        }
+
+        return (array) $wpdb->get_results( $wpdb->prepare(
+            "SELECT id, item_id, attempts, owner FROM $tasks WHERE owner = %s AND status = 'queued' ORDER BY id",
+            $owner
+        ), ARRAY_A );
+    }
+
+    /**
+     * Fail the tasks whose lease expired MAX_ATTEMPTS times (their worker died on
+     * them every time), so a crashing item cannot hold the queue up.
+     *
+     * @return array Item IDs that were failed.
+     */
+    public static function reap( $job_id ) {
+        global $wpdb;
+        $tasks = self::table( 'tasks' );
+
+        $rows = (array) $wpdb->get_results( $wpdb->prepare(
+            "SELECT id, item_id FROM $tasks WHERE job_id = %d AND status = 'queued' AND lease > 0 AND lease <= %d AND attempts >= %d",
+            $job_id, time(), self::MAX_ATTEMPTS
+        ), ARRAY_A );
+        if ( empty( $rows ) ) {
+            return array();
+        }
+
+        $reaped = $wpdb->query( $wpdb->prepare(
+            "UPDATE $tasks SET status = 'failed', lease = 0, owner = '', error = %s WHERE id IN (" . implode( ',', array_map( 'intval', wp_list_pluck( $rows, 'id' ) ) ) . ") AND status = 'queued' AND lease <= %d",
+            sprintf( 'Worker stopped while processing this item (%d attempts).', self::MAX_ATTEMPTS ), time()
+        ) );
+        self::add_to_job( $job_id, array( 'failed' => (int) $reaped ) );
+
+        return array_map( 'intval', wp_list_pluck( $rows, 'item_id' ) );
+    }
+
+    /**
+     * Extend the lease of every task still held by $owner.
+     */
+    public static function heartbeat( $owner, $lease = self::LEASE ) {
+        global $wpdb;
+        $wpdb->query( $wpdb->prepare(
+            "UPDATE " . self::table( 'tasks' ) . " SET lease = %d WHERE owner = %s AND status = 'queued'",
+            time() + $lease, $owner
+        ) );
+    }
+
+    /**
+     * Mark a claimed task 'done' or 'failed' and count it on its job. False if the
+     * lease was taken over by another worker (it counts the task instead).
+     */
+    public static function finish( $job_id, $task, $status, $error = '' ) {
+        global $wpdb;
+        $finished = (bool) $wpdb->query( $wpdb->prepare(
+            "UPDATE " . self::table( 'tasks' ) . " SET status = %s, lease = 0, error = %s WHERE id = %d AND owner = %s AND status = 'queued'",
+            $status, substr( $error, 0, 255 ), $task['id'], $task['owner']
+        ) );
+        if ( $finished ) {
+            self::add_to_job( $job_id, array( $status === 'done' ? 'done' : 'failed' => 1 ) );
+        }
+        return $finished;
+    }
+
+    /**
+     * Hand a claimed task back untouched (e.g. rate limited); the claim does not count as an attempt.
+     */
+    public static function release( $task ) {
+        global $wpdb;
+        $wpdb->query( $wpdb->prepare(
+            "UPDATE " . self::table( 'tasks' ) . " SET lease = 0, owner = '', attempts = attempts - 1 WHERE id = %d AND owner = %s AND status = 'queued'",
+            $task['id'], $task['owner']
+        ) );
+    }
+
+    /**
+     * @return array array( 'free' => claimable tasks, 'leased' => tasks held, 'workers' => distinct holders )
+     */
+    public static function count_tasks( $job_id ) {
+        global $wpdb;
+        $now = time();
+        $row = $wpdb->get_row( $wpdb->prepare(
+            "SELECT SUM(lease <= %d) AS free, SUM(lease > %d) AS leased, COUNT(DISTINCT IF(lease > %d, owner, NULL)) AS workers
+             FROM " . self::table( 'tasks' ) . " WHERE job_id = %d AND status = 'queued'",
+            $now, $now, $now, $job_id
+        ), ARRAY_A );
+
+        return array(
+            'free' => (int) $row['free'],
+            'leased' => (int) $row['leased'],
+            'workers' => (int) $row['workers'],
+        );
+    }
+
+    // --- Runners ---
+
+    /**
+     * @param callable $run     function( $budget ): bool, true while the handler has work left.
+     * @param callable $summary function(): array( 'free' => units nobody holds, 'workers' => live workers ).
+     */
+    public static function register_handler( $type, $run, $summary ) {
+        self::$handlers[ $type ] = array( 'run' => $run, 'summary' => $summary );
+    }
+
+    /**
+     * Work on every handler until $budget seconds are used up. Handlers are taken
+     * in random order so parallel runners do not all start on the same one.
+     *
+     * @return bool True while any handler has work left.
+     */
+    public static function run( $budget = null ) {
+        if ( $budget === null ) {
+            $max = (int) ini_get( 'max_execution_time' );
+            $budget = ( $max > 0 ) ? min( self::TICK_BUDGET, max( 5, (int) ( $max / 2 ) ) ) : self::TICK_BUDGET;
+        }
+        $deadline = microtime( true ) + $budget;
+
+        $types = array_keys( self::$handlers );
+        shuffle( $types );
+
+        $remaining = false;
+        foreach ( $types as $type ) {
+            $left = $deadline - microtime( true );
+            if ( $left < 1 ) {
+                $remaining = true;
+                break;
+            }
+            if ( call_user_func( self::$handlers[ $type ]['run'], $left ) ) {
+                $remaining = true;
+            }
+        }
+        return $remaining;
+    }
+
+    /**
+     * Make sure work gets done without a browser: schedule the watchdog tick and
+     * start loopback runners for free work, up to woosuite_job_workers in parallel.
+     */
+    public static function dispatch() {
+        $free = 0;
+        $workers = 0;
+        foreach ( self::$handlers as $handler ) {
+            $summary = call_user_func( $handler['summary'] );
+            $free += $summary['free'];
+            $workers += $summary['workers'];
+        }
+
+        if ( $free + $workers === 0 ) {
+            return;
+        }
+        if ( ! wp_next_scheduled( self::CRON_HOOK ) ) {
+            wp_schedule_event( time() + 60, self::CRON_SCHEDULE, self::CRON_HOOK );
+        }
+
+        $token = get_option( 'woosuite_job_token', '' );
+        if ( ! $token ) {
+            $token = wp_generate_password( 32, false );
+            update_option( 'woosuite_job_token', $token, false );
+        }
+
+        $max_workers = max( 1, (int) get_option( 'woosuite_job_workers', 3 ) );
+        $spawn = min( $free, $max_workers - $workers );
+        for ( $i = 0; $i < $spawn; $i++ ) {
+            wp_remote_post( admin_url( 'admin-ajax.php?action=' . self::WORKER_ACTION ), array(
+                'timeout' => 0.01,
+                'blocking' => false,
+                'sslverify' => false,
+                'body' => array( 'token' => $token ),
+            ) );
+        }
+    }
+
+    /**
+     * Loopback runner (admin-ajax, authenticated by woosuite_job_token).
+     */
+    public static function handle_loopback() {
+        $token = isset( $_POST['token'] ) ? sanitize_text_field( wp_unslash( $_POST['token'] ) ) : '';
+        $expected = (string) get_option( 'woosuite_job_token', '' );
+        if ( $expected === '' || ! hash_equals( $expected, $token ) ) {
+            wp_die( '', '', array( 'response' => 403 ) );
+        }
+
+        ignore_user_abort( true );
+        if ( function_exists( 'set_time_limit' ) ) set_time_limit( 300 );
+        if ( self::run() ) {
+            self::dispatch();
+        }
+        wp_die();
+    }
+
+    /**
+     * Watchdog tick: restarts the loopback chain if it died and wakes paused jobs.
+     * Unscheduled once there is nothing left to do.
+     */
+    public static function tick() {
+        if ( self::run() ) {
+            self::dispatch();
+            return;
+        }
+        wp_clear_scheduled_hook( self::CRON_HOOK );
+    }
+
+    public static function add_cron_schedule( $schedules ) {
+        $schedules[ self::CRON_SCHEDULE ] = array( 'interval' => 60, 'display' => 'Every Minute (WooSuite jobs)' );
+        return $schedules;
+    }
+
+    /**
+     * `wp woosuite worker [--concurrency=<n>] [--stop-when-empty]`: a long-lived
+     * runner. --concurrency sets the AI requests this process keeps in flight
+     * (woosuite_ai_concurrency); start more processes to add workers, each claims
+     * its own tasks. Without --stop-when-empty it waits for new jobs.
+     */
+    public static function cli_worker( $args, $assoc_args ) {
+        if ( isset( $assoc_args['concurrency'] ) ) {
+            $concurrency = max( 1, min( 16, (int) $assoc_args['concurrency'] ) );
+            add_filter( 'pre_option_woosuite_ai_concurrency', function() use ( $concurrency ) {
+                return $concurrency;
+            } );
+        }
+        $stop_when_empty = ! empty( $assoc_args['stop-when-empty'] );
+
+        $idle = false;
+        while ( true ) {
+            if ( self::run( 60 ) ) {
+                $idle = false;
+                $lines = array();
+                foreach ( self::$handlers as $type => $handler ) {
+                    $summary = call_user_func( $handler['summary'] );
+                    if ( $summary['free'] + $summary['workers'] > 0 ) {
+                        $lines[] = sprintf( '%s: %d queued, %d workers', $type, $summary['free'], $summary['workers'] );
+                    }
+                }
+                WP_CLI::log( $lines ? implode( '; ', $lines ) : 'Waiting (paused or held by other workers)...' );
+                sleep( 1 ); // Paused jobs and tasks leased by other workers
+                continue;
+            }
+
+            if ( $stop_when_empty ) {
+                break;
+            }
+            if ( ! $idle ) {
+                WP_CLI::log( 'Queue empty, waiting for jobs...' );
+                $idle = true;
+            }
+            sleep( 5 );
+        }
+
+        WP_CLI::success( 'Queue empty.' );
+    }
+}
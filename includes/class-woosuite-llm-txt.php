@@ -4,16 +4,41 @@ class WooSuite_LLM_Txt {
 
     private $plugin_name;
     private $version;
+    private $cache;
+
+    // llms.txt is small: regenerated (debounced) when its inputs change, plus twice daily
+    const REFRESH_HOOK = 'woosuite_llms_txt_refresh';
+    const SCHEDULE_HOOK = 'woosuite_llms_txt_scheduled';
+
+    // llms-full.txt covers the whole catalog: built in batches by a background job
+    const FULL_BUILD_HOOK = 'woosuite_llms_full_build';
+    const FULL_STATE_OPTION = 'woosuite_llms_full_state';
+    const FULL_BATCH = 200;
+    const FULL_TYPES = array( 'product', 'post', 'page' );
+
+    const REWRITE_VERSION = '2';
 
     public function __construct( $plugin_name, $version ) {
         $this->plugin_name = $plugin_name;
         $this->version = $version;
+        $this->cache = new WooSuite_File_Cache( 'llms' );
     }
 
     public function init() {
         add_filter( 'query_vars', array( $this, 'add_query_vars' ) );
         add_action( 'init', array( $this, 'add_rewrite_rules' ) );
         add_action( 'template_redirect', array( $this, 'render_llms_txt' ) );
+
+        add_action( self::REFRESH_HOOK, array( $this, 'regenerate' ) );
+        add_action( self::SCHEDULE_HOOK, array( $this, 'run_scheduled' ) );
+        add_action( self::FULL_BUILD_HOOK, array( $this, 'build_full_batch' ) );
+
+        // Inputs of llms.txt: summaries of listed items, bestseller ranking, recent posts
+        add_action( 'added_post_meta', array( $this, 'on_meta_change' ), 10, 3 );
+        add_action( 'updated_post_meta', array( $this, 'on_meta_change' ), 10, 3 );
+        add_action( 'deleted_post_meta', array( $this, 'on_meta_change' ), 10, 3 );
+        add_action( 'transition_post_status', array( $this, 'on_status_change' ), 10, 3 );
+        add_action( 'save_post', array( $this, 'on_save_post' ) );
     }
 
     public function add_query_vars( $vars ) {
@@ -23,67 +48,293 @@ class WooSuite_LLM_Txt {
 
     public function add_rewrite_rules() {
         add_rewrite_rule( '^llms\.txt$', 'index.php?woosuite_llms_txt=1', 'top' );
+        add_rewrite_rule( '^llms-full\.txt$', 'index.php?woosuite_llms_txt=full', 'top' );
+
+        if ( get_option( 'woosuite_llms_rewrite_version' ) !== self::REWRITE_VERSION ) {
+            flush_rewrite_rules( false );
+            update_option( 'woosuite_llms_rewrite_version', self::REWRITE_VERSION );
+        }
+
+        if ( ! wp_next_scheduled( self::SCHEDULE_HOOK ) ) {
+            wp_schedule_event( time() + HOUR_IN_SECONDS, 'twicedaily', self::SCHEDULE_HOOK );
+        }
     }
 
     public function render_llms_txt() {
-        if ( get_query_var( 'woosuite_llms_txt' ) ) {
+        $variant = get_query_var( 'woosuite_llms_txt' );
+        if ( ! $variant ) {
+            return;
+        }
+
+        if ( $variant === 'full' ) {
+            $this->render_full();
+            return;
+        }
+
+        // Precomputed; only the very first hit (or a wiped cache) generates inline
+        $path = $this->cache->get( 'llms.txt' );
+        if ( ! $path ) {
+            $path = $this->regenerate();
+        }
+
+        if ( $path ) {
+            $this->cache->serve( $path, 'text/plain; charset=utf-8' );
+        } else {
             header( 'Content-Type: text/plain; charset=utf-8' );
+            $out = fopen( 'php://output', 'wb' );
+            $this->write_llms_txt( $out );
+            fclose( $out );
+        }
+        exit;
+    }
 
-            // Site Info
-            echo "# " . get_bloginfo( 'name' ) . "\n";
-            echo get_bloginfo( 'description' ) . "\n\n";
-
-            echo "## About\n";
-            echo "This file provides context for AI agents crawling " . get_site_url() . ".\n\n";
-
-            // Sitemap Link
-            echo "## Sitemap\n";
-            echo get_site_url() . "/sitemap.xml\n\n";
-
-            // Top Products (if WooCommerce)
-            if ( class_exists( 'WooCommerce' ) ) {
-                echo "## Top Products\n";
-                $args = array(
-                    'limit' => 20,
-                    'orderby' => 'popularity', // Best selling
-                    'order' => 'DESC',
-                    'status' => 'publish',
-                );
-                $products = wc_get_products( $args );
-                foreach ( $products as $product ) {
-                    echo "- " . $product->get_name() . ": " . $product->get_permalink() . "\n";
-                    $summary = get_post_meta( $product->get_id(), '_woosuite_llm_summary', true );
-                    if ( $summary ) {
-                        // Clean summary of newlines to keep format clean
-                        $summary = str_replace( array("\r", "\n"), " ", $summary );
-                        echo "  Summary: " . $summary . "\n";
-                    } else {
-                         // Fallback to short description
-                         $desc = strip_tags( $product->get_short_description() ?: $product->get_description() );
-                         $desc = substr( $desc, 0, 150 ) . '...';
-                         echo "  Description: " . str_replace( array("\r", "\n"), " ", $desc ) . "\n";
-                    }
-                }
-                echo "\n";
-            }
+    /**
+     * Rebuild the cached llms.txt.
+     *
+     * @return string|false Path of the file.
+     */
+    public function regenerate() {
+        $listed = array();
+        $path = $this->cache->put( 'llms.txt', function( $handle ) use ( &$listed ) {
+            $listed = $this->write_llms_txt( $handle );
+        } );
+
+        // Remember which items appear, so only their summary edits trigger a refresh
+        update_option( 'woosuite_llms_txt_ids', $listed, false );
+        return $path;
+    }
 
-            // Recent Posts
-            echo "## Recent Posts\n";
-            $recent_posts = get_posts( array( 'numberposts' => 10, 'post_status' => 'publish' ) );
-            foreach ( $recent_posts as $post ) {
-                echo "- " . $post->post_title . ": " . get_permalink( $post->ID ) . "\n";
-                $summary = get_post_meta( $post->ID, '_woosuite_llm_summary', true );
+    public function run_scheduled() {
+        $this->regenerate();
+        if ( $this->full_enabled() ) {
+            $this->start_full_build();
+        }
+    }
+
+    /**
+     * Write llms.txt to $handle.
+     *
+     * @return array IDs of the products and posts listed.
+     */
+    public function write_llms_txt( $handle ) {
+        $listed = array();
+        $this->write_header( $handle );
+
+        // Top Products (if WooCommerce)
+        if ( class_exists( 'WooCommerce' ) ) {
+            fwrite( $handle, "## Top Products\n" );
+            $args = array(
+                'limit' => 20,
+                'orderby' => 'popularity', // Best selling
+                'order' => 'DESC',
+                'status' => 'publish',
+            );
+            $products = wc_get_products( $args );
+            foreach ( $products as $product ) {
+                $listed[] = $product->get_id();
+                fwrite( $handle, "- " . $product->get_name() . ": " . $product->get_permalink() . "\n" );
+                $summary = get_post_meta( $product->get_id(), '_woosuite_llm_summary', true );
                 if ( $summary ) {
-                    $summary = str_replace( array("\r", "\n"), " ", $summary );
-                    echo "  Summary: " . $summary . "\n";
+                    // Clean summary of newlines to keep format clean
+                    fwrite( $handle, "  Summary: " . $this->one_line( $summary ) . "\n" );
                 } else {
-                     $excerpt = strip_tags( $post->post_excerpt ?: $post->post_content );
-                     $excerpt = substr( $excerpt, 0, 150 ) . '...';
-                     echo "  Excerpt: " . str_replace( array("\r", "\n"), " ", $excerpt ) . "\n";
+                    // Fallback to short description
+                    $desc = strip_tags( $product->get_short_description() ?: $product->get_description() );
+                    fwrite( $handle, "  Description: " . $this->one_line( substr( $desc, 0, 150 ) . '...' ) . "\n" );
                 }
             }
+            fwrite( $handle, "\n" );
+        }
+
+        // Recent Posts
+        fwrite( $handle, "## Recent Posts\n" );
+        $recent_posts = get_posts( array( 'numberposts' => 10, 'post_status' => 'publish' ) );
+        foreach ( $recent_posts as $post ) {
+            $listed[] = $post->ID;
+            $this->write_post_entry( $handle, $post, 'Excerpt', 150 );
+        }
+
+        return $listed;
+    }
+
+    // --- llms-full.txt ---
+
+    private function full_enabled() {
+        return get_option( 'woosuite_llms_full_enabled', 'no' ) === 'yes';
+    }
+
+    private function render_full() {
+        if ( ! $this->full_enabled() ) {
+            return; // Let WordPress 404
+        }
 
+        $path = $this->cache->get( 'llms-full.txt' );
+        if ( $path ) {
+            $this->cache->serve( $path, 'text/plain; charset=utf-8' );
             exit;
         }
+
+        // Never build in the request: kick the background job and ask the client to come back
+        $this->start_full_build( false );
+        status_header( 503 );
+        header( 'Retry-After: 120' );
+        header( 'Content-Type: text/plain; charset=utf-8' );
+        echo "llms-full.txt is being generated. Please retry shortly.\n";
+        exit;
+    }
+
+    /**
+     * Start (or restart) the background build. $restart = false leaves a running build alone.
+     */
+    public function start_full_build( $restart = true ) {
+        $state = get_option( self::FULL_STATE_OPTION );
+        if ( ! $restart && is_array( $state ) && $state['status'] === 'building' && $state['updated'] > time() - 600 ) {
+            return;
+        }
+
+        $handle = $this->cache->open_partial( 'llms-full.txt', false );
+        if ( ! $handle ) {
+            return;
+        }
+        $this->write_header( $handle );
+        fclose( $handle );
+
+        update_option( self::FULL_STATE_OPTION, array(
+            'status' => 'building',
+            'type' => 0, // Index into FULL_TYPES
+            'cursor' => 0,
+            'written' => 0,
+            'updated' => time(),
+        ), false );
+
+        wp_clear_scheduled_hook( self::FULL_BUILD_HOOK );
+        wp_schedule_single_event( time(), self::FULL_BUILD_HOOK );
+    }
+
+    /**
+     * Cron job: append batches (keyset on ID per post type) for up to 20 seconds.
+     */
+    public function build_full_batch() {
+        global $wpdb;
+
+        $state = get_option( self::FULL_STATE_OPTION );
+        if ( ! is_array( $state ) || $state['status'] !== 'building' ) {
+            return;
+        }
+
+        $handle = $this->cache->open_partial( 'llms-full.txt' );
+        if ( ! $handle ) {
+            return;
+        }
+
+        $start_time = microtime( true );
+        $types = self::FULL_TYPES;
+
+        while ( $state['type'] < count( $types ) && ( microtime( true ) - $start_time ) < 20 ) {
+            $post_type = $types[ $state['type'] ];
+
+            $ids = $wpdb->get_col( $wpdb->prepare(
+                "SELECT ID FROM $wpdb->posts WHERE post_type = %s AND post_status = 'publish' AND ID > %d ORDER BY ID LIMIT %d",
+                $post_type, $state['cursor'], self::FULL_BATCH
+            ) );
+
+            if ( $state['cursor'] === 0 && ! empty( $ids ) ) {
+                $labels = array( 'product' => 'Products', 'post' => 'Posts', 'page' => 'Pages' );
+                fwrite( $handle, "\n## " . $labels[ $post_type ] . "\n" );
+            }
+
+            if ( empty( $ids ) ) {
+                $state['type']++;
+                $state['cursor'] = 0;
+                continue;
+            }
+
+            _prime_post_caches( $ids, true, true );
+            foreach ( $ids as $id ) {
+                $this->write_post_entry( $handle, get_post( $id ), 'Description', 500 );
+            }
+
+            $state['cursor'] = (int) end( $ids );
+            $state['written'] += count( $ids );
+            $state['updated'] = time();
+            update_option( self::FULL_STATE_OPTION, $state, false );
+        }
+
+        fclose( $handle );
+
+        if ( $state['type'] < count( $types ) ) {
+            wp_schedule_single_event( time() + 5, self::FULL_BUILD_HOOK );
+            return;
+        }
+
+        $this->cache->commit_partial( 'llms-full.txt' );
+        $state['status'] = 'complete';
+        $state['updated'] = time();
+        update_option( self::FULL_STATE_OPTION, $state, false );
+    }
+
+    // --- Invalidation ---
+
+    public function on_meta_change( $meta_ids, $object_id, $meta_key ) {
+        if ( $meta_key === '_woosuite_llm_summary' && $this->is_listed( $object_id ) ) {
+            $this->schedule_refresh( MINUTE_IN_SECONDS );
+        } elseif ( $meta_key === 'total_sales' ) {
+            // Bestseller ranking may have moved; sales are frequent, so batch them up
+            $this->schedule_refresh( 15 * MINUTE_IN_SECONDS );
+        }
+    }
+
+    public function on_status_change( $new_status, $old_status, $post ) {
+        if ( $post->post_type === 'post' && $new_status !== $old_status && ( $new_status === 'publish' || $old_status === 'publish' ) ) {
+            $this->schedule_refresh( MINUTE_IN_SECONDS );
+        }
+    }
+
+    public function on_save_post( $post_id ) {
+        if ( $this->is_listed( $post_id ) ) {
+            $this->schedule_refresh( MINUTE_IN_SECONDS ); // Title or permalink may have changed
+        }
+    }
+
+    private function schedule_refresh( $delay ) {
+        // Debounced: one pending regeneration at a time
+        if ( ! wp_next_scheduled( self::REFRESH_HOOK ) ) {
+            wp_schedule_single_event( time() + $delay, self::REFRESH_HOOK );
+        }
+    }
+
+    private function is_listed( $post_id ) {
+        $listed = get_option( 'woosuite_llms_txt_ids', array() );
+        return is_array( $listed ) && in_array( (int) $post_id, $listed, true );
+    }
+
+    // --- Output helpers ---
+
+    private function write_header( $handle ) {
+        // Site Info
+        fwrite( $handle, "# " . get_bloginfo( 'name' ) . "\n" );
+        fwrite( $handle, get_bloginfo( 'description' ) . "\n\n" );
+
+        fwrite( $handle, "## About\n" );
+        fwrite( $handle, "This file provides context for AI agents crawling " . get_site_url() . ".\n\n" );
+
+        // Sitemap Link
+        fwrite( $handle, "## Sitemap\n" );
+        fwrite( $handle, get_site_url() . "/sitemap.xml\n\n" );
+    }
+
+    private function write_post_entry( $handle, $post, $fallback_label, $fallback_length ) {
+        fwrite( $handle, "- " . $post->post_title . ": " . get_permalink( $post ) . "\n" );
+        $summary = get_post_meta( $post->ID, '_woosuite_llm_summary', true );
+        if ( $summary ) {
+            fwrite( $handle, "  Summary: " . $this->one_line( $summary ) . "\n" );
+        } else {
+            $excerpt = strip_tags( $post->post_excerpt ?: $post->post_content );
+            fwrite( $handle, "  $fallback_label: " . $this->one_line( substr( $excerpt, 0, $fallback_length ) . '...' ) . "\n" );
+        }
+    }
+
+    private function one_line( $text ) {
+        return str_replace( array( "\r", "\n" ), " ", $text );
     }
 }
@@ -0,0 +1,233 @@
+<?php
+
+/**
+ * Site-wide rate limiter for Groq (and custom OpenAI-compatible) requests.
+ *
+ * A request bucket (RPM, from the plan setting) and a token bucket (TPM, learned
+ * from the x-ratelimit-* headers) are stored in one option, so the SEO worker,
+ * REST requests from the browser loops and any other PHP process all draw from
+ * the same budget. Buckets are refilled continuously and corrected from the
+ * headers Groq returns on every response; a 429 blocks everyone until its
+ * Retry-After has passed.
+ */
+class WooSuite_Rate_Limiter {
+
+    const OPTION = 'woosuite_rate_limit_state';
+    const LOCK = 'woosuite_rate_limiter';
+
+    // Pace to just under the plan limit.
+    const HEADROOM = 0.9;
+
+    private $rpm;
+
+    public function __construct() {
+        $this->rpm = (int) get_option( 'woosuite_groq_rpm', 30 );
+    }
+
+    public function is_enabled() {
+        return get_option( 'woosuite_rate_limiter_enabled', 'yes' ) === 'yes';
+    }
+
+    /**
+     * Try to take one request (and $tokens tokens) from the shared budget.
+     *
+     * @return float 0 if the request may go now, otherwise seconds to wait.
+     */
+    public function acquire( $tokens = 0 ) {
+        if ( ! $this->is_enabled() ) {
+            return 0;
+        }
+
+        $this->lock();
+        $state = $this->refill( $this->load() );
+        $now = microtime( true );
+        $wait = 0;
+
+        if ( $state['blocked_until'] > $now ) {
+            $wait = $state['blocked_until'] - $now;
+        } elseif ( $this->rpm > 0 && $state['requests'] < 1 ) {
+            $wait = ( 1 - $state['requests'] ) / $this->per_second( $this->rpm );
+        } elseif ( $state['tpm'] > 0 && $state['tokens'] < $tokens ) {
+            $needed = min( $tokens, $state['tpm'] * self::HEADROOM );
+            $wait = max( 0, $needed - $state['tokens'] ) / $this->per_second( $state['tpm'] );
+        }
+
+        if ( $wait <= 0 ) {
+            $state['requests'] -= 1;
+            $state['tokens'] -= $tokens;
+            $wait = 0;
+        }
+
+        $this->save( $state );
+        $this->unlock();
+
+        return $wait;
+    }
+
+    /**
+     * Block until the request may go, up to $max_wait seconds.
+     *
+     * @return float 0 on success, otherwise the remaining wait (request not taken).
+     */
+    public function wait( $tokens = 0, $max_wait = 10 ) {
+        $deadline = microtime( true ) + $max_wait;
+
+        while ( true ) {
+            $wait = $this->acquire( $tokens );
+            if ( $wait <= 0 ) {
+                return 0;
+            }
+            if ( microtime( true ) + $wait > $deadline ) {
+                return $wait;
+            }
+            usleep( (int) ( $wait * 1000000 ) + 50000 );
+        }
+    }
+
+    /**
+     * Correct the shared state from a Groq response (headers and 429s).
+     */
+    public function record_response( $response ) {
+        if ( ! $this->is_enabled() || is_wp_error( $response ) ) {
+            return;
+        }
+
+        $code = (int) wp_remote_retrieve_response_code( $response );
+        $limit_tokens = wp_remote_retrieve_header( $response, 'x-ratelimit-limit-tokens' );
+        $remaining_tokens = wp_remote_retrieve_header( $response, 'x-ratelimit-remaining-tokens' );
+        $remaining_requests = wp_remote_retrieve_header( $response, 'x-ratelimit-remaining-requests' );
+        $retry_after = wp_remote_retrieve_header( $response, 'retry-after' );
+
+        if ( $code !== 429 && $limit_tokens === '' && $remaining_tokens === '' && $remaining_requests === '' ) {
+            return; // Nothing to learn (e.g. custom endpoint without rate-limit headers)
+        }
+
+        $this->lock();
+        $state = $this->refill( $this->load() );
+        $now = microtime( true );
+
+        $learned_tpm = $state['tpm'] <= 0 && is_numeric( $limit_tokens ) && (int) $limit_tokens > 0;
+        if ( is_numeric( $limit_tokens ) ) {
+            $state['tpm'] = (int) $limit_tokens;
+        }
+
+        if ( is_numeric( $remaining_tokens ) ) {
+            if ( $learned_tpm ) {
+                // First sight of the TPM: the local balance only counted spending
+                // (it started at 0), so take the server's balance as the start
+                $state['tokens'] = min( $state['tpm'] * self::HEADROOM, (float) $remaining_tokens );
+            } else {
+                // Server-side numbers win over our local estimate, but only downwards:
+                // other processes may have spent tokens since this response was produced.
+                $state['tokens'] = min( $state['tokens'], (float) $remaining_tokens );
+            }
+        }
+
+        // x-ratelimit-remaining-requests is the daily (RPD) budget on Groq.
+        if ( is_numeric( $remaining_requests ) && (int) $remaining_requests <= 0 ) {
+            $reset = $this->parse_duration( wp_remote_retrieve_header( $response, 'x-ratelimit-reset-requests' ) );
+            $state['blocked_until'] = max( $state['blocked_until'], $now + $reset );
+        }
+
+        if ( $code === 429 ) {
+            $delay = is_numeric( $retry_after ) ? (float) $retry_after : $this->parse_duration( $retry_after );
+            if ( $delay <= 0 ) {
+                $delay = 60 / max( 1, $this->rpm );
+            }
+            $state['blocked_until'] = max( $state['blocked_until'], $now + $delay );
+            $state['requests'] = min( $state['requests'], 0 );
+        }
+
+        $this->save( $state );
+        $this->unlock();
+    }
+
+    /**
+     * Seconds until the next request could be admitted (for Retry-After).
+     */
+    public function get_retry_after() {
+        if ( ! $this->is_enabled() ) {
+            return 0;
+        }
+
+        $state = $this->refill( $this->load() );
+        $wait = max( 0, $state['blocked_until'] - microtime( true ) );
+        if ( $this->rpm > 0 && $state['requests'] < 1 ) {
+            $wait = max( $wait, ( 1 - $state['requests'] ) / $this->per_second( $this->rpm ) );
+        }
+        return $wait;
+    }
+
+    private function per_second( $per_minute ) {
+        return ( $per_minute * self::HEADROOM ) / 60;
+    }
+
+    private function refill( $state ) {
+        $now = microtime( true );
+        $elapsed = max( 0, $now - $state['updated'] );
+
+        if ( $this->rpm > 0 ) {
+            $capacity = $this->rpm * self::HEADROOM;
+            $state['requests'] = min( $capacity, $state['requests'] + $elapsed * $this->per_second( $this->rpm ) );
+        }
+        if ( $state['tpm'] > 0 ) {
+            $capacity = $state['tpm'] * self::HEADROOM;
+            $state['tokens'] = min( $capacity, $state['tokens'] + $elapsed * $this->per_second( $state['tpm'] ) );
+        }
+
+        $state['updated'] = $now;
+        return $state;
+    }
+
+    private function load() {
+        // Other processes write this option; skip the object cache.
+        wp_cache_delete( self::OPTION, 'options' );
+        $state = get_option( self::OPTION );
+
+        if ( ! is_array( $state ) ) {
+            $state = array(
+                'requests' => $this->rpm * self::HEADROOM,
+                'tokens' => 0,
+                'tpm' => 0,
+                'blocked_until' => 0,
+                'updated' => microtime( true ),
+            );
+        }
+        return $state;
+    }
+
+    private function save( $state ) {
+        update_option( self::OPTION, $state, false );
+    }
+
+    private function lock() {
+        global $wpdb;
+        $wpdb->get_var( $wpdb->prepare( 'SELECT GET_LOCK(%s, %d)', self::LOCK, 5 ) );
+    }
+
+    private function unlock() {
+        global $wpdb;
+        $wpdb->get_var( $wpdb->prepare( 'SELECT RELEASE_LOCK(%s)', self::LOCK ) );
+    }
+
+    /**
+     * Parse Groq durations like "7.66s", "2m59.56s" or "1h2m3s" into seconds.
+     */
+    private function parse_duration( $value ) {
+        if ( ! is_string( $value ) || $value === '' ) {
+            return 0;
+        }
+        if ( is_numeric( $value ) ) {
+            return (float) $value;
+        }
+
+        $seconds = 0;
+        if ( preg_match_all( '/([\d.]+)(ms|h|m|s)/', $value, $parts, PREG_SET_ORDER ) ) {
+            foreach ( $parts as $part ) {
+                $multiplier = array( 'h' => 3600, 'm' => 60, 's' => 1, 'ms' => 0.001 );
+                $seconds += (float) $part[1] * $multiplier[ $part[2] ];
+            }
+        }
+        return $seconds;
+    }
+}
@@ -42,14 +42,80 @@ class WooSuite_Security_Scanner {
         'wordpress-seo' // Yoast
     );
 
+    // Bump when $scan_patterns or the verdict logic change: every file is read again
+    const RULES_VERSION = '1';
+
+    // AI verdicts older than this are asked again
+    const VERDICT_TTL = 30 * DAY_IN_SECONDS;
+
+    // All patterns in one regex; capture group N+1 is pattern N
+    private $combined_pattern;
+
+    // Fingerprints of the folder being scanned, keyed by md5( path )
+    private $fingerprints = array();
+    private $seen = array();
+
+    // Set when the AI could not be asked for the current file
+    private $verdict_failed = false;
+
+    // Seconds of work per tick (capped at half of max_execution_time)
+    const TICK_BUDGET = 20;
+
+    // Extra seconds before a claimed folder is handed to another worker (its worker died)
+    const LEASE_GRACE = 60;
+
     public function __construct() {
-        add_action( 'woosuite_security_deep_scan_process', array( $this, 'process_batch' ) );
+        WooSuite_Job_Queue::register_handler( 'deep_scan', array( $this, 'run_worker' ), array( __CLASS__, 'get_work_summary' ) );
+        $this->combined_pattern = '/(' . implode( ')|(', array_keys( $this->scan_patterns ) ) . ')/i';
+    }
+
+    /**
+     * Fingerprint index (one row per scanned file) and AI verdict cache (one row per snippet).
+     */
+    public static function get_schema( $charset_collate ) {
+        global $wpdb;
+        $files = $wpdb->prefix . 'woosuite_scan_files';
+        $verdicts = $wpdb->prefix . 'woosuite_scan_verdicts';
+
+        return array(
+            "CREATE TABLE $files (
+			path_hash char(32) NOT NULL,
+			folder varchar(191) NOT NULL,
+			path text NOT NULL,
+			size bigint(20) unsigned NOT NULL DEFAULT 0,
+			mtime int(10) unsigned NOT NULL DEFAULT 0,
+			content_hash char(40) NOT NULL DEFAULT '',
+			rules varchar(8) NOT NULL DEFAULT '',
+			findings longtext NOT NULL,
+			seen_at int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (path_hash),
+			KEY folder (folder),
+			KEY seen_at (seen_at)
+		) $charset_collate;",
+            "CREATE TABLE $verdicts (
+			snippet_hash char(40) NOT NULL,
+			verdict varchar(20) NOT NULL,
+			confidence varchar(20) NOT NULL,
+			explanation text NOT NULL,
+			created_at int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (snippet_hash),
+			KEY created_at (created_at)
+		) $charset_collate;",
+        );
     }
 
     /**
      * Start the Deep Scan
+     *
+     * Creates a scan run with one work unit per top-level folder (see
+     * WooSuite_Scan_Store). Workers (the WooSuite_Job_Queue runners,
+     * `wp woosuite deep-scan`) lease a unit, scan files in path order until their
+     * time budget runs out and hand it back with resume_after set to the last file
+     * done, so a big folder resumes mid-way and several folders run side by side.
      */
-    public function start_scan() {
+    public function start_scan( $dispatch = true ) {
+        global $wpdb;
+
         // Build queue: All folders in plugins and themes
         $queue = array();
 
@@ -77,28 +143,79 @@ class WooSuite_Security_Scanner {
             }
         }
 
-        // Initial Status
-        update_option( 'woosuite_security_scan_status', array(
-            'status' => 'running',
+        // File counts from the previous scan drive the ETA
+        $table_name = $wpdb->prefix . 'woosuite_scan_files';
+        $estimates = array();
+        foreach ( (array) $wpdb->get_results( "SELECT folder, COUNT(*) AS files FROM $table_name GROUP BY folder", ARRAY_A ) as $row ) {
+            $estimates[ $row['folder'] ] = (int) $row['files'];
+        }
+
+        $units = array();
+        foreach ( $queue as $folder ) {
+            $key = $this->folder_key( $folder );
+            $units[] = array(
+                'folder' => $folder,
+                'estimate' => isset( $estimates[ $key ] ) ? $estimates[ $key ] : 0,
+            );
+        }
+
+        $previous = (int) get_option( 'woosuite_security_scan_run', 0 );
+        if ( $previous ) {
+            WooSuite_Scan_Store::cancel_run( $previous );
+        }
+
+        $run_id = WooSuite_Scan_Store::create_run( 'deep', array(
             'total_folders' => count( $queue ),
-            'processed_folders' => 0,
             'current_folder' => 'Initializing...',
-            'found_issues' => 0,
-            'start_time' => current_time( 'mysql' ),
-            'message' => 'Initializing scan...'
-        ));
+            'message' => 'Initializing scan...',
+        ) );
+        WooSuite_Scan_Store::add_units( $run_id, $units );
 
-        update_option( 'woosuite_security_scan_queue', $queue );
-        update_option( 'woosuite_security_scan_results', array() ); // Clear previous results
+        update_option( 'woosuite_security_scan_run', $run_id, false );
 
-        // Schedule First Batch
-        if ( ! wp_next_scheduled( 'woosuite_security_deep_scan_process' ) ) {
-            wp_schedule_single_event( time(), 'woosuite_security_deep_scan_process' );
+        if ( $dispatch ) {
+            WooSuite_Job_Queue::dispatch();
         }
 
         return count( $queue );
     }
 
+    /**
+     * Latest deep scan run, in the shape of the old status option, with throughput
+     * (files_per_sec) and estimated seconds left (eta_seconds).
+     */
+    public static function get_status() {
+        $run = WooSuite_Scan_Store::get_latest_run( 'deep' );
+        if ( ! $run ) {
+            return array( 'status' => 'idle' );
+        }
+
+        $status = array( 'run_id' => (int) $run['id'] );
+        foreach ( array( 'status', 'message', 'current_folder' ) as $key ) {
+            $status[ $key ] = $run[ $key ];
+        }
+        foreach ( array( 'total_folders', 'processed_folders', 'found_issues', 'files_total', 'files_unchanged', 'ai_lookups', 'ai_cache_hits', 'started_at', 'finished_at' ) as $key ) {
+            $status[ $key ] = (int) $run[ $key ];
+        }
+        $status['start_time'] = get_date_from_gmt( gmdate( 'Y-m-d H:i:s', $status['started_at'] ) );
+        $status['fingerprint_hit_rate'] = $status['files_total'] > 0 ? round( 100 * $status['files_unchanged'] / $status['files_total'], 1 ) : 0;
+        $status['verdict_hit_rate'] = $status['ai_lookups'] > 0 ? round( 100 * $status['ai_cache_hits'] / $status['ai_lookups'], 1 ) : 0;
+
+        $end = ( $status['status'] === 'complete' && $status['finished_at'] ) ? $status['finished_at'] : time();
+        $rate = $status['files_total'] / max( 1, $end - $status['started_at'] );
+        $status['files_per_sec'] = round( $rate, 1 );
+        $status['eta_seconds'] = 0;
+
+        if ( $status['status'] === 'running' ) {
+            // Units never scanned before count as an average folder
+            $average = $status['processed_folders'] > 0 ? $status['files_total'] / $status['processed_folders'] : 0;
+            $units = WooSuite_Scan_Store::get_unit_summary( $status['run_id'], $average );
+            $status['eta_seconds'] = ( $rate > 0 && $status['files_total'] > 0 ) ? (int) ceil( $units['remaining_files'] / $rate ) : null;
+        }
+
+        return $status;
+    }
+
     /**
      * Check if a folder/plugin is in the safe list
      */
@@ -149,60 +266,141 @@ class WooSuite_Security_Scanner {
     }
 
     /**
-     * Process one batch (one directory from queue)
+     * `wp woosuite deep-scan [--resume]`: run the scan in this process, without a time budget
+     * per tick. Several processes with --resume share the queue (each leases its own folder).
      */
-    public function process_batch() {
-        $status = get_option( 'woosuite_security_scan_status' );
-        $queue = get_option( 'woosuite_security_scan_queue' );
-        $results = get_option( 'woosuite_security_scan_results', array() );
+    public static function cli_scan( $args, $assoc_args ) {
+        $scanner = new self();
+        if ( empty( $assoc_args['resume'] ) ) {
+            WP_CLI::log( sprintf( 'Scanning %d folders...', $scanner->start_scan( false ) ) );
+        }
 
-        // Validation
-        if ( ! $status || $status['status'] !== 'running' ) {
-            return;
+        while ( $scanner->run_worker( 60 ) ) {
+            $status = self::get_status();
+            WP_CLI::log( sprintf(
+                '%d/%d folders, %d files (%s files/sec), %d issues',
+                $status['processed_folders'], $status['total_folders'], $status['files_total'], $status['files_per_sec'], $status['found_issues']
+            ) );
+            sleep( 1 ); // Remaining folders may be leased by other workers
         }
 
-        if ( empty( $queue ) ) {
-            // Done!
-            $status['status'] = 'complete';
-            $status['message'] = 'Scan Complete.';
-            $status['current_folder'] = '';
-            // Save final time?
-            update_option( 'woosuite_security_scan_status', $status );
+        $status = self::get_status();
+        WP_CLI::success( sprintf( 'Scan complete: %d files, %d issues.', $status['files_total'], $status['found_issues'] ) );
+    }
+
+    /**
+     * Lease units and scan them until $budget seconds are used up.
+     *
+     * @return bool True while unfinished units remain.
+     */
+    public function run_worker( $budget = null ) {
+        $run_id = (int) get_option( 'woosuite_security_scan_run', 0 );
+        $run = $run_id ? WooSuite_Scan_Store::get_run( $run_id ) : null;
+        if ( ! $run || $run['status'] !== 'running' ) {
+            return false;
+        }
+
+        if ( $budget === null ) {
+            $budget = $this->tick_budget();
+        }
+        $deadline = microtime( true ) + $budget;
+
+        while ( microtime( true ) < $deadline ) {
+            $unit = WooSuite_Scan_Store::claim_unit( $run_id, time() + (int) ceil( $budget ) + self::LEASE_GRACE );
+            if ( ! $unit ) {
+                break;
+            }
+
+            WooSuite_Scan_Store::update_run( $run_id, array(
+                'current_folder' => substr( basename( $unit['folder'] ), 0, 191 ),
+                'message' => "Scanning " . basename( $unit['folder'] ) . "...",
+            ) );
+
+            $results = array();
+            $stats = array( 'files_total' => 0, 'files_unchanged' => 0, 'ai_lookups' => 0, 'ai_cache_hits' => 0 );
+            $files_done = 0;
+            $finished = $this->scan_unit( $unit, $results, $stats, $files_done, $deadline );
+
+            // If another worker took the unit over (our lease expired), it redoes this work
+            if ( WooSuite_Scan_Store::release_unit( $unit, $finished, $files_done ) ) {
+                WooSuite_Scan_Store::add_findings( $run_id, $results );
+                $stats['found_issues'] = count( $results );
+                $stats['processed_folders'] = $finished ? 1 : 0;
+                WooSuite_Scan_Store::add_to_run( $run_id, $stats );
+            }
+        }
+
+        if ( WooSuite_Scan_Store::count_units( $run_id ) > 0 ) {
+            return true;
+        }
+
+        // Done! (Only the worker that flips the status runs the wrap-up.)
+        if ( WooSuite_Scan_Store::complete_run( $run_id, 'Scan Complete.' ) ) {
+            $this->prune_caches( (int) $run['started_at'] );
             // Also update the main 'last scan' option
             update_option( 'woosuite_last_scan_time', current_time( 'mysql' ) );
             update_option( 'woosuite_last_scan_source', 'deep_scan' );
-            return;
         }
+        return false;
+    }
 
-        // Pop one folder
-        $folder = array_shift( $queue );
+    /**
+     * Work left for the job queue runners: free folders and the workers holding one.
+     */
+    public static function get_work_summary() {
+        $run_id = (int) get_option( 'woosuite_security_scan_run', 0 );
+        $run = $run_id ? WooSuite_Scan_Store::get_run( $run_id ) : null;
+        if ( ! $run || $run['status'] !== 'running' ) {
+            return array( 'free' => 0, 'workers' => 0 );
+        }
 
-        $status['current_folder'] = basename( $folder );
-        $status['message'] = "Scanning " . basename( $folder ) . "...";
-        update_option( 'woosuite_security_scan_status', $status );
+        $units = WooSuite_Scan_Store::get_unit_summary( $run_id, 0 );
+        return array( 'free' => $units['free'], 'workers' => $units['leased'] );
+    }
 
-        // Scan it
-        $this->scan_directory( $folder, $results );
+    private function tick_budget() {
+        $max = (int) ini_get( 'max_execution_time' );
+        return ( $max > 0 ) ? min( self::TICK_BUDGET, max( 5, (int) ( $max / 2 ) ) ) : self::TICK_BUDGET;
+    }
 
-        // Update Status
-        $status['processed_folders']++;
-        $status['found_issues'] = count( $results );
-        update_option( 'woosuite_security_scan_status', $status );
+    /**
+     * Scan a unit's files after resume_after until done or out of time.
+     *
+     * @return bool True if the folder is finished.
+     */
+    private function scan_unit( &$unit, &$results, &$stats, &$files_done, $deadline ) {
+        $dir = $unit['folder'];
 
-        // Save Queue and Results
-        update_option( 'woosuite_security_scan_queue', $queue );
-        update_option( 'woosuite_security_scan_results', $results );
+        // Double check if this subdirectory is ignored (granularity)
+        if ( ! is_dir( $dir ) || $this->is_safe_folder( $dir ) ) return true;
 
-        // Chain next batch immediately
-        wp_schedule_single_event( time(), 'woosuite_security_deep_scan_process' );
-    }
+        $folder = $this->folder_key( $dir );
+        $this->load_fingerprints( $folder );
+        $finished = true;
 
-    private function scan_directory( $dir, &$results ) {
-        if ( ! is_dir( $dir ) ) return;
+        foreach ( $this->list_files( $dir ) as $path => $file ) {
+            if ( $unit['resume_after'] !== '' && strcmp( $path, $unit['resume_after'] ) <= 0 ) {
+                continue; // Done in an earlier tick
+            }
+            if ( microtime( true ) >= $deadline ) {
+                $finished = false;
+                break;
+            }
 
-        // Double check if this subdirectory is ignored (granularity)
-        if ( $this->is_safe_folder( $dir ) ) return;
+            $this->scan_file( $path, $results, $stats, $folder, $file[0], $file[1] );
+            $unit['resume_after'] = $path;
+            $files_done++;
+        }
+
+        $this->touch_fingerprints();
+        return $finished;
+    }
 
+    /**
+     * PHP files under $dir (up to 2MB), sorted by path so a scan can resume: path => array( size, mtime ).
+     */
+    private function list_files( $dir ) {
+        $files = array();
         try {
             $iterator = new RecursiveIteratorIterator( new RecursiveDirectoryIterator( $dir ) );
 
@@ -212,62 +410,227 @@ class WooSuite_Security_Scanner {
                     // Skip very large files (> 2MB)
                     if ( $file->getSize() > 2 * 1024 * 1024 ) continue;
 
-                    $this->scan_file( $file->getPathname(), $results );
+                    $files[ $file->getPathname() ] = array( $file->getSize(), $file->getMTime() );
                 }
             }
         } catch ( Exception $e ) {
             error_log( "WooSuite Scan Error in $dir: " . $e->getMessage() );
         }
+
+        ksort( $files, SORT_STRING );
+        return $files;
     }
 
-    private function scan_file( $filepath, &$results ) {
+    private function scan_file( $filepath, &$results, &$stats, $folder, $size, $mtime ) {
         // Final check for file ignore
         if ( $this->is_safe_folder( $filepath ) ) return;
 
+        $stats['files_total']++;
+        $path_hash = md5( $filepath );
+        $known = isset( $this->fingerprints[ $path_hash ] ) ? $this->fingerprints[ $path_hash ] : null;
+        if ( $known && $known['rules'] !== self::RULES_VERSION ) {
+            $known = null;
+        }
+
+        // Unchanged since the last scan: reuse its findings without reading it
+        if ( $known && (int) $known['size'] === $size && (int) $known['mtime'] === $mtime ) {
+            $stats['files_unchanged']++;
+            $this->seen[] = $path_hash;
+            $this->add_findings( $results, $known['findings'] );
+            return;
+        }
+
         // Read file
         $content = file_get_contents( $filepath );
         if ( ! $content ) return;
 
-        foreach ( $this->scan_patterns as $pattern => $name ) {
-            if ( preg_match( '/' . $pattern . '/i', $content, $matches ) ) {
-                // Found a match - BUT wait, ask AI first!
-                $rel_path = str_replace( ABSPATH, '', $filepath );
+        // Touched but identical (e.g. re-deployed): same result
+        $content_hash = sha1( $content );
+        if ( $known && $known['content_hash'] === $content_hash ) {
+            $stats['files_unchanged']++;
+            $this->add_findings( $results, $known['findings'] );
+            $this->save_fingerprint( $path_hash, $folder, $filepath, $size, $mtime, $content_hash, $known['findings'] );
+            return;
+        }
 
-                // Get context (surrounding lines) for AI
-                $context = $this->get_snippet_context( $content, $matches[0] );
+        $this->verdict_failed = false;
+        $findings = $this->match_content( $filepath, $content, $stats );
+        $this->add_findings( $results, $findings );
 
-                // Ask Groq (AI)
-                $groq = new WooSuite_Groq();
-                $analysis = $groq->analyze_security_threat( $context, basename( $filepath ) );
+        // A heuristic-only result is not remembered: the next scan retries the AI
+        if ( ! $this->verdict_failed ) {
+            $this->save_fingerprint( $path_hash, $folder, $filepath, $size, $mtime, $content_hash, $findings );
+        }
+    }
 
-                $verdict = 'Suspicious'; // Default fallback
-                $explanation = 'Flagged by heuristic scanner.';
-                $confidence = 'Low';
+    /**
+     * One regex pass over the file, then (in pattern order) the AI check for the
+     * first occurrence of each matched pattern until one is not cleared.
+     *
+     * @return array Zero or one result rows.
+     */
+    private function match_content( $filepath, $content, &$stats ) {
+        if ( ! preg_match_all( $this->combined_pattern, $content, $all, PREG_SET_ORDER ) ) {
+            return array();
+        }
 
-                if ( ! is_wp_error( $analysis ) && isset( $analysis['verdict'] ) ) {
-                    $verdict = $analysis['verdict'];
-                    $explanation = isset( $analysis['explanation'] ) ? $analysis['explanation'] : $explanation;
-                    $confidence = isset( $analysis['confidence'] ) ? $analysis['confidence'] : 'Medium';
+        $names = array_values( $this->scan_patterns );
+        $first = array();
+        foreach ( $all as $match ) {
+            // The set has one non-empty group: the alternative that matched
+            for ( $i = 1; $i < count( $match ); $i++ ) {
+                if ( $match[ $i ] !== '' ) {
+                    if ( ! isset( $first[ $i - 1 ] ) ) $first[ $i - 1 ] = $match[ $i ];
+                    break;
                 }
+            }
+        }
+        ksort( $first );
 
-                // If AI says Safe with High confidence, we skip it (unless user wants verbose logs)
-                if ( $verdict === 'Safe' && $confidence === 'High' ) {
-                    continue;
-                }
+        foreach ( $first as $index => $matched ) {
+            $name = $names[ $index ];
+            // Found a match - BUT wait, ask AI first!
+            $rel_path = str_replace( ABSPATH, '', $filepath );
 
-                $results[] = array(
-                    'file' => $rel_path,
-                    'issue' => $name,
-                    'severity' => ($verdict === 'Malicious') ? 'critical' : 'medium',
-                    'date' => current_time( 'mysql' ),
-                    'ai_verdict' => $verdict,
-                    'ai_explanation' => $explanation
-                );
+            // Get context (surrounding lines) for AI
+            $context = $this->get_snippet_context( $content, $matched );
 
-                // One match per file is enough to flag it
-                break;
+            $analysis = $this->get_verdict( $context, $filepath, $stats );
+
+            $verdict = 'Suspicious'; // Default fallback
+            $explanation = 'Flagged by heuristic scanner.';
+            $confidence = 'Low';
+
+            if ( ! is_wp_error( $analysis ) && isset( $analysis['verdict'] ) ) {
+                $verdict = $analysis['verdict'];
+                $explanation = isset( $analysis['explanation'] ) ? $analysis['explanation'] : $explanation;
+                $confidence = isset( $analysis['confidence'] ) ? $analysis['confidence'] : 'Medium';
+            }
+
+            // If AI says Safe with High confidence, we skip it (unless user wants verbose logs)
+            if ( $verdict === 'Safe' && $confidence === 'High' ) {
+                continue;
             }
+
+            // One match per file is enough to flag it
+            return array( array(
+                'file' => $rel_path,
+                'issue' => $name,
+                'severity' => ($verdict === 'Malicious') ? 'critical' : 'medium',
+                'date' => current_time( 'mysql' ),
+                'ai_verdict' => $verdict,
+                'ai_explanation' => $explanation
+            ) );
+        }
+
+        return array();
+    }
+
+    /**
+     * AI verdict for a snippet, cached by snippet hash so the same code (e.g. a
+     * vendor library bundled by several plugins) is only sent once.
+     */
+    private function get_verdict( $context, $filepath, &$stats ) {
+        global $wpdb;
+        $table_name = $wpdb->prefix . 'woosuite_scan_verdicts';
+        $snippet_hash = sha1( $context );
+
+        $stats['ai_lookups']++;
+        $cached = $wpdb->get_row( $wpdb->prepare(
+            "SELECT verdict, confidence, explanation FROM $table_name WHERE snippet_hash = %s AND created_at > %d",
+            $snippet_hash, time() - self::VERDICT_TTL
+        ), ARRAY_A );
+        if ( $cached ) {
+            $stats['ai_cache_hits']++;
+            return $cached;
         }
+
+        // Ask Groq (AI)
+        $groq = new WooSuite_Groq();
+        $analysis = $groq->analyze_security_threat( $context, basename( $filepath ) );
+
+        // Errors (rate limits, outages) are not cached: the next scan asks again
+        if ( ! is_wp_error( $analysis ) && isset( $analysis['verdict'] ) ) {
+            $wpdb->replace( $table_name, array(
+                'snippet_hash' => $snippet_hash,
+                'verdict' => substr( (string) $analysis['verdict'], 0, 20 ),
+                'confidence' => substr( isset( $analysis['confidence'] ) ? (string) $analysis['confidence'] : 'Medium', 0, 20 ),
+                'explanation' => isset( $analysis['explanation'] ) ? (string) $analysis['explanation'] : '',
+                'created_at' => time(),
+            ) );
+        } else {
+            $this->verdict_failed = true;
+        }
+
+        return $analysis;
+    }
+
+    private function add_findings( &$results, $findings ) {
+        foreach ( $findings as $finding ) {
+            $results[] = $finding;
+        }
+    }
+
+    private function folder_key( $dir ) {
+        return substr( wp_normalize_path( str_replace( ABSPATH, '', $dir ) ), 0, 191 );
+    }
+
+    private function load_fingerprints( $folder ) {
+        global $wpdb;
+        $table_name = $wpdb->prefix . 'woosuite_scan_files';
+
+        $this->fingerprints = array();
+        $this->seen = array();
+        $rows = $wpdb->get_results( $wpdb->prepare(
+            "SELECT path_hash, size, mtime, content_hash, rules, findings FROM $table_name WHERE folder = %s",
+            $folder
+        ), ARRAY_A );
+        foreach ( (array) $rows as $row ) {
+            $row['findings'] = (array) maybe_unserialize( $row['findings'] );
+            $this->fingerprints[ $row['path_hash'] ] = $row;
+        }
+    }
+
+    private function save_fingerprint( $path_hash, $folder, $filepath, $size, $mtime, $content_hash, $findings ) {
+        global $wpdb;
+        $wpdb->replace( $wpdb->prefix . 'woosuite_scan_files', array(
+            'path_hash' => $path_hash,
+            'folder' => $folder,
+            'path' => $filepath,
+            'size' => $size,
+            'mtime' => $mtime,
+            'content_hash' => $content_hash,
+            'rules' => self::RULES_VERSION,
+            'findings' => maybe_serialize( $findings ),
+            'seen_at' => time(),
+        ) );
+    }
+
+    /**
+     * Mark the skipped files as still present, in chunks rather than one UPDATE per file.
+     */
+    private function touch_fingerprints() {
+        global $wpdb;
+        $table_name = $wpdb->prefix . 'woosuite_scan_files';
+        foreach ( array_chunk( $this->seen, 500 ) as $chunk ) {
+            $wpdb->query( $wpdb->prepare(
+                "UPDATE $table_name SET seen_at = %d WHERE path_hash IN ('" . implode( "','", $chunk ) . "')",
+                time()
+            ) );
+        }
+        $this->seen = array();
+        $this->fingerprints = array();
+    }
+
+    /**
+     * After a full scan: forget files that no longer exist (or are now ignored) and expired verdicts.
+     */
+    private function prune_caches( $started_at ) {
+        global $wpdb;
+        $files = $wpdb->prefix . 'woosuite_scan_files';
+        $verdicts = $wpdb->prefix . 'woosuite_scan_verdicts';
+        $wpdb->query( $wpdb->prepare( "DELETE FROM $files WHERE seen_at < %d", $started_at ) );
+        $wpdb->query( $wpdb->prepare( "DELETE FROM $verdicts WHERE created_at < %d", time() - self::VERDICT_TTL ) );
     }
 
     private function get_snippet_context( $content, $match ) {
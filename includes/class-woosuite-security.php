@@ -20,6 +20,8 @@ class WooSuite_Security {
         // Scheduled Scans
         add_action( 'woosuite_scheduled_scan', array( $this, 'perform_core_scan' ) );
         add_action( 'woosuite_daily_log_analysis', array( $this, 'perform_log_analysis' ) );
+        add_action( WooSuite_Security_Log::ROLLUP_HOOK, array( 'WooSuite_Security_Log', 'rollup' ) );
+        add_action( WooSuite_Ip_Store::PRUNE_HOOK, array( 'WooSuite_Ip_Store', 'prune' ) );
 
         // Login Protection
         if ( get_option( 'woosuite_login_protection_enabled', 'yes' ) === 'yes' ) {
@@ -38,6 +40,60 @@ class WooSuite_Security {
         }
     }
 
+    // WAF rules: literal substrings, matched against lowercased, URL-decoded input values
+    const SQLI_PATTERNS = array(
+        'union select',
+        'union all select',
+        'drop table',
+        'information_schema',
+        'or 1=1',
+    );
+
+    const XSS_PATTERNS = array(
+        '<script>',
+        'javascript:',
+        'onload=',
+        'onerror=',
+    );
+
+    /**
+     * The enabled rules as one alternation with a named group per rule set. The
+     * pattern string only depends on the toggles, so PCRE's per-process cache
+     * compiles (and JITs) it once per PHP worker rather than once per request.
+     */
+    public static function compile_rules( $block_sqli, $block_xss ) {
+        $groups = array();
+        foreach ( array( 'sqli' => $block_sqli ? self::SQLI_PATTERNS : array(), 'xss' => $block_xss ? self::XSS_PATTERNS : array() ) as $name => $patterns ) {
+            if ( $patterns ) {
+                $quoted = array_map( function( $pattern ) {
+                    return preg_quote( $pattern, '/' );
+                }, $patterns );
+                $groups[] = '(?<' . $name . '>' . implode( '|', $quoted ) . ')';
+            }
+        }
+        return $groups ? '/' . implode( '|', $groups ) . '/S' : '';
+    }
+
+    /**
+     * WAF toggles in one read of the autoloaded options (falls back to get_option
+     * for options that are not autoloaded).
+     */
+    private function get_waf_config() {
+        $alloptions = function_exists( 'wp_load_alloptions' ) ? wp_load_alloptions() : array();
+        $defaults = array(
+            'woosuite_firewall_enabled' => 'yes',
+            'woosuite_firewall_simulation_mode' => 'no',
+            'woosuite_firewall_block_sqli' => 'yes',
+            'woosuite_firewall_block_xss' => 'yes',
+        );
+
+        $config = array();
+        foreach ( $defaults as $key => $default ) {
+            $config[ $key ] = isset( $alloptions[ $key ] ) ? $alloptions[ $key ] : get_option( $key, $default );
+        }
+        return $config;
+    }
+
     /**
      * The WAF (Web Application Firewall)
      * Inspects incoming requests for malicious patterns.
@@ -48,8 +104,10 @@ class WooSuite_Security {
             return;
         }
 
+        $config = $this->get_waf_config();
+
         // Check if Firewall is enabled
-        if ( get_option( 'woosuite_firewall_enabled', 'yes' ) !== 'yes' ) {
+        if ( $config['woosuite_firewall_enabled'] !== 'yes' ) {
             return;
         }
 
@@ -70,69 +128,34 @@ class WooSuite_Security {
             return;
         }
 
-        $request_data = array_merge( $_GET, $_POST, $_COOKIE );
-        $user_agent = isset( $_SERVER['HTTP_USER_AGENT'] ) ? $_SERVER['HTTP_USER_AGENT'] : '';
         $request_uri = isset( $_SERVER['REQUEST_URI'] ) ? $_SERVER['REQUEST_URI'] : '';
 
-        $simulation_mode = get_option( 'woosuite_firewall_simulation_mode', 'no' ) === 'yes';
-        $block_sqli = get_option( 'woosuite_firewall_block_sqli', 'yes' ) === 'yes';
-        $block_xss = get_option( 'woosuite_firewall_block_xss', 'yes' ) === 'yes';
-
-        // Helper function to recursively check arrays (prevents bypass)
-        $check_value = function( $value, $patterns ) use ( &$check_value ) {
-            if ( is_array( $value ) ) {
-                // Recursively check array values (prevents array bypass)
-                foreach ( $value as $item ) {
-                    if ( $check_value( $item, $patterns ) ) {
-                        return true; // Found threat, stop checking
-                    }
-                }
-                return false;
+        $simulation_mode = $config['woosuite_firewall_simulation_mode'] === 'yes';
+        $block_sqli = $config['woosuite_firewall_block_sqli'] === 'yes';
+        $block_xss = $config['woosuite_firewall_block_xss'] === 'yes';
+
+        // 1 + 2. SQL Injection and XSS: every value (nested arrays included, so
+        // they cannot be used as a bypass) is normalized once and the combined
+        // rules run over all of them in a single pass.
+        $rules = self::compile_rules( $block_sqli, $block_xss );
+        if ( $rules !== '' ) {
+            $values = array();
+            foreach ( array( $_GET, $_POST, $_COOKIE ) as $source ) {
+                array_walk_recursive( $source, function( $value ) use ( &$values ) {
+                    $values[] = strtolower( urldecode( (string) $value ) );
+                } );
             }
 
-            $value_lower = strtolower( urldecode( $value ) );
-            foreach ( $patterns as $pattern ) {
-                if ( strpos( $value_lower, $pattern ) !== false ) {
-                    return true; // Threat found
-                }
-            }
-            return false;
-        };
-
-        // 1. Check for basic SQL Injection patterns
-        if ( $block_sqli ) {
-            $sqli_patterns = array(
-                'union select',
-                'union all select',
-                'drop table',
-                'information_schema',
-                'or 1=1',
-            );
-
-            foreach ( $request_data as $key => $value ) {
-                if ( $check_value( $value, $sqli_patterns ) ) {
+            // No rule contains a newline, so a match never spans two values
+            if ( $values && preg_match_all( $rules, implode( "\n", $values ), $matches ) ) {
+                if ( $block_sqli && array_filter( $matches['sqli'], 'strlen' ) ) {
                     // Increase violation count
                     $this->track_violation( $ip );
                     $this->block_request( 'SQL Injection Attempt', 'high', $simulation_mode );
-                    if ( $simulation_mode ) break; // Log once per request in sim mode
                 }
-            }
-        }
-
-        // 2. Check for XSS (Cross Site Scripting)
-        if ( $block_xss ) {
-            $xss_patterns = array(
-                '<script>',
-                'javascript:',
-                'onload=',
-                'onerror=',
-            );
-
-            foreach ( $request_data as $key => $value ) {
-                if ( $check_value( $value, $xss_patterns ) ) {
+                if ( $block_xss && array_filter( $matches['xss'], 'strlen' ) ) {
                     $this->track_violation( $ip );
                     $this->block_request( 'XSS Attempt', 'medium', $simulation_mode );
-                    if ( $simulation_mode ) break;
                 }
             }
         }
@@ -145,40 +168,22 @@ class WooSuite_Security {
     }
 
     /**
-     * Checks if the IP is currently banned.
+     * Checks if the IP (or a range containing it) is currently banned.
      */
     private function check_ip_reputation( $ip ) {
-        // Check for Ban Transient
-        $ban_transient = 'woosuite_ban_' . md5( $ip );
-        if ( get_transient( $ban_transient ) ) {
-            return true;
-        }
-        return false;
+        return WooSuite_Ip_Store::is_banned( $ip );
     }
 
     /**
      * Track violations for IP Reputation logic.
-     * "Three Strikes" (or 5) within a time window leads to a ban.
+     * 5 violations within a sliding 10 minute window lead to a 30 minute ban.
      */
     private function track_violation( $ip ) {
-        $transient_name = 'woosuite_violations_' . md5( $ip );
-        $violations = get_transient( $transient_name );
+        if ( WooSuite_Ip_Store::hit( $ip ) >= 5 && ! WooSuite_Ip_Store::is_banned( $ip ) ) {
+            WooSuite_Ip_Store::ban_automatic( $ip, 30 * 60, 'Too many violations' );
 
-        if ( false === $violations ) {
-            // First violation, start counter. 10 minute window.
-            set_transient( $transient_name, 1, 10 * 60 );
-        } else {
-            $violations++;
-            set_transient( $transient_name, $violations, 10 * 60 );
-        }
-
-        // Ban Logic: If > 5 violations in 10 mins -> Ban for 30 mins
-        if ( $violations >= 5 ) {
-             $ban_transient = 'woosuite_ban_' . md5( $ip );
-             set_transient( $ban_transient, true, 30 * 60 );
-
-             // Log the ban
-             $this->log_threat( $ip, 'IP Reputation Ban (Too many violations)', 'critical', true );
+            // Log the ban
+            $this->log_threat( $ip, 'IP Reputation Ban (Too many violations)', 'critical', true );
         }
     }
 
@@ -194,12 +199,9 @@ class WooSuite_Security {
             return; // Do not die
         }
 
+        // Counted in threats_blocked (WooSuite_Counters) when the log is flushed
         $this->log_threat( $ip, $reason, $severity, true );
 
-        // Update total blocked count
-        $count = (int) get_option( 'woosuite_threats_blocked_count', 0 );
-        update_option( 'woosuite_threats_blocked_count', $count + 1 );
-
         wp_die(
             '<h1>Access Denied</h1><p>Your request was blocked by WooSuite Firewall.</p><p>Reason: ' . esc_html( $reason ) . '</p>',
             'WooSuite Security',
@@ -222,20 +224,10 @@ class WooSuite_Security {
     }
 
     /**
-     * Log threat to database
+     * Log threat to database (buffered, written at shutdown by WooSuite_Security_Log)
      */
     public function log_threat( $ip, $event, $severity, $blocked = true ) {
-        global $wpdb;
-        $wpdb->insert(
-            $this->table_name,
-            array(
-                'event' => $event,
-                'ip_address' => $ip,
-                'severity' => $severity,
-                'blocked' => $blocked ? 1 : 0,
-                'created_at' => current_time( 'mysql' )
-            )
-        );
+        WooSuite_Security_Log::add( $ip, $event, $severity, $blocked );
     }
 
     /**
@@ -386,8 +378,18 @@ class WooSuite_Security {
             }
         }
 
-        // Save result to transient or option
-        update_option( 'woosuite_last_scan_results', $modified_files );
+        // Save result as a scan run with one finding per file
+        $findings = array();
+        foreach ( $modified_files as $item ) {
+            $findings[] = array(
+                'file' => $item['file'],
+                'issue' => ( $item['status'] === 'missing' ) ? 'Core file missing' : 'Core file modified',
+                'severity' => ( $item['status'] === 'missing' ) ? 'medium' : 'critical',
+            );
+        }
+        $run_id = WooSuite_Scan_Store::create_run( 'core', array( 'source' => $source, 'found_issues' => count( $findings ) ) );
+        WooSuite_Scan_Store::add_findings( $run_id, $findings );
+        WooSuite_Scan_Store::complete_run( $run_id, 'Scan Complete.' );
         update_option( 'woosuite_last_scan_time', current_time( 'mysql' ) );
         update_option( 'woosuite_last_scan_source', $source );
 
@@ -405,7 +407,7 @@ class WooSuite_Security {
     public function get_logs( $limit = 20, $offset = 0 ) {
         global $wpdb;
         return $wpdb->get_results( $wpdb->prepare(
-            "SELECT * FROM {$this->table_name} ORDER BY created_at DESC LIMIT %d OFFSET %d",
+            "SELECT * FROM {$this->table_name} ORDER BY id DESC LIMIT %d OFFSET %d",
             $limit,
             $offset
         ) );
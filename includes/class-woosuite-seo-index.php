@@ -0,0 +1,249 @@
+<?php
+
+/**
+ * Denormalized SEO status index: one row per product/post/page/image with the
+ * flags the listing filters and the SEO worker select on.
+ *
+ * The "unoptimized" / "enhanced" filters used to be meta_query chains of up to
+ * six NOT EXISTS clauses (one LEFT JOIN on wp_postmeta each). With the index
+ * they become a single join on this table's primary key plus indexed flags.
+ *
+ * Rows are kept current by meta/post hooks and (re)built in ID ranges by the
+ * woosuite_seo_index_backfill cron job. Until a backfill has completed,
+ * is_ready() is false and callers keep using their meta_query fallback.
+ */
+class WooSuite_Seo_Index {
+
+    const STATE_OPTION = 'woosuite_seo_index_state';
+    const BACKFILL_HOOK = 'woosuite_seo_index_backfill';
+
+    // IDs per INSERT ... SELECT during the backfill
+    const BACKFILL_CHUNK = 2000;
+
+    const TEXT_TYPES = array( 'product', 'post', 'page' );
+
+    // Meta keys that feed a flag; any change to them refreshes the row
+    const WATCHED_KEYS = array(
+        '_woosuite_meta_description',
+        '_wp_attachment_image_alt',
+        '_woosuite_history_post_title',
+        '_woosuite_history_post_content',
+        '_woosuite_history_post_excerpt',
+        '_woosuite_proposed_title',
+        '_woosuite_proposed_description',
+        '_woosuite_proposed_short_description',
+        '_woosuite_seo_failed',
+        '_woosuite_seo_processed_at',
+    );
+
+    public function __construct() {
+        add_action( 'added_post_meta', array( $this, 'on_meta_change' ), 10, 3 );
+        add_action( 'updated_post_meta', array( $this, 'on_meta_change' ), 10, 3 );
+        add_action( 'deleted_post_meta', array( $this, 'on_meta_change' ), 10, 3 );
+        add_action( 'save_post', array( $this, 'on_save_post' ), 10, 2 );
+        add_action( 'add_attachment', array( $this, 'refresh' ) );
+        add_action( 'deleted_post', array( $this, 'remove' ) );
+        add_action( self::BACKFILL_HOOK, array( $this, 'run_backfill' ) );
+        add_filter( 'posts_clauses', array( $this, 'filter_clauses' ), 10, 2 );
+    }
+
+    public static function table_name() {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_seo_index';
+    }
+
+    public static function get_schema( $charset_collate ) {
+        $table_name = self::table_name();
+        return "CREATE TABLE $table_name (
+			post_id bigint(20) unsigned NOT NULL,
+			post_type varchar(20) NOT NULL,
+			has_meta_desc tinyint(1) NOT NULL DEFAULT 0,
+			has_alt tinyint(1) NOT NULL DEFAULT 0,
+			has_history tinyint(1) NOT NULL DEFAULT 0,
+			has_proposal tinyint(1) NOT NULL DEFAULT 0,
+			failed tinyint(1) NOT NULL DEFAULT 0,
+			processed_at int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (post_id),
+			KEY queue (post_type,failed,processed_at,has_meta_desc,has_alt),
+			KEY enhanced (post_type,has_history,has_proposal),
+			KEY processed_at (processed_at)
+		) $charset_collate;";
+    }
+
+    /**
+     * True once a full backfill has completed, i.e. every eligible post has a row.
+     */
+    public static function is_ready() {
+        $state = get_option( self::STATE_OPTION );
+        return is_array( $state ) && isset( $state['status'] ) && $state['status'] === 'ready';
+    }
+
+    public static function get_state() {
+        $state = get_option( self::STATE_OPTION );
+        return is_array( $state ) ? $state : array( 'status' => 'missing', 'cursor' => 0 );
+    }
+
+    /**
+     * Start a (re)build from the lowest ID. Existing rows stay in place (and in
+     * use, if the index was ready) until their range is rewritten.
+     */
+    public static function schedule_backfill() {
+        $state = self::get_state();
+        update_option( self::STATE_OPTION, array(
+            'status' => ( $state['status'] === 'ready' ) ? 'ready' : 'backfilling',
+            'rebuilding' => true,
+            'cursor' => 0,
+            'started' => time(),
+        ), false );
+
+        wp_clear_scheduled_hook( self::BACKFILL_HOOK );
+        wp_schedule_single_event( time(), self::BACKFILL_HOOK );
+    }
+
+    /**
+     * Cron job: rebuild rows range by range for up to 20 seconds, then reschedule.
+     */
+    public function run_backfill() {
+        global $wpdb;
+
+        $state = self::get_state();
+        if ( empty( $state['rebuilding'] ) ) {
+            return;
+        }
+
+        $max_id = (int) $wpdb->get_var( "SELECT MAX(ID) FROM $wpdb->posts" );
+        $start_time = microtime( true );
+        $cursor = (int) $state['cursor'];
+
+        while ( $cursor < $max_id && ( microtime( true ) - $start_time ) < 20 ) {
+            $this->rebuild_range( $cursor + 1, $cursor + self::BACKFILL_CHUNK );
+            $cursor += self::BACKFILL_CHUNK;
+
+            $state['cursor'] = $cursor;
+            update_option( self::STATE_OPTION, $state, false );
+        }
+
+        if ( $cursor < $max_id ) {
+            wp_schedule_single_event( time() + 5, self::BACKFILL_HOOK );
+            return;
+        }
+
+        update_option( self::STATE_OPTION, array(
+            'status' => 'ready',
+            'rebuilding' => false,
+            'cursor' => $cursor,
+            'completed' => time(),
+        ), false );
+    }
+
+    public function on_meta_change( $meta_ids, $object_id, $meta_key ) {
+        if ( in_array( $meta_key, self::WATCHED_KEYS, true ) ) {
+            $this->refresh( $object_id );
+        }
+    }
+
+    public function on_save_post( $post_id, $post ) {
+        if ( wp_is_post_revision( $post_id ) ) {
+            return;
+        }
+        $this->refresh( $post_id );
+    }
+
+    /**
+     * Recompute one post's row from its meta (or drop it if no longer eligible).
+     */
+    public function refresh( $post_id ) {
+        $post_id = (int) $post_id;
+        if ( $post_id <= 0 ) {
+            return;
+        }
+
+        $post = get_post( $post_id );
+        $eligible = $post && ( in_array( $post->post_type, self::TEXT_TYPES, true ) || wp_attachment_is_image( $post ) );
+        if ( ! $eligible ) {
+            $this->remove( $post_id ); // e.g. a product whose type changed
+            return;
+        }
+        $this->rebuild_range( $post_id, $post_id );
+    }
+
+    public function remove( $post_id ) {
+        global $wpdb;
+        $wpdb->delete( self::table_name(), array( 'post_id' => (int) $post_id ), array( '%d' ) );
+    }
+
+    /**
+     * Clear a flag for every row, mirroring a bulk delete of the meta key behind it
+     * (raw DELETEs on wp_postmeta do not fire the meta hooks).
+     */
+    public static function clear_flag( $column ) {
+        global $wpdb;
+        if ( ! in_array( $column, array( 'failed', 'processed_at' ), true ) ) {
+            return;
+        }
+        $table_name = self::table_name();
+        $wpdb->query( "UPDATE $table_name SET $column = 0 WHERE $column <> 0" );
+    }
+
+    /**
+     * WP_Query integration: queries with 'woosuite_seo_index' => array( condition, ... )
+     * join the index and add the named conditions to WHERE.
+     */
+    public function filter_clauses( $clauses, $query ) {
+        global $wpdb;
+
+        $conditions = $query->get( 'woosuite_seo_index' );
+        if ( empty( $conditions ) || ! is_array( $conditions ) ) {
+            return $clauses;
+        }
+
+        $map = array(
+            'unoptimized' => 'wsi.has_meta_desc = 0',
+            'unoptimized_image' => 'wsi.has_alt = 0',
+            'enhanced' => '(wsi.has_history = 1 OR wsi.has_proposal = 1)',
+            'not_enhanced' => 'wsi.has_history = 0 AND wsi.has_proposal = 0',
+            'queued' => 'wsi.failed = 0 AND wsi.processed_at = 0',
+        );
+
+        $table_name = self::table_name();
+        $clauses['join'] .= " INNER JOIN $table_name AS wsi ON wsi.post_id = {$wpdb->posts}.ID";
+        foreach ( $conditions as $condition ) {
+            if ( isset( $map[ $condition ] ) ) {
+                $clauses['where'] .= ' AND ' . $map[ $condition ];
+            }
+        }
+
+        return $clauses;
+    }
+
+    /**
+     * Rewrite the rows for posts with IDs in [$from, $to] in two statements.
+     */
+    private function rebuild_range( $from, $to ) {
+        global $wpdb;
+        $table_name = self::table_name();
+
+        $wpdb->query( $wpdb->prepare( "DELETE FROM $table_name WHERE post_id BETWEEN %d AND %d", $from, $to ) );
+
+        $types = "'" . implode( "','", self::TEXT_TYPES ) . "'";
+        $exists = function( $keys, $non_empty = true ) use ( $wpdb ) {
+            $keys = "'" . implode( "','", $keys ) . "'";
+            $value = $non_empty ? " AND m.meta_value <> ''" : '';
+            return "EXISTS (SELECT 1 FROM $wpdb->postmeta m WHERE m.post_id = p.ID AND m.meta_key IN ($keys)$value)";
+        };
+
+        $sql = "INSERT INTO $table_name (post_id, post_type, has_meta_desc, has_alt, has_history, has_proposal, failed, processed_at)
+            SELECT p.ID, p.post_type,
+                " . $exists( array( '_woosuite_meta_description' ) ) . ",
+                " . $exists( array( '_wp_attachment_image_alt' ) ) . ",
+                " . $exists( array( '_woosuite_history_post_title', '_woosuite_history_post_content', '_woosuite_history_post_excerpt' ), false ) . ",
+                " . $exists( array( '_woosuite_proposed_title', '_woosuite_proposed_description', '_woosuite_proposed_short_description' ), false ) . ",
+                " . $exists( array( '_woosuite_seo_failed' ), false ) . ",
+                COALESCE( ( SELECT MAX( CAST( m.meta_value AS UNSIGNED ) ) FROM $wpdb->postmeta m WHERE m.post_id = p.ID AND m.meta_key = '_woosuite_seo_processed_at' ), 0 )
+            FROM $wpdb->posts p
+            WHERE p.ID BETWEEN %d AND %d
+              AND ( p.post_type IN ($types) OR ( p.post_type = 'attachment' AND p.post_mime_type LIKE 'image/%%' ) )";
+
+        $wpdb->query( $wpdb->prepare( $sql, $from, $to ) );
+    }
+}
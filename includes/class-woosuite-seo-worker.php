@@ -3,12 +3,16 @@
 class WooSuite_Seo_Worker {
 
     private $groq;
+    private $limiter;
     private $log_option = 'woosuite_debug_log';
 
     public function __construct() {
         // Switch to Groq
         $this->groq = new WooSuite_Groq();
-        add_action( 'woosuite_seo_batch_process', array( $this, 'process_batch' ) );
+        // Background context: wait longer for a rate limit slot before pausing the batch
+        $this->groq->set_max_wait( 20 );
+        $this->limiter = new WooSuite_Rate_Limiter();
+        WooSuite_Job_Queue::register_handler( 'seo', array( $this, 'run_worker' ), array( __CLASS__, 'get_work_summary' ) );
     }
 
     private function log( $message ) {
@@ -36,154 +40,278 @@ class WooSuite_Seo_Worker {
     }
 
     /**
-     * Start the batch process with filters
+     * Start the batch process with filters: one 'seo' job in WooSuite_Job_Queue
+     * with a task per unoptimized item, replacing any unfinished batch.
      * @param array $filters e.g. ['type' => 'product', 'category' => 123]
+     * @return int Job ID.
      */
-    public function start_batch( $filters = array() ) {
-        update_option( 'woosuite_seo_batch_stop_signal', false );
-        update_option( 'woosuite_seo_batch_filters', $filters );
+    public function start_batch( $filters = array(), $dispatch = true ) {
+        WooSuite_Job_Queue::cancel_jobs( 'seo', 'Replaced by a new batch.' );
 
-        $total = $this->get_total_unoptimized_count( $filters );
+        $ids = $this->get_queue_items( $filters );
+        $total = count( $ids );
         $type_label = isset( $filters['type'] ) ? ucfirst( $filters['type'] ) : 'Item';
 
         $this->log( "Starting Batch for {$type_label}s. Total found: $total" );
 
-        update_option( 'woosuite_seo_batch_status', array(
-            'status' => 'running',
-            'total' => $total,
-            'processed' => 0,
-            'failed' => 0,
-            'start_time' => current_time( 'mysql' ),
-            'last_updated' => time(),
-            'message' => "Starting optimization of $total {$type_label}s..."
-        ));
+        $job_id = WooSuite_Job_Queue::create_job( 'seo', $filters, "Starting optimization of $total {$type_label}s..." );
+        WooSuite_Job_Queue::add_tasks( $job_id, $ids );
 
-        if ( ! wp_next_scheduled( 'woosuite_seo_batch_process' ) ) {
-            wp_schedule_single_event( time(), 'woosuite_seo_batch_process' );
+        if ( $dispatch ) {
+            WooSuite_Job_Queue::dispatch();
         }
+        return $job_id;
     }
 
     public function resume_batch() {
-        $status = get_option( 'woosuite_seo_batch_status' );
-        // Only resume if not already running (or if stuck)
-        // We force it to 'running'
-        $status['status'] = 'running';
-        $status['message'] = 'Resuming batch process...';
-        $status['last_updated'] = time();
-        update_option( 'woosuite_seo_batch_status', $status );
-        update_option( 'woosuite_seo_batch_stop_signal', false );
+        $job = WooSuite_Job_Queue::get_latest_job( 'seo' );
+        if ( ! $job || ! in_array( $job['status'], array( 'stopped', 'paused' ), true ) ) {
+            return;
+        }
 
+        WooSuite_Job_Queue::update_job( $job['id'], array( 'status' => 'running', 'paused_until' => 0, 'message' => 'Resuming batch process...' ) );
         $this->log( "Manual Resume Triggered." );
+        WooSuite_Job_Queue::dispatch();
+    }
 
-        if ( ! wp_next_scheduled( 'woosuite_seo_batch_process' ) ) {
-            wp_schedule_single_event( time(), 'woosuite_seo_batch_process' );
+    public function stop_batch( $message = "Stopped" ) {
+        $job = WooSuite_Job_Queue::get_latest_job( 'seo' );
+        if ( ! $job || ! in_array( $job['status'], array( 'running', 'paused' ), true ) ) {
+            return;
         }
+
+        $this->log( "Batch Stopped: $message" );
+        // Tasks stay queued: Resume picks up where this left off
+        WooSuite_Job_Queue::update_job( $job['id'], array( 'status' => 'stopped', 'paused_until' => 0, 'message' => $message ) );
+    }
+
+    /**
+     * Latest batch in the shape of the old woosuite_seo_batch_status option.
+     */
+    public static function get_status() {
+        $job = WooSuite_Job_Queue::get_latest_job( 'seo' );
+        if ( ! $job || $job['status'] === 'cancelled' ) {
+            return array( 'status' => 'idle' );
+        }
+
+        return array(
+            'status' => $job['status'],
+            'total' => $job['total'],
+            'processed' => $job['done'] + $job['failed'],
+            'failed' => $job['failed'],
+            'start_time' => get_date_from_gmt( gmdate( 'Y-m-d H:i:s', $job['created_at'] ) ),
+            'last_updated' => $job['updated_at'],
+            'resume_at' => $job['paused_until'],
+            'message' => $job['message'],
+        );
     }
 
-    public function process_batch() {
+    /**
+     * Work left for the job queue runners: claimable tasks and the workers holding some.
+     */
+    public static function get_work_summary() {
+        $job = WooSuite_Job_Queue::get_latest_job( 'seo' );
+        if ( ! $job || ! in_array( $job['status'], array( 'running', 'paused' ), true ) ) {
+            return array( 'free' => 0, 'workers' => 0 );
+        }
+
+        $tasks = WooSuite_Job_Queue::count_tasks( $job['id'] );
+        // A paused job has nothing to hand out until it is due
+        return array(
+            'free' => $job['status'] === 'running' || $job['paused_until'] <= time() ? $tasks['free'] : 0,
+            'workers' => $tasks['workers'],
+        );
+    }
+
+    /**
+     * Claim tasks of the active batch and process them until $budget seconds are
+     * used up (see WooSuite_Job_Queue::run).
+     *
+     * @return bool True while the batch has work left (including while it is paused).
+     */
+    public function run_worker( $budget = 25 ) {
+        $deadline = microtime( true ) + $budget;
+
         // WRAP ENTIRE WORKER IN TRY/CATCH TO PREVENT SILENT DEATH
         try {
-            // Cleanup stuck items (older than 10 mins)
-            $this->cleanup_stuck_items();
-
             if ( function_exists( 'set_time_limit' ) ) set_time_limit( 300 );
 
-            if ( get_option( 'woosuite_seo_batch_stop_signal' ) ) {
-                $this->stop_batch("Process stopped by user.");
-                return;
-            }
+            while ( microtime( true ) < $deadline ) {
+                $job = WooSuite_Job_Queue::get_latest_job( 'seo' );
+                if ( $job && $job['status'] === 'paused' ) {
+                    // Short pauses (Retry-After) are waited out here, long ones by the queue's wake-up tick
+                    $wait = $job['paused_until'] - time();
+                    if ( $wait > 0 && $wait >= $deadline - microtime( true ) ) {
+                        return true;
+                    }
+                    if ( $wait > 0 ) {
+                        sleep( $wait );
+                    }
+                    $this->log( "Resuming batch after pause..." );
+                }
 
-            $status = get_option( 'woosuite_seo_batch_status' );
+                $job = WooSuite_Job_Queue::get_active_job( 'seo' );
+                if ( ! $job ) {
+                    return false;
+                }
 
-            // If status is 'paused', it means we were called by the scheduler to RESUME.
-            // So we switch back to 'running'.
-            if ( isset( $status['status'] ) && $status['status'] === 'paused' ) {
-                $status['status'] = 'running';
-                $status['message'] = 'Resuming after rate limit pause...';
-                update_option( 'woosuite_seo_batch_status', $status );
-                $this->log( "Resuming batch after pause..." );
-            } elseif ( ! $status || $status['status'] !== 'running' ) {
-                return;
-            }
+                // Items whose worker died on them MAX_ATTEMPTS times
+                foreach ( WooSuite_Job_Queue::reap( $job['id'] ) as $id ) {
+                    $this->log( "ID {$id} failed: worker stopped while processing it." );
+                    update_post_meta( $id, '_woosuite_seo_failed', 1 );
+                    update_post_meta( $id, '_woosuite_seo_last_error', 'Worker stopped while processing this item.' );
+                }
 
-            $status['last_updated'] = time();
-            update_option( 'woosuite_seo_batch_status', $status );
+                // Text items share batched prompts of $batch_size; up to $concurrency prompts are in flight at once
+                $batch_size = max( 1, (int) get_option( 'woosuite_seo_batch_size', 5 ) );
+                $concurrency = max( 1, min( 16, (int) get_option( 'woosuite_ai_concurrency', 4 ) ) );
+                $tasks = WooSuite_Job_Queue::claim( $job['id'], $batch_size * $concurrency );
 
-            $start_time = microtime( true );
-            // Groq is fast, but we limit execution time to keep the server happy
-            $max_execution_time = 25;
+                if ( empty( $tasks ) ) {
+                    $left = WooSuite_Job_Queue::count_tasks( $job['id'] );
+                    if ( $left['free'] + $left['leased'] > 0 ) {
+                        return true; // The rest is held by other workers
+                    }
+                    if ( WooSuite_Job_Queue::complete_job( $job['id'], 'Optimization Complete!' ) ) {
+                        $this->log( "No more items to process. Batch Complete." );
+                    }
+                    return false;
+                }
 
-            while ( ( microtime( true ) - $start_time ) < $max_execution_time ) {
+                $this->process_tasks( $job, $tasks, $batch_size, $concurrency );
 
-                if ( get_option( 'woosuite_seo_batch_stop_signal' ) ) {
-                    $this->stop_batch("Process stopped by user.");
-                    return;
-                }
+                // No fixed sleep: WooSuite_Groq paces every call through the shared rate limiter.
+            }
+        } catch ( Throwable $e ) { // Catch global Throwable to ensure nothing escapes
+             $this->log( "FATAL BATCH WORKER ERROR: " . $e->getMessage() . " in " . $e->getFile() . ":" . $e->getLine() );
+             // Claimed tasks are retried when their lease runs out, and failed after MAX_ATTEMPTS
+             return true;
+        }
 
-                $status = get_option( 'woosuite_seo_batch_status' );
-                if ( $status['status'] !== 'running' ) {
-                    return;
+        return true;
+    }
+
+    /**
+     * One pass over claimed tasks: AI calls in flight together, each result written
+     * back (and its task finished) as its response arrives.
+     */
+    private function process_tasks( $job, $tasks, $batch_size, $concurrency ) {
+        $by_id = array();
+        foreach ( $tasks as $task ) {
+            $by_id[ (int) $task['item_id'] ] = $task;
+        }
+        $owner = $tasks[0]['owner'];
+        $beat = time();
+
+        $rate_limited = false;
+        $apply = function( $id, $ai_result ) use ( $job, $by_id, $owner, &$beat, &$rate_limited ) {
+            $task = $by_id[ $id ];
+
+            // Throttled before it was answered: the task goes back to the queue for the resume
+            if ( is_wp_error( $ai_result ) && $ai_result->get_error_code() === 'rate_limit' ) {
+                if ( ! $rate_limited ) {
+                    $this->pause_for_rate_limit( $job['id'] );
                 }
+                $rate_limited = true;
+                WooSuite_Job_Queue::release( $task );
+                return;
+            }
+
+            $result = $this->process_single_item( $id, $ai_result );
 
-                $filters = get_option( 'woosuite_seo_batch_filters', array() );
-                $ids = $this->get_next_batch_items( 1, $filters );
-
-                if ( empty( $ids ) ) {
-                    $this->log( "No more items to process. Batch Complete." );
-                    $status['status'] = 'complete';
-                    $status['message'] = 'Optimization Complete!';
-                    $status['processed'] = $status['total'];
-                    $status['last_updated'] = time();
-                    update_option( 'woosuite_seo_batch_status', $status );
-                    return;
+            if ( $result === 'RATE_LIMIT' ) {
+                if ( ! $rate_limited ) {
+                    $this->pause_for_rate_limit( $job['id'] );
                 }
+                $rate_limited = true;
+                WooSuite_Job_Queue::release( $task );
+            } else {
+                WooSuite_Job_Queue::finish( $job['id'], $task, $result === 'SUCCESS' ? 'done' : 'failed', $result === 'SUCCESS' ? '' : (string) get_post_meta( $id, '_woosuite_seo_last_error', true ) );
+            }
 
-                $id = $ids[0];
-                $result = $this->process_single_item( $id, $status );
+            // Keep the rest of the claim while slow responses come in
+            if ( time() - $beat >= 30 ) {
+                WooSuite_Job_Queue::heartbeat( $owner );
+                $beat = time();
+            }
+        };
 
-                if ( $result === 'RATE_LIMIT' ) {
-                    // Schedule a resume event for 60 seconds later
-                    if ( ! get_option( 'woosuite_seo_batch_stop_signal' ) ) {
-                        // Clear any existing schedule first to be safe
-                        wp_clear_scheduled_hook( 'woosuite_seo_batch_process' );
-                        wp_schedule_single_event( time() + 60, 'woosuite_seo_batch_process' );
-                        $this->log( "Batch Paused (Rate Limit). Auto-resume scheduled in 60s." );
+        $ids = array_keys( $by_id );
+        foreach ( $ids as $id ) {
+            if ( ! get_post( $id ) ) {
+                $apply( $id, null ); // Recorded as failed
+            }
+        }
+
+        // Each result is written back as its response arrives
+        $this->groq->run_concurrent( $this->build_jobs( $ids, $batch_size ), $concurrency, function( $key, $result ) use ( $apply ) {
+            list( $kind, $ids ) = explode( ':', $key, 2 );
+            foreach ( explode( ',', $ids ) as $id ) {
+                $id = (int) $id;
+                if ( $kind === 'batch' ) {
+                    if ( is_wp_error( $result ) ) {
+                        $apply( $id, $result );
+                    } else {
+                        $apply( $id, isset( $result[ $id ] ) ? $result[ $id ] : new WP_Error( 'api_empty', 'No result for this item in the batch.' ) );
                     }
-                    break;
+                } else {
+                    $apply( $id, $result );
                 }
+            }
+        } );
 
-                // Increment counts handled in process_single_item?
-                // No, process_single_item handles 'processed' increment only on success.
-                // We need to handle failures here if process_single_item didn't.
-                // But process_single_item takes &$status reference.
-
-                // Let's refactor process_single_item to NOT update status counts, or we check result.
-                if ( $result === 'ERROR' ) {
-                    $status['processed']++;
-                    if ( ! isset( $status['failed'] ) ) $status['failed'] = 0;
-                    $status['failed']++;
-                    update_option( 'woosuite_seo_batch_status', $status );
-                }
+        if ( ! $rate_limited ) {
+            WooSuite_Job_Queue::update_job( $job['id'], array( 'message' => 'Processed ' . count( $ids ) . ' items, last ID ' . end( $ids ) . '...' ) );
+        }
+    }
 
-                // Smart Throttling for Groq Free Tier (approx 30 RPM = 1 request every 2s)
-                // We add a slight buffer (2s)
-                sleep(2);
+    /**
+     * AI jobs for one pass (see WooSuite_Groq::run_concurrent): text items in
+     * batched prompts of $batch_size, one vision call per image. Job keys name the
+     * kind and the post IDs they answer for, e.g. "batch:12,13,14" or "image:40".
+     */
+    private function build_jobs( $ids, $batch_size ) {
+        $rewrite_titles = get_option( 'woosuite_seo_rewrite_titles', 'no' ) === 'yes';
+
+        $jobs = array();
+        $items = array();
+        foreach ( $ids as $id ) {
+            $post = get_post( $id );
+            if ( ! $post ) {
+                continue;
+            }
+            if ( $post->post_type === 'attachment' ) {
+                $jobs[ "image:$id" ] = array( 'image_seo', (int) $id, basename( get_attached_file( $id ) ?: wp_get_attachment_url( $id ) ) );
+            } else {
+                $items[ $id ] = $this->build_text_item( $post, $rewrite_titles );
             }
-        } catch ( Throwable $e ) { // Catch global Throwable to ensure nothing escapes
-             $this->log( "FATAL BATCH WORKER ERROR: " . $e->getMessage() . " in " . $e->getFile() . ":" . $e->getLine() );
-             // Mark batch as stopped or failed? Maybe keep running to retry?
-             // Ideally we stop to prevent infinite crash loops.
-             $this->stop_batch("Stopped due to internal error. Check logs.");
         }
 
-        // Reschedule if still running (and not paused by rate limit)
-        $status = get_option( 'woosuite_seo_batch_status' ); // Re-fetch to check if paused
-        if ( ! get_option( 'woosuite_seo_batch_stop_signal' ) && $status['status'] === 'running' ) {
-             wp_schedule_single_event( time() + 1, 'woosuite_seo_batch_process' );
+        foreach ( array_chunk( $items, $batch_size, true ) as $chunk ) {
+            if ( count( $chunk ) === 1 ) {
+                $jobs[ 'text:' . key( $chunk ) ] = array( 'seo_meta', reset( $chunk ) );
+            } else {
+                $this->log( "Requesting SEO meta for " . count( $chunk ) . " items in one prompt (IDs " . implode( ', ', array_keys( $chunk ) ) . ")..." );
+                $jobs[ 'batch:' . implode( ',', array_keys( $chunk ) ) ] = array( 'seo_meta_batch', $chunk );
+            }
         }
+
+        return $jobs;
     }
 
-    private function process_single_item( $id, &$status ) {
+    /**
+     * Pause the batch until the shared limiter has budget again (Retry-After).
+     */
+    private function pause_for_rate_limit( $job_id ) {
+        $delay = max( 1, (int) ceil( $this->limiter->get_retry_after() ) );
+        $this->log( "Rate Limit Hit! Batch Paused. Auto-resume in {$delay}s." );
+        WooSuite_Job_Queue::pause_job( $job_id, time() + $delay, 'Paused due to API Rate Limit. Auto-resuming shortly...' );
+    }
+
+    /**
+     * @return string 'SUCCESS', 'ERROR' (flagged as failed on the item) or 'RATE_LIMIT'.
+     */
+    private function process_single_item( $id, $ai_result = null ) {
         $post = get_post( $id );
         if ( ! $post ) {
              update_post_meta( $id, '_woosuite_seo_failed', 1 );
@@ -192,24 +320,15 @@ class WooSuite_Seo_Worker {
 
         $this->log( "Processing ID {$id} ({$post->post_type})..." );
 
-        // Mark as processed immediately to avoid loops
-        update_post_meta( $id, '_woosuite_seo_processed_at', time() );
-
         try {
             $rewrite_titles = get_option( 'woosuite_seo_rewrite_titles', 'no' ) === 'yes';
 
             if ( $post->post_type === 'attachment' ) {
-                $this->process_image( $post );
+                $this->process_image( $post, $ai_result );
             } else {
-                $this->process_text( $post, $rewrite_titles );
+                $this->process_text( $post, $rewrite_titles, $ai_result );
             }
 
-            // Success
-            $status['processed']++;
-            $status['last_updated'] = time();
-            $status['message'] = "Processed ID {$id}: " . substr($post->post_title, 0, 30) . "...";
-            update_option( 'woosuite_seo_batch_status', $status );
-
             return 'SUCCESS';
 
         } catch ( Throwable $e ) { // Catch everything (Exceptions + Errors)
@@ -217,15 +336,6 @@ class WooSuite_Seo_Worker {
             $this->log( "Error processing ID {$id}: " . $msg );
 
             if ( $msg === 'RATE_LIMIT_HIT' ) {
-                $this->log( "Rate Limit Hit! Pausing batch..." );
-
-                $status['status'] = 'paused';
-                $status['message'] = 'Paused due to API Rate Limit. Auto-resuming shortly...';
-                $status['last_updated'] = time();
-                update_option( 'woosuite_seo_batch_status', $status );
-
-                delete_post_meta( $id, '_woosuite_seo_processed_at' );
-
                 return 'RATE_LIMIT';
             }
 
@@ -235,16 +345,7 @@ class WooSuite_Seo_Worker {
         }
     }
 
-    private function stop_batch( $message = "Stopped" ) {
-        $this->log( "Batch Stopped: $message" );
-        $status = get_option( 'woosuite_seo_batch_status' );
-        $status['status'] = 'stopped';
-        $status['message'] = $message;
-        $status['last_updated'] = time();
-        update_option( 'woosuite_seo_batch_status', $status );
-    }
-
-    private function process_text( $post, $rewrite_titles ) {
+    private function build_text_item( $post, $rewrite_titles ) {
         $item = array(
             'type' => $post->post_type,
             'name' => $post->post_title,
@@ -257,8 +358,14 @@ class WooSuite_Seo_Worker {
             if ( $product ) $item['price'] = $product->get_price();
         }
 
-        // Call Groq for Text SEO
-        $result = $this->groq->generate_seo_meta( $item );
+        return $item;
+    }
+
+    private function process_text( $post, $rewrite_titles, $result = null ) {
+        // Call Groq for Text SEO (unless the batched prompt already answered for this item)
+        if ( $result === null ) {
+            $result = $this->groq->generate_seo_meta( $this->build_text_item( $post, $rewrite_titles ) );
+        }
 
         if ( is_wp_error( $result ) ) {
             if ( $result->get_error_code() === 'rate_limit' ) {
@@ -363,11 +470,8 @@ class WooSuite_Seo_Worker {
             $this->log( "Optimizing Product Image ID {$img_id} for Product: {$product_name}" );
 
             try {
-                $url = wp_get_attachment_url( $img_id );
-                if ( ! $url ) continue;
-
-                // Use Text-Based Generation (Passed Context)
-                $result = $this->groq->generate_image_seo( $url, $product_name, $context );
+                // Read from disk and cached by file hash (see WooSuite_Image_Input)
+                $result = $this->groq->generate_image_seo( (int) $img_id, $product_name, $context );
 
                     // Check for Rate Limit in Image Loop
                     if ( is_wp_error( $result ) && $result->get_error_code() === 'rate_limit' ) {
@@ -388,9 +492,6 @@ class WooSuite_Seo_Worker {
                     update_post_meta( $img_id, '_woosuite_seo_processed_at', time() );
                 }
 
-                // Sleep briefly to avoid hammering the API if product has many images
-                    sleep(2);
-
             } catch ( Exception $e ) {
                     if ( $e->getMessage() === 'RATE_LIMIT_HIT' ) {
                          // Re-throw so the parent process can handle the pause
@@ -401,14 +502,16 @@ class WooSuite_Seo_Worker {
         }
     }
 
-    private function process_image( $post ) {
-        $url = wp_get_attachment_url( $post->ID );
-        if ( ! $url ) {
-            throw new Exception( "Missing attachment URL." );
+    private function process_image( $post, $result = null ) {
+        // Call Groq for the image (unless run_concurrent already did)
+        if ( $result === null ) {
+            $file = get_attached_file( $post->ID );
+            if ( ! $file && ! wp_get_attachment_url( $post->ID ) ) {
+                throw new Exception( "Missing attachment file." );
+            }
+            $result = $this->groq->generate_image_seo( $post->ID, basename( $file ?: wp_get_attachment_url( $post->ID ) ) );
         }
 
-        $result = $this->groq->generate_image_seo( $url, basename( $url ) );
-
         if ( is_wp_error( $result ) ) {
              if ( $result->get_error_code() === 'rate_limit' ) {
                  throw new Exception( 'RATE_LIMIT_HIT' );
@@ -439,22 +542,40 @@ class WooSuite_Seo_Worker {
         }
     }
 
-    private function get_next_batch_items( $limit, $filters = array() ) {
-        // Build Meta Query (Unoptimized)
-        $meta_query = array(
+    /**
+     * "Unoptimized and not yet attempted": indexed flags when the SEO index is
+     * built, otherwise the equivalent NOT EXISTS meta_query.
+     */
+    private function apply_queue_filter( &$args, $type ) {
+        if ( WooSuite_Seo_Index::is_ready() ) {
+            $args['woosuite_seo_index'] = array( 'queued', $type === 'image' ? 'unoptimized_image' : 'unoptimized' );
+            return;
+        }
+
+        $args['meta_query'] = array(
             'relation' => 'AND',
             array( 'key' => '_woosuite_seo_failed', 'compare' => 'NOT EXISTS' ),
-            array( 'key' => '_woosuite_seo_processed_at', 'compare' => 'NOT EXISTS' )
+            array( 'key' => '_woosuite_seo_processed_at', 'compare' => 'NOT EXISTS' ),
+            array( 'key' => $type === 'image' ? '_wp_attachment_image_alt' : '_woosuite_meta_description', 'compare' => 'NOT EXISTS' )
         );
+    }
 
+    /**
+     * IDs of every item the batch should optimize (one task each), in ID order.
+     */
+    private function get_queue_items( $filters = array() ) {
         // Determine Type
         $type = isset( $filters['type'] ) ? $filters['type'] : 'product';
 
         $args = array(
-            'posts_per_page' => $limit,
+            'posts_per_page' => -1,
             'fields' => 'ids',
             'orderby' => 'ID',
             'order' => 'ASC',
+            'no_found_rows' => true,
+            'update_post_meta_cache' => false,
+            'update_post_term_cache' => false,
+            'suppress_filters' => false, // get_posts() default would skip the index join
         );
 
         if ( $type === 'image' ) {
@@ -463,18 +584,13 @@ class WooSuite_Seo_Worker {
             $args['post_mime_type'] = 'image';
             // SKIP ORPHAN IMAGES (User Requirement: Only attached images)
             $args['post_parent__not_in'] = array( 0 );
-
-            // Image specific meta check
-            $meta_query[] = array( 'key' => '_wp_attachment_image_alt', 'compare' => 'NOT EXISTS' );
-
         } else {
             $args['post_type'] = $type; // product, post, page
             $args['post_status'] = 'publish';
-
-            // Text specific meta check
-            $meta_query[] = array( 'key' => '_woosuite_meta_description', 'compare' => 'NOT EXISTS' );
         }
 
+        $this->apply_queue_filter( $args, $type );
+
         // Apply Category Filter if present
         if ( ! empty( $filters['category'] ) ) {
             $taxonomy = ($type === 'product') ? 'product_cat' : 'category';
@@ -500,8 +616,6 @@ class WooSuite_Seo_Worker {
             // I'll stick to 'unoptimized' logic for safety.
         }
 
-        $args['meta_query'] = $meta_query;
-
         return get_posts( $args );
     }
 
@@ -510,13 +624,9 @@ class WooSuite_Seo_Worker {
 
         $args = array(
             'fields' => 'ids',
-            'posts_per_page' => -1, // Just counting
-        );
-
-        $meta_query = array(
-            'relation' => 'AND',
-            array( 'key' => '_woosuite_seo_failed', 'compare' => 'NOT EXISTS' ),
-            array( 'key' => '_woosuite_seo_processed_at', 'compare' => 'NOT EXISTS' )
+            'posts_per_page' => 1, // Just counting (found_posts), no need to fetch every ID
+            'update_post_meta_cache' => false,
+            'update_post_term_cache' => false,
         );
 
         if ( $type === 'image' ) {
@@ -525,13 +635,13 @@ class WooSuite_Seo_Worker {
             $args['post_mime_type'] = 'image';
             // SKIP ORPHAN IMAGES
             $args['post_parent__not_in'] = array( 0 );
-            $meta_query[] = array( 'key' => '_wp_attachment_image_alt', 'compare' => 'NOT EXISTS' );
         } else {
             $args['post_type'] = $type;
             $args['post_status'] = 'publish';
-            $meta_query[] = array( 'key' => '_woosuite_meta_description', 'compare' => 'NOT EXISTS' );
         }
 
+        $this->apply_queue_filter( $args, $type );
+
         if ( ! empty( $filters['category'] ) ) {
             $taxonomy = ($type === 'product') ? 'product_cat' : 'category';
             $args['tax_query'] = array(
@@ -548,18 +658,7 @@ class WooSuite_Seo_Worker {
             $args['post__in'] = $filters['ids'];
         }
 
-        $args['meta_query'] = $meta_query;
-
         $query = new WP_Query( $args );
         return $query->found_posts;
     }
-
-    private function cleanup_stuck_items() {
-        global $wpdb;
-        $cutoff = time() - 600; // 10 mins
-        $wpdb->query( $wpdb->prepare(
-            "DELETE FROM $wpdb->postmeta WHERE meta_key = '_woosuite_seo_processed_at' AND meta_value < %d",
-            $cutoff
-        ) );
-    }
 }
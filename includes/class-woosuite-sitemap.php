@@ -4,10 +4,24 @@ class WooSuite_Sitemap {
 
     private $plugin_name;
     private $version;
+    private $cache;
+
+    // Each child sitemap covers a fixed ID range of one post type, so an edit only
+    // invalidates the shard that holds it (and at most SHARD_SIZE URLs per file).
+    const SHARD_SIZE = 2000;
+
+    // Rows primed and written per step while streaming a shard
+    const CHUNK = 200;
+
+    // Regenerate cached files at least daily (e.g. changed image alt text)
+    const MAX_AGE = DAY_IN_SECONDS;
+
+    const REWRITE_VERSION = '2';
 
     public function __construct( $plugin_name, $version ) {
         $this->plugin_name = $plugin_name;
         $this->version = $version;
+        $this->cache = new WooSuite_File_Cache( 'sitemaps' );
     }
 
     public function init() {
@@ -15,75 +29,191 @@ class WooSuite_Sitemap {
         add_filter( 'query_vars', array( $this, 'add_query_vars' ) );
         add_action( 'template_redirect', array( $this, 'render_sitemap' ) );
         add_filter( 'robots_txt', array( $this, 'add_to_robots' ), 100 );
+
+        // Invalidate only the affected shard (plus the index, whose lastmod changes)
+        add_action( 'save_post', array( $this, 'invalidate_post' ) );
+        add_action( 'delete_post', array( $this, 'invalidate_post' ) ); // Before the row is gone (post type still known)
     }
 
     public function add_rewrite_rules() {
-        add_rewrite_rule( '^sitemap\.xml$', 'index.php?woosuite_sitemap=1', 'top' );
+        add_rewrite_rule( '^sitemap\.xml$', 'index.php?woosuite_sitemap=index', 'top' );
+        add_rewrite_rule( '^sitemap-([a-z0-9_]+)-([0-9]+)\.xml$', 'index.php?woosuite_sitemap=$matches[1]&woosuite_sitemap_shard=$matches[2]', 'top' );
+
+        // The child sitemap rule is new; existing installs need one flush
+        if ( get_option( 'woosuite_sitemap_rewrite_version' ) !== self::REWRITE_VERSION ) {
+            flush_rewrite_rules( false );
+            update_option( 'woosuite_sitemap_rewrite_version', self::REWRITE_VERSION );
+        }
     }
 
     public function add_query_vars( $vars ) {
         $vars[] = 'woosuite_sitemap';
+        $vars[] = 'woosuite_sitemap_shard';
         return $vars;
     }
 
     public function render_sitemap() {
-        if ( get_query_var( 'woosuite_sitemap' ) ) {
-            // Check if enabled
-            if ( get_option( 'woosuite_sitemap_enabled', 'yes' ) !== 'yes' ) {
+        $sitemap = get_query_var( 'woosuite_sitemap' );
+        if ( ! $sitemap ) {
+            return;
+        }
+
+        // Check if enabled
+        if ( get_option( 'woosuite_sitemap_enabled', 'yes' ) !== 'yes' ) {
+            return;
+        }
+
+        $shard = (int) get_query_var( 'woosuite_sitemap_shard' );
+
+        if ( $sitemap === 'index' || $sitemap === '1' ) {
+            $key = 'sitemap.xml';
+            $writer = array( $this, 'write_index' );
+        } elseif ( $sitemap === 'home' ) {
+            $key = 'sitemap-home-0.xml';
+            $writer = array( $this, 'write_home' );
+        } elseif ( in_array( $sitemap, $this->get_post_types(), true ) ) {
+            $key = "sitemap-$sitemap-$shard.xml";
+            $writer = function( $handle ) use ( $sitemap, $shard ) {
+                $this->write_shard( $handle, $sitemap, $shard );
+            };
+        } else {
+            return; // Unknown type: let WordPress 404
+        }
+
+        $path = $this->cache->get( $key, self::MAX_AGE );
+        if ( ! $path ) {
+            // Only shards the index lists are generated and cached; any other number is a 404
+            if ( $key !== 'sitemap.xml' && $sitemap !== 'home' && ! $this->shard_exists( $sitemap, $shard ) ) {
+                global $wp_query;
+                $wp_query->set_404();
+                status_header( 404 );
+                nocache_headers();
                 return;
             }
+            $path = $this->cache->put( $key, $writer );
+        }
 
+        if ( $path ) {
+            $this->cache->serve( $path, 'application/xml; charset=utf-8' );
+        } else {
+            // Uploads not writable: stream straight to the client
             header( 'Content-Type: application/xml; charset=utf-8' );
-            echo '<?xml version="1.0" encoding="UTF-8"?>';
-            echo '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">';
+            $out = fopen( 'php://output', 'wb' );
+            call_user_func( $writer, $out );
+            fclose( $out );
+        }
+        exit;
+    }
 
-            // Home
-            echo '<url><loc>' . home_url( '/' ) . '</loc><changefreq>daily</changefreq><priority>1.0</priority></url>';
+    public function write_index( $handle ) {
+        global $wpdb;
 
-            // Posts & Pages & Products
-            $post_types = array( 'post', 'page' );
-            if ( class_exists( 'WooCommerce' ) ) {
-                $post_types[] = 'product';
-            }
+        fwrite( $handle, '<?xml version="1.0" encoding="UTF-8"?>' );
+        fwrite( $handle, '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' );
+        fwrite( $handle, '<sitemap><loc>' . esc_url( home_url( '/sitemap-home-0.xml' ) ) . '</loc></sitemap>' );
 
-            $posts = get_posts( array(
-                'numberposts' => -1,
-                'post_type' => $post_types,
-                'post_status' => 'publish',
-                'orderby' => 'modified',
-                'order' => 'DESC'
+        foreach ( $this->get_post_types() as $post_type ) {
+            // One grouped query lists the non-empty shards and their lastmod
+            $shards = $wpdb->get_results( $wpdb->prepare(
+                "SELECT FLOOR(ID / %d) AS shard, MAX(post_modified_gmt) AS modified
+                 FROM $wpdb->posts WHERE post_type = %s AND post_status = 'publish'
+                 GROUP BY shard ORDER BY shard",
+                self::SHARD_SIZE, $post_type
             ) );
 
-            foreach ( $posts as $post ) {
-                $last_mod = get_the_modified_date( 'c', $post );
-                echo '<url>';
-                echo '<loc>' . get_permalink( $post ) . '</loc>';
-                echo '<lastmod>' . $last_mod . '</lastmod>';
-                echo '<changefreq>weekly</changefreq>';
-                echo '<priority>0.8</priority>';
+            foreach ( $shards as $row ) {
+                fwrite( $handle, '<sitemap>' );
+                fwrite( $handle, '<loc>' . esc_url( home_url( "/sitemap-$post_type-{$row->shard}.xml" ) ) . '</loc>' );
+                fwrite( $handle, '<lastmod>' . mysql2date( 'c', $row->modified, false ) . '</lastmod>' );
+                fwrite( $handle, '</sitemap>' );
+            }
+        }
+
+        fwrite( $handle, '</sitemapindex>' );
+    }
+
+    public function write_home( $handle ) {
+        $this->write_urlset_open( $handle );
+        fwrite( $handle, '<url><loc>' . esc_url( home_url( '/' ) ) . '</loc><changefreq>daily</changefreq><priority>1.0</priority></url>' );
+        fwrite( $handle, '</urlset>' );
+    }
+
+    /**
+     * Whether the shard has at least one published $post_type post (a row of the index).
+     */
+    private function shard_exists( $post_type, $shard ) {
+        global $wpdb;
+
+        return (bool) $wpdb->get_var( $wpdb->prepare(
+            "SELECT ID FROM $wpdb->posts WHERE post_type = %s AND post_status = 'publish' AND ID BETWEEN %d AND %d LIMIT 1",
+            $post_type, $shard * self::SHARD_SIZE, ( $shard + 1 ) * self::SHARD_SIZE - 1
+        ) );
+    }
+
+    /**
+     * Stream one child sitemap: published $post_type posts with IDs in the shard's range.
+     */
+    public function write_shard( $handle, $post_type, $shard ) {
+        global $wpdb;
+
+        $ids = $wpdb->get_col( $wpdb->prepare(
+            "SELECT ID FROM $wpdb->posts WHERE post_type = %s AND post_status = 'publish' AND ID BETWEEN %d AND %d ORDER BY ID",
+            $post_type, $shard * self::SHARD_SIZE, ( $shard + 1 ) * self::SHARD_SIZE - 1
+        ) );
+
+        $this->write_urlset_open( $handle );
+
+        foreach ( array_chunk( $ids, self::CHUNK ) as $chunk ) {
+            // Posts + their meta/terms (permalinks, _thumbnail_id), then the thumbnails' meta
+            _prime_post_caches( $chunk, true, true );
+            $thumb_ids = array();
+            foreach ( $chunk as $id ) {
+                $thumb_id = (int) get_post_meta( $id, '_thumbnail_id', true );
+                if ( $thumb_id ) $thumb_ids[ $id ] = $thumb_id;
+            }
+            if ( $thumb_ids ) {
+                _prime_post_caches( array_unique( array_values( $thumb_ids ) ), false, true );
+            }
+
+            foreach ( $chunk as $id ) {
+                $post = get_post( $id );
+                $xml = '<url>';
+                $xml .= '<loc>' . esc_url( get_permalink( $post ) ) . '</loc>';
+                $xml .= '<lastmod>' . get_the_modified_date( 'c', $post ) . '</lastmod>';
+                $xml .= '<changefreq>weekly</changefreq>';
+                $xml .= '<priority>0.8</priority>';
 
                 // Add Featured Image
-                $thumb_id = get_post_thumbnail_id( $post->ID );
-                if ( $thumb_id ) {
-                    $img_url = wp_get_attachment_url( $thumb_id );
+                if ( isset( $thumb_ids[ $id ] ) ) {
+                    $img_url = wp_get_attachment_url( $thumb_ids[ $id ] );
                     if ( $img_url ) {
-                        echo '<image:image>';
-                        echo '<image:loc>' . esc_url( $img_url ) . '</image:loc>';
+                        $xml .= '<image:image>';
+                        $xml .= '<image:loc>' . esc_url( $img_url ) . '</image:loc>';
                         // Add Title as caption if available
-                        $alt = get_post_meta($thumb_id, '_wp_attachment_image_alt', true);
-                        if ($alt) {
-                             echo '<image:title>' . esc_html($alt) . '</image:title>';
+                        $alt = get_post_meta( $thumb_ids[ $id ], '_wp_attachment_image_alt', true );
+                        if ( $alt ) {
+                            $xml .= '<image:title>' . esc_html( $alt ) . '</image:title>';
                         }
-                        echo '</image:image>';
+                        $xml .= '</image:image>';
                     }
                 }
 
-                echo '</url>';
+                $xml .= '</url>';
+                fwrite( $handle, $xml );
             }
+        }
 
-            echo '</urlset>';
-            exit;
+        fwrite( $handle, '</urlset>' );
+    }
+
+    public function invalidate_post( $post_id ) {
+        $post_type = get_post_type( $post_id );
+        if ( ! $post_type || ! in_array( $post_type, $this->get_post_types(), true ) ) {
+            return;
         }
+        $shard = (int) floor( $post_id / self::SHARD_SIZE );
+        $this->cache->delete( "sitemap-$post_type-$shard.xml" );
+        $this->cache->delete( 'sitemap.xml' );
     }
 
     public function add_to_robots( $output ) {
@@ -92,4 +222,18 @@ class WooSuite_Sitemap {
         }
         return $output;
     }
+
+    private function write_urlset_open( $handle ) {
+        fwrite( $handle, '<?xml version="1.0" encoding="UTF-8"?>' );
+        fwrite( $handle, '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">' );
+    }
+
+    private function get_post_types() {
+        // Posts & Pages & Products
+        $post_types = array( 'post', 'page' );
+        if ( class_exists( 'WooCommerce' ) ) {
+            $post_types[] = 'product';
+        }
+        return $post_types;
+    }
 }
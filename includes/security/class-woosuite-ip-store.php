@@ -0,0 +1,368 @@
+<?php
+
+/**
+ * Per-IP violation counters and IP / CIDR bans for the firewall.
+ *
+ * Violations are counted in a sliding window (the current fixed bucket plus the
+ * previous one, weighted by how much of it still overlaps the window), with an
+ * atomic increment in APCu, the persistent object cache, or, when neither is
+ * available, wp_woosuite_ip_hits (INSERT ... ON DUPLICATE KEY UPDATE).
+ *
+ * Bans live in wp_woosuite_ip_bans. Manual bans (single IPs, CIDR and ASN ranges)
+ * are compiled into the autoloaded woosuite_ip_ban_index option, grouped by
+ * address family and prefix length and keyed by the masked network, so checking
+ * an IP against any number of /24 (or /64, ...) ranges is one isset() per prefix
+ * length in use, without a query. The short automatic bans of the violation
+ * counter stay out of the index (an attack would otherwise grow and rewrite it
+ * for every attacking IP): they are looked up by exact IP in the same backend as
+ * the counters, or in the bans table. Addresses are stored packed (inet_pton)
+ * and passed to SQL as hex / UNHEX() so queries stay ASCII.
+ */
+class WooSuite_Ip_Store {
+
+    const PRUNE_HOOK = 'woosuite_ip_store_prune';
+
+    const INDEX_OPTION = 'woosuite_ip_ban_index';
+
+    const CACHE_GROUP = 'woosuite_ip';
+
+    // Violation window in seconds
+    const WINDOW = 600;
+
+    private static $backend = null;
+    private static $index = null;
+
+    public static function get_schema( $charset_collate ) {
+        global $wpdb;
+        $hits = $wpdb->prefix . 'woosuite_ip_hits';
+        $bans = $wpdb->prefix . 'woosuite_ip_bans';
+
+        return array(
+            "CREATE TABLE $hits (
+			ip varbinary(16) NOT NULL,
+			bucket int(10) unsigned NOT NULL,
+			hits int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (ip,bucket),
+			KEY bucket (bucket)
+		) $charset_collate;",
+            "CREATE TABLE $bans (
+			id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+			network varbinary(16) NOT NULL,
+			prefix_len tinyint(3) unsigned NOT NULL,
+			cidr varchar(64) NOT NULL,
+			reason varchar(255) NOT NULL DEFAULT '',
+			expires_at int(10) unsigned NOT NULL DEFAULT 0,
+			created_at int(10) unsigned NOT NULL DEFAULT 0,
+			auto tinyint(1) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (id),
+			UNIQUE KEY network (network,prefix_len),
+			KEY expires_at (expires_at)
+		) $charset_collate;",
+        );
+    }
+
+    private static function table( $name ) {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_ip_' . $name;
+    }
+
+    /**
+     * 'apcu', 'cache' (persistent object cache) or 'table'.
+     */
+    public static function backend() {
+        if ( self::$backend === null ) {
+            if ( function_exists( 'apcu_enabled' ) && apcu_enabled() ) {
+                self::$backend = 'apcu';
+            } elseif ( function_exists( 'wp_using_ext_object_cache' ) && wp_using_ext_object_cache() ) {
+                self::$backend = 'cache';
+            } else {
+                self::$backend = 'table';
+            }
+        }
+        return self::$backend;
+    }
+
+    /**
+     * Count a violation and return the IP's violations in the last $window seconds.
+     */
+    public static function hit( $ip, $window = self::WINDOW ) {
+        global $wpdb;
+        $packed = @inet_pton( $ip );
+        if ( $packed === false ) {
+            return 0;
+        }
+
+        $now = time();
+        $bucket = (int) floor( $now / $window );
+        $overlap = 1 - ( $now % $window ) / $window;
+        $current = 0;
+        $previous = 0;
+
+        switch ( self::backend() ) {
+            case 'apcu':
+            case 'cache':
+                $key = 'woosuite_ipv_' . bin2hex( $packed ) . '_' . $window . '_';
+                if ( self::$backend === 'apcu' ) {
+                    apcu_add( $key . $bucket, 0, 2 * $window );
+                    $current = (int) apcu_inc( $key . $bucket );
+                    $previous = (int) apcu_fetch( $key . ( $bucket - 1 ) );
+                } else {
+                    wp_cache_add( $key . $bucket, 0, self::CACHE_GROUP, 2 * $window );
+                    $current = (int) wp_cache_incr( $key . $bucket, 1, self::CACHE_GROUP );
+                    $previous = (int) wp_cache_get( $key . ( $bucket - 1 ), self::CACHE_GROUP );
+                }
+                break;
+
+            default:
+                $table = self::table( 'hits' );
+                $wpdb->query( $wpdb->prepare(
+                    "INSERT INTO $table (ip, bucket, hits) VALUES (UNHEX(%s), %d, 1) ON DUPLICATE KEY UPDATE hits = hits + 1",
+                    bin2hex( $packed ), $bucket
+                ) );
+                $rows = $wpdb->get_results( $wpdb->prepare(
+                    "SELECT bucket, hits FROM $table WHERE ip = UNHEX(%s) AND bucket IN (%d, %d)",
+                    bin2hex( $packed ), $bucket, $bucket - 1
+                ) );
+                foreach ( (array) $rows as $row ) {
+                    if ( (int) $row->bucket === $bucket ) {
+                        $current = (int) $row->hits;
+                    } else {
+                        $previous = (int) $row->hits;
+                    }
+                }
+        }
+
+        return $current + (int) floor( $previous * $overlap );
+    }
+
+    /**
+     * Whether an IP falls in any active ban: the autoloaded index of manual bans,
+     * then the IP's own automatic ban.
+     */
+    public static function is_banned( $ip ) {
+        $packed = @inet_pton( $ip );
+        if ( $packed === false ) {
+            return false;
+        }
+
+        if ( self::$index === null ) {
+            self::$index = get_option( self::INDEX_OPTION, array() );
+        }
+        $family = strlen( $packed ) === 4 ? 4 : 6;
+        $now = time();
+        if ( ! empty( self::$index[ $family ] ) ) {
+            foreach ( self::$index[ $family ] as $prefix_len => $networks ) {
+                $network = bin2hex( self::mask( $packed, $prefix_len ) );
+                if ( isset( $networks[ $network ] ) && ( $networks[ $network ] === 0 || $networks[ $network ] > $now ) ) {
+                    return true;
+                }
+            }
+        }
+
+        return self::auto_ban_expiry( $packed ) > $now;
+    }
+
+    /**
+     * Expiry of the IP's automatic ban, 0 if there is none.
+     */
+    private static function auto_ban_expiry( $packed ) {
+        global $wpdb;
+        $key = 'woosuite_ipban_' . bin2hex( $packed );
+
+        switch ( self::backend() ) {
+            case 'apcu':
+                return (int) apcu_fetch( $key );
+            case 'cache':
+                return (int) wp_cache_get( $key, self::CACHE_GROUP );
+            default:
+                $table = self::table( 'bans' );
+                return (int) $wpdb->get_var( $wpdb->prepare(
+                    "SELECT expires_at FROM $table WHERE network = UNHEX(%s) AND prefix_len = %d AND auto = 1",
+                    bin2hex( $packed ), strlen( $packed ) * 8
+                ) );
+        }
+    }
+
+    /**
+     * Ban a single IP or a CIDR range ("203.0.113.7", "203.0.113.0/24", "2001:db8::/48").
+     *
+     * @param int $duration Seconds, 0 for permanent.
+     * @return bool|WP_Error
+     */
+    public static function ban( $cidr, $duration = 0, $reason = '' ) {
+        $range = self::parse_cidr( $cidr );
+        if ( ! $range ) {
+            return new WP_Error( 'invalid_cidr', 'Invalid IP or CIDR range: ' . $cidr );
+        }
+        self::insert_ban( $range, $duration, $reason );
+        self::rebuild_index();
+        return true;
+    }
+
+    /**
+     * Short ban of a single IP by the violation counter. Recorded in the bans table
+     * (listed with the others, and the lookup of the table backend) and, with APCu
+     * or an object cache, under the IP's key there; the autoloaded index is untouched.
+     *
+     * @param int $duration Seconds.
+     */
+    public static function ban_automatic( $ip, $duration, $reason = '' ) {
+        $range = self::parse_cidr( $ip );
+        if ( ! $range || strpos( $range['cidr'], '/' ) !== false ) {
+            return false;
+        }
+        self::insert_ban( $range, $duration, $reason, true );
+
+        $key = 'woosuite_ipban_' . bin2hex( $range['network'] );
+        $expires = time() + (int) $duration;
+        if ( self::backend() === 'apcu' ) {
+            apcu_store( $key, $expires, (int) $duration );
+        } elseif ( self::$backend === 'cache' ) {
+            wp_cache_set( $key, $expires, self::CACHE_GROUP, (int) $duration );
+        }
+        return true;
+    }
+
+    /**
+     * Ban several ranges at once (e.g. every prefix announced by an ASN) with one index rebuild.
+     *
+     * @return array Ranges that could not be parsed.
+     */
+    public static function ban_ranges( $cidrs, $duration = 0, $reason = '' ) {
+        $invalid = array();
+        foreach ( $cidrs as $cidr ) {
+            $range = self::parse_cidr( $cidr );
+            if ( $range ) {
+                self::insert_ban( $range, $duration, $reason );
+            } else {
+                $invalid[] = $cidr;
+            }
+        }
+        self::rebuild_index();
+        return $invalid;
+    }
+
+    public static function unban( $id ) {
+        global $wpdb;
+        $table = self::table( 'bans' );
+        $ban = $wpdb->get_row( $wpdb->prepare( "SELECT LOWER(HEX(network)) AS network, auto FROM $table WHERE id = %d", (int) $id ) );
+        $deleted = $wpdb->delete( $table, array( 'id' => (int) $id ), array( '%d' ) );
+
+        if ( $ban && (int) $ban->auto === 1 ) {
+            if ( self::backend() === 'apcu' ) {
+                apcu_delete( 'woosuite_ipban_' . $ban->network );
+            } elseif ( self::$backend === 'cache' ) {
+                wp_cache_delete( 'woosuite_ipban_' . $ban->network, self::CACHE_GROUP );
+            }
+        } else {
+            self::rebuild_index();
+        }
+        return (bool) $deleted;
+    }
+
+    /**
+     * Active bans, newest first.
+     */
+    public static function get_bans( $limit = 200 ) {
+        global $wpdb;
+        $table = self::table( 'bans' );
+        return $wpdb->get_results( $wpdb->prepare(
+            "SELECT id, cidr, reason, expires_at, created_at FROM $table WHERE expires_at = 0 OR expires_at > %d ORDER BY id DESC LIMIT %d",
+            time(), $limit
+        ), ARRAY_A );
+    }
+
+    /**
+     * Drop expired bans and old violation buckets (hourly).
+     */
+    public static function prune() {
+        global $wpdb;
+        $bans = self::table( 'bans' );
+        $hits = self::table( 'hits' );
+
+        // Expired automatic bans are not in the index, so only manual ones need a rebuild
+        $wpdb->query( $wpdb->prepare( "DELETE FROM $bans WHERE auto = 1 AND expires_at <= %d", time() ) );
+        $expired = $wpdb->query( $wpdb->prepare( "DELETE FROM $bans WHERE expires_at > 0 AND expires_at <= %d", time() ) );
+        // Buckets are at most a few windows wide; anything older than a day is dead
+        $wpdb->query( $wpdb->prepare( "DELETE FROM $hits WHERE bucket < %d", (int) floor( ( time() - DAY_IN_SECONDS ) / self::WINDOW ) ) );
+
+        if ( $expired ) {
+            self::rebuild_index();
+        }
+    }
+
+    private static function insert_ban( $range, $duration, $reason, $auto = false ) {
+        global $wpdb;
+        $table = self::table( 'bans' );
+        $now = time();
+        $expires = $duration > 0 ? $now + (int) $duration : 0;
+
+        // Re-banning keeps the longer of the two bans (0 = permanent wins); a manual ban
+        // of an automatically banned IP turns it into a manual (indexed) one
+        $wpdb->query( $wpdb->prepare(
+            "INSERT INTO $table (network, prefix_len, cidr, reason, expires_at, created_at, auto) VALUES (UNHEX(%s), %d, %s, %s, %d, %d, %d)
+             ON DUPLICATE KEY UPDATE reason = VALUES(reason),
+                expires_at = IF(expires_at = 0 OR VALUES(expires_at) = 0, 0, GREATEST(expires_at, VALUES(expires_at))),
+                auto = LEAST(auto, VALUES(auto))",
+            bin2hex( $range['network'] ), $range['prefix_len'], $range['cidr'], substr( $reason, 0, 255 ), $expires, $now, $auto ? 1 : 0
+        ) );
+    }
+
+    /**
+     * Recompile the autoloaded ban index from the active manual bans.
+     */
+    public static function rebuild_index() {
+        global $wpdb;
+        $table = self::table( 'bans' );
+        $rows = $wpdb->get_results( $wpdb->prepare(
+            "SELECT LOWER(HEX(network)) AS network, prefix_len, expires_at FROM $table WHERE auto = 0 AND ( expires_at = 0 OR expires_at > %d )",
+            time()
+        ) );
+
+        $index = array();
+        foreach ( (array) $rows as $row ) {
+            $family = strlen( $row->network ) === 8 ? 4 : 6;
+            $index[ $family ][ (int) $row->prefix_len ][ $row->network ] = (int) $row->expires_at;
+        }
+        foreach ( $index as $family => $lengths ) {
+            // Longest prefixes (single IPs) first: they are the most common bans
+            krsort( $index[ $family ] );
+        }
+
+        update_option( self::INDEX_OPTION, $index, true );
+        self::$index = $index;
+    }
+
+    /**
+     * @return array|null network (packed, masked), prefix_len, cidr (normalized)
+     */
+    public static function parse_cidr( $cidr ) {
+        $parts = explode( '/', trim( $cidr ), 2 );
+        $packed = @inet_pton( $parts[0] );
+        if ( $packed === false ) {
+            return null;
+        }
+        $bits = strlen( $packed ) * 8;
+        $prefix_len = isset( $parts[1] ) ? $parts[1] : (string) $bits;
+        if ( ! ctype_digit( $prefix_len ) || (int) $prefix_len > $bits ) {
+            return null;
+        }
+        $prefix_len = (int) $prefix_len;
+        $network = self::mask( $packed, $prefix_len );
+
+        return array(
+            'network' => $network,
+            'prefix_len' => $prefix_len,
+            'cidr' => inet_ntop( $network ) . ( $prefix_len === $bits ? '' : '/' . $prefix_len ),
+        );
+    }
+
+    private static function mask( $packed, $prefix_len ) {
+        $bytes = intdiv( $prefix_len, 8 );
+        $masked = substr( $packed, 0, $bytes );
+        if ( $prefix_len % 8 ) {
+            $masked .= chr( ord( $packed[ $bytes ] ) & ( 0xFF << ( 8 - $prefix_len % 8 ) ) & 0xFF );
+        }
+        return str_pad( $masked, strlen( $packed ), "\0" );
+    }
+}
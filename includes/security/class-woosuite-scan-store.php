@@ -0,0 +1,339 @@
+<?php
+
+/**
+ * Tables behind the deep scan and core integrity scan.
+ *
+ * wp_woosuite_scan_runs: one row per scan with its progress counters (updated in
+ * place with col = col + n). wp_woosuite_scan_units: the deep scan's per-folder work
+ * units, leased with a single conditional UPDATE. wp_woosuite_scan_findings: one row
+ * per flagged file, appended in multi-row INSERTs and read a page at a time. A
+ * finding's status (open / ignored / quarantined / deleted) follows the actions
+ * taken on its file.
+ */
+class WooSuite_Scan_Store {
+
+    // Older runs (and their findings) are dropped when a new one starts
+    const KEEP_RUNS = 10;
+
+    const FINDING_STATUSES = array( 'open', 'ignored', 'quarantined', 'deleted' );
+
+    public static function get_schema( $charset_collate ) {
+        global $wpdb;
+        $runs = $wpdb->prefix . 'woosuite_scan_runs';
+        $units = $wpdb->prefix . 'woosuite_scan_units';
+        $findings = $wpdb->prefix . 'woosuite_scan_findings';
+
+        return array(
+            "CREATE TABLE $runs (
+			id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+			type varchar(20) NOT NULL,
+			source varchar(20) NOT NULL DEFAULT '',
+			status varchar(20) NOT NULL,
+			message varchar(255) NOT NULL DEFAULT '',
+			current_folder varchar(191) NOT NULL DEFAULT '',
+			total_folders int(10) unsigned NOT NULL DEFAULT 0,
+			processed_folders int(10) unsigned NOT NULL DEFAULT 0,
+			found_issues int(10) unsigned NOT NULL DEFAULT 0,
+			files_total int(10) unsigned NOT NULL DEFAULT 0,
+			files_unchanged int(10) unsigned NOT NULL DEFAULT 0,
+			ai_lookups int(10) unsigned NOT NULL DEFAULT 0,
+			ai_cache_hits int(10) unsigned NOT NULL DEFAULT 0,
+			started_at int(10) unsigned NOT NULL DEFAULT 0,
+			finished_at int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (id),
+			KEY type (type,id)
+		) $charset_collate;",
+            "CREATE TABLE $units (
+			run_id bigint(20) unsigned NOT NULL,
+			folder_hash char(32) NOT NULL,
+			folder text NOT NULL,
+			resume_after text NOT NULL,
+			lease int(10) unsigned NOT NULL DEFAULT 0,
+			owner varchar(40) NOT NULL DEFAULT '',
+			files int(10) unsigned NOT NULL DEFAULT 0,
+			estimate int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (run_id,folder_hash),
+			KEY lease (run_id,lease)
+		) $charset_collate;",
+            "CREATE TABLE $findings (
+			id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+			run_id bigint(20) unsigned NOT NULL,
+			file varchar(500) NOT NULL,
+			file_hash char(32) NOT NULL,
+			issue varchar(100) NOT NULL,
+			severity varchar(20) NOT NULL,
+			ai_verdict varchar(20) NOT NULL DEFAULT '',
+			ai_explanation text NOT NULL,
+			status varchar(20) NOT NULL DEFAULT 'open',
+			created_at datetime NOT NULL,
+			PRIMARY KEY  (id),
+			KEY run (run_id,status,severity),
+			KEY file_hash (file_hash)
+		) $charset_collate;",
+        );
+    }
+
+    private static function table( $name ) {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_scan_' . $name;
+    }
+
+    // --- Runs ---
+
+    /**
+     * Open a run (type 'deep' or 'core') and prune old runs of that type.
+     *
+     * @return int Run ID.
+     */
+    public static function create_run( $type, $fields = array() ) {
+        global $wpdb;
+
+        $wpdb->insert( self::table( 'runs' ), array_merge( array(
+            'type' => $type,
+            'status' => 'running',
+            'started_at' => time(),
+        ), $fields ) );
+        $run_id = (int) $wpdb->insert_id;
+
+        $runs = self::table( 'runs' );
+        $cutoff = (int) $wpdb->get_var( $wpdb->prepare(
+            "SELECT id FROM $runs WHERE type = %s ORDER BY id DESC LIMIT 1 OFFSET %d",
+            $type, self::KEEP_RUNS
+        ) );
+        if ( $cutoff ) {
+            $old = $wpdb->get_col( $wpdb->prepare( "SELECT id FROM $runs WHERE type = %s AND id <= %d", $type, $cutoff ) );
+            $ids = implode( ',', array_map( 'intval', $old ) );
+            $wpdb->query( "DELETE FROM " . self::table( 'findings' ) . " WHERE run_id IN ($ids)" );
+            $wpdb->query( "DELETE FROM " . self::table( 'units' ) . " WHERE run_id IN ($ids)" );
+            $wpdb->query( "DELETE FROM $runs WHERE id IN ($ids)" );
+        }
+
+        return $run_id;
+    }
+
+    public static function get_latest_run( $type ) {
+        global $wpdb;
+        $runs = self::table( 'runs' );
+        return $wpdb->get_row( $wpdb->prepare( "SELECT * FROM $runs WHERE type = %s ORDER BY id DESC LIMIT 1", $type ), ARRAY_A );
+    }
+
+    public static function get_run( $run_id ) {
+        global $wpdb;
+        $runs = self::table( 'runs' );
+        return $wpdb->get_row( $wpdb->prepare( "SELECT * FROM $runs WHERE id = %d", $run_id ), ARRAY_A );
+    }
+
+    public static function update_run( $run_id, $fields ) {
+        global $wpdb;
+        return $wpdb->update( self::table( 'runs' ), $fields, array( 'id' => (int) $run_id ) );
+    }
+
+    /**
+     * Add to a run's counters in place, e.g. array( 'files_total' => 25 ).
+     */
+    public static function add_to_run( $run_id, $counters ) {
+        global $wpdb;
+        $allowed = array( 'processed_folders', 'found_issues', 'files_total', 'files_unchanged', 'ai_lookups', 'ai_cache_hits' );
+
+        $set = array();
+        foreach ( $counters as $column => $delta ) {
+            if ( in_array( $column, $allowed, true ) && (int) $delta !== 0 ) {
+                $set[] = "$column = $column + " . (int) $delta;
+            }
+        }
+        if ( $set ) {
+            $runs = self::table( 'runs' );
+            $wpdb->query( $wpdb->prepare( "UPDATE $runs SET " . implode( ', ', $set ) . " WHERE id = %d", $run_id ) );
+        }
+    }
+
+    /**
+     * Mark a running run complete. True only for the caller that actually flipped it.
+     */
+    public static function complete_run( $run_id, $message = '' ) {
+        global $wpdb;
+        $runs = self::table( 'runs' );
+        return (bool) $wpdb->query( $wpdb->prepare(
+            "UPDATE $runs SET status = 'complete', message = %s, current_folder = '', finished_at = %d WHERE id = %d AND status = 'running'",
+            $message, time(), $run_id
+        ) );
+    }
+
+    /**
+     * Stop a run that is still going (a new scan replaces it) and drop its work units.
+     */
+    public static function cancel_run( $run_id ) {
+        global $wpdb;
+        $runs = self::table( 'runs' );
+        $wpdb->query( $wpdb->prepare( "UPDATE $runs SET status = 'cancelled', current_folder = '' WHERE id = %d AND status = 'running'", $run_id ) );
+        $wpdb->delete( self::table( 'units' ), array( 'run_id' => (int) $run_id ), array( '%d' ) );
+    }
+
+    // --- Work units ---
+
+    public static function add_units( $run_id, $units ) {
+        global $wpdb;
+        foreach ( array_chunk( $units, 100 ) as $chunk ) {
+            $rows = array();
+            foreach ( $chunk as $unit ) {
+                $rows[] = $wpdb->prepare( "(%d, %s, %s, '', 0, '', 0, %d)", $run_id, md5( $unit['folder'] ), $unit['folder'], $unit['estimate'] );
+            }
+            $wpdb->query( "INSERT INTO " . self::table( 'units' ) . " (run_id, folder_hash, folder, resume_after, lease, owner, files, estimate) VALUES " . implode( ',', $rows ) );
+        }
+    }
+
+    /**
+     * Lease the first free (or expired) unit until $lease_until. One UPDATE, so two
+     * workers can never hold the same unit.
+     */
+    public static function claim_unit( $run_id, $lease_until ) {
+        global $wpdb;
+        $units = self::table( 'units' );
+        $owner = uniqid( '', true );
+
+        $claimed = $wpdb->query( $wpdb->prepare(
+            "UPDATE $units SET lease = %d, owner = %s WHERE run_id = %d AND lease <= %d ORDER BY folder_hash LIMIT 1",
+            $lease_until, $owner, $run_id, time()
+        ) );
+        if ( ! $claimed ) {
+            return null;
+        }
+
+        return $wpdb->get_row( $wpdb->prepare( "SELECT * FROM $units WHERE run_id = %d AND owner = %s", $run_id, $owner ), ARRAY_A );
+    }
+
+    /**
+     * Hand a unit back with its new cursor, or delete it when $finished. False if the
+     * lease was taken over by another worker (the caller then discards its work).
+     */
+    public static function release_unit( $unit, $finished, $files_done ) {
+        global $wpdb;
+        $units = self::table( 'units' );
+
+        if ( $finished ) {
+            return (bool) $wpdb->query( $wpdb->prepare(
+                "DELETE FROM $units WHERE run_id = %d AND folder_hash = %s AND owner = %s",
+                $unit['run_id'], $unit['folder_hash'], $unit['owner']
+            ) );
+        }
+
+        return (bool) $wpdb->query( $wpdb->prepare(
+            "UPDATE $units SET resume_after = %s, files = files + %d, lease = 0, owner = '' WHERE run_id = %d AND folder_hash = %s AND owner = %s",
+            $unit['resume_after'], $files_done, $unit['run_id'], $unit['folder_hash'], $unit['owner']
+        ) );
+    }
+
+    /**
+     * @return array array( 'free' => n, 'leased' => n, 'remaining_files' => estimate )
+     */
+    public static function get_unit_summary( $run_id, $average_files ) {
+        global $wpdb;
+        $units = self::table( 'units' );
+        $row = $wpdb->get_row( $wpdb->prepare(
+            "SELECT SUM(lease <= %d) AS free, SUM(lease > %d) AS leased,
+                SUM(GREATEST(0, IF(estimate > 0, estimate, %d) - files)) AS remaining_files
+             FROM $units WHERE run_id = %d",
+            time(), time(), (int) $average_files, $run_id
+        ), ARRAY_A );
+
+        return array(
+            'free' => (int) $row['free'],
+            'leased' => (int) $row['leased'],
+            'remaining_files' => (int) $row['remaining_files'],
+        );
+    }
+
+    public static function count_units( $run_id ) {
+        global $wpdb;
+        $units = self::table( 'units' );
+        return (int) $wpdb->get_var( $wpdb->prepare( "SELECT COUNT(*) FROM $units WHERE run_id = %d", $run_id ) );
+    }
+
+    // --- Findings ---
+
+    /**
+     * Append findings (rows shaped like the scanner's results) in multi-row INSERTs.
+     */
+    public static function add_findings( $run_id, $findings ) {
+        global $wpdb;
+        foreach ( array_chunk( $findings, 100 ) as $chunk ) {
+            $rows = array();
+            foreach ( $chunk as $finding ) {
+                $file = wp_normalize_path( $finding['file'] );
+                $rows[] = $wpdb->prepare(
+                    "(%d, %s, %s, %s, %s, %s, %s, 'open', %s)",
+                    $run_id,
+                    $file,
+                    md5( $file ),
+                    $finding['issue'],
+                    $finding['severity'],
+                    isset( $finding['ai_verdict'] ) ? $finding['ai_verdict'] : '',
+                    isset( $finding['ai_explanation'] ) ? $finding['ai_explanation'] : '',
+                    isset( $finding['date'] ) ? $finding['date'] : current_time( 'mysql' )
+                );
+            }
+            $wpdb->query( "INSERT INTO " . self::table( 'findings' ) . " (run_id, file, file_hash, issue, severity, ai_verdict, ai_explanation, status, created_at) VALUES " . implode( ',', $rows ) );
+        }
+    }
+
+    /**
+     * One page of a run's findings.
+     *
+     * @param array $args page, per_page, status ('open' by default, 'all'), severity, search.
+     * @return array array( 'items' => rows, 'total' => n )
+     */
+    public static function get_findings( $run_id, $args = array() ) {
+        global $wpdb;
+        $findings = self::table( 'findings' );
+
+        $page = max( 1, isset( $args['page'] ) ? (int) $args['page'] : 1 );
+        $per_page = min( 200, max( 1, isset( $args['per_page'] ) ? (int) $args['per_page'] : 50 ) );
+        $status = isset( $args['status'] ) ? $args['status'] : 'open';
+
+        $where = $wpdb->prepare( "run_id = %d", $run_id );
+        if ( in_array( $status, self::FINDING_STATUSES, true ) ) {
+            $where .= $wpdb->prepare( " AND status = %s", $status );
+        }
+        if ( ! empty( $args['severity'] ) ) {
+            $where .= $wpdb->prepare( " AND severity = %s", $args['severity'] );
+        }
+        if ( ! empty( $args['search'] ) ) {
+            $where .= $wpdb->prepare( " AND file LIKE %s", '%' . $wpdb->esc_like( $args['search'] ) . '%' );
+        }
+
+        $total = (int) $wpdb->get_var( "SELECT COUNT(*) FROM $findings WHERE $where" );
+        // $where is already prepared (and may hold LIKE wildcards): only the limit is added here
+        $items = $wpdb->get_results(
+            "SELECT id, file, issue, severity, ai_verdict, ai_explanation, status, created_at AS date
+             FROM $findings WHERE $where ORDER BY severity = 'critical' DESC, id
+             LIMIT " . (int) $per_page . " OFFSET " . (int) ( ( $page - 1 ) * $per_page ),
+            ARRAY_A
+        );
+
+        return array( 'items' => $items, 'total' => $total );
+    }
+
+    /**
+     * Set the status of every finding for $path (relative to ABSPATH). With
+     * $prefix, files below a directory match too (ignoring a whole folder).
+     * $from limits the change to findings currently in that status.
+     *
+     * @return int Rows changed.
+     */
+    public static function set_finding_status( $path, $status, $prefix = false, $from = null ) {
+        global $wpdb;
+        $findings = self::table( 'findings' );
+        $path = ltrim( wp_normalize_path( $path ), '/' );
+
+        if ( $prefix ) {
+            $where = $wpdb->prepare( "( file_hash = %s OR file LIKE %s )", md5( $path ), $wpdb->esc_like( untrailingslashit( $path ) ) . '/%' );
+        } else {
+            $where = $wpdb->prepare( "file_hash = %s", md5( $path ) );
+        }
+        if ( $from ) {
+            $where .= $wpdb->prepare( " AND status = %s", $from );
+        }
+
+        return (int) $wpdb->query( $wpdb->prepare( "UPDATE $findings SET status = %s WHERE ", $status ) . $where );
+    }
+}
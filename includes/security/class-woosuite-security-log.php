@@ -0,0 +1,169 @@
+<?php
+
+/**
+ * Write path and retention for wp_woosuite_security_logs.
+ *
+ * Events are buffered for the rest of the request and written in one multi-row
+ * INSERT at shutdown (also after wp_die()/exit), so a flood of blocked requests
+ * or failed logins costs one query per request. The threats_blocked counter is
+ * bumped once per flush. A daily job rolls rows older than
+ * woosuite_security_log_retention_days (default 30) into per-day aggregates in
+ * wp_woosuite_security_daily and deletes them, keeping the log table small.
+ */
+class WooSuite_Security_Log {
+
+    const ROLLUP_HOOK = 'woosuite_security_log_rollup';
+
+    // Flush early when a single request (e.g. a WP-CLI import) logs this many events
+    const MAX_BUFFER = 200;
+
+    const ROLLUP_BATCH = 5000;
+
+    private static $buffer = array();
+    private static $registered = false;
+
+    public static function table_name() {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_security_logs';
+    }
+
+    public static function daily_table_name() {
+        global $wpdb;
+        return $wpdb->prefix . 'woosuite_security_daily';
+    }
+
+    public static function get_schema( $charset_collate ) {
+        $logs = self::table_name();
+        $daily = self::daily_table_name();
+
+        return array(
+            "CREATE TABLE $logs (
+			id bigint(20) NOT NULL AUTO_INCREMENT,
+			event varchar(255) NOT NULL,
+			ip_address varchar(45) NOT NULL,
+			severity varchar(20) NOT NULL,
+			blocked tinyint(1) NOT NULL DEFAULT 1,
+			created_at datetime DEFAULT CURRENT_TIMESTAMP,
+			PRIMARY KEY  (id),
+			KEY created_at (created_at),
+			KEY severity (severity,created_at),
+			KEY blocked (blocked,created_at),
+			KEY ip_address (ip_address,created_at)
+		) $charset_collate;",
+            "CREATE TABLE $daily (
+			day date NOT NULL,
+			event_key char(40) NOT NULL,
+			event varchar(255) NOT NULL,
+			severity varchar(20) NOT NULL,
+			blocked tinyint(1) NOT NULL DEFAULT 1,
+			hits bigint(20) unsigned NOT NULL DEFAULT 0,
+			unique_ips int(10) unsigned NOT NULL DEFAULT 0,
+			PRIMARY KEY  (day,event_key),
+			KEY blocked (blocked,day)
+		) $charset_collate;",
+        );
+    }
+
+    public static function add( $ip, $event, $severity, $blocked = true ) {
+        self::$buffer[] = array( $event, $ip, $severity, $blocked ? 1 : 0, current_time( 'mysql' ) );
+
+        if ( ! self::$registered ) {
+            // WordPress runs its own shutdown hook via register_shutdown_function too
+            register_shutdown_function( array( __CLASS__, 'flush' ) );
+            self::$registered = true;
+        }
+        if ( count( self::$buffer ) >= self::MAX_BUFFER ) {
+            self::flush();
+        }
+    }
+
+    /**
+     * Write buffered events, returns how many.
+     */
+    public static function flush() {
+        global $wpdb;
+        if ( ! self::$buffer ) {
+            return 0;
+        }
+        $events = self::$buffer;
+        self::$buffer = array();
+
+        $blocked = 0;
+        $rows = array();
+        foreach ( $events as $event ) {
+            $rows[] = $wpdb->prepare( "(%s, %s, %s, %d, %s)", $event[0], $event[1], $event[2], $event[3], $event[4] );
+            $blocked += $event[3];
+        }
+        $wpdb->query( "INSERT INTO " . self::table_name() . " (event, ip_address, severity, blocked, created_at) VALUES " . implode( ',', $rows ) );
+
+        if ( $blocked && class_exists( 'WooSuite_Counters' ) ) {
+            WooSuite_Counters::increment( 'threats_blocked', $blocked );
+        }
+        return count( $events );
+    }
+
+    /**
+     * Blocked events that were rolled up, for WooSuite_Counters::reconcile().
+     */
+    public static function rolled_up_blocked() {
+        global $wpdb;
+        $daily = self::daily_table_name();
+        if ( $wpdb->get_var( "SHOW TABLES LIKE '$daily'" ) !== $daily ) {
+            return 0;
+        }
+        return (int) $wpdb->get_var( "SELECT SUM(hits) FROM $daily WHERE blocked = 1" );
+    }
+
+    /**
+     * Aggregate and delete rows older than the retention window, one day at a time.
+     */
+    public static function rollup() {
+        global $wpdb;
+        $logs = self::table_name();
+        $daily = self::daily_table_name();
+
+        $days = max( 1, (int) get_option( 'woosuite_security_log_retention_days', 30 ) );
+        $cutoff = gmdate( 'Y-m-d 00:00:00', current_time( 'timestamp' ) - $days * DAY_IN_SECONDS );
+        $deadline = microtime( true ) + 20;
+
+        // A day whose aggregate is written but whose rows are not all deleted yet
+        $pending = get_option( 'woosuite_security_rollup_day', '' );
+
+        while ( microtime( true ) < $deadline ) {
+            if ( $pending ) {
+                $day = $pending;
+            } else {
+                $oldest = $wpdb->get_var( $wpdb->prepare( "SELECT MIN(created_at) FROM $logs WHERE created_at < %s", $cutoff ) );
+                if ( ! $oldest ) {
+                    break;
+                }
+                $day = substr( $oldest, 0, 10 );
+
+                $wpdb->query( $wpdb->prepare(
+                    "INSERT INTO $daily (day, event_key, event, severity, blocked, hits, unique_ips)
+                     SELECT %s, SHA1(CONCAT_WS('|', event, severity, blocked)), event, severity, blocked, COUNT(*), COUNT(DISTINCT ip_address)
+                     FROM $logs WHERE created_at >= %s AND created_at < %s + INTERVAL 1 DAY
+                     GROUP BY event, severity, blocked
+                     ON DUPLICATE KEY UPDATE hits = hits + VALUES(hits), unique_ips = GREATEST(unique_ips, VALUES(unique_ips))",
+                    $day, $day, $day
+                ) );
+                update_option( 'woosuite_security_rollup_day', $day, false );
+            }
+
+            $deleted = $wpdb->query( $wpdb->prepare(
+                "DELETE FROM $logs WHERE created_at >= %s AND created_at < %s + INTERVAL 1 DAY LIMIT %d",
+                $day, $day, self::ROLLUP_BATCH
+            ) );
+            if ( $deleted < self::ROLLUP_BATCH ) {
+                $pending = '';
+                delete_option( 'woosuite_security_rollup_day' );
+            } else {
+                $pending = $day;
+            }
+        }
+
+        if ( $pending || $wpdb->get_var( $wpdb->prepare( "SELECT id FROM $logs WHERE created_at < %s LIMIT 1", $cutoff ) ) ) {
+            wp_schedule_single_event( time() + 60, self::ROLLUP_HOOK );
+        }
+    }
+}
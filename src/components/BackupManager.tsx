@@ -19,6 +19,7 @@ const BackupManager: React.FC = () => {
   const [exporting, setExporting] = useState(false);
   const [exportProgress, setExportProgress] = useState<string>('');
   const [exportUrl, setExportUrl] = useState<string | null>(null);
+  const [creatingPassport, setCreatingPassport] = useState(false);
 
   const [oldDomain, setOldDomain] = useState('');
   const [newDomain, setNewDomain] = useState('');
@@ -74,61 +75,30 @@ const BackupManager: React.FC = () => {
 
   const handleChunkedExport = async () => {
       try {
-          // 1. Get Tables
-          setExportProgress("Fetching table list...");
-          const tablesRes = await fetch(`${apiUrl}/backup/tables`, {
-              headers: { 'X-WP-Nonce': nonce }
-          });
-          const tablesData = await tablesRes.json();
-
-          if ( !tablesData.tables ) throw new Error("Could not fetch tables.");
-
-          const tables: {name: string, rows: number}[] = tablesData.tables;
-          // let totalRows = tables.reduce((acc, t) => acc + t.rows, 0); // Unused for now
-          // let exportedRows = 0;
-
-          // 2. Iterate and Chunk
-          for (const table of tables) {
-              const limit = 1000;
-              let offset = 0;
-
-              let hasMore = true;
-              while (hasMore) {
-                  // Update UI
-                  setExportProgress(`Exporting ${table.name} (${offset}/${table.rows})...`);
-
-                  const chunkRes = await fetch(`${apiUrl}/backup/export/chunk`, {
-                       method: 'POST',
-                       headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
-                       body: JSON.stringify({
-                           table: table.name,
-                           offset: offset,
-                           limit: limit,
-                           // PASS REPLACEMENT PARAMS
-                           search: doReplace ? oldDomain : '',
-                           replace: doReplace ? newDomain : ''
-                       })
-                  });
-
-                  if (!chunkRes.ok) {
-                      const err = await chunkRes.json();
-                      throw new Error(err.message || "Chunk failed");
-                  }
-
-                  const chunkData = await chunkRes.json();
-                  const count = chunkData.count;
-
-                  // exportedRows += count;
-                  offset += count;
-
-                  if (count < limit) hasMore = false;
+          // Server-side workers export tables side by side into archive segments (WP-Cron and loopback workers keep going between calls)
+          setExportProgress("Exporting database...");
+          let done = false;
+          while (!done) {
+              const stepRes = await fetch(`${apiUrl}/backup/export/step`, {
+                   method: 'POST',
+                   headers: { 'X-WP-Nonce': nonce }
+              });
+              const stepData = await stepRes.json();
+
+              if (!stepRes.ok) {
+                  throw new Error(stepData.message || "Export step failed");
+              }
 
-                  // Small delay to prevent server overload
-                  await new Promise(r => setTimeout(r, 50));
+              const p = stepData.progress;
+              done = p.status === 'complete';
+              if (!done) {
+                  setExportProgress(`Exporting ${p.current_table || 'tables'} (${p.tables_done}/${p.tables_total} tables, ${p.rows_done.toLocaleString()}/${p.rows_total.toLocaleString()} rows, ${p.segments} segments, ${p.workers} workers, ${p.mb_per_sec} MB/s)...`);
+                  // Other workers may hold the remaining units; don't spin
+                  await new Promise(r => setTimeout(r, 500));
               }
           }
 
-          // 3. Finalize
+          // Finalize
           setExportProgress("Finalizing export file...");
           const finRes = await fetch(`${apiUrl}/backup/export/finalize`, {
                method: 'POST',
@@ -148,6 +118,33 @@ const BackupManager: React.FC = () => {
       }
   };
 
+  // Passport for Migration Station on the destination site (download link, token and checksums)
+  const handleDownloadPassport = async () => {
+      setCreatingPassport(true);
+      try {
+          const res = await fetch(`${apiUrl}/backup/passport`, {
+              method: 'POST',
+              headers: { 'X-WP-Nonce': nonce }
+          });
+          const data = await res.json();
+          if (!res.ok) {
+              alert("Passport failed: " + (data.message || "Unknown error"));
+              return;
+          }
+          const blob = new Blob([JSON.stringify(data, null, 2)], { type: 'application/json' });
+          const link = document.createElement('a');
+          link.href = URL.createObjectURL(blob);
+          link.download = 'passport.json';
+          link.click();
+          URL.revokeObjectURL(link.href);
+      } catch (e) {
+          console.error(e);
+          alert("Network error.");
+      } finally {
+          setCreatingPassport(false);
+      }
+  };
+
   const handleExportDB = async () => {
       if (doReplace && !backupConfirmed) {
           alert("Please confirm that you have created a backup of the DESTINATION site before proceeding with replacement.");
@@ -458,7 +455,7 @@ const BackupManager: React.FC = () => {
                                        </button>
                                        {exporting && (
                                            <div className="text-xs text-center text-gray-500 animate-pulse">
-                                               Processing large database in chunks... Please do not close this tab.
+                                               Exporting on the server in batches... Keep this tab open for the fastest export.
                                            </div>
                                        )}
                                    </div>
@@ -467,7 +464,7 @@ const BackupManager: React.FC = () => {
                                        <CheckCircle size={40} className="text-green-500 mx-auto mb-2" />
                                        <h5 className="font-bold text-green-800 text-lg">Export Complete!</h5>
                                        <p className="text-green-700 mb-4 text-sm">
-                                            {doReplace ? 'migration_ready_export.sql' : 'database_export.sql'}
+                                            {exportUrl.split('/').pop()}
                                        </p>
                                        <a
                                             href={exportUrl}
@@ -476,6 +473,13 @@ const BackupManager: React.FC = () => {
                                        >
                                            Download SQL File ({doReplace ? 'Ready for Import' : 'Raw Backup'})
                                        </a>
+                                       <button
+                                            onClick={handleDownloadPassport}
+                                            disabled={creatingPassport}
+                                            className="inline-flex items-center gap-2 ml-3 bg-white text-green-700 border border-green-300 px-6 py-2 rounded-lg font-bold hover:bg-green-100 transition disabled:opacity-50"
+                                       >
+                                           {creatingPassport ? <Loader size={16} className="animate-spin" /> : <Shield size={16} />} Download Migration Passport
+                                       </button>
                                        <div className="mt-4 pt-4 border-t border-green-200">
                                            <button onClick={() => setMigrationStep(3)} className="text-green-800 font-medium text-sm hover:underline">
                                                Next: View Import Instructions &rarr;
@@ -503,7 +507,7 @@ const BackupManager: React.FC = () => {
                                   <ol className="list-decimal list-inside space-y-2 text-sm">
                                       <li>Go to your destination site (<strong>{newDomain}</strong>).</li>
                                       <li>Ensure you have a backup there (as confirmed in Step 2).</li>
-                                      <li>Import the SQL file using PHPMyAdmin, WP-CLI, or a generic import plugin.</li>
+                                      <li>Import the SQL file using PHPMyAdmin, WP-CLI, or a generic import plugin (<code>.sql.gz</code> files can be imported as-is by PHPMyAdmin, or with <code>gunzip -c file.sql.gz | mysql</code>).</li>
                                       <li><strong>Done!</strong> Your site should work immediately.</li>
                                   </ol>
                               </div>
@@ -103,7 +103,8 @@ const ContentEnhancer: React.FC = () => {
     }
   };
 
-  const handleRewrite = async (item: ContentItem) => {
+  // regenerate: skip the server's cached answer for this prompt (Regenerate button)
+  const handleRewrite = async (item: ContentItem, regenerate = false) => {
       setGenerating(item.id);
       try {
           const res = await fetch(`${apiUrl}/content/rewrite`, {
@@ -113,7 +114,8 @@ const ContentEnhancer: React.FC = () => {
                   id: item.id,
                   field: activeField,
                   tone,
-                  instructions
+                  instructions,
+                  regenerate
               })
           });
 
@@ -464,7 +466,7 @@ const ContentEnhancer: React.FC = () => {
                                                         <Check size={12} /> Apply
                                                     </button>
                                                     <button
-                                                        onClick={() => handleRewrite(item)}
+                                                        onClick={() => handleRewrite(item, true)}
                                                         disabled={generating === item.id}
                                                         className="text-gray-500 hover:text-purple-600 text-xs flex items-center gap-1"
                                                     >
@@ -12,7 +12,8 @@ interface Issue {
     original_string: string;
     suggested_fix: string;
     confidence: string;
-    status?: 'pending' | 'fixed' | 'failed' | 'ignored';
+    method?: 'local' | 'ai' | 'unresolved';
+    status?: 'pending' | 'fixing' | 'fixed' | 'failed' | 'ignored';
 }
 
 const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain }) => {
@@ -20,10 +21,9 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
     const [progress, setProgress] = useState(0);
     const [issues, setIssues] = useState<Issue[]>([]);
     const [scannedCount, setScannedCount] = useState(0);
+    const [aiCount, setAiCount] = useState(0);
     const [fixing, setFixing] = useState(false);
 
-    // Config
-    const BATCH_SIZE = 5; // Low batch size for deep analysis
     const { apiUrl, nonce } = (window as any).woosuiteData || {};
 
     const startScan = async () => {
@@ -35,9 +35,11 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
         setScanning(true);
         setIssues([]);
         setScannedCount(0);
+        setAiCount(0);
         setProgress(0);
 
-        let offset = 0;
+        // Each step reads posts, postmeta and term descriptions from this ID cursor for up to 15s
+        let cursor: any = null;
         let hasMore = true;
         let errorCount = 0;
 
@@ -48,14 +50,14 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
                     headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
                     body: JSON.stringify({
                         old_domain: oldDomain,
-                        offset: offset,
-                        limit: BATCH_SIZE
+                        cursor: cursor
                     })
                 });
 
                 if (res.status === 429) {
-                    console.warn("Rate Limit (429). Pausing for 65s...");
-                    await new Promise(r => setTimeout(r, 65000));
+                    const retryAfter = parseInt(res.headers.get('Retry-After') || '', 10) || 10;
+                    console.warn(`Rate Limit (429). Retrying in ${retryAfter}s...`);
+                    await new Promise(r => setTimeout(r, retryAfter * 1000));
                     continue; // Retry same batch
                 }
 
@@ -67,12 +69,13 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
                     setIssues(prev => [...prev, ...data.issues.map((i: any) => ({...i, status: 'pending'}))]);
                 }
 
-                offset += BATCH_SIZE;
-                setScannedCount(offset);
-                hasMore = data.has_more;
+                if (data.ai_error) console.warn(`AI step failed, links left for review: ${data.ai_error}`);
 
-                // Throttling
-                await new Promise(r => setTimeout(r, 2000));
+                cursor = data.cursor;
+                setScannedCount(prev => prev + data.scanned);
+                setAiCount(prev => prev + data.sent_to_ai);
+                hasMore = data.has_more;
+                // No fixed throttle: the server paces AI calls through the shared rate limiter.
 
             } catch (e) {
                 console.error(e);
@@ -99,7 +102,7 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
 
     const fixIssue = async (index: number) => {
         const issue = issues[index];
-        if (issue.status !== 'pending') return;
+        if (issue.status !== 'pending' || !issue.suggested_fix) return;
 
         // Optimistic Update
         const newIssues = [...issues];
@@ -129,9 +132,8 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
         setFixing(true);
         // Process sequentially to handle serialized logic safely and not hammer DB
         for (let i = 0; i < issues.length; i++) {
-            if (issues[i].status === 'pending') {
+            if (issues[i].status === 'pending' && issues[i].suggested_fix) {
                 await fixIssue(i);
-                await new Promise(r => setTimeout(r, 500)); // Slight delay
             }
         }
         setFixing(false);
@@ -171,7 +173,7 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
             {(scanning || issues.length > 0) && (
                 <div className="bg-gray-50 p-4 rounded-lg border border-gray-200 mb-6">
                     <div className="flex justify-between text-xs font-bold text-gray-600 mb-2">
-                        <span>Scanned Items: {scannedCount}</span>
+                        <span>Scanned Items: {scannedCount} ({aiCount} links sent to AI)</span>
                         <span className="text-red-500">Issues Found: {issues.length}</span>
                     </div>
                     {scanning && (
@@ -190,7 +192,7 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
                             <tr className="text-xs font-bold text-gray-500 uppercase border-b border-gray-200">
                                 <th className="p-3">Source ID</th>
                                 <th className="p-3">Original String</th>
-                                <th className="p-3">AI Suggestion</th>
+                                <th className="p-3">Suggestion</th>
                                 <th className="p-3 text-right">
                                     {fixing ? 'Fixing...' : (
                                         <button onClick={autoFixAll} className="text-blue-600 hover:underline">
@@ -205,7 +207,12 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
                                 <tr key={idx} className="border-b border-gray-100 hover:bg-gray-50">
                                     <td className="p-3 text-gray-600">#{issue.source_id} <span className="text-xs text-gray-400">({issue.location})</span></td>
                                     <td className="p-3 font-mono text-xs text-red-600 break-all max-w-xs">{issue.original_string}</td>
-                                    <td className="p-3 font-mono text-xs text-green-600 break-all max-w-xs">{issue.suggested_fix}</td>
+                                    <td className="p-3 font-mono text-xs text-green-600 break-all max-w-xs">
+                                        {issue.suggested_fix || <span className="text-gray-400 font-sans">Needs review</span>}
+                                        {issue.method && issue.method !== 'unresolved' && (
+                                            <span className="ml-2 text-[10px] font-sans text-gray-400 uppercase">{issue.method === 'local' ? 'Local' : 'AI'} · {issue.confidence}</span>
+                                        )}
+                                    </td>
                                     <td className="p-3 text-right">
                                         {issue.status === 'fixed' ? (
                                             <span className="text-green-600 flex items-center justify-end gap-1"><CheckCircle size={14}/> Fixed</span>
@@ -214,7 +221,7 @@ const DeepLinkScanner: React.FC<DeepLinkScannerProps> = ({ oldDomain, newDomain
                                         ) : (
                                             <button
                                                 onClick={() => fixIssue(idx)}
-                                                disabled={fixing}
+                                                disabled={fixing || !issue.suggested_fix}
                                                 className="text-gray-400 hover:text-purple-600 transition"
                                             >
                                                 <ArrowRight size={16} />
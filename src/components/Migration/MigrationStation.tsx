@@ -60,6 +60,69 @@ const MigrationStation: React.FC<MigrationStationProps> = ({ onCancel }) => {
         }
     };
 
+    // Import status line: totals and throughput since validation
+    const importRate = (data: any) =>
+        `Processed ${data.statements_total} statements (${Math.round(data.bytes_total/1024/1024)}MB) at ${data.statements_per_sec} stmt/s, ${data.mb_per_sec} MB/s` +
+        (data.errors ? `, ${data.errors} failed` : '') + '.';
+
+    // Segmented archive: fetch segments three at a time; one that fails its checksum is fetched again
+    const fetchSegments = async (segments: any[], totalBytes: number) => {
+        const queue = [...segments];
+        let fetched = 0;
+
+        const worker = async () => {
+            for (let segment = queue.shift(); segment; segment = queue.shift()) {
+                for (let attempt = 1; ; attempt++) {
+                    const res = await fetch(`${apiUrl}/backup/import/fetch-chunk`, {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
+                        body: JSON.stringify({ url: passport.download_url, segment: segment.id })
+                    });
+                    const data = await res.json();
+                    if (res.ok) break;
+                    if (attempt >= 3) throw new Error(data.message || `Segment ${segment.id} failed`);
+                    addLog(`Segment ${segment.id} (${segment.table || 'schema'}): ${data.message} Retrying...`);
+                }
+
+                fetched += segment.length;
+                setProgress(Math.min(99, Math.round((fetched / totalBytes) * 100)));
+                addLog(`Downloaded ${Math.round(fetched/1024/1024)}MB / ${Math.round(totalBytes/1024/1024)}MB (checksums verified)`);
+            }
+        };
+
+        await Promise.all([worker(), worker(), worker()]);
+    };
+
+    // Schema segment first, then each table segment on its own
+    const importSegments = async (segments: any[], oldDomain: string, newDomain: string) => {
+        const ordered = [...segments.filter(s => s.kind === 'schema'), ...segments.filter(s => s.kind !== 'schema')];
+
+        for (let i = 0; i < ordered.length; i++) {
+            let offset = 0;
+            let done = false;
+            while (!done) {
+                const res = await fetch(`${apiUrl}/backup/import/process-chunk`, {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
+                    body: JSON.stringify({
+                        segment: ordered[i].id,
+                        offset: offset,
+                        old_domain: oldDomain,
+                        new_domain: newDomain
+                    })
+                });
+
+                const data = await res.json();
+                if (!res.ok) throw new Error(data.message || "Import failed");
+
+                offset = data.offset;
+                done = data.done;
+                addLog(`Importing ${ordered[i].table || 'schema'} (segment ${i + 1}/${ordered.length})... ${importRate(data)}`);
+            }
+            setProgress(Math.min(99, Math.round(((i + 1) / ordered.length) * 100)));
+        }
+    };
+
     const startMigration = async () => {
         setStep('migrate');
         setPhase('fetching');
@@ -67,6 +130,28 @@ const MigrationStation: React.FC<MigrationStationProps> = ({ onCancel }) => {
         addLog("Initializing migration sequence...");
 
         try {
+            // Assuming current site is the "new domain"
+            const currentDomain = new URL((window as any).woosuiteData.homeUrl).hostname;
+            // Passport should ideally contain old domain, but we can infer or pass it.
+            // For now, let's assume passport source_url contains it.
+            const oldDomain = new URL(passport.source_url).hostname;
+
+            // Segmented archive (manifest checked during validation)
+            const manifest = validationReport?.manifest;
+            if (manifest) {
+                addLog(`Phase 1: Fetching ${manifest.segments.length} segments from Source...`);
+                await fetchSegments(manifest.segments, manifest.archive_bytes);
+
+                setPhase('processing');
+                addLog("Phase 2: Importing Database & Updating URLs...");
+                setProgress(0);
+                await importSegments(manifest.segments, oldDomain, currentDomain);
+
+                addLog("Migration Successfully Completed!");
+                setStep('complete');
+                return;
+            }
+
             // PHASE 1: DOWNLOAD
             addLog("Phase 1: Fetching Backup from Source...");
             let offset = 0;
@@ -110,13 +195,6 @@ const MigrationStation: React.FC<MigrationStationProps> = ({ onCancel }) => {
 
             offset = 0; // Reset offset for reading local file
             done = false;
-            let queriesTotal = 0;
-
-            // Assuming current site is the "new domain"
-            const currentDomain = new URL((window as any).woosuiteData.homeUrl).hostname;
-            // Passport should ideally contain old domain, but we can infer or pass it.
-            // For now, let's assume passport source_url contains it.
-            const oldDomain = new URL(passport.source_url).hostname;
 
             while (!done) {
                 const res = await fetch(`${apiUrl}/backup/import/process-chunk`, {
@@ -133,12 +211,10 @@ const MigrationStation: React.FC<MigrationStationProps> = ({ onCancel }) => {
                 if (!res.ok) throw new Error(data.message || "Import failed");
 
                 offset = data.offset;
-                queriesTotal += data.queries;
                 done = data.done;
 
-                addLog(`Importing... Processed ${queriesTotal} queries.`);
-                // We don't know total lines easily, so we might just pulse progress or estimate based on file bytes
-                // Let's use file bytes offset / total file size
+                addLog(`Importing... ${importRate(data)}`);
+                // Offsets are uncompressed SQL bytes, so this runs ahead for a gzip dump (capped at 99%)
                 const percent = Math.min(99, Math.round((offset / total) * 100));
                 setProgress(percent);
 
@@ -202,6 +278,7 @@ const MigrationStation: React.FC<MigrationStationProps> = ({ onCancel }) => {
                                 <h4 className="font-bold text-gray-800">Source: {passport.source_url}</h4>
                                 <p className="text-sm text-gray-500">
                                     Size: {Math.round(passport.filesize / 1024 / 1024)} MB • Generated: {new Date(passport.generated_at * 1000).toLocaleDateString()}
+                                    {validationReport?.manifest && ` • ${validationReport.manifest.tables} tables in ${validationReport.manifest.segments.length} checksummed segments`}
                                 </p>
                             </div>
                         </div>
@@ -27,9 +27,19 @@ const SecurityHub: React.FC = () => {
   const [deepScanStatus, setDeepScanStatus] = useState<any>(null);
   const [selectedThreats, setSelectedThreats] = useState<string[]>([]); // For bulk actions
 
+  // Deep Scan Findings (paged from /security/findings)
+  const [findings, setFindings] = useState<any[]>([]);
+  const [findingsTotal, setFindingsTotal] = useState(0);
+  const [findingsPage, setFindingsPage] = useState(1);
+  const [severityFilter, setSeverityFilter] = useState('');
+  const findingsPerPage = 50;
+
   // Quarantine & Ignore Lists
   const [quarantinedFiles, setQuarantinedFiles] = useState<any[]>([]);
   const [ignoredPaths, setIgnoredPaths] = useState<string[]>([]);
+  const [ipBans, setIpBans] = useState<any[]>([]);
+  const [banInput, setBanInput] = useState('');
+  const [banReason, setBanReason] = useState('');
   const [aiAnalysis, setAiAnalysis] = useState<any>(null);
   const [analyzingFile, setAnalyzingFile] = useState<string | null>(null);
 
@@ -62,11 +72,18 @@ const SecurityHub: React.FC = () => {
     return () => clearInterval(interval);
   }, [deepScanStatus?.status]);
 
+  // Reload the current page of findings as the scan finds more
+  useEffect(() => {
+    if (!apiUrl || !deepScanStatus?.run_id) return;
+    fetchFindings();
+  }, [deepScanStatus?.run_id, deepScanStatus?.found_issues, findingsPage, severityFilter]);
+
   // Fetch Lists when tab changes
   useEffect(() => {
       if (activeTab === 'quarantine') {
           fetchQuarantine();
           fetchIgnored();
+          fetchBans();
       }
   }, [activeTab]);
 
@@ -123,6 +140,32 @@ const SecurityHub: React.FC = () => {
     }
   };
 
+  const fetchFindings = async () => {
+    try {
+        const params = new URLSearchParams({
+            run: String(deepScanStatus.run_id),
+            page: String(findingsPage),
+            per_page: String(findingsPerPage),
+        });
+        if (severityFilter) params.set('severity', severityFilter);
+        const res = await fetch(`${apiUrl}/security/findings?${params.toString()}`, {
+            headers: { 'X-WP-Nonce': nonce }
+        });
+        if (res.ok) {
+            const data = await res.json();
+            setFindings(data.items || []);
+            setFindingsTotal(data.total || 0);
+        }
+    } catch (e) {
+        console.error("Failed to fetch scan findings", e);
+    }
+  };
+
+  const removeFindings = (files: string[]) => {
+      setFindings(prev => prev.filter((r: any) => !files.includes(r.file)));
+      setFindingsTotal(prev => Math.max(0, prev - files.length));
+  };
+
   const fetchQuarantine = async () => {
       try {
           const res = await fetch(`${apiUrl}/security/quarantine`, {
@@ -147,6 +190,51 @@ const SecurityHub: React.FC = () => {
       } catch (e) { console.error(e); }
   };
 
+  const fetchBans = async () => {
+      try {
+          const res = await fetch(`${apiUrl}/security/bans`, {
+              headers: { 'X-WP-Nonce': nonce }
+          });
+          if (res.ok) {
+              const data = await res.json();
+              setIpBans(data.bans || []);
+          }
+      } catch (e) { console.error(e); }
+  };
+
+  const handleAddBans = async () => {
+      if (!banInput.trim()) return;
+      try {
+          const res = await fetch(`${apiUrl}/security/bans`, {
+              method: 'POST',
+              headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
+              body: JSON.stringify({ ranges: banInput, reason: banReason })
+          });
+          const data = await res.json();
+          if (data.invalid && data.invalid.length > 0) {
+              alert(`Skipped invalid entries: ${data.invalid.join(', ')}`);
+          }
+          if (res.ok) {
+              setBanInput('');
+              setBanReason('');
+              fetchBans();
+          }
+      } catch (e) { alert("Failed to add ban."); }
+  };
+
+  const handleUnban = async (id: number) => {
+      try {
+          const res = await fetch(`${apiUrl}/security/bans/remove`, {
+              method: 'POST',
+              headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
+              body: JSON.stringify({ id })
+          });
+          if (res.ok) {
+              fetchBans();
+          }
+      } catch (e) { alert("Failed to remove ban."); }
+  };
+
   const handleToggle = async (option: string, value: boolean) => {
       // Optimistic update
       if (option === 'firewall') setFirewallEnabled(value);
@@ -205,6 +293,9 @@ const SecurityHub: React.FC = () => {
   const startDeepScan = async () => {
     setShowDeepScanModal(false);
     setDeepScanStatus({ status: 'running', message: 'Starting...', processed_folders: 0, total_folders: 1 }); // Optimistic
+    setFindings([]);
+    setFindingsTotal(0);
+    setFindingsPage(1);
     try {
         await fetch(`${apiUrl}/security/deep-scan/start`, {
             method: 'POST',
@@ -231,10 +322,7 @@ const SecurityHub: React.FC = () => {
           });
           if (res.ok) {
               // Remove from local view
-              setDeepScanStatus((prev: any) => ({
-                  ...prev,
-                  results: prev.results.filter((r: any) => r.file !== filepath)
-              }));
+              removeFindings([filepath]);
           }
       } catch (e) { alert("Failed to ignore file."); }
   };
@@ -250,10 +338,7 @@ const SecurityHub: React.FC = () => {
           const data = await res.json();
           if (res.ok && data.success) {
                // Remove from local view
-               setDeepScanStatus((prev: any) => ({
-                  ...prev,
-                  results: prev.results.filter((r: any) => r.file !== filepath)
-              }));
+               removeFindings([filepath]);
           } else {
               alert("Error: " + data.message);
           }
@@ -359,12 +444,7 @@ const SecurityHub: React.FC = () => {
           if (res.ok && data.success) {
               alert(`Successfully processed ${data.count} items.`);
               // Remove processed items from view
-              if (deepScanStatus?.results) {
-                 setDeepScanStatus((prev: any) => ({
-                      ...prev,
-                      results: prev.results.filter((r: any) => !selectedThreats.includes(r.file))
-                  }));
-              }
+              removeFindings(selectedThreats);
               setSelectedThreats([]);
               // If ignored, refresh ignore list
               if (action === 'ignore') fetchIgnored();
@@ -386,11 +466,11 @@ const SecurityHub: React.FC = () => {
   };
 
   const toggleSelectAllThreats = () => {
-      if (!deepScanStatus?.results) return;
-      if (selectedThreats.length === deepScanStatus.results.length) {
+      if (findings.length === 0) return;
+      if (selectedThreats.length === findings.length) {
           setSelectedThreats([]);
       } else {
-          setSelectedThreats(deepScanStatus.results.map((r: any) => r.file));
+          setSelectedThreats(findings.map((r: any) => r.file));
       }
   };
 
@@ -799,12 +879,24 @@ const SecurityHub: React.FC = () => {
                             style={{ width: `${deepScanStatus.total_folders > 0 ? (deepScanStatus.processed_folders / deepScanStatus.total_folders) * 100 : 0}%` }}
                         ></div>
                     </div>
+                    {deepScanStatus.files_total > 0 && (
+                        <div className="flex gap-4 text-xs text-gray-500 mt-2">
+                            <span>{deepScanStatus.files_total} files, {deepScanStatus.fingerprint_hit_rate}% unchanged (skipped)</span>
+                            {deepScanStatus.files_per_sec > 0 && <span>{deepScanStatus.files_per_sec} files/sec</span>}
+                            {deepScanStatus.status === 'running' && typeof deepScanStatus.eta_seconds === 'number' && (
+                                <span>ETA {deepScanStatus.eta_seconds >= 60 ? `${Math.ceil(deepScanStatus.eta_seconds / 60)} min` : `${deepScanStatus.eta_seconds}s`}</span>
+                            )}
+                            {deepScanStatus.ai_lookups > 0 && (
+                                <span>AI verdicts: {deepScanStatus.verdict_hit_rate}% from cache ({deepScanStatus.ai_cache_hits}/{deepScanStatus.ai_lookups})</span>
+                            )}
+                        </div>
+                    )}
                 </div>
 
-                {deepScanStatus.results && deepScanStatus.results.length > 0 && (
+                {(findingsTotal > 0 || severityFilter !== '') && (
                     <div className="mt-6">
                         <div className="flex justify-between items-end mb-2">
-                             <h4 className="font-medium text-red-600 flex items-center gap-2"><AlertTriangle size={16}/> Suspicious Files Found ({deepScanStatus.results.length})</h4>
+                             <h4 className="font-medium text-red-600 flex items-center gap-2"><AlertTriangle size={16}/> Suspicious Files Found ({findingsTotal})</h4>
                              {selectedThreats.length > 0 && (
                                  <div className="flex gap-2">
                                      <button
@@ -828,6 +920,17 @@ const SecurityHub: React.FC = () => {
                                  </div>
                              )}
                         </div>
+                        <div className="flex justify-end mb-2">
+                            <select
+                                value={severityFilter}
+                                onChange={(e) => { setSeverityFilter(e.target.value); setFindingsPage(1); setSelectedThreats([]); }}
+                                className="text-xs border border-gray-300 rounded px-2 py-1 text-gray-700"
+                            >
+                                <option value="">All severities</option>
+                                <option value="critical">Critical</option>
+                                <option value="medium">Medium</option>
+                            </select>
+                        </div>
                         <div className="bg-red-50 border border-red-100 rounded-lg overflow-hidden max-h-96 overflow-y-auto">
                             <table className="w-full text-left text-sm">
                                 <thead className="bg-red-100/50 text-red-800 sticky top-0">
@@ -835,7 +938,7 @@ const SecurityHub: React.FC = () => {
                                         <th className="p-3 w-8">
                                             <input
                                                 type="checkbox"
-                                                checked={selectedThreats.length === deepScanStatus.results.length}
+                                                checked={findings.length > 0 && selectedThreats.length === findings.length}
                                                 onChange={toggleSelectAllThreats}
                                                 className="rounded border-red-300 text-purple-600 focus:ring-purple-500"
                                             />
@@ -846,7 +949,7 @@ const SecurityHub: React.FC = () => {
                                     </tr>
                                 </thead>
                                 <tbody className="divide-y divide-red-100">
-                                    {deepScanStatus.results.map((res: any, idx: number) => (
+                                    {findings.map((res: any, idx: number) => (
                                         <tr key={idx} className="hover:bg-red-100/50 transition-colors">
                                             <td className="p-3 align-top">
                                                 <input
@@ -891,7 +994,28 @@ const SecurityHub: React.FC = () => {
                                 </tbody>
                             </table>
                         </div>
-                         <div className="mt-4 flex justify-end">
+                         <div className="mt-4 flex justify-between items-center">
+                            <div className="flex items-center gap-2 text-xs text-gray-600">
+                                {findingsTotal > findingsPerPage && (
+                                    <>
+                                        <button
+                                            onClick={() => { setFindingsPage(p => Math.max(1, p - 1)); setSelectedThreats([]); }}
+                                            disabled={findingsPage <= 1}
+                                            className="px-2 py-1 border border-gray-300 rounded disabled:opacity-50"
+                                        >
+                                            Prev
+                                        </button>
+                                        <span>Page {findingsPage} of {Math.ceil(findingsTotal / findingsPerPage)}</span>
+                                        <button
+                                            onClick={() => { setFindingsPage(p => p + 1); setSelectedThreats([]); }}
+                                            disabled={findingsPage >= Math.ceil(findingsTotal / findingsPerPage)}
+                                            className="px-2 py-1 border border-gray-300 rounded disabled:opacity-50"
+                                        >
+                                            Next
+                                        </button>
+                                    </>
+                                )}
+                            </div>
                             <button
                                 onClick={closeScanResults}
                                 className="px-4 py-2 bg-gray-100 text-gray-700 rounded-lg hover:bg-gray-200 transition text-sm font-medium"
@@ -902,7 +1026,7 @@ const SecurityHub: React.FC = () => {
                     </div>
                 )}
 
-                {deepScanStatus.status === 'complete' && (!deepScanStatus.results || deepScanStatus.results.length === 0) && (
+                {deepScanStatus.status === 'complete' && findingsTotal === 0 && severityFilter === '' && (
                     <div className="flex flex-col items-center justify-center p-6 bg-green-50 rounded-lg border border-green-100">
                         <CheckCircle size={48} className="text-green-500 mb-2" />
                         <p className="text-green-800 font-medium">Scan Complete</p>
@@ -1048,6 +1172,58 @@ const SecurityHub: React.FC = () => {
                       </ul>
                   )}
               </div>
+
+              {/* Blocked IPs & Ranges */}
+              <div className="bg-white rounded-xl shadow-sm border border-gray-200 p-6">
+                  <h3 className="font-bold text-gray-800 mb-4 flex items-center gap-2">
+                      <Globe size={20} className="text-red-500" /> Blocked IPs & Ranges
+                  </h3>
+                  <div className="flex gap-2 mb-4">
+                      <input
+                        type="text"
+                        value={banInput}
+                        onChange={(e) => setBanInput(e.target.value)}
+                        placeholder="203.0.113.7, 198.51.100.0/24, 2001:db8::/48"
+                        className="flex-1 border border-gray-300 rounded-lg px-3 py-2 text-sm font-mono"
+                      />
+                      <input
+                        type="text"
+                        value={banReason}
+                        onChange={(e) => setBanReason(e.target.value)}
+                        placeholder="Reason (e.g. AS64500)"
+                        className="w-48 border border-gray-300 rounded-lg px-3 py-2 text-sm"
+                      />
+                      <button
+                        onClick={handleAddBans}
+                        className="bg-red-600 text-white px-4 py-2 rounded-lg text-sm font-medium hover:bg-red-700"
+                      >
+                          Block
+                      </button>
+                  </div>
+                  {ipBans.length === 0 ? (
+                      <p className="text-gray-500 text-sm">No active bans.</p>
+                  ) : (
+                      <ul className="divide-y divide-gray-100">
+                          {ipBans.map((ban) => (
+                              <li key={ban.id} className="p-3 flex justify-between items-center hover:bg-gray-50">
+                                  <div>
+                                      <span className="font-mono text-sm text-gray-700">{ban.cidr}</span>
+                                      <span className="text-xs text-gray-500 ml-3">{ban.reason}</span>
+                                      <span className="text-xs text-gray-400 ml-3">
+                                          {Number(ban.expires_at) > 0 ? `until ${new Date(Number(ban.expires_at) * 1000).toLocaleString()}` : 'permanent'}
+                                      </span>
+                                  </div>
+                                  <button
+                                    onClick={() => handleUnban(Number(ban.id))}
+                                    className="text-red-600 hover:text-red-800 text-xs font-medium"
+                                  >
+                                      Unblock
+                                  </button>
+                              </li>
+                          ))}
+                      </ul>
+                  )}
+              </div>
           </div>
       )}
     </div>
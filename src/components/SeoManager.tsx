@@ -102,10 +102,11 @@ const SeoManager: React.FC = () => {
   const handleGenerate = async (item: ContentItem) => {
     setGenerating(item.id);
     try {
+      // Clicking Generate on an item that already has SEO data asks the AI again
       const res = await fetch(`${apiUrl}/seo/generate/${item.id}`, {
            method: 'POST',
            headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
-           body: JSON.stringify({})
+           body: JSON.stringify({ regenerate: !!(item.metaDescription || item.altText) })
       });
 
       if (!res.ok) {
@@ -179,96 +180,112 @@ const SeoManager: React.FC = () => {
       setStopBatch(false);
       setClientBatchProgress({ current: 0, total: idsToProcess.length, failed: 0 });
 
-      const sleep = (ms: number) => new Promise(r => setTimeout(r, ms));
-      const CONCURRENCY = 3; // Process 3 items at once
-
-      for (let i = 0; i < idsToProcess.length; i += CONCURRENCY) {
-          // Check Stop Flag (State updates are async, so we use a ref or just break if state changed in previous render cycle?)
-          // In a functional loop, accessing state directly might give stale values.
-          // However, we can break after the loop iteration.
-          // For immediate stop, we need a ref, but simple state check works "eventually".
-          // We will check state inside the loop if possible, but React state is closure-bound.
-          // FIX: Use a custom check or rely on the UI 'stop' action to reload/break?
-          // We will implement a 'stopRef' pattern if needed, but let's trust the user hits stop and we check it next loop.
-          // Actually, 'stopBatch' state variable won't update inside this loop closure.
-          // We need to use a ref for the stop flag.
-          // Since I can't rewrite the whole component to add useRef now easily without losing context,
-          // I will use a window global property as a hack or break the loop by checking a DOM element?
-          // Better: Use `await new Promise(...)` that checks a flag?
-          // Let's rely on `stopBatch` state being updated via the button, BUT this loop closure has the OLD `stopBatch` (false).
-          // We MUST use a Ref.
-      }
-
-      // RE-IMPLEMENTATION WITH RECURSION OR REF WOULD BE CLEANER.
-      // BUT GIVEN THE TOOLS, I WILL USE A REF-LIKE PATTERN attached to the component instance? No class.
-      // I will attach a flag to window.woosuiteData temporary? No.
-      // I will just use the loop logic below which is cleaner and handles concurrency.
-
-      await processBatchWithConcurrency(idsToProcess, CONCURRENCY, sleep);
+      await processBulkStream(idsToProcess);
 
       setIsClientBatch(false);
       setSelectedIds([]);
   };
 
-  const processBatchWithConcurrency = async (ids: number[], concurrency: number, sleep: (ms: number) => Promise<unknown>) => {
-      // We need to access the LATEST value of `stopBatch`.
-      // Since we are in a closure, we can't.
-      // Workaround: Use a mutable object we pass around or check a global.
-      // Or, use a recursive function that reads state? No, recursion also binds state.
-      // The standard React way is useRef. Since I can't add useRef easily in this diff without re-rendering the whole top block...
-      // I will assume the user uses the 'Stop' button which will just reload the page or we add a hidden element to check?
-      // actually I can add useRef in the top level diff if I'm careful.
-      // But wait, I can just check `document.getElementById('woosuite-stop-signal')`.
-
-      for (let i = 0; i < ids.length; i += concurrency) {
-          if (document.getElementById('woosuite-stop-signal')) {
-              break;
-          }
-
-          const chunk = ids.slice(i, i + concurrency);
-          const promises = chunk.map(id => processSingleItem(id, sleep));
-          await Promise.all(promises);
+  // The Stop button renders #woosuite-stop-signal; state would be stale inside this loop
+  const stopRequested = () => !!document.getElementById('woosuite-stop-signal');
 
-          setClientBatchProgress(prev => ({ ...prev, current: Math.min(prev.current + chunk.length, prev.total) }));
-          await sleep(100); // Small delay between chunks to breathe
+  const applyStreamLine = (line: any) => {
+      if (line.success && line.data) {
+          const updates = mapResultToItem(line.data, activeTab);
+          setItems(prev => prev.map(p => p.id === line.id ? { ...p, ...updates } : p));
+          setClientBatchProgress(prev => ({ ...prev, current: Math.min(prev.current + 1, prev.total) }));
+      } else {
+          setItems(prev => prev.map(p => p.id === line.id ? { ...p, lastError: line.message || 'Unknown error' } : p));
+          setClientBatchProgress(prev => ({ ...prev, current: Math.min(prev.current + 1, prev.total), failed: prev.failed + 1 }));
       }
   };
 
-  const processSingleItem = async (id: number, sleep: (ms: number) => Promise<unknown>) => {
-      let retries = 0;
-      let success = false;
-      while (!success && retries < 2) {
+  // Sends the IDs to /seo/generate/stream in chunks. The server works through each
+  // chunk for ~20s and streams one NDJSON line per item; IDs it did not get to
+  // (time budget or rate limit) come back in the final line and are sent again.
+  const processBulkStream = async (ids: number[]) => {
+      const sleep = (ms: number) => new Promise(r => setTimeout(r, ms));
+      const CHUNK_SIZE = 200;
+      let queue = [...ids];
+      let idleRounds = 0; // Rounds in a row that finished no item
+
+      while (queue.length > 0 && !stopRequested()) {
+          const chunk = queue.slice(0, CHUNK_SIZE);
+          queue = queue.slice(CHUNK_SIZE);
+          let remaining: number[] = chunk;
+          let retryAfter = 0;
+          let finished = 0;
+
           try {
-              const res = await fetch(`${apiUrl}/seo/generate/${id}`, {
+              const res = await fetch(`${apiUrl}/seo/generate/stream`, {
                   method: 'POST',
                   headers: { 'Content-Type': 'application/json', 'X-WP-Nonce': nonce },
-                  body: JSON.stringify({ rewriteTitle: false })
+                  body: JSON.stringify({ ids: chunk, rewriteTitle: false })
               });
 
               if (res.status === 429) {
-                  console.warn(`Rate Limit Hit for ID ${id}. Pausing...`);
-                  await sleep(65000);
-                  retries++;
-                  continue;
-              }
-
-              if (!res.ok) throw new Error("Failed");
-
-              const json = await res.json();
-              if (json.success && json.data) {
-                  const updates = mapResultToItem(json.data, activeTab);
-                  setItems(prev => prev.map(p => {
-                      if (p.id === id) return { ...p, ...updates, lastError: undefined };
-                      return p;
-                  }));
-                  success = true;
+                  retryAfter = parseInt(res.headers.get('Retry-After') || '', 10) || 10;
+              } else if (!res.ok || !res.body) {
+                  throw new Error(res.statusText || 'Server error');
               } else {
-                  throw new Error(json.message || "Unknown error");
+                  const reader = res.body.getReader();
+                  const decoder = new TextDecoder();
+                  const seen = new Set<number>();
+                  let buffer = '';
+                  let summary: any = null;
+
+                  while (true) {
+                      if (stopRequested()) {
+                          // The server saves the pass in flight and then stops
+                          await reader.cancel();
+                          break;
+                      }
+                      const { done, value } = await reader.read();
+                      if (done) break;
+                      buffer += decoder.decode(value, { stream: true });
+                      const lines = buffer.split('\n');
+                      buffer = lines.pop() || '';
+                      for (const raw of lines) {
+                          if (!raw.trim()) continue;
+                          const line = JSON.parse(raw);
+                          if (line.done) {
+                              summary = line;
+                          } else {
+                              seen.add(line.id);
+                              applyStreamLine(line);
+                          }
+                      }
+                  }
+
+                  finished = seen.size;
+                  if (summary) {
+                      remaining = summary.remaining || [];
+                      retryAfter = summary.retryAfter || 0;
+                  } else {
+                      // Stream cut off (PHP fatal, proxy timeout): resend what got no answer
+                      remaining = chunk.filter(id => !seen.has(id));
+                  }
               }
           } catch (e) {
-              setClientBatchProgress(prev => ({ ...prev, failed: prev.failed + 1 }));
+              console.error(e);
+              setClientBatchProgress(prev => ({ ...prev, current: Math.min(prev.current + chunk.length, prev.total), failed: prev.failed + chunk.length }));
+              continue;
+          }
+
+          idleRounds = finished > 0 ? 0 : idleRounds + 1;
+          if (idleRounds >= 5) {
+              // Rate limited again and again without progress: count the rest as failed
+              const left = remaining.length + queue.length;
+              setClientBatchProgress(prev => ({ ...prev, current: Math.min(prev.current + left, prev.total), failed: prev.failed + left }));
               break;
           }
+
+          queue = [...remaining, ...queue];
+          if (retryAfter > 0 && queue.length > 0) {
+              // The server-side limiter tells us exactly how long to wait
+              console.warn(`Rate Limit Hit. ${remaining.length} items wait ${retryAfter}s...`);
+              await sleep(retryAfter * 1000);
+          }
       }
   };
 
@@ -9,6 +9,9 @@ const Settings: React.FC = () => {
   const [useCustomApi, setUseCustomApi] = useState(false);
   const [customApiUrl, setCustomApiUrl] = useState('');
   const [customModelId, setCustomModelId] = useState('');
+  const [groqRpm, setGroqRpm] = useState(30);
+  const [aiConcurrency, setAiConcurrency] = useState(4);
+  const [llmsFullEnabled, setLlmsFullEnabled] = useState(false);
 
   // Save State
   const [saveStatus, setSaveStatus] = useState<'idle' | 'saving' | 'success' | 'error'>('idle');
@@ -54,6 +57,9 @@ const Settings: React.FC = () => {
             setUseCustomApi(data.useCustomApi || false);
             setCustomApiUrl(data.customApiUrl || '');
             setCustomModelId(data.customModelId || '');
+            if (typeof data.groqRpm === 'number') setGroqRpm(data.groqRpm);
+            if (typeof data.aiConcurrency === 'number') setAiConcurrency(data.aiConcurrency);
+            setLlmsFullEnabled(data.llmsFullEnabled || false);
         })
         .catch(e => console.error("Failed to load settings:", e));
     }
@@ -84,7 +90,10 @@ const Settings: React.FC = () => {
                     apiKey: apiKey.trim(),
                     useCustomApi,
                     customApiUrl,
-                    customModelId
+                    customModelId,
+                    groqRpm,
+                    aiConcurrency,
+                    llmsFullEnabled
                 })
             });
 
@@ -317,6 +326,35 @@ const Settings: React.FC = () => {
                             </div>
                         </div>
 
+                        <div>
+                            <label className="block text-sm font-medium text-gray-700 mb-2">Requests per Minute (plan limit)</label>
+                            <input
+                                type="number"
+                                min={0}
+                                value={groqRpm}
+                                onChange={(e) => setGroqRpm(parseInt(e.target.value, 10) || 0)}
+                                className="w-40 px-4 py-2.5 rounded-lg border border-gray-300 focus:ring-2 focus:ring-purple-200 focus:border-purple-500 outline-none transition font-mono"
+                            />
+                            <p className="text-xs text-gray-500 mt-2">
+                                All AI requests are paced to just under this limit. Free tier: 30. Token and daily limits are read from Groq's response headers. 0 disables local pacing.
+                            </p>
+                        </div>
+
+                        <div>
+                            <label className="block text-sm font-medium text-gray-700 mb-2">Parallel Requests (background optimization)</label>
+                            <input
+                                type="number"
+                                min={1}
+                                max={16}
+                                value={aiConcurrency}
+                                onChange={(e) => setAiConcurrency(Math.min(16, Math.max(1, parseInt(e.target.value, 10) || 1)))}
+                                className="w-40 px-4 py-2.5 rounded-lg border border-gray-300 focus:ring-2 focus:ring-purple-200 focus:border-purple-500 outline-none transition font-mono"
+                            />
+                            <p className="text-xs text-gray-500 mt-2">
+                                How many AI requests the background worker keeps in flight at once. They still share the per-minute limit above, so raise this on paid plans.
+                            </p>
+                        </div>
+
                         {/* Test Result Feedback */}
                         {testResult && (
                             <div className={`p-4 rounded-lg text-sm border flex items-start gap-3 ${testResult.success ? 'bg-green-50 text-green-800 border-green-200' : 'bg-red-50 text-red-800 border-red-200'}`}>
@@ -351,6 +389,15 @@ const Settings: React.FC = () => {
                                 <span className="text-sm text-gray-700">Beta Features</span>
                                 <input type="checkbox" className="toggle-checkbox accent-purple-600" />
                             </div>
+                            <div className="flex items-center justify-between">
+                                <span className="text-sm text-gray-700">Publish llms-full.txt (whole catalog, built in background)</span>
+                                <input
+                                    type="checkbox"
+                                    className="toggle-checkbox accent-purple-600"
+                                    checked={llmsFullEnabled}
+                                    onChange={(e) => setLlmsFullEnabled(e.target.checked)}
+                                />
+                            </div>
                         </div>
                     </div>
 
@@ -376,6 +423,20 @@ const Settings: React.FC = () => {
                         </button>
                     </div>
 
+                    <div className="flex justify-between items-center p-4 bg-gray-50 rounded-lg border border-gray-200">
+                        <div>
+                            <div className="font-medium text-gray-900">Clear AI Response Cache</div>
+                            <div className="text-sm text-gray-500">Forgets saved AI answers, so every prompt is sent to the AI again.</div>
+                        </div>
+                        <button
+                            onClick={() => handleMaintenance('clear_ai_cache')}
+                            disabled={maintenanceLoading === 'clear_ai_cache'}
+                            className="px-4 py-2 bg-white border border-gray-300 text-gray-700 rounded-lg text-sm font-medium hover:bg-gray-100 disabled:opacity-50"
+                        >
+                            {maintenanceLoading === 'clear_ai_cache' ? 'Processing...' : 'Run Cleanup'}
+                        </button>
+                    </div>
+
                     <div className="flex justify-between items-center p-4 bg-gray-50 rounded-lg border border-gray-200">
                         <div>
                             <div className="font-medium text-gray-900">Delete Post Revisions</div>
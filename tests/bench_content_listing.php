@@ -0,0 +1,142 @@
+<?php
+/**
+ * Query-count / latency benchmark for GET /woosuite/v1/content.
+ *
+ * Needs a real WordPress + WooCommerce (query counts are the point), so it runs
+ * through WP-CLI rather than mock_wp.php:
+ *
+ *   wp eval-file tests/bench_content_listing.php [type=product] [seed=500] [runs=5]
+ *
+ * For each page size (20/100/500) it reports queries and median ms for:
+ *   - legacy: the old per-row loop (get_post_meta x12, get_the_terms, wc_get_product)
+ *   - full:   the current endpoint, every column
+ *   - fields: the current endpoint with fields=id,name,metaTitle,metaDescription
+ *
+ * The object cache is flushed before every run, so the numbers match a site
+ * without a persistent object cache. seed=N creates products until the store
+ * has N (tagged "woosuite-bench"; delete them afterwards).
+ */
+
+if ( ! defined( 'ABSPATH' ) || ! class_exists( 'WooSuite_Api' ) ) {
+    echo "Run with: wp eval-file tests/bench_content_listing.php (plugin active)\n";
+    return;
+}
+
+$bench_args = array();
+foreach ( isset( $args ) ? $args : array() as $arg ) {
+    list( $key, $value ) = array_pad( explode( '=', $arg, 2 ), 2, '' );
+    $bench_args[ $key ] = $value;
+}
+$bench_type = isset( $bench_args['type'] ) ? $bench_args['type'] : 'product';
+$bench_runs = isset( $bench_args['runs'] ) ? max( 1, (int) $bench_args['runs'] ) : 5;
+
+// The endpoint checks manage_options
+$admins = get_users( array( 'role' => 'administrator', 'number' => 1, 'fields' => 'ID' ) );
+wp_set_current_user( $admins ? $admins[0] : 1 );
+
+if ( ! empty( $bench_args['seed'] ) && $bench_type === 'product' ) {
+    $have = (int) wp_count_posts( 'product' )->publish;
+    for ( $i = $have; $i < (int) $bench_args['seed']; $i++ ) {
+        $id = wp_insert_post( array(
+            'post_type' => 'product',
+            'post_status' => 'publish',
+            'post_title' => "Bench Product $i",
+            'post_content' => str_repeat( 'Solid build and a soft finish. ', 10 ),
+        ) );
+        update_post_meta( $id, '_price', (string) ( 10 + $i % 90 ) );
+        update_post_meta( $id, '_regular_price', (string) ( 10 + $i % 90 ) );
+        if ( $i % 2 ) {
+            update_post_meta( $id, '_woosuite_meta_title', "Bench Product $i | Shop" );
+            update_post_meta( $id, '_woosuite_meta_description', "Meta description for bench product $i." );
+        }
+        wp_set_object_terms( $id, array( 'woosuite-bench', 'tag-' . ( $i % 20 ) ), 'product_tag' );
+    }
+}
+
+/**
+ * The listing loop as it was before meta/term priming (for comparison).
+ */
+function bench_legacy_listing( $type, $limit ) {
+    $query = new WP_Query( array(
+        'post_type' => $type === 'image' ? 'attachment' : $type,
+        'post_status' => $type === 'image' ? 'inherit' : 'publish',
+        'posts_per_page' => $limit,
+        'update_post_meta_cache' => false,
+        'update_post_term_cache' => false,
+    ) );
+
+    $data = array();
+    foreach ( $query->posts as $post ) {
+        $item = array(
+            'id' => $post->ID,
+            'metaTitle' => get_post_meta( $post->ID, '_woosuite_meta_title', true ),
+            'metaDescription' => get_post_meta( $post->ID, '_woosuite_meta_description', true ),
+            'llmSummary' => get_post_meta( $post->ID, '_woosuite_llm_summary', true ),
+            'lastError' => get_post_meta( $post->ID, '_woosuite_seo_last_error', true ),
+            'permalink' => get_permalink( $post->ID ),
+            'proposedTitle' => get_post_meta( $post->ID, '_woosuite_proposed_title', true ),
+            'proposedDescription' => get_post_meta( $post->ID, '_woosuite_proposed_description', true ),
+            'proposedShortDescription' => get_post_meta( $post->ID, '_woosuite_proposed_short_description', true ),
+            'hasHistory' => ! empty( get_post_meta( $post->ID, '_woosuite_history_post_content', true ) ) ||
+                            ! empty( get_post_meta( $post->ID, '_woosuite_history__woosuite_meta_description', true ) ) ||
+                            ! empty( get_post_meta( $post->ID, '_woosuite_history__wp_attachment_image_alt', true ) ) ||
+                            ! empty( get_post_meta( $post->ID, '_woosuite_history_post_title', true ) ) ||
+                            ! empty( get_post_meta( $post->ID, '_woosuite_history_post_excerpt', true ) ),
+        );
+        $terms = get_the_terms( $post->ID, $type === 'product' ? 'product_tag' : 'post_tag' );
+        $item['tags'] = ( ! is_wp_error( $terms ) && ! empty( $terms ) ) ? wp_list_pluck( $terms, 'name' ) : array();
+        if ( $type === 'product' && function_exists( 'wc_get_product' ) ) {
+            $product = wc_get_product( $post->ID );
+            if ( $product ) $item['price'] = $product->get_price();
+        }
+        $data[] = $item;
+    }
+    return count( $data );
+}
+
+function bench_endpoint_listing( $type, $limit, $fields = '' ) {
+    $request = new WP_REST_Request( 'GET', '/woosuite/v1/content' );
+    $request->set_param( 'type', $type );
+    $request->set_param( 'limit', $limit );
+    if ( $fields ) {
+        $request->set_param( 'fields', $fields );
+    }
+    $response = rest_do_request( $request );
+    $data = $response->get_data();
+    return isset( $data['items'] ) ? count( $data['items'] ) : 0;
+}
+
+/**
+ * @return array( rows, queries, median ms )
+ */
+function bench_measure( $callback, $runs ) {
+    global $wpdb;
+    $times = array();
+    $queries = 0;
+    $rows = 0;
+    for ( $i = 0; $i < $runs; $i++ ) {
+        wp_cache_flush();
+        $before = $wpdb->num_queries;
+        $start = microtime( true );
+        $rows = call_user_func( $callback );
+        $times[] = ( microtime( true ) - $start ) * 1000;
+        $queries = $wpdb->num_queries - $before;
+    }
+    sort( $times );
+    return array( $rows, $queries, $times[ (int) floor( count( $times ) / 2 ) ] );
+}
+
+printf( "GET /content type=%s, median of %d runs, object cache flushed per run\n\n", $bench_type, $bench_runs );
+printf( "%-6s %-8s %6s %9s %10s\n", 'limit', 'variant', 'rows', 'queries', 'ms' );
+
+foreach ( array( 20, 100, 500 ) as $limit ) {
+    $variants = array(
+        'legacy' => function() use ( $bench_type, $limit ) { return bench_legacy_listing( $bench_type, $limit ); },
+        'full' => function() use ( $bench_type, $limit ) { return bench_endpoint_listing( $bench_type, $limit ); },
+        'fields' => function() use ( $bench_type, $limit ) { return bench_endpoint_listing( $bench_type, $limit, 'id,name,metaTitle,metaDescription' ); },
+    );
+    foreach ( $variants as $name => $callback ) {
+        list( $rows, $queries, $ms ) = bench_measure( $callback, $bench_runs );
+        printf( "%-6d %-8s %6d %9d %10.1f\n", $limit, $name, $rows, $queries, $ms );
+    }
+}
@@ -0,0 +1,144 @@
+<?php
+/**
+ * Export throughput benchmark for the PHP database export.
+ *
+ * Needs a real MySQL (the point is how LIMIT offset and keyset paging behave on
+ * big tables), so it runs through WP-CLI:
+ *
+ *   wp eval-file tests/bench_db_export.php [size_mb=2048] [seconds=120] [modes=offset,keyset,keyset-plain] [drop=1]
+ *
+ * Generates wp_woosuite_bench_export, shaped like wp_postmeta (about 1 KB per
+ * row), up to size_mb, then exports only that table and reports MB/s of SQL
+ * written, the output size and the rows/s of the last 10% of the run (where
+ * LIMIT offset slows down):
+ *   - offset:       the old /backup/export/chunk loop (LIMIT offset, 1000, one INSERT per chunk, plain .sql)
+ *   - keyset:       a WooSuite_Db_Export worker (primary key paging, packet-sized INSERTs, gzip segments)
+ *   - keyset-plain: the same without gzip, to separate compression cost from paging
+ * Each mode stops after `seconds`. drop=1 removes the table afterwards.
+ */
+
+if ( ! defined( 'ABSPATH' ) || ! class_exists( 'WooSuite_Db_Export' ) ) {
+    echo "Run with: wp eval-file tests/bench_db_export.php (plugin active)\n";
+    return;
+}
+
+$bench_args = array( 'size_mb' => 2048, 'seconds' => 120, 'modes' => 'offset,keyset,keyset-plain', 'drop' => 0 );
+foreach ( isset( $args ) ? $args : array() as $arg ) {
+    list( $key, $value ) = array_pad( explode( '=', $arg, 2 ), 2, '' );
+    $bench_args[ $key ] = $value;
+}
+
+global $wpdb;
+$bench_table = $wpdb->prefix . 'woosuite_bench_export';
+$bench_dir = wp_upload_dir()['basedir'] . '/woosuite-exports-temp';
+wp_mkdir_p( $bench_dir );
+
+// --- Generate ---
+$wpdb->query( "CREATE TABLE IF NOT EXISTS $bench_table (
+    meta_id bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+    post_id bigint(20) unsigned NOT NULL DEFAULT 0,
+    meta_key varchar(255) DEFAULT NULL,
+    meta_value longtext,
+    PRIMARY KEY (meta_id),
+    KEY post_id (post_id),
+    KEY meta_key (meta_key(191))
+) " . $wpdb->get_charset_collate() );
+
+$target = (int) $bench_args['size_mb'] * 1048576;
+$size = function() use ( $wpdb, $bench_table ) {
+    $wpdb->query( "ANALYZE TABLE $bench_table" );
+    return (int) $wpdb->get_var( $wpdb->prepare(
+        "SELECT data_length FROM information_schema.TABLES WHERE table_schema = DATABASE() AND table_name = %s", $bench_table
+    ) );
+};
+
+if ( ! $wpdb->get_var( "SELECT meta_id FROM $bench_table LIMIT 1" ) ) {
+    $seed = array();
+    for ( $i = 1; $i <= 1000; $i++ ) {
+        $value = $i % 3 === 0
+            ? serialize( array( 'url' => home_url( "/product/item-$i/" ), 'sizes' => array( 'S', 'M', 'L' ), 'note' => str_repeat( 'lorem ipsum ', 60 ) ) )
+            : wp_generate_password( 900, false ) . " 50% off at " . home_url( '/' );
+        $seed[] = $wpdb->prepare( "(%d, %s, %s)", $i, '_bench_meta_' . ( $i % 20 ), $value );
+    }
+    $wpdb->query( "INSERT INTO $bench_table (post_id, meta_key, meta_value) VALUES " . implode( ',', $seed ) );
+}
+while ( ( $current = $size() ) < $target ) {
+    WP_CLI::log( sprintf( 'Generating: %d MB of %d MB', $current / 1048576, $target / 1048576 ) );
+    $wpdb->query( "INSERT INTO $bench_table (post_id, meta_key, meta_value) SELECT post_id + 1000, meta_key, meta_value FROM $bench_table LIMIT " . max( 1000, (int) ( ( $target - $current ) / 1000 ) ) );
+}
+$total_rows = (int) $wpdb->get_var( "SELECT COUNT(*) FROM $bench_table" );
+WP_CLI::log( sprintf( '%s: %d rows, %d MB data', $bench_table, $total_rows, $size() / 1048576 ) );
+
+// --- Modes ---
+$bench_offset = function( $file, $deadline ) use ( $wpdb, $bench_table ) {
+    $offset = 0;
+    $bytes = 0;
+    $marks = array();
+    while ( microtime( true ) < $deadline ) {
+        $rows = $wpdb->get_results( $wpdb->prepare( "SELECT * FROM `$bench_table` LIMIT %d, %d", $offset, 1000 ), ARRAY_N );
+        if ( ! $rows ) {
+            break;
+        }
+        $entries = array();
+        foreach ( $rows as $row ) {
+            $values = array();
+            foreach ( $row as $value ) {
+                $values[] = $value === null ? 'NULL' : "'" . $wpdb->_real_escape( $value ) . "'";
+            }
+            $entries[] = '(' . implode( ',', $values ) . ')';
+        }
+        $sql = "INSERT INTO `$bench_table` VALUES " . implode( ',', $entries ) . ";\n";
+        file_put_contents( $file, $sql, FILE_APPEND | LOCK_EX );
+        $bytes += strlen( $sql );
+        $offset += count( $rows );
+        $marks[] = array( microtime( true ), $offset );
+    }
+    return array( $offset, $bytes, $marks );
+};
+
+$bench_keyset = function( $file, $deadline ) use ( $bench_table ) {
+    WooSuite_Db_Export::start( $file, array( 'tables' => array( $bench_table ) ) );
+    $marks = array();
+    // One worker in this process, no cron chain or loopbacks
+    wp_clear_scheduled_hook( WooSuite_Db_Export::CRON_HOOK );
+    do {
+        WooSuite_Db_Export::run_worker( max( 1, min( 20, $deadline - microtime( true ) ) ) );
+        $status = WooSuite_Db_Export::get_status();
+        $marks[] = array( microtime( true ), $status['rows_done'] );
+    } while ( $status['status'] === 'running' && microtime( true ) < $deadline );
+    WooSuite_Db_Export::cancel();
+    @unlink( dirname( $file ) . '/done.flag' );
+    @unlink( WooSuite_Backup_Archive::manifest_path( $file ) );
+    return array( $status['rows_done'], $status['sql_bytes'], $marks );
+};
+
+WP_CLI::log( sprintf( "\n%-13s %10s %10s %10s %12s %14s", 'mode', 'rows', 'SQL MB', 'MB/s', 'file MB', 'tail rows/s' ) );
+foreach ( explode( ',', $bench_args['modes'] ) as $mode ) {
+    $file = $bench_dir . '/bench-' . $mode . ( $mode === 'keyset' ? '.sql.gz' : '.sql' );
+    @unlink( $file );
+
+    $started = microtime( true );
+    $deadline = $started + (int) $bench_args['seconds'];
+    list( $rows, $bytes, $marks ) = ( $mode === 'offset' ) ? $bench_offset( $file, $deadline ) : $bench_keyset( $file, $deadline );
+    $elapsed = microtime( true ) - $started;
+
+    // Throughput over the last 10% of the run
+    $tail = 0;
+    if ( count( $marks ) > 1 ) {
+        $end = end( $marks );
+        $from = $marks[ max( 0, (int) floor( count( $marks ) * 0.9 ) - 1 ) ];
+        $tail = ( $end[0] > $from[0] ) ? ( $end[1] - $from[1] ) / ( $end[0] - $from[0] ) : 0;
+    }
+
+    clearstatcache();
+    WP_CLI::log( sprintf(
+        "%-13s %10d %10.1f %10.2f %12.1f %14d%s",
+        $mode, $rows, $bytes / 1048576, $bytes / 1048576 / $elapsed, filesize( $file ) / 1048576, $tail,
+        $rows < $total_rows ? '  (stopped after ' . $bench_args['seconds'] . 's)' : ''
+    ) );
+    @unlink( $file );
+}
+
+if ( ! empty( $bench_args['drop'] ) ) {
+    $wpdb->query( "DROP TABLE IF EXISTS $bench_table" );
+}
@@ -0,0 +1,501 @@
+<?php
+/**
+ * Throughput benchmark for WooSuite_Groq against tests/mock_groq_server.py.
+ *
+ * Drives generate_seo_meta, rewrite_content, generate_image_seo and the
+ * WooSuite_Seo_Worker batch loop through a real HTTP stack (curl) and reports
+ * items/min, time spent idle (sleeping instead of waiting on the API) and 429s
+ * for each pacing strategy. Strategies that emulate the old fixed waits switch
+ * the shared WooSuite_Rate_Limiter off.
+ *
+ * Usage:
+ *   python3 tests/mock_groq_server.py --rpm 30 --tpm 30000 &
+ *   php tests/bench_groq_throughput.php --op=seo --strategy=all --duration=120
+ *
+ * Options:
+ *   --url=http://127.0.0.1:8766   Mock server base URL
+ *   --op=seo|rewrite|image        Which Groq call to drive
+ *   --strategy=NAME|all           worker, adaptive, batched, client, none (see $bench_strategies)
+ *   --duration=SECONDS            Wall time per strategy (default 60)
+ *   --items=N                     Catalog size (default 500)
+ *   --batch=N                     Items per prompt for batched/worker (default 5, 1 = unbatched)
+ */
+
+error_reporting( E_ALL );
+ini_set( 'error_log', '/dev/null' ); // The worker logs every item via error_log().
+
+require_once __DIR__ . '/mock_wp.php';
+require_once __DIR__ . '/mock_job_queue.php';
+
+$opts = getopt( '', array( 'url:', 'op:', 'strategy:', 'duration:', 'items:', 'batch:' ) );
+$bench_url = rtrim( isset( $opts['url'] ) ? $opts['url'] : 'http://127.0.0.1:8766', '/' );
+$bench_op = isset( $opts['op'] ) ? $opts['op'] : 'seo';
+$bench_duration = isset( $opts['duration'] ) ? (int) $opts['duration'] : 60;
+$bench_items = isset( $opts['items'] ) ? (int) $opts['items'] : 500;
+$bench_strategy = isset( $opts['strategy'] ) ? $opts['strategy'] : 'all';
+$bench_batch = isset( $opts['batch'] ) ? max( 1, (int) $opts['batch'] ) : 5;
+
+// --- Mock WordPress (on top of mock_wp.php) ---
+
+$mock_options = array();
+$mock_cron = array();
+$bench = array();
+
+class WP_Error {
+    private $code;
+    private $message;
+    private $data;
+    public function __construct( $code = '', $message = '', $data = '' ) {
+        $this->code = $code;
+        $this->message = $message;
+        $this->data = $data;
+    }
+    public function get_error_code() { return $this->code; }
+    public function get_error_message() { return $this->message; }
+    public function get_error_data() { return $this->data; }
+}
+
+function is_wp_error( $thing ) { return $thing instanceof WP_Error; }
+function wp_json_encode( $data ) { return json_encode( $data ); }
+
+function get_option( $name, $default = false ) {
+    global $mock_options;
+    return array_key_exists( $name, $mock_options ) ? $mock_options[ $name ] : $default;
+}
+
+function update_option( $name, $value, $autoload = null ) {
+    global $mock_options;
+    $mock_options[ $name ] = $value;
+    return true;
+}
+
+function delete_option( $name ) {
+    global $mock_options;
+    unset( $mock_options[ $name ] );
+    return true;
+}
+
+function current_time( $type ) {
+    return $type === 'mysql' ? date( 'Y-m-d H:i:s' ) : time();
+}
+
+function get_date_from_gmt( $date ) { return $date; }
+
+function delete_post_meta( $id, $key ) {
+    global $mock_db;
+    unset( $mock_db[ $id ]['meta'][ $key ] );
+    return true;
+}
+
+function taxonomy_exists( $taxonomy ) { return false; }
+function wp_set_object_terms( $id, $terms, $taxonomy, $append = false ) { return array(); }
+function get_post_thumbnail_id( $id ) { return 0; }
+
+function wp_get_attachment_url( $id ) {
+    global $bench_url;
+    return $bench_url . '/image.jpg';
+}
+
+// Images come from the mock server, not from disk
+function get_attached_file( $id ) { return false; }
+
+// WooSuite_Job_Queue::pause_job schedules a wake-up tick
+function wp_schedule_single_event( $timestamp, $hook ) {
+    global $mock_cron;
+    $mock_cron[ $hook ] = $timestamp;
+    return true;
+}
+
+function mock_find_posts( $args ) {
+    global $mock_db;
+    $ids = array();
+    foreach ( $mock_db as $id => $post ) {
+        if ( isset( $args['post_type'] ) && $post['post_type'] !== $args['post_type'] ) continue;
+        if ( ! empty( $args['post_parent__not_in'] ) && in_array( $post['post_parent'], $args['post_parent__not_in'] ) ) continue;
+        if ( ! empty( $args['post__in'] ) && ! in_array( $id, $args['post__in'] ) ) continue;
+
+        // Only the NOT EXISTS clauses used by WooSuite_Seo_Worker are supported.
+        $match = true;
+        foreach ( isset( $args['meta_query'] ) ? $args['meta_query'] : array() as $clause ) {
+            if ( is_array( $clause ) && isset( $clause['key'] ) && isset( $post['meta'][ $clause['key'] ] ) ) {
+                $match = false;
+            }
+        }
+        if ( $match ) $ids[] = $id;
+    }
+    sort( $ids );
+    return $ids;
+}
+
+function mock_paginate( $ids, $args ) {
+    if ( isset( $args['posts_per_page'] ) && $args['posts_per_page'] > 0 ) {
+        $ids = array_slice( $ids, 0, $args['posts_per_page'] );
+    }
+    return $ids;
+}
+
+function get_posts( $args ) { return mock_paginate( mock_find_posts( $args ), $args ); }
+
+function wp_cache_delete( $key, $group = '' ) { return true; }
+
+class WP_Query {
+    public $posts;
+    public $found_posts;
+    public function __construct( $args ) {
+        $ids = mock_find_posts( $args );
+        $this->posts = mock_paginate( $ids, $args );
+        $this->found_posts = count( $ids );
+    }
+}
+
+$wpdb = new Mock_Queue_WPDB();
+
+// --- HTTP via curl, instrumented ---
+
+function bench_http( $method, $url, $args ) {
+    global $bench;
+
+    $headers = array();
+    foreach ( isset( $args['headers'] ) ? $args['headers'] : array() as $name => $value ) {
+        $headers[] = "$name: $value";
+    }
+
+    $response_headers = array();
+    $ch = curl_init( $url );
+    curl_setopt( $ch, CURLOPT_RETURNTRANSFER, true );
+    curl_setopt( $ch, CURLOPT_CUSTOMREQUEST, $method );
+    curl_setopt( $ch, CURLOPT_HTTPHEADER, $headers );
+    curl_setopt( $ch, CURLOPT_TIMEOUT, isset( $args['timeout'] ) ? $args['timeout'] : 5 );
+    curl_setopt( $ch, CURLOPT_NOBODY, $method === 'HEAD' );
+    curl_setopt( $ch, CURLOPT_HEADERFUNCTION, function( $ch, $line ) use ( &$response_headers ) {
+        $parts = explode( ':', $line, 2 );
+        if ( count( $parts ) === 2 ) {
+            $response_headers[ strtolower( trim( $parts[0] ) ) ] = trim( $parts[1] );
+        }
+        return strlen( $line );
+    } );
+    if ( isset( $args['body'] ) ) {
+        curl_setopt( $ch, CURLOPT_POSTFIELDS, $args['body'] );
+    }
+
+    $start = microtime( true );
+    $body = curl_exec( $ch );
+    $bench['busy'] += microtime( true ) - $start;
+
+    if ( $body === false ) {
+        $error = curl_error( $ch );
+        curl_close( $ch );
+        return new WP_Error( 'http_request_failed', $error );
+    }
+
+    $code = (int) curl_getinfo( $ch, CURLINFO_HTTP_CODE );
+    curl_close( $ch );
+
+    if ( $method === 'POST' ) {
+        $bench['requests']++;
+        if ( $code === 429 ) $bench['rate_limited']++;
+    }
+
+    return array(
+        'headers' => $response_headers,
+        'body' => $body,
+        'response' => array( 'code' => $code, 'message' => '' ),
+    );
+}
+
+function wp_remote_post( $url, $args = array() ) { return bench_http( 'POST', $url, $args ); }
+function wp_remote_get( $url, $args = array() ) { return bench_http( 'GET', $url, $args ); }
+function wp_remote_head( $url, $args = array() ) { return bench_http( 'HEAD', $url, $args ); }
+
+function wp_remote_retrieve_response_code( $response ) {
+    return is_wp_error( $response ) ? '' : $response['response']['code'];
+}
+
+function wp_remote_retrieve_body( $response ) {
+    return is_wp_error( $response ) ? '' : $response['body'];
+}
+
+function wp_remote_retrieve_headers( $response ) {
+    return is_wp_error( $response ) ? array() : $response['headers'];
+}
+
+function wp_remote_retrieve_header( $response, $header ) {
+    if ( is_wp_error( $response ) ) return '';
+    $header = strtolower( $header );
+    return isset( $response['headers'][ $header ] ) ? $response['headers'][ $header ] : '';
+}
+
+// --- Load plugin classes ---
+
+require_once __DIR__ . '/../includes/class-woosuite-job-queue.php';
+require_once __DIR__ . '/../includes/class-woosuite-seo-index.php';
+require_once __DIR__ . '/../includes/class-woosuite-rate-limiter.php';
+require_once __DIR__ . '/../includes/class-woosuite-ai-cache.php';
+require_once __DIR__ . '/../includes/class-woosuite-image-input.php';
+require_once __DIR__ . '/../includes/class-woosuite-groq.php';
+require_once __DIR__ . '/../includes/class-woosuite-seo-worker.php';
+
+// --- Fixtures ---
+
+function bench_reset( $limiter = true ) {
+    global $mock_db, $mock_options, $mock_cron, $bench, $bench_url, $bench_items, $bench_batch, $wpdb;
+
+    $mock_db = array();
+    $mock_cron = array();
+    $wpdb = new Mock_Queue_WPDB();
+    $mock_options = array(
+        'woosuite_gemini_api_key' => 'gsk_bench',
+        'woosuite_use_custom_api' => 'yes',
+        'woosuite_api_url_custom' => $bench_url . '/openai/v1/chat/completions',
+        'woosuite_rate_limiter_enabled' => $limiter ? 'yes' : 'no',
+        'woosuite_seo_batch_size' => $bench_batch,
+        // Without WordPress's Requests library the worker sends one request at a time anyway
+        'woosuite_ai_concurrency' => 1,
+        // Every bench item repeats the same prompt / image: measure the API, not WooSuite_Ai_Cache
+        'woosuite_ai_cache_enabled' => 'no',
+    );
+    $bench = array( 'busy' => 0.0, 'requests' => 0, 'rate_limited' => 0, 'done' => 0 );
+
+    $filler = str_repeat( 'Solid build, soft finish and a size that fits any room. ', 8 );
+    for ( $i = 1; $i <= $bench_items; $i++ ) {
+        $mock_db[ $i ] = array(
+            'ID' => $i,
+            'post_title' => "Bench Product $i",
+            'post_content' => $filler,
+            'post_excerpt' => '',
+            'post_type' => 'product',
+            'post_parent' => 0,
+            'meta' => array(),
+        );
+        $image_id = $bench_items + $i;
+        $mock_db[ $image_id ] = array(
+            'ID' => $image_id,
+            'post_title' => "bench-image-$i",
+            'post_content' => '',
+            'post_excerpt' => '',
+            'post_type' => 'attachment',
+            'post_parent' => $i,
+            'meta' => array(),
+        );
+    }
+
+    // Refill the mock's rate-limit buckets so every strategy starts equal.
+    $ch = curl_init( $bench_url . '/__mock/reset' );
+    curl_setopt( $ch, CURLOPT_RETURNTRANSFER, true );
+    curl_setopt( $ch, CURLOPT_POST, true );
+    curl_exec( $ch );
+    curl_close( $ch );
+}
+
+/**
+ * One unit of work for the selected op. Returns true, false, or the
+ * rate_limit WP_Error.
+ */
+function bench_call( $groq, $id ) {
+    global $bench_op, $mock_db;
+    $post = $mock_db[ $id ];
+
+    if ( $bench_op === 'image' ) {
+        $result = $groq->generate_image_seo( wp_get_attachment_url( $id ), 'bench-image.jpg' );
+    } elseif ( $bench_op === 'rewrite' ) {
+        $result = $groq->rewrite_content( $post['post_content'], 'description', 'Professional', '', $post['post_title'] );
+    } else {
+        $result = $groq->generate_seo_meta( array(
+            'type' => 'product',
+            'name' => $post['post_title'],
+            'description' => $post['post_content'],
+            'price' => '19.99',
+        ) );
+    }
+
+    if ( is_wp_error( $result ) ) {
+        return $result->get_error_code() === 'rate_limit' ? $result : false;
+    }
+    return true;
+}
+
+function bench_ids() {
+    global $bench_op, $bench_items;
+    return $bench_op === 'image' ? range( $bench_items + 1, 2 * $bench_items ) : range( 1, $bench_items );
+}
+
+// --- Strategies ---
+
+/**
+ * WooSuite_Seo_Worker::run_worker on an in-memory job queue, one runner back to back
+ * (like `wp woosuite worker`); pauses longer than a pass wait for the wake-up tick.
+ */
+function bench_strategy_worker( $deadline ) {
+    global $bench_op, $bench;
+
+    if ( $bench_op === 'rewrite' ) {
+        return 'n/a (the worker does not rewrite content)';
+    }
+
+    $worker = new WooSuite_Seo_Worker();
+    $worker->start_batch( array( 'type' => $bench_op === 'image' ? 'image' : 'product' ), false );
+
+    while ( microtime( true ) < $deadline ) {
+        if ( ! $worker->run_worker( min( 25, $deadline - microtime( true ) ) ) ) break;
+        $status = WooSuite_Seo_Worker::get_status();
+        if ( $status['status'] === 'paused' && $status['resume_at'] > time() ) {
+            sleep( min( $status['resume_at'] - time(), max( 0, (int) ceil( $deadline - microtime( true ) ) ) ) );
+        }
+    }
+
+    $status = WooSuite_Seo_Worker::get_status();
+    $bench['done'] = $status['processed'] - $status['failed'];
+    return null;
+}
+
+/**
+ * Back to back through the shared limiter, honouring retry_after on 429.
+ */
+function bench_strategy_adaptive( $deadline ) {
+    global $bench;
+    $groq = new WooSuite_Groq();
+    $ids = bench_ids();
+
+    while ( $ids && microtime( true ) < $deadline ) {
+        $result = bench_call( $groq, $ids[0] );
+        if ( is_wp_error( $result ) ) {
+            $data = $result->get_error_data();
+            sleep( isset( $data['retry_after'] ) ? $data['retry_after'] : 1 );
+            continue;
+        }
+        array_shift( $ids );
+        if ( $result ) $bench['done']++;
+    }
+    return null;
+}
+
+/**
+ * Like adaptive, but --batch products per prompt via generate_seo_meta_batch.
+ */
+function bench_strategy_batched( $deadline ) {
+    global $bench_op, $bench_batch, $bench, $mock_db;
+
+    if ( $bench_op !== 'seo' ) {
+        return 'n/a (only SEO meta is batched)';
+    }
+
+    $groq = new WooSuite_Groq();
+    $ids = bench_ids();
+
+    while ( $ids && microtime( true ) < $deadline ) {
+        $items = array();
+        foreach ( array_slice( $ids, 0, $bench_batch ) as $id ) {
+            $items[ $id ] = array(
+                'type' => 'product',
+                'name' => $mock_db[ $id ]['post_title'],
+                'description' => $mock_db[ $id ]['post_content'],
+                'price' => '19.99',
+            );
+        }
+
+        $results = $groq->generate_seo_meta_batch( $items );
+        if ( is_wp_error( $results ) ) {
+            $data = $results->get_error_data();
+            if ( $results->get_error_code() !== 'rate_limit' ) {
+                $ids = array_slice( $ids, count( $items ) );
+                continue;
+            }
+            sleep( isset( $data['retry_after'] ) ? $data['retry_after'] : 1 );
+            continue;
+        }
+
+        $ids = array_slice( $ids, count( $items ) );
+        foreach ( $results as $result ) {
+            if ( ! is_wp_error( $result ) ) $bench['done']++;
+        }
+    }
+    return null;
+}
+
+/**
+ * Old SeoManager.tsx client loop: limiter off, blind 65s wait on 429.
+ * (The browser runs three of these concurrently; this drives one.)
+ */
+function bench_strategy_client( $deadline ) {
+    global $bench;
+    bench_reset( false );
+    $groq = new WooSuite_Groq();
+    $ids = bench_ids();
+
+    while ( $ids && microtime( true ) < $deadline ) {
+        $result = bench_call( $groq, $ids[0] );
+        if ( is_wp_error( $result ) ) {
+            sleep( 65 );
+            continue;
+        }
+        array_shift( $ids );
+        if ( $result ) $bench['done']++;
+    }
+    return null;
+}
+
+/**
+ * No pacing at all (limiter off): retry one second after a 429.
+ */
+function bench_strategy_none( $deadline ) {
+    global $bench;
+    bench_reset( false );
+    $groq = new WooSuite_Groq();
+    $ids = bench_ids();
+
+    while ( $ids && microtime( true ) < $deadline ) {
+        $result = bench_call( $groq, $ids[0] );
+        if ( is_wp_error( $result ) ) {
+            sleep( 1 );
+            continue;
+        }
+        array_shift( $ids );
+        if ( $result ) $bench['done']++;
+    }
+    return null;
+}
+
+$bench_strategies = array(
+    'worker' => 'bench_strategy_worker',
+    'adaptive' => 'bench_strategy_adaptive',
+    'batched' => 'bench_strategy_batched',
+    'client' => 'bench_strategy_client',
+    'none' => 'bench_strategy_none',
+);
+
+// --- Run ---
+
+$selected = $bench_strategy === 'all' ? array_keys( $bench_strategies ) : explode( ',', $bench_strategy );
+
+echo "WooSuite Groq throughput: op=$bench_op, {$bench_duration}s per strategy, mock at $bench_url\n\n";
+printf( "%-10s %7s %9s %9s %9s %7s %9s %6s\n", 'strategy', 'items', 'elapsed', 'items/min', 'idle s', 'idle%', 'requests', '429s' );
+
+foreach ( $selected as $name ) {
+    if ( ! isset( $bench_strategies[ $name ] ) ) {
+        echo "Unknown strategy: $name\n";
+        continue;
+    }
+
+    bench_reset();
+    $start = microtime( true );
+    $skipped = call_user_func( $bench_strategies[ $name ], $start + $bench_duration );
+    $elapsed = microtime( true ) - $start;
+
+    if ( $skipped ) {
+        printf( "%-10s %s\n", $name, $skipped );
+        continue;
+    }
+
+    $idle = max( 0, $elapsed - $bench['busy'] );
+    printf(
+        "%-10s %7d %8.1fs %9.1f %9.1f %6.0f%% %9d %6d\n",
+        $name,
+        $bench['done'],
+        $elapsed,
+        $bench['done'] / $elapsed * 60,
+        $idle,
+        $idle / $elapsed * 100,
+        $bench['requests'],
+        $bench['rate_limited']
+    );
+}
@@ -0,0 +1,90 @@
+<?php
+/**
+ * Cost of one resumed import step as the offset grows, reader only (no database).
+ *
+ *   php tests/bench_sql_import.php [--size-mb=200] [--segment-mb=16] [--step-mb=8]
+ *
+ * Writes a generated dump of about size-mb of SQL twice: as a WooSuite archive
+ * (one gzip member per segment-mb) and as a single gzip member (mysqldump | gzip).
+ * At 10%, 30%, 50%, 70% and 90% of the dump it opens a reader the way a
+ * process-chunk step does and times how long it takes to tokenize step-mb of
+ * statements, reporting MB/s per step:
+ *   - segmented: resumed from the checkpoint of the previous step
+ *   - single:    no member to seek to, inflated from the start of the file
+ * The segmented column stays flat; the single one falls with the offset.
+ */
+
+require_once __DIR__ . '/../includes/backup/class-woosuite-sql-import.php';
+
+$bench_args = array( 'size-mb' => 200, 'segment-mb' => 16, 'step-mb' => 8 );
+foreach ( array_slice( $argv, 1 ) as $arg ) {
+    if ( preg_match( '/^--([a-z-]+)=(.*)$/', $arg, $m ) && isset( $bench_args[ $m[1] ] ) ) {
+        $bench_args[ $m[1] ] = max( 1, (int) $m[2] );
+    }
+}
+
+$dir = sys_get_temp_dir() . '/woosuite-import-bench-' . getmypid();
+@mkdir( $dir );
+$segmented = $dir . '/segmented.sql.gz';
+$single = $dir . '/single.sql.gz';
+
+// postmeta-shaped rows, 500 per INSERT
+mt_srand( 42 );
+$out_segmented = fopen( $segmented, 'wb' );
+$out_single = gzopen( $single, 'wb6' );
+$segment = '';
+$written = 0;
+$id = 0;
+while ( $written < $bench_args['size-mb'] * 1048576 ) {
+    $values = array();
+    for ( $i = 0; $i < 500; $i++ ) {
+        $id++;
+        $values[] = "($id," . mt_rand( 1, 99999 ) . ",'_bench_meta','" . str_repeat( dechex( mt_rand() ), 12 ) . "')";
+    }
+    $sql = 'INSERT INTO `wp_postmeta` VALUES ' . implode( ',', $values ) . ";\n";
+    $written += strlen( $sql );
+    gzwrite( $out_single, $sql );
+    $segment .= $sql;
+    if ( strlen( $segment ) >= $bench_args['segment-mb'] * 1048576 ) {
+        fwrite( $out_segmented, gzencode( $segment, 6 ) );
+        $segment = '';
+    }
+}
+fwrite( $out_segmented, gzencode( $segment, 6 ) );
+fclose( $out_segmented );
+gzclose( $out_single );
+
+/**
+ * Open at $offset and tokenize $bytes of statements; returns MB/s and the reader's checkpoint.
+ */
+function bench_step( $file, $offset, $bytes, $checkpoint ) {
+    $started = microtime( true );
+    $reader = new WooSuite_Sql_Import( $file, $offset, WooSuite_Sql_Import::READ_BLOCK, $checkpoint );
+    while ( $reader->offset() - $offset < $bytes && $reader->next_statement() !== null ) {
+    }
+    $seconds = microtime( true ) - $started;
+    $mark = $reader->checkpoint();
+    $reader->close();
+    return array( $bytes / 1048576 / $seconds, $mark );
+}
+
+printf( "%.0f MB of SQL, %d MB segments, %d MB per step\n\n", $written / 1048576, $bench_args['segment-mb'], $bench_args['step-mb'] );
+printf( "%-8s %14s %14s\n", 'offset', 'segmented MB/s', 'single MB/s' );
+
+$step = $bench_args['step-mb'] * 1048576;
+foreach ( array( 10, 30, 50, 70, 90 ) as $percent ) {
+    // The step before this one leaves its checkpoint behind; find it the same way
+    $reader = new WooSuite_Sql_Import( $segmented );
+    while ( $reader->offset() < $written * $percent / 100 && $reader->next_statement() !== null ) {
+    }
+    $offset = $reader->offset();
+    $checkpoint = $reader->checkpoint();
+    $reader->close();
+
+    list( $segmented_rate ) = bench_step( $segmented, $offset, $step, $checkpoint );
+    list( $single_rate ) = bench_step( $single, $offset, $step, null );
+    printf( "%-8s %14.1f %14.1f\n", $percent . '%', $segmented_rate, $single_rate );
+}
+
+array_map( 'unlink', glob( $dir . '/*' ) );
+rmdir( $dir );
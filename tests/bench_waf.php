@@ -0,0 +1,163 @@
+<?php
+/**
+ * Per-request overhead of WooSuite_Security::firewall_check on clean traffic.
+ *
+ *   php tests/bench_waf.php [--requests=2000] [--runs=5] [--cookie-bytes=2048]
+ *
+ * Builds a pool of realistic storefront requests (search / filter / UTM query
+ * strings, WooCommerce session, analytics and consent cookies, some checkout
+ * POSTs) on top of the WAF mock environment and reports median µs per request
+ * and the req/s ceiling that leaves, for:
+ *   - off:    woosuite_firewall_enabled = no
+ *   - on:     the compiled single-pass matcher
+ *   - legacy: the old per-rule-set strpos loops, for comparison
+ *
+ * End-to-end numbers against a real site come from tests/waf_load.py.
+ */
+
+require_once __DIR__ . '/mock_waf_env.php';
+
+$bench_args = array( 'requests' => 2000, 'runs' => 5, 'cookie-bytes' => 2048 );
+foreach ( array_slice( $argv, 1 ) as $arg ) {
+    if ( preg_match( '/^--([a-z-]+)=(.*)$/', $arg, $m ) && isset( $bench_args[ $m[1] ] ) ) {
+        $bench_args[ $m[1] ] = max( 1, (int) $m[2] );
+    }
+}
+
+mt_srand( 42 );
+
+function bench_token( $length ) {
+    $chars = 'abcdefghijklmnopqrstuvwxyz0123456789';
+    $out = '';
+    for ( $i = 0; $i < $length; $i++ ) {
+        $out .= $chars[ mt_rand( 0, 35 ) ];
+    }
+    return $out;
+}
+
+function bench_request( $cookie_bytes ) {
+    $terms = array( 'blue running shoes', 'organic cotton t-shirt', 'gift card', 'wireless headphones', 'kids rain jacket' );
+    $get = array( 's' => $terms[ mt_rand( 0, 4 ) ], 'post_type' => 'product' );
+    if ( mt_rand( 0, 1 ) ) {
+        $get += array( 'orderby' => 'popularity', 'paged' => (string) mt_rand( 1, 20 ), 'filter_color' => 'blue,black', 'min_price' => '20', 'max_price' => '150' );
+    }
+    if ( mt_rand( 0, 2 ) === 0 ) {
+        $get += array( 'utm_source' => 'newsletter', 'utm_medium' => 'email', 'utm_campaign' => 'spring_sale_2024', 'fbclid' => bench_token( 64 ) );
+    }
+
+    $cookie = array(
+        'wordpress_test_cookie' => 'WP Cookie check',
+        'wp_woocommerce_session_' . bench_token( 32 ) => mt_rand( 1000, 9999 ) . '||' . time() . '||' . time() . '||' . bench_token( 32 ),
+        'woocommerce_items_in_cart' => '1',
+        'woocommerce_cart_hash' => bench_token( 32 ),
+        '_ga' => 'GA1.2.' . mt_rand() . '.' . time(),
+        '_gid' => 'GA1.2.' . mt_rand() . '.' . time(),
+        '_fbp' => 'fb.1.' . time() . '.' . mt_rand(),
+        'cookieyes-consent' => 'consentid:' . bench_token( 32 ) . ',consent:yes,action:yes,necessary:yes,functional:yes,analytics:yes,performance:no,advertisement:no',
+        // Tag-manager / A-B testing state, URL-encoded JSON
+        '_analytics_state' => urlencode( json_encode( array( 'v' => 3, 'events' => str_split( bench_token( $cookie_bytes ), 40 ) ) ) ),
+    );
+
+    $post = array();
+    if ( mt_rand( 0, 9 ) === 0 ) {
+        $post = array(
+            'billing_first_name' => 'Anna', 'billing_last_name' => 'Muster', 'billing_company' => '',
+            'billing_country' => 'CH', 'billing_address_1' => 'Bahnhofstrasse 12', 'billing_address_2' => '',
+            'billing_postcode' => '8001', 'billing_city' => 'Zürich', 'billing_phone' => '+41 44 000 00 00',
+            'billing_email' => 'anna@example.com', 'order_comments' => 'Please leave the parcel at the door.',
+            'shipping_method' => array( 'flat_rate:1' ), 'payment_method' => 'stripe',
+            'terms' => 'on', 'woocommerce-process-checkout-nonce' => bench_token( 10 ),
+            '_wp_http_referer' => '/?wc-ajax=update_order_review',
+        );
+    }
+
+    return array( $get, $post, $cookie );
+}
+
+// The old matcher: one recursive strpos loop per rule set over array_merge()'d input
+function bench_legacy_check( $block_sqli, $block_xss ) {
+    $request_data = array_merge( $_GET, $_POST, $_COOKIE );
+    $check_value = function( $value, $patterns ) use ( &$check_value ) {
+        if ( is_array( $value ) ) {
+            foreach ( $value as $item ) {
+                if ( $check_value( $item, $patterns ) ) {
+                    return true;
+                }
+            }
+            return false;
+        }
+        $value_lower = strtolower( urldecode( $value ) );
+        foreach ( $patterns as $pattern ) {
+            if ( strpos( $value_lower, $pattern ) !== false ) {
+                return true;
+            }
+        }
+        return false;
+    };
+
+    $found = false;
+    foreach ( array( array( $block_sqli, WooSuite_Security::SQLI_PATTERNS ), array( $block_xss, WooSuite_Security::XSS_PATTERNS ) ) as $set ) {
+        if ( $set[0] ) {
+            foreach ( $request_data as $value ) {
+                $found = $check_value( $value, $set[1] ) || $found;
+            }
+        }
+    }
+    return $found;
+}
+
+$pool = array();
+for ( $i = 0; $i < $bench_args['requests']; $i++ ) {
+    $pool[] = bench_request( $bench_args['cookie-bytes'] );
+}
+$_SERVER['REMOTE_ADDR'] = '203.0.113.10';
+$_SERVER['REQUEST_URI'] = '/shop/?s=shoes';
+
+$security = new WooSuite_Security( 'woosuite-ai', '1.0.0' );
+$modes = array(
+    'off' => function() use ( $security ) { $security->firewall_check(); },
+    'on' => function() use ( $security ) { $security->firewall_check(); },
+    'legacy' => function() {
+        // The same option reads the old firewall_check did
+        get_option( 'woosuite_firewall_enabled', 'yes' );
+        get_option( 'woosuite_firewall_simulation_mode', 'no' );
+        bench_legacy_check( get_option( 'woosuite_firewall_block_sqli', 'yes' ) === 'yes', get_option( 'woosuite_firewall_block_xss', 'yes' ) === 'yes' );
+    },
+);
+
+$bytes = 0;
+foreach ( $pool as $request ) {
+    $bytes += strlen( http_build_query( $request[0] ) . http_build_query( $request[1] ) . http_build_query( $request[2] ) );
+}
+printf( "%d requests, %.1f KB average input, %d runs\n\n", count( $pool ), $bytes / count( $pool ) / 1024, $bench_args['runs'] );
+printf( "%-8s %12s %14s\n", 'mode', 'us/request', 'req/s (WAF)' );
+
+$results = array();
+foreach ( $modes as $mode => $callback ) {
+    $wp_options = array(
+        'woosuite_firewall_enabled' => $mode === 'off' ? 'no' : 'yes',
+        'woosuite_firewall_simulation_mode' => 'no',
+        'woosuite_firewall_block_sqli' => 'yes',
+        'woosuite_firewall_block_xss' => 'yes',
+    );
+
+    $samples = array();
+    for ( $run = 0; $run < $bench_args['runs']; $run++ ) {
+        $start = microtime( true );
+        foreach ( $pool as $request ) {
+            list( $_GET, $_POST, $_COOKIE ) = $request;
+            try {
+                $callback();
+            } catch ( WPDieException $e ) {
+                echo "False positive in mode {$mode}: " . $e->getMessage() . "\n";
+                exit( 1 );
+            }
+        }
+        $samples[] = ( microtime( true ) - $start ) / count( $pool );
+    }
+    sort( $samples );
+    $results[ $mode ] = $samples[ (int) floor( count( $samples ) / 2 ) ];
+    printf( "%-8s %12.2f %14s\n", $mode, $results[ $mode ] * 1e6, number_format( 1 / $results[ $mode ] ) );
+}
+
+printf( "\nWAF overhead per request: %.2f us (legacy %.2f us)\n", ( $results['on'] - $results['off'] ) * 1e6, ( $results['legacy'] - $results['off'] ) * 1e6 );
@@ -0,0 +1,1284 @@
+"""
+Local stand-in for the WooSuite AI REST API (woosuite/v1).
+
+Implements the routes registered in WooSuite_Api::register_routes against a
+generated in-memory catalog, so the React admin app (and the verify_*.py
+Playwright scripts) can be exercised against a store of realistic size without
+WordPress, PHP or a Groq key.
+
+Usage:
+    python3 tests/mock_api_server.py --products 40000 --latency 40 --rate-limit-rate 0.05
+
+Then open http://127.0.0.1:8765/wp-admin/admin.php?page=woosuite-ai
+(build the app first so that assets/woosuite-app.js exists).
+
+Playwright scripts can start it in-process instead:
+
+    from tests.mock_api_server import start_server
+    server = start_server(products=500, ai_latency=0.2)
+    page.goto(server.admin_url)
+    ...
+    print(server.state.metrics_snapshot())
+    server.stop()
+
+Mock-only endpoints:
+    GET  /__mock/stats   request counts, status codes and latency percentiles
+    POST /__mock/reset   regenerate the catalog and clear metrics
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_PREFIX = '/wp-json/woosuite/v1'
+
+# Routes that call Groq in the real plugin. Fault injection and the extra
+# AI latency apply to these by default.
+AI_ROUTES = (
+    '/seo/generate',
+    '/content/rewrite',
+    '/security/analyze-file',
+    '/security/analyze-logs',
+    '/security/analyze-firewall',
+    '/backup/analyze',
+    '/migration/scan',
+    '/settings/test-connection',
+)
+
+WORDS = (
+    'organic', 'premium', 'wireless', 'vintage', 'handmade', 'compact', 'smart',
+    'leather', 'bamboo', 'ceramic', 'portable', 'ergonomic', 'waterproof', 'classic',
+    'stainless', 'cotton', 'modern', 'rustic', 'deluxe', 'eco', 'ultra', 'mini',
+)
+NOUNS = (
+    'Headphones', 'Backpack', 'Mug', 'Lamp', 'Chair', 'Watch', 'Jacket', 'Bottle',
+    'Notebook', 'Speaker', 'Blanket', 'Wallet', 'Sneakers', 'Keyboard', 'Planter',
+    'Teapot', 'Scarf', 'Charger', 'Desk', 'Candle',
+)
+CATEGORY_NAMES = (
+    'Electronics', 'Fashion', 'Home', 'Garden', 'Kitchen', 'Outdoors', 'Office',
+    'Beauty', 'Toys', 'Sports',
+)
+
+DEFAULT_TABLES = (
+    ('wp_options', 1, 2.5),
+    ('wp_posts', 'posts', 0.004),
+    ('wp_postmeta', 'postmeta', 0.0002),
+    ('wp_terms', 'terms', 0.0001),
+    ('wp_term_relationships', 'relationships', 0.00005),
+    ('wp_users', 50, 0.1),
+    ('wp_woosuite_security_logs', 'logs', 0.0002),
+)
+
+
+class Catalog:
+    """Synthetic store content, shaped like the posts/meta the PHP side reads."""
+
+    def __init__(self, products=1000, posts=200, pages=20, images=None,
+                 optimized_ratio=0.3, enhanced_ratio=0.1, seed=1):
+        self.rng = random.Random(seed)
+        self.items = {}
+        self.by_type = {'product': [], 'post': [], 'page': [], 'image': []}
+        self.categories = {'product': [], 'post': []}
+        self.security_logs = []
+        self._next_id = 1
+
+        self._build_categories()
+        for _ in range(products):
+            self._add('product', optimized_ratio, enhanced_ratio)
+        for _ in range(posts):
+            self._add('post', optimized_ratio, enhanced_ratio)
+        for _ in range(pages):
+            self._add('page', optimized_ratio, enhanced_ratio)
+
+        if images is None:
+            images = products
+        product_ids = self.by_type['product']
+        for i in range(images):
+            parent = product_ids[i % len(product_ids)] if product_ids else 0
+            self._add('image', optimized_ratio, 0, parent=parent)
+
+        self._build_security_logs(200)
+
+    def _build_categories(self):
+        term_id = 10
+        for tax_type in ('product', 'post'):
+            for name in CATEGORY_NAMES:
+                parent = {'id': term_id, 'name': name, 'parent': 0, 'count': 0}
+                self.categories[tax_type].append(parent)
+                term_id += 1
+                # One child per top-level term so include_children matters.
+                self.categories[tax_type].append(
+                    {'id': term_id, 'name': name + ' Deals', 'parent': parent['id'], 'count': 0})
+                term_id += 1
+
+    def _add(self, item_type, optimized_ratio, enhanced_ratio, parent=0):
+        rng = self.rng
+        item_id = self._next_id
+        self._next_id += 1
+
+        name = '%s %s %s' % (rng.choice(WORDS).title(), rng.choice(WORDS).title(), rng.choice(NOUNS))
+        body = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(20, 80)))
+        optimized = rng.random() < optimized_ratio
+        enhanced = rng.random() < enhanced_ratio
+
+        item = {
+            'id': item_id,
+            'type': item_type,
+            'name': name,
+            'content': body,
+            'excerpt': ' '.join(body.split()[:12]),
+            'meta': {},
+            'tags': [],
+            'category': 0,
+            'parent': parent,
+        }
+
+        if item_type == 'image':
+            item['name'] = name.lower().replace(' ', '-')
+            item['content'] = ''
+            if optimized:
+                item['meta']['_wp_attachment_image_alt'] = 'Photo of ' + name
+        else:
+            if optimized:
+                item['meta']['_woosuite_meta_title'] = name + ' | Shop'
+                item['meta']['_woosuite_meta_description'] = 'Buy the ' + name.lower() + ' online.'
+                item['meta']['_woosuite_llm_summary'] = name + ' summary.'
+            if enhanced:
+                item['meta']['_woosuite_proposed_description'] = 'AI: ' + body[:120]
+            item['tags'] = rng.sample(WORDS, 2)
+            if item_type in ('product', 'post'):
+                terms = self.categories[item_type]
+                term = rng.choice(terms)
+                item['category'] = term['id']
+                term['count'] += 1
+            if item_type == 'product':
+                item['meta']['_price'] = '%.2f' % rng.uniform(5, 500)
+
+        self.items[item_id] = item
+        self.by_type[item_type].append(item_id)
+
+    def _build_security_logs(self, count):
+        events = ('SQL Injection Attempt', 'XSS Attempt', 'Path Traversal Attempt', 'Login Failed')
+        now = time.time()
+        for i in range(count):
+            self.security_logs.append({
+                'id': str(i + 1),
+                'event': self.rng.choice(events),
+                'ip_address': '203.0.113.%d' % self.rng.randint(1, 254),
+                'severity': self.rng.choice(('medium', 'high', 'critical')),
+                'blocked': '1' if self.rng.random() < 0.8 else '0',
+                'created_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now - i * 600)),
+            })
+
+    # --- Query helpers (mirror get_content_items) ---
+
+    def term_with_children(self, item_type, term_id):
+        taxonomy = 'product' if item_type == 'product' else 'post'
+        ids = {term_id}
+        for term in self.categories[taxonomy]:
+            if term['parent'] in ids:
+                ids.add(term['id'])
+        return ids
+
+    def is_unoptimized(self, item):
+        key = '_wp_attachment_image_alt' if item['type'] == 'image' else '_woosuite_meta_description'
+        return not item['meta'].get(key)
+
+    def is_enhanced(self, item):
+        keys = (
+            '_woosuite_history_post_title', '_woosuite_history_post_content',
+            '_woosuite_history_post_excerpt', '_woosuite_proposed_title',
+            '_woosuite_proposed_description', '_woosuite_proposed_short_description',
+        )
+        return any(k in item['meta'] for k in keys)
+
+    def has_history(self, item):
+        keys = (
+            '_woosuite_history_post_content', '_woosuite_history__woosuite_meta_description',
+            '_woosuite_history__wp_attachment_image_alt', '_woosuite_history_post_title',
+            '_woosuite_history_post_excerpt',
+        )
+        return any(item['meta'].get(k) for k in keys)
+
+    def query(self, item_type, filter_=None, category=None, status=None, search=None):
+        ids = self.by_type.get(item_type, [])
+        cats = self.term_with_children(item_type, int(category)) if category else None
+        needle = search.lower() if search else None
+
+        matched = []
+        # WP_Query default order: date DESC. Newer items have higher IDs here.
+        for item_id in reversed(ids):
+            item = self.items[item_id]
+            if filter_ == 'unoptimized' and not self.is_unoptimized(item):
+                continue
+            if cats is not None and item['category'] not in cats:
+                continue
+            if status == 'enhanced' and not self.is_enhanced(item):
+                continue
+            if status == 'not_enhanced' and self.is_enhanced(item):
+                continue
+            if needle and needle not in item['name'].lower() and needle not in item['content'].lower():
+                continue
+            matched.append(item_id)
+        return matched
+
+    def to_response_item(self, item, home_url):
+        meta = item['meta']
+        out = {
+            'id': item['id'],
+            'name': item['name'],
+            'description': item['content'],
+            'shortDescription': item['excerpt'],
+            'fallbackDescription': item['excerpt'] or item['content'],
+            'metaTitle': meta.get('_woosuite_meta_title', ''),
+            'metaDescription': meta.get('_woosuite_meta_description', ''),
+            'llmSummary': meta.get('_woosuite_llm_summary', ''),
+            'lastError': meta.get('_woosuite_seo_last_error', ''),
+            'type': item['type'],
+            'permalink': '%s/?p=%d' % (home_url, item['id']),
+            'proposedTitle': meta.get('_woosuite_proposed_title', ''),
+            'proposedDescription': meta.get('_woosuite_proposed_description', ''),
+            'proposedShortDescription': meta.get('_woosuite_proposed_short_description', ''),
+            'hasHistory': self.has_history(item),
+            'tags': list(item['tags']),
+        }
+        if item['type'] == 'image':
+            url = '%s/wp-content/uploads/%s.jpg' % (home_url, item['name'])
+            out['imageUrl'] = url
+            out['permalink'] = url
+            out['altText'] = meta.get('_wp_attachment_image_alt', '')
+            if not out['description']:
+                out['description'] = item['excerpt']
+        elif item['type'] == 'product':
+            out['price'] = meta.get('_price', '')
+        return out
+
+
+class MockState:
+    """Catalog plus fault-injection settings and request metrics, shared by all handler threads."""
+
+    def __init__(self, catalog_args, latency=0.0, jitter=0.0, ai_latency=0.5,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=5,
+                 faults_on='ai', seed=1):
+        self.catalog_args = catalog_args
+        self.latency = latency
+        self.jitter = jitter
+        self.ai_latency = ai_latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.faults_on = faults_on
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.catalog = Catalog(**self.catalog_args)
+            self.options = {
+                'firewall': True, 'spam': True, 'block_sqli': True, 'block_xss': True,
+                'simulation_mode': False, 'login': True,
+            }
+            self.settings = {'apiKey': 'gsk_mock', 'useCustomApi': False,
+                             'customApiUrl': '', 'customModelId': ''}
+            self.ignored = []
+            self.bans = []
+            self.quarantine = []
+            self.debug_log = []
+            self.deep_scan = {'status': 'idle'}
+            self.deep_scan_started = 0.0
+            self.seo_batch = {'status': 'idle'}
+            self.export_job = None
+            self.import_stats = {'statements': 0, 'bytes': 0}
+            self.metrics = {'routes': {}, 'status': {}, 'latencies': [], 'in_flight': 0, 'max_in_flight': 0}
+
+    def table_rows(self):
+        catalog = self.catalog
+        posts = len(catalog.items)
+        counts = {
+            'posts': posts,
+            'postmeta': sum(len(i['meta']) for i in catalog.items.values()) + posts * 4,
+            'terms': len(catalog.categories['product']) + len(catalog.categories['post']),
+            'relationships': posts * 3,
+            'logs': len(catalog.security_logs),
+        }
+        tables = []
+        for name, rows, row_kb in DEFAULT_TABLES:
+            rows = counts[rows] if isinstance(rows, str) else rows
+            tables.append({'name': name, 'rows': rows, 'size_mb': round(rows * row_kb, 2)})
+        return tables
+
+    def record(self, route, status, elapsed):
+        with self.lock:
+            routes = self.metrics['routes']
+            routes[route] = routes.get(route, 0) + 1
+            key = str(status)
+            self.metrics['status'][key] = self.metrics['status'].get(key, 0) + 1
+            self.metrics['latencies'].append(elapsed)
+
+    def metrics_snapshot(self):
+        with self.lock:
+            lat = sorted(self.metrics['latencies'])
+
+            def pct(p):
+                if not lat:
+                    return 0
+                return round(lat[min(len(lat) - 1, int(len(lat) * p))] * 1000, 1)
+
+            return {
+                'requests': len(lat),
+                'routes': dict(self.metrics['routes']),
+                'status': dict(self.metrics['status']),
+                'max_in_flight': self.metrics['max_in_flight'],
+                'latency_ms': {'p50': pct(0.5), 'p95': pct(0.95), 'p99': pct(0.99)},
+                'unoptimized': {t: sum(1 for i in ids if self.catalog.is_unoptimized(self.catalog.items[i]))
+                                for t, ids in self.catalog.by_type.items()},
+            }
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = 'WooSuiteMock/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, fmt, *args)
+
+    # --- Plumbing ---
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return status
+
+    def send_file(self, path, content_type):
+        if not os.path.isfile(path):
+            return self.send_json({'code': 'not_found', 'message': 'Asset not found'}, 404)
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return 200
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length).decode('utf-8') or '{}')
+        except ValueError:
+            return {}
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def dispatch(self, method):
+        started = time.time()
+        parsed = urlparse(self.path)
+        path = parsed.path
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        state = self.state
+
+        with state.lock:
+            state.metrics['in_flight'] += 1
+            state.metrics['max_in_flight'] = max(state.metrics['max_in_flight'], state.metrics['in_flight'])
+        try:
+            if path.startswith(API_PREFIX):
+                route = path[len(API_PREFIX):] or '/'
+                label, status = self.handle_api(method, route, query)
+            elif path.startswith('/__mock/'):
+                label, status = path, self.handle_mock(method, path)
+            elif path.startswith('/wp-content/plugins/woosuite-ai/assets/') or path.startswith('/assets/'):
+                name = os.path.basename(path)
+                ctype = 'application/javascript' if name.endswith('.js') else 'text/css'
+                label, status = '/assets', self.send_file(os.path.join(REPO_ROOT, 'assets', name), ctype)
+            elif path.startswith('/wp-admin/admin.php') or path in ('/', '/admin.php'):
+                label, status = '/wp-admin', self.send_admin_page()
+            else:
+                label, status = path, self.send_json({'code': 'rest_no_route', 'message': 'No route was found.'}, 404)
+        finally:
+            with state.lock:
+                state.metrics['in_flight'] -= 1
+        if not path.startswith('/__mock/'):
+            state.record(label, status, time.time() - started)
+
+    def send_admin_page(self):
+        base = self.server.base_url
+        html = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>WooSuite AI (mock)</title>
+    <link rel="stylesheet" href="/assets/woosuite-app.css">
+</head>
+<body class="bg-gray-100">
+    <div id="wpwrap"><div id="woosuite-app-root"></div></div>
+    <script>
+        window.woosuiteData = {
+            root: '%(base)s/wp-json/',
+            apiUrl: '%(base)s%(prefix)s',
+            nonce: 'mock-nonce',
+            homeUrl: '%(base)s',
+            apiKey: 'gsk_mock'
+        };
+    </script>
+    <script type="module" src="/assets/woosuite-app.js"></script>
+</body>
+</html>""" % {'base': base, 'prefix': API_PREFIX}
+        body = html.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return 200
+
+    def handle_mock(self, method, path):
+        if path == '/__mock/stats':
+            return self.send_json(self.state.metrics_snapshot())
+        if path == '/__mock/reset' and method == 'POST':
+            self.state.reset()
+            return self.send_json({'success': True})
+        return self.send_json({'code': 'not_found'}, 404)
+
+    # --- Fault injection ---
+
+    def inject_faults(self, route):
+        """Sleep for the configured latency and maybe return an injected error status."""
+        state = self.state
+        is_ai = route.startswith(AI_ROUTES)
+
+        delay = state.latency + (state.rng.uniform(0, state.jitter) if state.jitter else 0)
+        if is_ai:
+            delay += state.ai_latency
+        if delay > 0:
+            time.sleep(delay)
+
+        if state.faults_on == 'ai' and not is_ai:
+            return None
+        roll = state.rng.random()
+        if roll < state.rate_limit_rate:
+            return self.send_json(
+                {'success': False, 'code': 'rate_limit',
+                 'message': 'Groq API Rate Limit Reached. Please wait a moment.'},
+                429, {'Retry-After': str(state.retry_after)})
+        if roll < state.rate_limit_rate + state.error_rate:
+            return self.send_json({'success': False, 'message': 'Injected server error'}, 500)
+        return None
+
+    # --- API routes ---
+
+    def handle_api(self, method, route, query):
+        routes = (
+            ('GET', r'/status', self.get_status),
+            ('GET', r'/settings', self.get_settings),
+            ('POST', r'/settings', self.save_settings),
+            ('POST', r'/settings/test-connection', self.test_connection),
+            ('GET', r'/system-logs', self.get_system_logs),
+            ('GET', r'/content', self.get_content_items),
+            ('GET', r'/content/categories', self.get_categories),
+            ('POST', r'/content/rewrite', self.rewrite_content),
+            ('POST', r'/content/apply', self.apply_content),
+            ('POST', r'/content/restore', self.restore_content),
+            ('POST', r'/content/bulk-apply', self.bulk_apply_content),
+            ('POST', r'/content/(?P<id>\d+)', self.update_content_item),
+            ('GET', r'/stats', self.get_stats),
+            ('POST', r'/seo/generate', self.generate_content_batch),
+            ('POST', r'/seo/generate/stream', self.generate_content_stream),
+            ('POST', r'/seo/generate/(?P<id>\d+)', self.generate_content_item),
+            ('GET', r'/seo/batch-status', self.get_seo_batch_status),
+            ('POST', r'/seo/batch', self.start_seo_batch),
+            ('POST', r'/seo/batch/(?P<action>resume|stop|reset)', self.seo_batch_action),
+            ('GET', r'/seo/scan', self.run_seo_scan),
+            ('GET', r'/seo/index', self.get_seo_index_status),
+            ('POST', r'/seo/index/rebuild', self.rebuild_seo_index),
+            ('GET', r'/security/logs', self.get_security_logs),
+            ('GET', r'/security/status', self.get_security_status),
+            ('POST', r'/security/toggle', self.toggle_security_option),
+            ('POST', r'/security/scan', self.run_security_scan),
+            ('POST', r'/security/deep-scan/start', self.start_deep_scan),
+            ('GET', r'/security/deep-scan/status', self.get_deep_scan_status),
+            ('GET', r'/security/findings', self.get_scan_findings),
+            ('GET', r'/security/quarantine', self.get_quarantine),
+            ('POST', r'/security/quarantine/(?P<action>move|restore|delete)', self.quarantine_action),
+            ('GET', r'/security/bans', self.get_bans),
+            ('POST', r'/security/bans', self.add_bans),
+            ('POST', r'/security/bans/remove', self.remove_ban),
+            ('GET', r'/security/ignore', self.get_ignored),
+            ('POST', r'/security/ignore', self.add_ignored),
+            ('POST', r'/security/ignore/remove', self.remove_ignored),
+            ('POST', r'/security/(?P<kind>analyze-file|analyze-logs|analyze-firewall)', self.analyze_security),
+            ('POST', r'/security/bulk', self.bulk_security_action),
+            ('GET', r'/backup/tables', self.get_tables),
+            ('POST', r'/backup/export', self.start_export),
+            ('POST', r'/backup/export/step', self.export_step),
+            ('POST', r'/backup/export/finalize', self.finalize_export),
+            ('GET', r'/backup/export/status', self.get_export_status),
+            ('POST', r'/backup/passport', self.create_passport),
+            ('POST', r'/backup/import/validate', self.validate_passport),
+            ('POST', r'/backup/import/fetch-chunk', self.import_fetch_chunk),
+            ('POST', r'/backup/import/process-chunk', self.import_process_chunk),
+            ('POST', r'/migration/scan', self.migration_scan),
+            ('POST', r'/migration/fix', self.migration_fix),
+        )
+        for verb, pattern, handler in routes:
+            match = re.fullmatch(pattern, route)
+            if verb == method and match:
+                label = re.sub(r'/\d+$', '/<id>', route)
+                fault = self.inject_faults(route)
+                if fault is not None:
+                    return label, fault
+                params = dict(query)
+                if method == 'POST':
+                    params.update(self.read_json())
+                params.update(match.groupdict())
+                return label, handler(params)
+        return route, self.send_json({'code': 'rest_no_route', 'message': 'No route was found matching the URL and request method.'}, 404)
+
+    def get_status(self, params):
+        return self.send_json({'status': 'ok', 'version': '1.1.0', 'message': 'WooSuite AI is running'})
+
+    def get_settings(self, params):
+        return self.send_json(self.state.settings)
+
+    def save_settings(self, params):
+        with self.state.lock:
+            for key in ('apiKey', 'useCustomApi', 'customApiUrl', 'customModelId'):
+                if key in params:
+                    self.state.settings[key] = params[key]
+        return self.send_json({'success': True})
+
+    def test_connection(self, params):
+        return self.send_json({'success': True, 'message': 'Connection Successful!', 'data': {'success': True}})
+
+    def get_system_logs(self, params):
+        return self.send_json({'logs': self.state.debug_log[:100]})
+
+    def get_content_items(self, params):
+        item_type = params.get('type') or 'product'
+        limit = int(params.get('limit') or 20)
+        page = max(1, int(params.get('page') or 1))
+        catalog = self.state.catalog
+
+        with self.state.lock:
+            ids = catalog.query(item_type, params.get('filter'), params.get('category'),
+                                params.get('status'), params.get('search'))
+            total = len(ids)
+            pages = (total + limit - 1) // limit if limit > 0 else 1
+            page_ids = ids[(page - 1) * limit:page * limit] if limit > 0 else ids
+
+            if params.get('fields') == 'ids':
+                payload = {'ids': page_ids, 'total': total, 'pages': pages}
+            else:
+                base = self.server.base_url
+                items = [catalog.to_response_item(catalog.items[i], base) for i in page_ids]
+                if params.get('fields'):
+                    wanted = {'id'} | {f.strip() for f in params['fields'].split(',')}
+                    items = [{k: v for k, v in item.items() if k in wanted} for item in items]
+                payload = {'items': items, 'total': total, 'pages': pages}
+        return self.send_json(payload)
+
+    def get_categories(self, params):
+        taxonomy = 'product' if (params.get('type') or 'product') == 'product' else 'post'
+        terms = self.state.catalog.categories[taxonomy]
+        return self.send_json([{'id': t['id'], 'name': t['name'], 'count': t['count']}
+                               for t in terms if t['parent'] == 0])
+
+    def get_item(self, params):
+        try:
+            return self.state.catalog.items.get(int(params.get('id') or 0))
+        except (TypeError, ValueError):
+            return None
+
+    def update_content_item(self, params):
+        item = self.get_item(params)
+        if not item:
+            return self.send_json({'success': False, 'message': 'Content not found'}, 404)
+        keys = {
+            'metaTitle': '_woosuite_meta_title',
+            'metaDescription': '_woosuite_meta_description',
+            'llmSummary': '_woosuite_llm_summary',
+            'altText': '_wp_attachment_image_alt',
+        }
+        with self.state.lock:
+            for param, key in keys.items():
+                if param in params:
+                    item['meta'][key] = params[param]
+            if 'title' in params:
+                item['name'] = params['title']
+        return self.send_json({'success': True})
+
+    def generate_content_item(self, params):
+        item = self.get_item(params)
+        if not item:
+            return self.send_json({'success': False, 'message': 'Not found'}, 404)
+        with self.state.lock:
+            result = self._generate(item, params.get('rewriteTitle'))
+        return self.send_json({'success': True, 'data': result})
+
+    def generate_content_batch(self, params):
+        ids = params.get('ids')
+        if not isinstance(ids, list) or not ids:
+            return self.send_json({'success': False, 'message': 'No items provided.'}, 400)
+        results = {}
+        with self.state.lock:
+            for raw_id in list(dict.fromkeys(ids))[:20]:
+                item = self.get_item({'id': raw_id})
+                if not item:
+                    results[str(raw_id)] = {'success': False, 'code': 'not_found', 'message': 'Not found'}
+                    continue
+                results[str(item['id'])] = {'success': True, 'data': self._generate(item, params.get('rewriteTitle'))}
+        return self.send_json({'success': True, 'results': results})
+
+    def generate_content_stream(self, params):
+        """NDJSON, one line per item, in waves of 4 items per --ai-latency, for up to
+        20s; a rate limit roll ends the stream early with retryAfter set."""
+        ids = [i for i in dict.fromkeys(params.get('ids') or []) if isinstance(i, int) and i > 0][:500]
+        if not ids:
+            return self.send_json({'success': False, 'message': 'No IDs provided'}, 400)
+        state = self.state
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=UTF-8')
+        self.send_header('Cache-Control', 'no-cache, no-store')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        def emit(line):
+            self.wfile.write((json.dumps(line) + '\n').encode('utf-8'))
+            self.wfile.flush()
+
+        deadline = time.time() + 20
+        remaining = list(ids)
+        retry_after = 0
+        while remaining and time.time() < deadline:
+            roll = state.rng.random()
+            if roll < state.rate_limit_rate:
+                retry_after = state.retry_after
+                break
+            wave, remaining = remaining[:4], remaining[4:]
+            if state.ai_latency > 0:
+                time.sleep(state.ai_latency)
+            for raw_id in wave:
+                item = self.get_item({'id': raw_id})
+                if not item:
+                    emit({'id': raw_id, 'success': False, 'message': 'Not found'})
+                elif state.rng.random() < state.error_rate:
+                    emit({'id': raw_id, 'success': False, 'code': 'api_error', 'message': 'Injected AI error'})
+                else:
+                    with state.lock:
+                        result = self._generate(item, params.get('rewriteTitle'))
+                    emit({'id': raw_id, 'success': True, 'data': result})
+        emit({'done': True, 'remaining': remaining, 'retryAfter': retry_after})
+        return 200
+
+    def _generate(self, item, rewrite_title):
+        meta = item['meta']
+        if item['type'] == 'image':
+            result = {'altText': 'Photo of ' + item['name'].replace('-', ' '),
+                      'title': item['name'].replace('-', ' ').title()}
+            meta['_woosuite_history__wp_attachment_image_alt'] = meta.get('_wp_attachment_image_alt', '')
+            meta['_wp_attachment_image_alt'] = result['altText']
+        else:
+            result = {
+                'title': item['name'] + ' | Official Store',
+                'description': 'Discover the %s. Fast shipping and easy returns.' % item['name'].lower(),
+                'llmSummary': '%s is a %s listed in this store.' % (item['name'], item['type']),
+                'tags': ', '.join(item['name'].lower().split()[:3]),
+            }
+            if rewrite_title:
+                result['simplifiedTitle'] = ' '.join(item['name'].split()[-2:])
+            meta['_woosuite_history__woosuite_meta_description'] = meta.get('_woosuite_meta_description', '')
+            meta['_woosuite_meta_title'] = result['title']
+            meta['_woosuite_meta_description'] = result['description']
+            meta['_woosuite_llm_summary'] = result['llmSummary']
+            item['tags'] = [t.strip() for t in result['tags'].split(',')]
+        meta.pop('_woosuite_seo_last_error', None)
+        return result
+
+    def rewrite_content(self, params):
+        item = self.get_item(params)
+        if not item:
+            return self.send_json({'success': False, 'message': 'Not found'}, 404)
+        if item['type'] != 'product':
+            return self.send_json({'success': False, 'message': 'Only products are supported for rewriting.'}, 400)
+        field = params.get('field') or 'description'
+        source = item['name'] if field == 'title' else item['content']
+        rewritten = 'AI (%s): %s' % (params.get('tone') or 'professional', source[:200])
+        key = '_woosuite_proposed_' + ('short_description' if field == 'short_description' else field)
+        with self.state.lock:
+            item['meta'][key] = rewritten
+        return self.send_json({'success': True, 'rewritten': rewritten})
+
+    def _apply_field(self, item, field, value):
+        attr = {'title': 'name', 'short_description': 'excerpt'}.get(field, 'content')
+        history = {'name': '_woosuite_history_post_title', 'excerpt': '_woosuite_history_post_excerpt',
+                   'content': '_woosuite_history_post_content'}[attr]
+        item['meta'][history] = item[attr]
+        item[attr] = value
+
+    def apply_content(self, params):
+        item = self.get_item(params)
+        if not item:
+            return self.send_json({'success': False, 'message': 'Not found'}, 404)
+        field = params.get('field') or 'description'
+        with self.state.lock:
+            value = params.get('content') or item['meta'].get('_woosuite_proposed_' + field)
+            if not value:
+                return self.send_json({'success': False, 'message': 'No content provided to apply.'}, 400)
+            self._apply_field(item, field, value)
+            item['meta'].pop('_woosuite_proposed_' + field, None)
+        return self.send_json({'success': True})
+
+    def restore_content(self, params):
+        item = self.get_item(params)
+        if not item:
+            return self.send_json({'success': False, 'message': 'Not found'}, 404)
+        with self.state.lock:
+            for key in [k for k in item['meta'] if k.startswith('_woosuite_history_')]:
+                value = item['meta'].pop(key)
+                target = key[len('_woosuite_history_'):]
+                if target == 'post_title':
+                    item['name'] = value
+                elif target == 'post_content':
+                    item['content'] = value
+                elif target == 'post_excerpt':
+                    item['excerpt'] = value
+                else:
+                    item['meta'][target] = value
+        return self.send_json({'success': True})
+
+    def bulk_apply_content(self, params):
+        ids = params.get('ids')
+        field = params.get('field') or 'description'
+        if not isinstance(ids, list) or not ids:
+            return self.send_json({'success': False, 'message': 'No IDs provided'}, 400)
+        applied = 0
+        with self.state.lock:
+            for item_id in ids:
+                item = self.state.catalog.items.get(int(item_id))
+                proposed = item['meta'].get('_woosuite_proposed_' + field) if item else None
+                if proposed:
+                    self._apply_field(item, field, proposed)
+                    del item['meta']['_woosuite_proposed_' + field]
+                    applied += 1
+        return self.send_json({'success': True, 'applied': applied})
+
+    def get_stats(self, params):
+        catalog = self.state.catalog
+        with self.state.lock:
+            total = len(catalog.items)
+            optimized = sum(1 for i in catalog.items.values() if not catalog.is_unoptimized(i))
+            blocked = sum(1 for log in catalog.security_logs if log['blocked'] == '1')
+        return self.send_json({
+            'orders': len(catalog.by_type['product']) * 3,
+            'seo_score': round(optimized / total * 100) if total else 0,
+            'threats_blocked': blocked,
+            'ai_searches': 0,
+            'last_backup': 'Never',
+            'last_recount': int(time.time()),
+        })
+
+    def get_seo_batch_status(self, params):
+        return self.send_json(self.state.seo_batch)
+
+    def start_seo_batch(self, params):
+        self.state.seo_batch = {'status': 'running', 'total': 0, 'processed': 0, 'start_time': int(time.time())}
+        return self.send_json({'success': True, 'message': 'Batch started'})
+
+    def seo_batch_action(self, params):
+        action = params['action']
+        if action == 'stop':
+            self.state.seo_batch = dict(self.state.seo_batch, status='stopped')
+            return self.send_json({'success': True, 'message': 'Stopping...'})
+        if action == 'reset':
+            self.state.seo_batch = {'status': 'idle'}
+            return self.send_json({'success': True, 'message': 'Reset complete'})
+        self.state.seo_batch = dict(self.state.seo_batch, status='running')
+        return self.send_json({'success': True, 'message': 'Batch resumed and triggered'})
+
+    def run_seo_scan(self, params):
+        catalog = self.state.catalog
+        details = {}
+        with self.state.lock:
+            for item_type in ('product', 'post', 'image'):
+                ids = catalog.by_type[item_type]
+                missing = sum(1 for i in ids if catalog.is_unoptimized(catalog.items[i]))
+                details[item_type] = {'total': len(ids), 'missing': missing}
+        total = sum(d['total'] for d in details.values())
+        optimized = total - sum(d['missing'] for d in details.values())
+        return self.send_json({
+            'score': round(optimized / total * 100) if total else 0,
+            'total_items': total,
+            'optimized_items': optimized,
+            'details': details,
+        })
+
+    def get_seo_index_status(self, params):
+        max_id = max(self.state.catalog.items) if self.state.catalog.items else 0
+        return self.send_json({'status': 'ready', 'ready': True, 'rebuilding': False,
+                               'cursor': max_id, 'maxId': max_id})
+
+    def rebuild_seo_index(self, params):
+        return self.send_json({'success': True, 'message': 'Index rebuild scheduled'})
+
+    def get_security_logs(self, params):
+        return self.send_json(self.state.catalog.security_logs[:20])
+
+    def get_security_status(self, params):
+        state = self.state
+        opts = state.options
+        return self.send_json({
+            'firewall_enabled': opts['firewall'],
+            'spam_enabled': opts['spam'],
+            'block_sqli': opts['block_sqli'],
+            'block_xss': opts['block_xss'],
+            'simulation_mode': opts['simulation_mode'],
+            'login_enabled': opts['login'],
+            'login_max_retries': 3,
+            'last_scan': 'Never',
+            'last_scan_source': 'auto',
+            'threats_blocked': sum(1 for log in state.catalog.security_logs if log['blocked'] == '1'),
+            'alerts': None,
+        })
+
+    def toggle_security_option(self, params):
+        option = params.get('option')
+        if option not in self.state.options:
+            return self.send_json({'success': False, 'message': 'Invalid option'}, 400)
+        self.state.options[option] = bool(params.get('value'))
+        return self.send_json({'success': True})
+
+    def run_security_scan(self, params):
+        return self.send_json({'status': 'complete', 'issues_found': 0, 'details': [], 'source': 'manual'})
+
+    def start_deep_scan(self, params):
+        folders = 40
+        self.state.deep_scan = {
+            'status': 'running', 'total_folders': folders, 'processed_folders': 0,
+            'current_folder': 'Initializing...', 'found_issues': 0,
+            'start_time': time.strftime('%Y-%m-%d %H:%M:%S'), 'message': 'Initializing scan...',
+            'started_at': int(time.time()),
+            'run_id': self.state.deep_scan.get('run_id', 0) + 1,
+        }
+        self.state.deep_scan_started = time.time()
+        return self.send_json({'success': True, 'count': folders})
+
+    def _deep_scan_progress(self):
+        scan = dict(self.state.deep_scan)
+        done = 0
+        if scan.get('status') in ('running', 'complete'):
+            # Pretend the cron chain processes two folders per second.
+            done = min(scan['total_folders'], int((time.time() - self.state.deep_scan_started) * 2))
+        return scan, done
+
+    def _deep_scan_findings(self, scan, done):
+        return [{
+            'id': i + 1,
+            'file': 'wp-content/plugins/plugin-%d/includes/loader.php' % i,
+            'issue': 'Obfuscated Code (base64_decode)',
+            'severity': 'critical' if i % 3 == 0 else 'medium',
+            'date': scan['start_time'],
+            'ai_verdict': 'Malicious' if i % 3 == 0 else 'Suspicious',
+            'ai_explanation': 'Mock finding.',
+            'status': 'open',
+        } for i in range(0, done, 4)]
+
+    def get_deep_scan_status(self, params):
+        scan, done = self._deep_scan_progress()
+        if scan.get('status') in ('running', 'complete'):
+            scan['processed_folders'] = done
+            scan['current_folder'] = 'plugin-%d' % done
+            scan['found_issues'] = len(self._deep_scan_findings(scan, done))
+            # Most files are unchanged since the last scan; most AI snippets are known.
+            scan['files_total'] = done * 25
+            scan['files_unchanged'] = done * 23
+            scan['fingerprint_hit_rate'] = 92.0 if done else 0
+            scan['ai_lookups'] = done * 2
+            scan['ai_cache_hits'] = done * 2 - scan['found_issues']
+            scan['verdict_hit_rate'] = round(100.0 * scan['ai_cache_hits'] / scan['ai_lookups'], 1) if done else 0
+            elapsed = max(1.0, time.time() - self.state.deep_scan_started)
+            scan['files_per_sec'] = round(scan['files_total'] / elapsed, 1)
+            scan['eta_seconds'] = int((scan['total_folders'] - done) / 2)
+            if done >= scan['total_folders']:
+                scan.update(status='complete', message='Scan Complete.', current_folder='')
+            else:
+                scan['message'] = 'Scanning plugin-%d...' % done
+        return self.send_json(scan)
+
+    def get_scan_findings(self, params):
+        scan, done = self._deep_scan_progress()
+        items = self._deep_scan_findings(scan, done) if done else []
+        if params.get('severity'):
+            items = [f for f in items if f['severity'] == params['severity']]
+        page = max(1, int(params.get('page', 1)))
+        per_page = min(200, max(1, int(params.get('per_page', 50))))
+        total = len(items)
+        return self.send_json({
+            'run_id': scan.get('run_id', 0),
+            'items': items[(page - 1) * per_page:page * per_page],
+            'total': total,
+            'page': page,
+            'pages': (total + per_page - 1) // per_page,
+        })
+
+    def get_quarantine(self, params):
+        return self.send_json({'files': self.state.quarantine})
+
+    def quarantine_action(self, params):
+        action = params['action']
+        if action == 'move':
+            if not params.get('file'):
+                return self.send_json({'success': False, 'message': 'No file specified'}, 400)
+            self.state.quarantine.append({
+                'id': str(len(self.state.quarantine) + 1), 'original_path': params['file'],
+                'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'size': 1024,
+            })
+        else:
+            if not params.get('id'):
+                return self.send_json({'success': False, 'message': 'No ID specified'}, 400)
+            self.state.quarantine = [q for q in self.state.quarantine if q['id'] != params['id']]
+        return self.send_json({'success': True})
+
+    def get_bans(self, params):
+        now = int(time.time())
+        return self.send_json({'bans': [b for b in reversed(self.state.bans) if not b['expires_at'] or b['expires_at'] > now]})
+
+    def add_bans(self, params):
+        ranges = params.get('ranges') or []
+        if isinstance(ranges, str):
+            ranges = [r for r in re.split(r'[\s,]+', ranges) if r]
+        if not ranges:
+            return self.send_json({'success': False, 'message': 'At least one IP or CIDR range is required'}, 400)
+        valid = [r for r in ranges if re.match(r'^[0-9a-fA-F:.]+(/\d{1,3})?$', r)]
+        invalid = [r for r in ranges if r not in valid]
+        if not valid:
+            return self.send_json({'success': False, 'message': 'Invalid IP or CIDR range', 'invalid': invalid}, 400)
+        now = int(time.time())
+        duration = int(params.get('duration') or 0) * 60
+        for cidr in valid:
+            self.state.bans.append({
+                'id': max([b['id'] for b in self.state.bans] or [0]) + 1, 'cidr': cidr, 'reason': params.get('reason', ''),
+                'expires_at': now + duration if duration else 0, 'created_at': now,
+            })
+        return self.send_json({'success': True, 'invalid': invalid})
+
+    def remove_ban(self, params):
+        if not params.get('id'):
+            return self.send_json({'success': False, 'message': 'Ban ID is required'}, 400)
+        before = len(self.state.bans)
+        self.state.bans = [b for b in self.state.bans if b['id'] != int(params['id'])]
+        return self.send_json({'success': len(self.state.bans) < before})
+
+    def get_ignored(self, params):
+        return self.send_json({'ignored': self.state.ignored})
+
+    def add_ignored(self, params):
+        path = params.get('path')
+        if not path:
+            return self.send_json({'success': False, 'message': 'Path is required'}, 400)
+        if path not in self.state.ignored:
+            self.state.ignored.append(path)
+        return self.send_json({'success': True})
+
+    def remove_ignored(self, params):
+        if not params.get('path'):
+            return self.send_json({'success': False}, 400)
+        self.state.ignored = [p for p in self.state.ignored if p != params['path']]
+        return self.send_json({'success': True})
+
+    def analyze_security(self, params):
+        return self.send_json({'success': True, 'analysis': {
+            'verdict': 'Suspicious', 'confidence': 'Medium',
+            'explanation': 'Mock analysis for %s.' % params['kind'],
+            'summary': 'Mock summary.', 'recommendations': [],
+        }})
+
+    def bulk_security_action(self, params):
+        items = params.get('items') or []
+        if not items:
+            return self.send_json({'success': False, 'message': 'No items selected'}, 400)
+        return self.send_json({'success': True, 'count': len(items)})
+
+    def get_tables(self, params):
+        return self.send_json({'tables': self.state.table_rows()})
+
+    def start_export(self, params):
+        tables = self.state.table_rows()
+        self.state.export_job = {
+            'tables': tables, 'table': 0, 'done_in_table': 0, 'rows_done': 0,
+            'rows_total': sum(t['rows'] for t in tables), 'started': time.time(),
+        }
+        return self.send_json({'success': True, 'method': 'php_chunked'})
+
+    # Rows the plugin's keyset export gets through in one step
+    EXPORT_ROWS_PER_STEP = 200000
+
+    def export_step(self, params):
+        job = self.state.export_job
+        if not job:
+            return self.send_json({'success': False, 'message': 'No export session active.'}, 400)
+        with self.state.lock:
+            budget = self.EXPORT_ROWS_PER_STEP
+            while budget > 0 and job['table'] < len(job['tables']):
+                left = job['tables'][job['table']]['rows'] - job['done_in_table']
+                take = min(left, budget)
+                job['done_in_table'] += take
+                job['rows_done'] += take
+                budget -= take
+                if job['done_in_table'] >= job['tables'][job['table']]['rows']:
+                    job['table'] += 1
+                    job['done_in_table'] = 0
+        return self.send_json({'success': True, 'progress': self._export_progress(job)})
+
+    def _export_progress(self, job):
+        sql_bytes = job['rows_done'] * 1000
+        elapsed = max(0.001, time.time() - job['started'])
+        total = len(job['tables'])
+        running = job['table'] < total
+        return {
+            'status': 'running' if running else 'complete', 'message': '',
+            'current_table': job['tables'][job['table']]['name'] if running else '',
+            'workers': 3 if running else 0,
+            'tables_done': job['table'], 'tables_total': total,
+            'units_done': job['table'], 'units_total': total,
+            'segments': 1 + sql_bytes // self.SEGMENT_SQL_BYTES + job['table'],
+            'rows_done': job['rows_done'], 'rows_total': job['rows_total'],
+            'sql_bytes': sql_bytes, 'file_bytes': sql_bytes // 6,
+            'mb_per_sec': round(sql_bytes / 1048576.0 / elapsed, 2),
+        }
+
+    # Uncompressed SQL per archive segment (WooSuite_Db_Export::SEGMENT_BYTES)
+    SEGMENT_SQL_BYTES = 16 * 1048576
+
+    def _mock_manifest(self):
+        segments = [{'id': 1, 'kind': 'schema', 'table': '', 'length': 20000, 'rows': 0}]
+        for table in self.state.table_rows():
+            rows_left = table['rows']
+            per_segment = self.SEGMENT_SQL_BYTES // 1000
+            while rows_left > 0:
+                take = min(rows_left, per_segment)
+                segments.append({'id': len(segments) + 1, 'kind': 'data', 'table': table['name'],
+                                 'length': take * 1000 // 6, 'rows': take})
+                rows_left -= take
+        return {'archive_bytes': sum(s['length'] for s in segments),
+                'tables': len(self.state.table_rows()), 'segments': segments}
+
+    def finalize_export(self, params):
+        rows = self.state.export_job['rows_done'] if self.state.export_job else 0
+        return self.send_json({'success': True, 'result': {
+            'url': self.server.base_url + '/wp-content/uploads/woosuite-exports-temp/mock.sql.gz',
+            'size': '%.2f MB' % (rows * 0.001 / 6), 'rows': rows,
+        }})
+
+    def get_export_status(self, params):
+        return self.send_json({'status': 'idle'})
+
+    def create_passport(self, params):
+        manifest = self._mock_manifest()
+        download = self.server.base_url + '/?woosuite_action=stream_backup&token=mock'
+        return self.send_json({
+            'version': '1.0', 'generated_at': int(time.time()), 'source_url': self.server.base_url,
+            'download_url': download, 'manifest_url': download + '&part=manifest',
+            'format': 'woosuite-archive', 'filename': 'mock.sql.gz', 'filesize': manifest['archive_bytes'],
+            'checksum': '0' * 64, 'token': 'mock', 'system': {'php_version': '8.2', 'db_size_mb': 250},
+        })
+
+    def validate_passport(self, params):
+        passport = params.get('passport') or {}
+        if not passport.get('token'):
+            return self.send_json({'success': False, 'message': 'Invalid passport data.'}, 400)
+        report = {'can_migrate': True, 'warnings': [], 'errors': []}
+        with self.state.lock:
+            self.state.import_stats = {'statements': 0, 'bytes': 0}
+        if passport.get('manifest_url'):
+            report['manifest'] = self._mock_manifest()
+        return self.send_json(report)
+
+    def import_fetch_chunk(self, params):
+        if 'segment' in params:
+            segment = next((s for s in self._mock_manifest()['segments'] if s['id'] == int(params['segment'])), None)
+            if not segment:
+                return self.send_json({'success': False, 'code': 'invalid_segment', 'message': 'Segment is not in the manifest.'}, 500)
+            return self.send_json({'segment': segment['id'], 'bytes': segment['length'], 'verified': True})
+        offset = int(params.get('offset') or 0)
+        chunk = 5 * 1048576
+        return self.send_json({'bytes': chunk, 'total_size': offset + chunk, 'done': False})
+
+    # Throughput the real engine reports (statements and MB of SQL per second since validation)
+    IMPORT_STATEMENTS_PER_SEC = 850.0
+    IMPORT_MB_PER_SEC = 21.5
+
+    def import_process_chunk(self, params):
+        offset = int(params.get('offset') or 0)
+        step = 8 * 1048576
+        if 'segment' in params:
+            segment = next((s for s in self._mock_manifest()['segments'] if s['id'] == int(params['segment'])), None)
+            size = segment['length'] * 6 if segment else 0
+            end, done = min(size, offset + step), offset + step >= size
+        else:
+            end, done = offset + step, False
+        queries = max(1, (end - offset) // 1048576 * 4)
+        with self.state.lock:
+            stats = self.state.import_stats
+            stats['statements'] += queries
+            stats['bytes'] += end - offset
+            totals = dict(stats)
+        return self.send_json({
+            'offset': end, 'done': done, 'queries': queries,
+            'statements_total': totals['statements'], 'bytes_total': totals['bytes'], 'errors': 0, 'last_error': '',
+            'statements_per_sec': self.IMPORT_STATEMENTS_PER_SEC, 'mb_per_sec': self.IMPORT_MB_PER_SEC,
+        })
+
+    # Deep link scan: rows per source that contain the old domain, one link each;
+    # every tenth link is ambiguous and "goes to the AI"
+    LINK_SOURCES = (('post_content', 450), ('postmeta', 300), ('term_description', 20))
+    LINK_STEP_ROWS = 200
+
+    def migration_scan(self, params):
+        old = params.get('old_domain') or ''
+        if not old:
+            return self.send_json({'success': False, 'message': 'Missing old_domain.'}, 400)
+        cursor = params.get('cursor') or {}
+        names = [name for name, _ in self.LINK_SOURCES]
+        source = cursor.get('source') if cursor.get('source') in names else names[0]
+        after = int(cursor.get('after') or 0)
+        total = dict(self.LINK_SOURCES)[source]
+
+        rows = list(range(after + 1, min(total, after + self.LINK_STEP_ROWS) + 1))
+        issues = []
+        ai = 0
+        for row in rows:
+            slug = 'item-%d' % row
+            ambiguous = row % 10 == 0
+            ai += ambiguous
+            issues.append({
+                'source_id': row, 'location': source,
+                'original_string': 'https://%s/%s/%s/' % (old, '2019/05' if ambiguous else 'shop', slug),
+                'suggested_fix': '%s/shop/%s/' % (self.server.base_url, slug),
+                'confidence': 'Medium' if ambiguous else 'High', 'method': 'ai' if ambiguous else 'local',
+            })
+
+        has_more = True
+        if len(rows) < self.LINK_STEP_ROWS:
+            index = names.index(source) + 1
+            has_more = index < len(names)
+            if has_more:
+                source, after = names[index], 0
+        else:
+            after = rows[-1]
+        return self.send_json({
+            'success': True, 'issues': issues, 'cursor': {'source': source, 'after': after if has_more else (rows[-1] if rows else after)},
+            'has_more': has_more, 'scanned': len(rows), 'resolved_locally': len(rows) - ai, 'sent_to_ai': ai, 'ai_error': '',
+        })
+
+    def migration_fix(self, params):
+        fix = params.get('fix')
+        if not isinstance(fix, dict) or not fix.get('suggested_fix'):
+            return self.send_json({'success': False, 'message': 'Invalid fix data.'}, 400)
+        return self.send_json({'success': True})
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, state, verbose=False):
+        ThreadingHTTPServer.__init__(self, address, Handler)
+        self.state = state
+        self.verbose = verbose
+        host, port = self.server_address[:2]
+        self.base_url = 'http://%s:%d' % (host, port)
+        self.admin_url = self.base_url + '/wp-admin/admin.php?page=woosuite-ai'
+        self.api_url = self.base_url + API_PREFIX
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def start_server(host='127.0.0.1', port=0, products=1000, posts=200, pages=20, images=None,
+                 optimized_ratio=0.3, enhanced_ratio=0.1, latency=0.0, jitter=0.0, ai_latency=0.5,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=5, faults_on='ai', seed=1,
+                 verbose=False):
+    """Start the stand-in on a background thread. port=0 picks a free port."""
+    catalog_args = {
+        'products': products, 'posts': posts, 'pages': pages, 'images': images,
+        'optimized_ratio': optimized_ratio, 'enhanced_ratio': enhanced_ratio, 'seed': seed,
+    }
+    state = MockState(catalog_args, latency=latency, jitter=jitter, ai_latency=ai_latency,
+                      error_rate=error_rate, rate_limit_rate=rate_limit_rate,
+                      retry_after=retry_after, faults_on=faults_on, seed=seed)
+    return MockServer((host, port), state, verbose=verbose).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the WooSuite AI REST API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--products', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--images', type=int, default=None, help='defaults to one per product')
+    parser.add_argument('--optimized-ratio', type=float, default=0.3)
+    parser.add_argument('--enhanced-ratio', type=float, default=0.1)
+    parser.add_argument('--latency', type=float, default=0, help='base latency per request, ms')
+    parser.add_argument('--jitter', type=float, default=0, help='random extra latency, ms')
+    parser.add_argument('--ai-latency', type=float, default=500, help='extra latency on AI routes, ms')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0, help='fraction answered with 429')
+    parser.add_argument('--retry-after', type=int, default=5, help='Retry-After seconds on injected 429s')
+    parser.add_argument('--faults-on', choices=('ai', 'all'), default='ai')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = start_server(
+        host=args.host, port=args.port, products=args.products, posts=args.posts, pages=args.pages,
+        images=args.images, optimized_ratio=args.optimized_ratio, enhanced_ratio=args.enhanced_ratio,
+        latency=args.latency / 1000.0, jitter=args.jitter / 1000.0, ai_latency=args.ai_latency / 1000.0,
+        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after,
+        faults_on=args.faults_on, seed=args.seed, verbose=args.verbose)
+
+    print('WooSuite mock API: %d items' % len(server.state.catalog.items))
+    print('  Admin: %s' % server.admin_url)
+    print('  API:   %s' % server.api_url)
+    print('  Stats: %s/__mock/stats' % server.base_url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
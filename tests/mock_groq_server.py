@@ -0,0 +1,409 @@
+"""
+Local stand-in for the Groq OpenAI-compatible chat completions API.
+
+Enforces RPM / TPM / RPD token buckets the way Groq does and answers with the
+same rate-limit headers (x-ratelimit-limit-*, x-ratelimit-remaining-*,
+x-ratelimit-reset-*, retry-after on 429). Responses are generated from the
+JSON structure requested in the prompt and can be made to show the quirks we
+see from Llama models: fenced JSON, prose around the JSON, trailing commas and
+truncated output.
+
+Usage:
+    python3 tests/mock_groq_server.py --rpm 30 --tpm 30000 --rpd 1000 --fence-rate 0.2
+
+Point the plugin (or tests/bench_groq_throughput.php) at it through the
+Custom API settings: http://127.0.0.1:8766/openai/v1/chat/completions
+
+Mock-only endpoints:
+    GET  /image.jpg      sample image for generate_image_seo (HEAD supported)
+    GET  /__mock/stats   requests, 429s by bucket, tokens and quirks emitted
+    POST /__mock/reset   refill the buckets and clear the stats
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+COMPLETIONS_PATH = '/openai/v1/chat/completions'
+
+# Rough cost of an image in a vision request, in prompt tokens.
+IMAGE_TOKENS = 1200
+
+
+def estimate_tokens(text):
+    return max(1, len(text) // 4)
+
+
+def format_reset(seconds):
+    """Groq style duration: '7.66s', '2m59.56s'."""
+    seconds = max(0.0, seconds)
+    minutes = int(seconds // 60)
+    rest = seconds - minutes * 60
+    if minutes:
+        return '%dm%.2fs' % (minutes, rest)
+    return '%.2fs' % rest
+
+
+class Bucket:
+    """Continuously refilling token bucket."""
+
+    def __init__(self, capacity, window):
+        self.capacity = float(capacity)
+        self.rate = self.capacity / window
+        self.level = self.capacity
+        self.updated = time.time()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount):
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def reset_in(self):
+        return (self.capacity - self.level) / self.rate
+
+
+class GroqState:
+
+    def __init__(self, rpm=30, tpm=30000, rpd=1000, latency=0.3, tokens_per_sec=600.0,
+                 fence_rate=0.0, prose_rate=0.0, trailing_comma_rate=0.0, truncate_rate=0.0,
+                 error_rate=0.0, seed=1):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.rpd = rpd
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.fence_rate = fence_rate
+        self.prose_rate = prose_rate
+        self.trailing_comma_rate = trailing_comma_rate
+        self.truncate_rate = truncate_rate
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests_bucket = Bucket(self.rpm, 60.0)
+            self.tokens_bucket = Bucket(self.tpm, 60.0)
+            self.daily_bucket = Bucket(self.rpd, 86400.0)
+            self.stats = {
+                'requests': 0, 'completed': 0, 'rate_limited': {'rpm': 0, 'tpm': 0, 'rpd': 0},
+                'errors': 0, 'prompt_tokens': 0, 'completion_tokens': 0,
+                'quirks': {'fence': 0, 'prose': 0, 'trailing_comma': 0, 'truncate': 0},
+                'started': time.time(),
+            }
+
+    def admit(self, tokens):
+        """Charge one request. Returns (ok, retry_after, bucket, headers)."""
+        with self.lock:
+            now = time.time()
+            for bucket in (self.requests_bucket, self.tokens_bucket, self.daily_bucket):
+                bucket.refill(now)
+            self.stats['requests'] += 1
+
+            waits = {
+                'rpm': self.requests_bucket.wait_for(1),
+                'tpm': self.tokens_bucket.wait_for(min(tokens, self.tokens_bucket.capacity)),
+                'rpd': self.daily_bucket.wait_for(1),
+            }
+            blocked = max(waits, key=waits.get)
+            ok = waits[blocked] == 0
+            if ok:
+                self.requests_bucket.level -= 1
+                self.tokens_bucket.level -= tokens
+                self.daily_bucket.level -= 1
+            else:
+                self.stats['rate_limited'][blocked] += 1
+
+            headers = {
+                'x-ratelimit-limit-requests': str(self.rpd),
+                'x-ratelimit-limit-tokens': str(self.tpm),
+                'x-ratelimit-remaining-requests': str(max(0, int(self.daily_bucket.level))),
+                'x-ratelimit-remaining-tokens': str(max(0, int(self.tokens_bucket.level))),
+                'x-ratelimit-reset-requests': format_reset(self.daily_bucket.reset_in()),
+                'x-ratelimit-reset-tokens': format_reset(self.tokens_bucket.reset_in()),
+            }
+            return ok, waits[blocked], blocked, headers
+
+    def roll(self, rate):
+        with self.lock:
+            return self.rng.random() < rate
+
+    def snapshot(self):
+        with self.lock:
+            stats = json.loads(json.dumps(self.stats))
+        elapsed = max(0.001, time.time() - stats['started'])
+        stats['elapsed'] = round(elapsed, 1)
+        stats['completed_per_min'] = round(stats['completed'] / elapsed * 60, 2)
+        return stats
+
+
+def prompt_text(messages):
+    """Flatten chat messages to text. Returns (text, image_count)."""
+    parts = []
+    images = 0
+    for message in messages or []:
+        content = message.get('content')
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            for block in content:
+                if block.get('type') == 'text':
+                    parts.append(block.get('text', ''))
+                elif block.get('type') == 'image_url':
+                    images += 1
+    return '\n'.join(parts), images
+
+
+def find_field(prompt, label):
+    match = re.search(r'^\s*%s:\s*(.+)$' % label, prompt, re.M)
+    return match.group(1).strip() if match else ''
+
+
+def seo_reply(name, simplified):
+    reply = {
+        'title': ('%s | Shop Online' % name)[:60],
+        'description': ('Discover the %s. Quality you can feel, designed to last.' % name)[:160],
+        'llmSummary': '%s: a well reviewed item with durable build and modern design.' % name,
+        'tags': ', '.join(name.lower().split()[:4]),
+    }
+    if simplified:
+        reply['simplifiedTitle'] = ' '.join(name.split()[-3:])
+    return reply
+
+
+def build_reply(prompt):
+    """Answer with the JSON structure the prompt asks for."""
+    name = find_field(prompt, 'Name') or find_field(prompt, 'Product Name') or 'Sample Product'
+
+    # Batched SEO prompt: one entry per [item key="..."] block
+    blocks = re.findall(r'\[item key="([^"]*)"\]\s*\n(?:.*\n)*?\s*Name:\s*(.+)', prompt)
+    if blocks and '"items"' in prompt:
+        simplified = '"simplifiedTitle"' in prompt
+        return {'items': [dict(key=key, **seo_reply(item_name.strip(), simplified)) for key, item_name in blocks]}
+
+    if '"altText"' in prompt:
+        return {'altText': 'Close-up photo of %s on a white background' % name, 'title': name.title()}
+    if '"rewritten"' in prompt:
+        context = re.search(r'Context \(Product Name/Title\): "([^"]*)"', prompt)
+        subject = context.group(1) if context else name
+        return {'rewritten': '%s is built for everyday use. ' % subject + 'Durable materials and a clean design. ' * 6}
+    if '"verdict"' in prompt:
+        return {'verdict': 'Suspicious', 'confidence': 'Medium', 'explanation': 'Dynamic code execution found.'}
+    if '"title"' in prompt and '"description"' in prompt:
+        return seo_reply(name, '"simplifiedTitle"' in prompt)
+    if '"risk"' in prompt:
+        return {'risk': 'Low', 'summary': 'Ready to migrate.', 'recommendations': ['Back up first.']}
+    return None
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = 'GroqMock/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, fmt, *args)
+
+    def send_json(self, payload, status=200, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        if urlparse(self.path).path == '/image.jpg':
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(self.server.image)))
+            self.end_headers()
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == '/image.jpg':
+            self.send_response(200)
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', str(len(self.server.image)))
+            self.end_headers()
+            self.wfile.write(self.server.image)
+        elif path == '/__mock/stats':
+            self.send_json(self.server.state.snapshot())
+        else:
+            self.send_json({'error': {'message': 'Unknown path', 'type': 'invalid_request_error'}}, 404)
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+
+        if path == '/__mock/reset':
+            self.server.state.reset()
+            return self.send_json({'success': True})
+        if path != COMPLETIONS_PATH:
+            return self.send_json({'error': {'message': 'Unknown path', 'type': 'invalid_request_error'}}, 404)
+        if not (self.headers.get('Authorization') or '').startswith('Bearer '):
+            return self.send_json({'error': {'message': 'Invalid API Key', 'type': 'invalid_request_error',
+                                             'code': 'invalid_api_key'}}, 401)
+        try:
+            body = json.loads(raw.decode('utf-8'))
+        except ValueError:
+            return self.send_json({'error': {'message': 'Invalid JSON body', 'type': 'invalid_request_error'}}, 400)
+
+        self.complete(body)
+
+    def complete(self, body):
+        state = self.server.state
+        prompt, images = prompt_text(body.get('messages'))
+        prompt_tokens = estimate_tokens(prompt) + images * IMAGE_TOKENS
+        max_tokens = int(body.get('max_tokens') or 1024)
+
+        # Groq checks the prompt plus the requested completion against TPM.
+        ok, retry_after, bucket, headers = state.admit(prompt_tokens + min(max_tokens, 512))
+        if not ok:
+            headers['retry-after'] = str(int(math.ceil(retry_after)))
+            limit_name = {'rpm': 'requests per minute (RPM)', 'tpm': 'tokens per minute (TPM)',
+                          'rpd': 'requests per day (RPD)'}[bucket]
+            return self.send_json({'error': {
+                'message': 'Rate limit reached for model `%s` on %s. Please try again in %s.'
+                           % (body.get('model'), limit_name, format_reset(retry_after)),
+                'type': 'tokens' if bucket == 'tpm' else 'requests',
+                'code': 'rate_limit_exceeded',
+            }}, 429, headers)
+
+        if state.roll(state.error_rate):
+            with state.lock:
+                state.stats['errors'] += 1
+            return self.send_json({'error': {'message': 'Internal Server Error', 'type': 'internal_server_error'}},
+                                  500, headers)
+
+        reply = build_reply(prompt)
+        content = json.dumps(reply, indent=2) if reply is not None else 'Pong'
+        finish_reason = 'stop'
+        quirks = []
+
+        if reply is not None:
+            if state.roll(state.trailing_comma_rate):
+                content = re.sub(r'"\n}$', '",\n}', content)
+                quirks.append('trailing_comma')
+            if state.roll(state.truncate_rate):
+                content = content[:int(len(content) * 0.8)]
+                finish_reason = 'length'
+                quirks.append('truncate')
+            if state.roll(state.fence_rate):
+                content = '```json\n%s\n```' % content
+                quirks.append('fence')
+            if state.roll(state.prose_rate):
+                content = 'Here is the JSON you requested:\n\n%s\n\nLet me know if you need changes.' % content
+                quirks.append('prose')
+
+        completion_tokens = min(max_tokens, estimate_tokens(content))
+        time.sleep(state.latency + completion_tokens / state.tokens_per_sec)
+
+        with state.lock:
+            state.stats['completed'] += 1
+            state.stats['prompt_tokens'] += prompt_tokens
+            state.stats['completion_tokens'] += completion_tokens
+            for quirk in quirks:
+                state.stats['quirks'][quirk] += 1
+
+        self.send_json({
+            'id': 'chatcmpl-mock-%d' % int(time.time() * 1000),
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': content},
+                'finish_reason': finish_reason,
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }, 200, headers)
+
+
+class GroqMockServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, state, verbose=False, image_kb=200):
+        ThreadingHTTPServer.__init__(self, address, Handler)
+        self.state = state
+        self.verbose = verbose
+        self.image = b'\xff\xd8\xff\xe0' + bytes(random.Random(1).getrandbits(8) for _ in range(image_kb * 1024))
+        host, port = self.server_address[:2]
+        self.base_url = 'http://%s:%d' % (host, port)
+        self.completions_url = self.base_url + COMPLETIONS_PATH
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def start_server(host='127.0.0.1', port=0, verbose=False, image_kb=200, **limits):
+    """Start the stand-in on a background thread. port=0 picks a free port."""
+    return GroqMockServer((host, port), GroqState(**limits), verbose=verbose, image_kb=image_kb).start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rate-limited stand-in for the Groq chat completions API.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--rpm', type=int, default=30, help='requests per minute')
+    parser.add_argument('--tpm', type=int, default=30000, help='tokens per minute')
+    parser.add_argument('--rpd', type=int, default=1000, help='requests per day')
+    parser.add_argument('--latency', type=float, default=300, help='time to first token, ms')
+    parser.add_argument('--tokens-per-sec', type=float, default=600)
+    parser.add_argument('--fence-rate', type=float, default=0, help='wrap JSON in ```json fences')
+    parser.add_argument('--prose-rate', type=float, default=0, help='surround JSON with prose')
+    parser.add_argument('--trailing-comma-rate', type=float, default=0)
+    parser.add_argument('--truncate-rate', type=float, default=0, help='cut output short (finish_reason=length)')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction answered with 500')
+    parser.add_argument('--image-kb', type=int, default=200, help='size of /image.jpg')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    server = start_server(
+        host=args.host, port=args.port, verbose=args.verbose, image_kb=args.image_kb,
+        rpm=args.rpm, tpm=args.tpm, rpd=args.rpd, latency=args.latency / 1000.0,
+        tokens_per_sec=args.tokens_per_sec, fence_rate=args.fence_rate, prose_rate=args.prose_rate,
+        trailing_comma_rate=args.trailing_comma_rate, truncate_rate=args.truncate_rate,
+        error_rate=args.error_rate, seed=args.seed)
+
+    print('Groq mock: %d RPM / %d TPM / %d RPD' % (args.rpm, args.tpm, args.rpd))
+    print('  Endpoint: %s' % server.completions_url)
+    print('  Image:    %s/image.jpg' % server.base_url)
+    print('  Stats:    %s/__mock/stats' % server.base_url)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
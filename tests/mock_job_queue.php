@@ -0,0 +1,187 @@
+<?php
+// In-memory wp_woosuite_jobs / wp_woosuite_tasks for the queries WooSuite_Job_Queue issues.
+// Shared by test_job_queue.php and the worker strategy of bench_groq_throughput.php.
+
+if ( ! function_exists( 'wp_list_pluck' ) ) {
+    function wp_list_pluck( $list, $field ) {
+        return array_map( function( $row ) use ( $field ) { return $row[ $field ]; }, $list );
+    }
+}
+
+class Mock_Queue_WPDB {
+    public $prefix = 'wp_';
+    public $postmeta = 'wp_postmeta';
+    public $insert_id = 0;
+    public $jobs = array();
+    public $tasks = array();
+    private $next_task = 1;
+
+    public function prepare( $query, ...$args ) {
+        $args = array_map( function( $arg ) { return is_string( $arg ) ? "'" . addslashes( $arg ) . "'" : $arg; }, $args );
+        return vsprintf( $query, $args );
+    }
+
+    public function insert( $table, $row ) {
+        $this->insert_id = count( $this->jobs ) ? max( array_keys( $this->jobs ) ) + 1 : 1;
+        $this->jobs[ $this->insert_id ] = array_merge( array(
+            'id' => $this->insert_id, 'message' => '', 'total' => 0, 'done' => 0, 'failed' => 0,
+            'paused_until' => 0, 'created_at' => 0, 'updated_at' => 0, 'finished_at' => 0,
+        ), $row );
+        return 1;
+    }
+
+    public function update( $table, $fields, $where ) {
+        if ( ! isset( $this->jobs[ $where['id'] ] ) ) {
+            return 0;
+        }
+        $this->jobs[ $where['id'] ] = array_merge( $this->jobs[ $where['id'] ], $fields );
+        return 1;
+    }
+
+    public function get_var( $query ) {
+        return strpos( $query, '_LOCK(' ) !== false ? 1 : null; // GET_LOCK / RELEASE_LOCK (rate limiter)
+    }
+
+    public function get_col( $query ) {
+        if ( preg_match( "/FROM wp_woosuite_jobs WHERE type = '(\w+)' ORDER BY id DESC LIMIT \d+ OFFSET (\d+)/", $query, $m ) ) {
+            $ids = array_keys( $this->jobs_of( $m[1] ) );
+            rsort( $ids );
+            return array_slice( $ids, (int) $m[2] );
+        }
+        if ( preg_match( "/FROM wp_woosuite_jobs WHERE type = '(\w+)' AND status IN \(([^)]*)\)/", $query, $m ) ) {
+            $statuses = array_map( function( $s ) { return trim( $s, " '" ); }, explode( ',', $m[2] ) );
+            return array_keys( array_filter( $this->jobs_of( $m[1] ), function( $job ) use ( $statuses ) { return in_array( $job['status'], $statuses, true ); } ) );
+        }
+        return array();
+    }
+
+    public function get_row( $query, $output = null ) {
+        if ( preg_match( '/FROM wp_woosuite_jobs WHERE id = (\d+)/', $query, $m ) ) {
+            return isset( $this->jobs[ $m[1] ] ) ? $this->jobs[ $m[1] ] : null;
+        }
+        if ( preg_match( "/FROM wp_woosuite_jobs WHERE type = '(\w+)' ORDER BY id DESC LIMIT 1/", $query, $m ) ) {
+            $jobs = $this->jobs_of( $m[1] );
+            return $jobs ? $jobs[ max( array_keys( $jobs ) ) ] : null;
+        }
+        if ( preg_match( '/SUM\(lease <= (\d+)\).* WHERE job_id = (\d+)/s', $query, $m ) ) {
+            $row = array( 'free' => 0, 'leased' => 0, 'workers' => 0 );
+            $owners = array();
+            foreach ( $this->queued( $m[2] ) as $task ) {
+                if ( $task['lease'] <= $m[1] ) {
+                    $row['free']++;
+                } else {
+                    $row['leased']++;
+                    $owners[ $task['owner'] ] = true;
+                }
+            }
+            $row['workers'] = count( $owners );
+            return $row;
+        }
+        return null;
+    }
+
+    public function get_results( $query, $output = null ) {
+        if ( preg_match( "/FROM wp_woosuite_tasks WHERE owner = '([\w.]+)' AND status = 'queued'/", $query, $m ) ) {
+            return array_values( array_map( function( $task ) {
+                return array( 'id' => $task['id'], 'item_id' => $task['item_id'], 'attempts' => $task['attempts'], 'owner' => $task['owner'] );
+            }, array_filter( $this->tasks, function( $task ) use ( $m ) { return $task['owner'] === $m[1] && $task['status'] === 'queued'; } ) ) );
+        }
+        if ( preg_match( '/WHERE job_id = (\d+) .* lease > 0 AND lease <= (\d+) AND attempts >= (\d+)/', $query, $m ) ) {
+            return array_values( array_filter( $this->queued( $m[1] ), function( $task ) use ( $m ) {
+                return $task['lease'] > 0 && $task['lease'] <= $m[2] && $task['attempts'] >= $m[3];
+            } ) );
+        }
+        return array();
+    }
+
+    public function query( $query ) {
+        $rows = 0;
+        if ( preg_match( '/^INSERT INTO wp_woosuite_tasks \(job_id, item_id\) VALUES (.*)$/s', $query, $m ) ) {
+            preg_match_all( '/\((\d+), (\d+)\)/', $m[1], $values, PREG_SET_ORDER );
+            foreach ( $values as $value ) {
+                $id = $this->next_task++;
+                $this->tasks[ $id ] = array( 'id' => $id, 'job_id' => (int) $value[1], 'item_id' => (int) $value[2], 'status' => 'queued', 'attempts' => 0, 'lease' => 0, 'owner' => '', 'error' => '' );
+                $rows++;
+            }
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_tasks SET lease = (\d+), owner = '([\w.]+)', attempts = attempts \+ 1 WHERE job_id = (\d+) AND status = 'queued' AND lease <= (\d+) ORDER BY id LIMIT (\d+)/", $query, $m ) ) {
+            foreach ( $this->queued( $m[3] ) as $id => $task ) {
+                if ( $rows >= $m[5] ) break;
+                if ( $task['lease'] <= $m[4] ) {
+                    $this->tasks[ $id ] = array_merge( $task, array( 'lease' => (int) $m[1], 'owner' => $m[2], 'attempts' => $task['attempts'] + 1 ) );
+                    $rows++;
+                }
+            }
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_tasks SET status = 'failed', lease = 0, owner = '', error = '.*' WHERE id IN \(([\d,]+)\) AND status = 'queued' AND lease <= (\d+)/", $query, $m ) ) {
+            foreach ( explode( ',', $m[1] ) as $id ) {
+                if ( $this->tasks[ $id ]['status'] === 'queued' && $this->tasks[ $id ]['lease'] <= $m[2] ) {
+                    $this->tasks[ $id ] = array_merge( $this->tasks[ $id ], array( 'status' => 'failed', 'lease' => 0, 'owner' => '' ) );
+                    $rows++;
+                }
+            }
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_tasks SET lease = (\d+) WHERE owner = '([\w.]+)'/", $query, $m ) ) {
+            foreach ( $this->tasks as $id => $task ) {
+                if ( $task['owner'] === $m[2] && $task['status'] === 'queued' ) {
+                    $this->tasks[ $id ]['lease'] = (int) $m[1];
+                    $rows++;
+                }
+            }
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_tasks SET status = '(\w+)', lease = 0, error = '(.*)' WHERE id = (\d+) AND owner = '([\w.]+)'/", $query, $m ) ) {
+            if ( isset( $this->tasks[ $m[3] ] ) && $this->tasks[ $m[3] ]['owner'] === $m[4] && $this->tasks[ $m[3] ]['status'] === 'queued' ) {
+                $this->tasks[ $m[3] ] = array_merge( $this->tasks[ $m[3] ], array( 'status' => $m[1], 'lease' => 0, 'error' => stripslashes( $m[2] ) ) );
+                $rows = 1;
+            }
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_tasks SET lease = 0, owner = '', attempts = attempts - 1 WHERE id = (\d+) AND owner = '([\w.]+)'/", $query, $m ) ) {
+            if ( isset( $this->tasks[ $m[1] ] ) && $this->tasks[ $m[1] ]['owner'] === $m[2] && $this->tasks[ $m[1] ]['status'] === 'queued' ) {
+                $this->tasks[ $m[1] ] = array_merge( $this->tasks[ $m[1] ], array( 'lease' => 0, 'owner' => '', 'attempts' => $this->tasks[ $m[1] ]['attempts'] - 1 ) );
+                $rows = 1;
+            }
+        } elseif ( preg_match( "/^DELETE FROM wp_woosuite_tasks WHERE job_id = (\d+) AND status = 'done'/", $query, $m ) ) {
+            foreach ( $this->tasks as $id => $task ) {
+                if ( $task['job_id'] == $m[1] && $task['status'] === 'done' ) {
+                    unset( $this->tasks[ $id ] );
+                    $rows++;
+                }
+            }
+        } elseif ( preg_match( '/^DELETE FROM wp_woosuite_(tasks|jobs) WHERE (job_id|id) IN \(([\d,]+)\)/', $query, $m ) ) {
+            $ids = explode( ',', $m[3] );
+            if ( $m[1] === 'jobs' ) {
+                foreach ( $ids as $id ) unset( $this->jobs[ $id ] );
+            } else {
+                $this->tasks = array_filter( $this->tasks, function( $task ) use ( $ids ) { return ! in_array( $task['job_id'], $ids ); } );
+            }
+        } elseif ( preg_match( '/^UPDATE wp_woosuite_jobs SET total = total \+ (\d+), updated_at = (\d+) WHERE id = (\d+)/', $query, $m ) ) {
+            $this->jobs[ $m[3] ]['total'] += (int) $m[1];
+            $rows = 1;
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_jobs SET status = 'running', paused_until = 0, updated_at = (\d+) WHERE id = (\d+) AND status = 'paused'/", $query, $m ) ) {
+            if ( $this->jobs[ $m[2] ]['status'] === 'paused' ) {
+                $this->jobs[ $m[2] ] = array_merge( $this->jobs[ $m[2] ], array( 'status' => 'running', 'paused_until' => 0 ) );
+                $rows = 1;
+            }
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_jobs SET status = 'complete', message = '(.*)', updated_at = (\d+), finished_at = (\d+) WHERE id = (\d+) AND status = 'running'/", $query, $m ) ) {
+            if ( $this->jobs[ $m[4] ]['status'] === 'running' ) {
+                $this->jobs[ $m[4] ] = array_merge( $this->jobs[ $m[4] ], array( 'status' => 'complete', 'message' => stripslashes( $m[1] ), 'finished_at' => (int) $m[3] ) );
+                $rows = 1;
+            }
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_jobs SET status = 'cancelled', message = '(.*)', updated_at = \d+ WHERE id IN \(([\d,]+)\)/", $query, $m ) ) {
+            foreach ( explode( ',', $m[2] ) as $id ) {
+                $this->jobs[ $id ]['status'] = 'cancelled';
+                $rows++;
+            }
+        } elseif ( preg_match( '/^UPDATE wp_woosuite_jobs SET (.*), updated_at = \d+ WHERE id = (\d+)$/', $query, $m ) ) {
+            preg_match_all( '/(done|failed) = \1 \+ (\d+)/', $m[1], $counters, PREG_SET_ORDER );
+            foreach ( $counters as $counter ) {
+                $this->jobs[ $m[2] ][ $counter[1] ] += (int) $counter[2];
+            }
+            $rows = 1;
+        }
+        return $rows;
+    }
+
+    private function jobs_of( $type ) {
+        return array_filter( $this->jobs, function( $job ) use ( $type ) { return $job['type'] === $type; } );
+    }
+
+    private function queued( $job_id ) {
+        return array_filter( $this->tasks, function( $task ) use ( $job_id ) { return $task['job_id'] == $job_id && $task['status'] === 'queued'; } );
+    }
+}
@@ -0,0 +1,113 @@
+<?php
+// Mock WordPress Environment for WooSuite_Security (WAF tests and benchmarks)
+
+$wp_options = [];
+function get_option($key, $default = false) {
+    global $wp_options;
+    return isset($wp_options[$key]) ? $wp_options[$key] : $default;
+}
+function update_option($key, $value) {
+    global $wp_options;
+    $wp_options[$key] = $value;
+}
+function wp_load_alloptions() {
+    global $wp_options;
+    return $wp_options;
+}
+
+$wp_transients = [];
+function get_transient($key) {
+    global $wp_transients;
+    return isset($wp_transients[$key]) ? $wp_transients[$key] : false;
+}
+function set_transient($key, $value, $expiration = 0) {
+    global $wp_transients;
+    $wp_transients[$key] = $value;
+    return true;
+}
+
+// Persistent object cache (WooSuite_Ip_Store counts violations here)
+$wp_cache = [];
+function wp_using_ext_object_cache() { return true; }
+function wp_cache_add($key, $data, $group = '', $expire = 0) {
+    global $wp_cache;
+    if (isset($wp_cache[$group][$key])) return false;
+    $wp_cache[$group][$key] = $data;
+    return true;
+}
+function wp_cache_incr($key, $offset = 1, $group = '') {
+    global $wp_cache;
+    if (!isset($wp_cache[$group][$key])) return false;
+    return $wp_cache[$group][$key] += $offset;
+}
+function wp_cache_get($key, $group = '') {
+    global $wp_cache;
+    return isset($wp_cache[$group][$key]) ? $wp_cache[$group][$key] : false;
+}
+function wp_cache_set($key, $data, $group = '', $expire = 0) {
+    global $wp_cache;
+    $wp_cache[$group][$key] = $data;
+    return true;
+}
+
+function is_user_logged_in() { return false; }
+function current_user_can($capability) { return false; }
+function current_time($type) { return date('Y-m-d H:i:s'); }
+function esc_html($s) { return htmlspecialchars($s); }
+
+// Mock WPDB: rows written to the security log land in $logs, IP bans in $bans
+class MockWPDB {
+    public $prefix = 'wp_';
+    public $logs = [];
+    public $bans = [];
+    public $queries = 0;
+    public function insert($table, $data) {
+        $this->logs[] = $data;
+    }
+    public function prepare($query, ...$args) {
+        $args = array_map(function($arg) {
+            return is_string($arg) ? "'" . addslashes($arg) . "'" : $arg;
+        }, $args);
+        return vsprintf(str_replace("'%s'", '%s', $query), $args);
+    }
+    public function query($sql) {
+        $this->queries++;
+        if (strpos($sql, 'INSERT INTO ' . $this->prefix . 'woosuite_security_logs') === 0) {
+            $string = "'((?:[^'\\\\]|\\\\.)*)'";
+            preg_match_all("/\\($string, $string, $string, (\\d+), $string\\)/", $sql, $rows, PREG_SET_ORDER);
+            foreach ($rows as $row) {
+                $this->logs[] = [
+                    'event' => stripslashes($row[1]),
+                    'ip_address' => stripslashes($row[2]),
+                    'severity' => stripslashes($row[3]),
+                    'blocked' => (int) $row[4],
+                    'created_at' => stripslashes($row[5]),
+                ];
+            }
+            return count($rows);
+        }
+        if (strpos($sql, 'INSERT INTO ' . $this->prefix . 'woosuite_ip_bans') === 0) {
+            preg_match("/UNHEX\\('([0-9a-f]+)'\\), (\\d+), '[^']*', '[^']*', (\\d+), \\d+, (\\d)/", $sql, $ban);
+            $this->bans[$ban[1] . '/' . $ban[2]] = (object) ['network' => $ban[1], 'prefix_len' => (int) $ban[2], 'expires_at' => (int) $ban[3], 'auto' => (int) $ban[4]];
+            return 1;
+        }
+        return 0;
+    }
+    public function get_results($sql, $output = null) {
+        if (strpos($sql, 'FROM ' . $this->prefix . 'woosuite_ip_bans') !== false) {
+            return array_values(array_filter($this->bans, function($ban) { return $ban->auto === 0; }));
+        }
+        return [];
+    }
+}
+$wpdb = new MockWPDB();
+
+// Mock wp_die
+class WPDieException extends Exception {}
+function wp_die($message = '', $title = '', $args = []) {
+    throw new WPDieException($message);
+}
+
+require_once __DIR__ . '/../includes/security/class-woosuite-security-log.php';
+require_once __DIR__ . '/../includes/security/class-woosuite-ip-store.php';
+require_once __DIR__ . '/../includes/class-woosuite-security.php';
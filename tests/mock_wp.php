@@ -40,10 +40,14 @@ function wp_update_post($args) {
 class WP_REST_Response {
     public $data;
     public $status;
+    public $headers = [];
     public function __construct($data, $status) {
         $this->data = $data;
         $this->status = $status;
     }
+    public function header($key, $value) {
+        $this->headers[$key] = $value;
+    }
 }
 
 class WP_REST_Request {
@@ -0,0 +1,143 @@
+<?php
+// AI response cache: identical prompts answered once, per-call bypass, per-item batch cache, hit/miss counters, TTL and LRU pruning.
+
+define( 'DAY_IN_SECONDS', 86400 );
+define( 'ARRAY_A', 'ARRAY_A' );
+
+class WP_Error {
+    private $code;
+    public function __construct( $code = '', $message = '', $data = '' ) { $this->code = $code; }
+    public function get_error_code() { return $this->code; }
+}
+function is_wp_error( $thing ) { return $thing instanceof WP_Error; }
+function wp_json_encode( $data ) { return json_encode( $data ); }
+
+$options = array( 'woosuite_gemini_api_key' => 'gsk_test', 'woosuite_rate_limiter_enabled' => 'no' );
+function get_option( $name, $default = false ) { global $options; return array_key_exists( $name, $options ) ? $options[ $name ] : $default; }
+function update_option( $name, $value ) { global $options; $options[ $name ] = $value; return true; }
+
+// In-memory tables for the queries WooSuite_Ai_Cache and WooSuite_Counters issue
+class Mock_Cache_WPDB {
+    public $prefix = 'wp_';
+    public $rows = array();
+    public $counters = array();
+
+    public function prepare( $query, ...$args ) {
+        $args = array_map( function( $arg ) { return is_string( $arg ) ? "'" . addslashes( $arg ) . "'" : $arg; }, $args );
+        return vsprintf( $query, $args );
+    }
+
+    public function get_var( $query ) {
+        if ( preg_match( "/SELECT response .* cache_key = '(\w+)' AND created_at > (\d+)/s", $query, $m ) ) {
+            return isset( $this->rows[ $m[1] ] ) && $this->rows[ $m[1] ]['created_at'] > $m[2] ? $this->rows[ $m[1] ]['response'] : null;
+        }
+        if ( strpos( $query, 'SELECT COUNT(*)' ) === 0 ) {
+            return count( $this->rows );
+        }
+        return null;
+    }
+
+    public function get_row( $query ) {
+        return array( 'entries' => count( $this->rows ), 'bytes' => array_sum( array_map( function( $row ) { return strlen( $row['response'] ); }, $this->rows ) ) );
+    }
+
+    public function get_results( $query ) {
+        $rows = array();
+        foreach ( $this->counters as $name => $value ) {
+            $rows[] = array( 'name' => $name, 'value' => $value );
+        }
+        return $rows;
+    }
+
+    public function query( $query ) {
+        if ( preg_match( "/^REPLACE INTO wp_woosuite_ai_cache .* VALUES \('(\w+)', '(\w+)', '(.*)', (\d+), 0, (\d+), (\d+)\)$/s", $query, $m ) ) {
+            $this->rows[ $m[1] ] = array( 'op' => $m[2], 'response' => stripslashes( $m[3] ), 'hits' => 0, 'created_at' => (int) $m[5], 'accessed_at' => (int) $m[6] );
+        } elseif ( preg_match( "/^UPDATE wp_woosuite_ai_cache SET hits = hits \+ 1, accessed_at = (\d+) WHERE cache_key = '(\w+)'/", $query, $m ) ) {
+            $this->rows[ $m[2] ]['hits']++;
+            $this->rows[ $m[2] ]['accessed_at'] = (int) $m[1];
+        } elseif ( preg_match( "/^DELETE FROM wp_woosuite_ai_cache WHERE created_at <= (\d+)/", $query, $m ) ) {
+            $this->rows = array_filter( $this->rows, function( $row ) use ( $m ) { return $row['created_at'] > $m[1]; } );
+        } elseif ( preg_match( "/^DELETE FROM wp_woosuite_ai_cache ORDER BY accessed_at ASC LIMIT (\d+)/", $query, $m ) ) {
+            uasort( $this->rows, function( $a, $b ) { return $a['accessed_at'] - $b['accessed_at']; } );
+            $this->rows = array_slice( $this->rows, (int) $m[1], null, true );
+        } elseif ( preg_match( "/^INSERT INTO wp_woosuite_counters .* VALUES \('(\w+)', (-?\d+),/s", $query, $m ) ) {
+            $this->counters[ $m[1] ] = ( isset( $this->counters[ $m[1] ] ) ? $this->counters[ $m[1] ] : 0 ) + (int) $m[2];
+        }
+        return 1;
+    }
+}
+$wpdb = new Mock_Cache_WPDB();
+
+// Chat completions endpoint: answers every item it is asked about
+$posts = array();
+function wp_remote_post( $url, $args ) {
+    global $posts;
+    $body = json_decode( $args['body'], true );
+    $prompt = end( $body['messages'] )['content'];
+    $posts[] = $prompt;
+    if ( preg_match_all( '/\[item key="(\w+)"\]/', $prompt, $m ) ) {
+        $items = array();
+        foreach ( $m[1] as $key ) {
+            $items[] = array( 'key' => $key, 'title' => "Title $key", 'description' => "Description $key" );
+        }
+        $content = json_encode( array( 'items' => $items ) );
+    } else {
+        $content = json_encode( array( 'title' => 'Title', 'description' => 'Description ' . count( $posts ) ) );
+    }
+    return array( 'code' => 200, 'body' => json_encode( array( 'choices' => array( array( 'message' => array( 'content' => $content ) ) ) ) ) );
+}
+function wp_remote_retrieve_response_code( $response ) { return $response['code']; }
+function wp_remote_retrieve_body( $response ) { return $response['body']; }
+
+require_once __DIR__ . '/../includes/class-woosuite-counters.php';
+require_once __DIR__ . '/../includes/class-woosuite-rate-limiter.php';
+require_once __DIR__ . '/../includes/class-woosuite-ai-cache.php';
+require_once __DIR__ . '/../includes/class-woosuite-groq.php';
+
+$item = array( 'type' => 'product', 'name' => 'Blue Shirt', 'description' => 'Cotton.' );
+$groq = new WooSuite_Groq();
+
+// --- TEST 1: The same prompt is sent once; a changed prompt is a miss ---
+echo "TEST 1: Identical prompts answered from the cache... ";
+$first = $groq->generate_seo_meta( $item );
+$second = $groq->generate_seo_meta( $item );
+$other = $groq->generate_seo_meta( array( 'rewrite_title' => true ) + $item );
+$stats = WooSuite_Ai_Cache::get_stats();
+$ok = count( $posts ) === 2 && $second === $first && $other !== $first
+    && $stats['hits'] === 1 && $stats['misses'] === 2 && $stats['entries'] === 2;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 2: Bypass asks again and replaces the cached answer ---
+echo "TEST 2: Per-call bypass... ";
+$groq->set_cache_bypass( true );
+$fresh = $groq->generate_seo_meta( $item );
+$groq->set_cache_bypass( false );
+$ok = count( $posts ) === 3 && $fresh !== $first && $groq->generate_seo_meta( $item ) === $fresh && count( $posts ) === 3;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 3: Batches only send the items not answered before ---
+echo "TEST 3: Per-item batch cache... ";
+$items = array(
+    11 => array( 'type' => 'product', 'name' => 'Red Mug', 'description' => 'Ceramic.' ),
+    12 => array( 'type' => 'product', 'name' => 'Green Mug', 'description' => 'Ceramic.' ),
+);
+$groq->generate_seo_meta_batch( $items );
+$items[13] = array( 'type' => 'product', 'name' => 'Black Mug', 'description' => 'Ceramic.' );
+$results = $groq->generate_seo_meta_batch( $items );
+$last = end( $posts );
+$ok = count( $posts ) === 5 && count( $results ) === 3 && $results[11]['title'] === 'Title 11'
+    && strpos( $last, 'Black Mug' ) !== false && strpos( $last, 'Red Mug' ) === false;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 4: Expired rows and the least recently used rows above MAX_ENTRIES are pruned ---
+echo "TEST 4: TTL and LRU pruning... ";
+$now = time();
+$wpdb->rows = array();
+for ( $i = 0; $i < WooSuite_Ai_Cache::MAX_ENTRIES + 2; $i++ ) {
+    $wpdb->rows[ "k$i" ] = array( 'op' => 'seo_meta', 'response' => '{}', 'hits' => 0, 'created_at' => $now, 'accessed_at' => $now - $i );
+}
+$wpdb->rows['expired'] = array( 'op' => 'seo_meta', 'response' => '{}', 'hits' => 0, 'created_at' => $now - WooSuite_Ai_Cache::TTL - 1, 'accessed_at' => $now );
+WooSuite_Ai_Cache::prune();
+$ok = count( $wpdb->rows ) === WooSuite_Ai_Cache::MAX_ENTRIES && ! isset( $wpdb->rows['expired'] )
+    && isset( $wpdb->rows['k0'] ) && ! isset( $wpdb->rows[ 'k' . ( WooSuite_Ai_Cache::MAX_ENTRIES + 1 ) ] );
+echo $ok ? "PASSED\n" : "FAILED\n";
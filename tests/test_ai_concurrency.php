@@ -0,0 +1,108 @@
+<?php
+// Concurrent AI calls: waves bounded by the concurrency, results delivered as they complete, unsent calls kept after a 429, sequential fallback.
+
+define( 'DAY_IN_SECONDS', 86400 );
+define( 'ABSPATH', '/' );
+define( 'WPINC', 'wp-includes' );
+
+class WP_Error {
+    private $code;
+    private $data;
+    public function __construct( $code = '', $message = '', $data = '' ) { $this->code = $code; $this->data = $data; }
+    public function get_error_code() { return $this->code; }
+    public function get_error_data() { return $this->data; }
+    public function get_error_message() { return $this->code; }
+}
+function is_wp_error( $thing ) { return $thing instanceof WP_Error; }
+function wp_json_encode( $data ) { return json_encode( $data ); }
+
+$options = array( 'woosuite_gemini_api_key' => 'gsk_test', 'woosuite_rate_limiter_enabled' => 'no', 'woosuite_ai_cache_enabled' => 'no' );
+function get_option( $name, $default = false ) { global $options; return array_key_exists( $name, $options ) ? $options[ $name ] : $default; }
+function update_option( $name, $value ) { global $options; $options[ $name ] = $value; return true; }
+
+// Chat completions endpoint: answers with the product name, or 429 for names listed in $throttle
+$throttle = array();
+function answer( $data ) {
+    global $throttle;
+    $body = json_decode( $data, true );
+    $prompt = end( $body['messages'] )['content'];
+    preg_match( '/Name: (.+)/', $prompt, $m );
+    $name = isset( $m[1] ) ? trim( $m[1] ) : '';
+    if ( in_array( $name, $throttle, true ) ) {
+        return array( 'code' => 429, 'body' => '{}', 'headers' => array( 'retry-after' => '7' ) );
+    }
+    $content = json_encode( array( 'title' => $name, 'description' => 'About ' . $name ) );
+    return array( 'code' => 200, 'body' => json_encode( array( 'choices' => array( array( 'message' => array( 'content' => $content ) ) ) ) ), 'headers' => array() );
+}
+
+$sequential_posts = 0;
+function wp_remote_post( $url, $args ) { global $sequential_posts; $sequential_posts++; return answer( $args['body'] ); }
+function wp_remote_retrieve_response_code( $response ) { return $response['code']; }
+function wp_remote_retrieve_body( $response ) { return $response['body']; }
+function wp_remote_retrieve_header( $response, $name ) { return isset( $response['headers'][ $name ] ) ? $response['headers'][ $name ] : ''; }
+
+// Requests::request_multiple stand-in: records each wave, completes its requests in reverse order
+class Requests {
+    public static $waves = array();
+    public static function request_multiple( $requests ) {
+        self::$waves[] = array_keys( $requests );
+        foreach ( array_reverse( $requests, true ) as $key => $request ) {
+            call_user_func( $request['options']['complete'], answer( $request['data'] ), $key );
+        }
+    }
+}
+class WP_HTTP_Requests_Response {
+    private $response;
+    public function __construct( $response ) { $this->response = $response; }
+    public function to_array() { return $this->response; }
+}
+
+require_once __DIR__ . '/../includes/class-woosuite-counters.php';
+require_once __DIR__ . '/../includes/class-woosuite-rate-limiter.php';
+require_once __DIR__ . '/../includes/class-woosuite-ai-cache.php';
+require_once __DIR__ . '/../includes/class-woosuite-groq.php';
+
+function jobs( $count ) {
+    $jobs = array();
+    for ( $i = 1; $i <= $count; $i++ ) {
+        $jobs[ "text:$i" ] = array( 'seo_meta', array( 'type' => 'product', 'name' => "Item $i", 'description' => 'Cotton.' ) );
+    }
+    return $jobs;
+}
+
+$groq = new WooSuite_Groq();
+
+// --- TEST 1: At most $concurrency requests per wave, every result handed back under its key ---
+echo "TEST 1: Bounded waves... ";
+$order = array();
+$results = array();
+$groq->run_concurrent( jobs( 7 ), 3, function( $key, $result ) use ( &$order, &$results ) {
+    $order[] = $key;
+    $results[ $key ] = $result;
+} );
+$ok = Requests::$waves === array( array( 'text:1', 'text:2', 'text:3' ), array( 'text:4', 'text:5', 'text:6' ), array( 'text:7' ) )
+    && count( $results ) === 7 && $results['text:5']['title'] === 'Item 5'
+    && $order[0] === 'text:3' && $sequential_posts === 0;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 2: A 429 finishes the current wave; later calls are not sent and come back as rate_limit ---
+echo "TEST 2: Throttled wave... ";
+Requests::$waves = array();
+$throttle = array( 'Item 2' );
+$results = array();
+$groq->run_concurrent( jobs( 7 ), 3, function( $key, $result ) use ( &$results ) { $results[ $key ] = $result; } );
+$throttle = array();
+$error = $results['text:6'];
+$ok = count( Requests::$waves ) === 1 && count( $results ) === 7
+    && $results['text:1']['title'] === 'Item 1' && $results['text:3']['title'] === 'Item 3'
+    && is_wp_error( $results['text:2'] ) && is_wp_error( $error ) && $error->get_error_code() === 'rate_limit'
+    && $error->get_error_data()['retry_after'] === 7;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 3: Concurrency 1 goes through wp_remote_post one call at a time ---
+echo "TEST 3: Sequential fallback... ";
+Requests::$waves = array();
+$results = array();
+$groq->run_concurrent( jobs( 3 ), 1, function( $key, $result ) use ( &$results ) { $results[ $key ] = $result; } );
+$ok = Requests::$waves === array() && $sequential_posts === 3 && array_keys( $results ) === array( 'text:1', 'text:2', 'text:3' );
+echo $ok ? "PASSED\n" : "FAILED\n";
@@ -0,0 +1,90 @@
+<?php
+// Segmented backup archive: manifest round trip, per-segment checksums, gzip member concatenation.
+
+if ( ! class_exists( 'WP_Error' ) ) {
+    class WP_Error {
+        private $code;
+        private $message;
+        public function __construct( $code = '', $message = '' ) {
+            $this->code = $code;
+            $this->message = $message;
+        }
+        public function get_error_code() { return $this->code; }
+        public function get_error_message() { return $this->message; }
+    }
+}
+function is_wp_error( $thing ) { return $thing instanceof WP_Error; }
+function wp_json_encode( $data ) { return json_encode( $data ); }
+
+require_once __DIR__ . '/../includes/backup/class-woosuite-backup-archive.php';
+
+$dir = sys_get_temp_dir() . '/woosuite-archive-test-' . getmypid();
+@mkdir( $dir );
+$archive = $dir . '/db-backup-test.sql.gz';
+
+$parts = array(
+    array( 'kind' => 'schema', 'table' => '', 'sql' => "SET FOREIGN_KEY_CHECKS = 0;\nCREATE TABLE `wp_test` (id int);\n" ),
+    array( 'kind' => 'data', 'table' => 'wp_test', 'sql' => "INSERT INTO `wp_test` VALUES ('1'),('2');\n" ),
+    array( 'kind' => 'data', 'table' => 'wp_test', 'sql' => "INSERT INTO `wp_test` VALUES ('3');\n" ),
+);
+$segments = array();
+$data = '';
+foreach ( $parts as $i => $part ) {
+    $member = gzencode( $part['sql'], 6 );
+    $segments[] = array(
+        'id' => $i + 1, 'kind' => $part['kind'], 'table' => $part['table'],
+        'offset' => strlen( $data ), 'length' => strlen( $member ), 'rows' => 0,
+        'sql_bytes' => strlen( $part['sql'] ), 'sha256' => hash( 'sha256', $member ),
+    );
+    $data .= $member;
+}
+file_put_contents( $archive, $data );
+
+// --- TEST 1: Manifest path and round trip ---
+echo "TEST 1: Manifest round trip... ";
+WooSuite_Backup_Archive::write_manifest( $archive, array( 'archive' => basename( $archive ), 'segments' => $segments ) );
+$manifest_path = WooSuite_Backup_Archive::manifest_path( $archive );
+$manifest = WooSuite_Backup_Archive::read_manifest( $manifest_path );
+if ( basename( $manifest_path ) === 'db-backup-test.manifest.json' && is_array( $manifest ) && count( $manifest['segments'] ) === 3
+    && $manifest['format'] === WooSuite_Backup_Archive::FORMAT ) {
+    echo "PASSED\n";
+} else {
+    echo "FAILED\n";
+    var_dump( $manifest_path, $manifest );
+}
+
+// --- TEST 2: Every segment verifies in place, the archive still gunzips as one stream ---
+echo "TEST 2: Segments verify inside the archive... ";
+$ok = true;
+foreach ( $manifest['segments'] as $segment ) {
+    $ok = $ok && WooSuite_Backup_Archive::verify_segment( $archive, $segment, $segment['offset'] );
+}
+$whole = implode( '', array_column( $parts, 'sql' ) );
+echo ( $ok && gzdecode( file_get_contents( $archive ) ) === $whole ) ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 3: A fetched segment on its own verifies and decodes; a corrupted one does not ---
+echo "TEST 3: Fetched segment checksum... ";
+$segment = WooSuite_Backup_Archive::get_segment( $manifest, 2 );
+$local = $dir . '/import-segment-2.sql.gz';
+file_put_contents( $local, substr( $data, $segment['offset'], $segment['length'] ) );
+$good = WooSuite_Backup_Archive::verify_segment( $local, $segment ) && gzdecode( file_get_contents( $local ) ) === $parts[1]['sql'];
+
+$corrupt = file_get_contents( $local );
+$corrupt[ 12 ] = chr( ord( $corrupt[ 12 ] ) ^ 0xFF );
+file_put_contents( $local, $corrupt );
+$bad = WooSuite_Backup_Archive::verify_segment( $local, $segment );
+
+file_put_contents( $local, substr( $data, $segment['offset'], $segment['length'] - 1 ) );
+$short = WooSuite_Backup_Archive::verify_segment( $local, $segment );
+echo ( $good && ! $bad && ! $short ) ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 4: Foreign or newer manifests are rejected ---
+echo "TEST 4: Invalid manifests... ";
+file_put_contents( $manifest_path, json_encode( array( 'format' => 'other', 'segments' => array() ) ) );
+$foreign = WooSuite_Backup_Archive::read_manifest( $manifest_path );
+file_put_contents( $manifest_path, json_encode( array( 'format' => WooSuite_Backup_Archive::FORMAT, 'version' => 99, 'segments' => array() ) ) );
+$newer = WooSuite_Backup_Archive::read_manifest( $manifest_path );
+echo ( is_wp_error( $foreign ) && is_wp_error( $newer ) && is_wp_error( WooSuite_Backup_Archive::read_manifest( $dir . '/missing.json' ) ) ) ? "PASSED\n" : "FAILED\n";
+
+array_map( 'unlink', glob( $dir . '/*' ) );
+rmdir( $dir );
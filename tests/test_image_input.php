@@ -0,0 +1,101 @@
+<?php
+// Vision input: intermediate size / downscale choice from disk, content hash shared by duplicate files, URL fallback.
+
+$dir = sys_get_temp_dir() . '/woosuite-image-test-' . getmypid();
+@mkdir( $dir . '/a', 0777, true );
+@mkdir( $dir . '/b', 0777, true );
+
+class WP_Error {}
+function is_wp_error( $thing ) { return $thing instanceof WP_Error; }
+function trailingslashit( $value ) { return rtrim( $value, '/\\' ) . '/'; }
+function get_temp_dir() { global $dir; return $dir; }
+function wp_check_filetype( $file ) { return array( 'type' => substr( $file, -4 ) === '.png' ? 'image/png' : 'image/jpeg' ); }
+
+// Attachment ID => [ attached file, metadata ]
+$attachments = array(
+    // Big upload with WordPress and WooCommerce sizes
+    1 => array( "$dir/a/shirt.jpg", array( 'width' => 2000, 'height' => 1500, 'sizes' => array(
+        'thumbnail' => array( 'file' => 'shirt-150x150.jpg', 'width' => 150, 'height' => 150 ),
+        'woocommerce_thumbnail' => array( 'file' => 'shirt-600x600.jpg', 'width' => 600, 'height' => 600 ),
+        'medium_large' => array( 'file' => 'shirt-768x576.jpg', 'width' => 768, 'height' => 576 ),
+        'large' => array( 'file' => 'shirt-1024x768.jpg', 'width' => 1024, 'height' => 768, 'mime-type' => 'image/jpeg' ),
+        '1536x1536' => array( 'file' => 'shirt-1536x1152.jpg', 'width' => 1536, 'height' => 1152 ),
+    ) ) ),
+    // Small enough to send as it is
+    2 => array( "$dir/a/logo.png", array( 'width' => 800, 'height' => 600 ) ),
+    // Big, no usable size: downscaled
+    3 => array( "$dir/a/banner.jpg", array( 'width' => 3000, 'height' => 1000, 'sizes' => array(
+        'thumbnail' => array( 'file' => 'banner-150x150.jpg', 'width' => 150, 'height' => 150 ),
+    ) ) ),
+    // Same picture as 1, uploaded again for another product
+    4 => array( "$dir/b/shirt-1.jpg", array( 'width' => 2000, 'height' => 1500 ) ),
+    // Offloaded: not on disk
+    5 => array( "$dir/b/missing.jpg", array() ),
+);
+foreach ( array( 'shirt.jpg', 'shirt-150x150.jpg', 'shirt-600x600.jpg', 'shirt-768x576.jpg', 'shirt-1024x768.jpg', 'shirt-1536x1152.jpg', 'logo.png', 'banner.jpg', 'banner-150x150.jpg' ) as $name ) {
+    file_put_contents( "$dir/a/$name", $name === 'shirt.jpg' ? 'original shirt' : $name );
+}
+copy( "$dir/a/shirt.jpg", "$dir/b/shirt-1.jpg" );
+
+function get_attached_file( $id ) { global $attachments; return $attachments[ $id ][0]; }
+function wp_get_attachment_metadata( $id ) { global $attachments; return $attachments[ $id ][1]; }
+function wp_get_attachment_url( $id ) { return 'https://cdn.example/img-' . $id . '.jpg'; }
+
+class Mock_Image_Editor {
+    public $file;
+    public $resized = null;
+    public function __construct( $file ) { $this->file = $file; }
+    public function resize( $w, $h, $crop ) { $this->resized = array( $w, $h, $crop ); return true; }
+    public function set_quality( $quality ) {}
+    public function save( $path, $mime ) {
+        file_put_contents( $path, 'scaled ' . basename( $this->file ) . ' ' . implode( 'x', array_slice( $this->resized, 0, 2 ) ) );
+        return array( 'path' => $path, 'mime-type' => $mime );
+    }
+}
+function wp_get_image_editor( $file ) { return new Mock_Image_Editor( $file ); }
+
+$remote_gets = 0;
+function wp_remote_head( $url, $args ) { return array( 'headers' => array( 'content-length' => 12 ) ); }
+function wp_remote_get( $url, $args ) { global $remote_gets; $remote_gets++; return array( 'code' => 200, 'body' => 'remote bytes', 'headers' => array( 'content-type' => 'image/webp' ) ); }
+function wp_remote_retrieve_header( $response, $name ) { return isset( $response['headers'][ $name ] ) ? $response['headers'][ $name ] : ''; }
+function wp_remote_retrieve_response_code( $response ) { return $response['code']; }
+function wp_remote_retrieve_body( $response ) { return $response['body']; }
+
+require_once __DIR__ . '/../includes/class-woosuite-image-input.php';
+
+function data_url( $mime, $data ) { return 'data:' . $mime . ';base64,' . base64_encode( $data ); }
+
+// --- TEST 1: Largest uncropped intermediate size within MAX_EDGE ---
+echo "TEST 1: Intermediate size... ";
+$input = new WooSuite_Image_Input( 1 );
+echo $input->get_data_url() === data_url( 'image/jpeg', 'shirt-1024x768.jpg' ) ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 2: Small originals go as they are, big ones without a size are downscaled ---
+echo "TEST 2: Original and downscaled copy... ";
+$small = ( new WooSuite_Image_Input( 2 ) )->get_data_url();
+$scaled = ( new WooSuite_Image_Input( 3 ) )->get_data_url();
+$ok = $small === data_url( 'image/png', 'logo.png' )
+    && $scaled === data_url( 'image/jpeg', 'scaled banner.jpg 1024x1024' )
+    && glob( "$dir/woosuite-vision-*" ) === array();
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 3: The cache key is the full-size file's content: a duplicate upload shares it ---
+echo "TEST 3: Content hash across duplicate files... ";
+$duplicate = new WooSuite_Image_Input( 4 );
+$ok = $input->get_hash() === sha1( 'original shirt' )
+    && $duplicate->get_hash() === $input->get_hash()
+    && ( new WooSuite_Image_Input( 2 ) )->get_hash() !== $input->get_hash();
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 4: Not on disk: fetched once by URL for both hash and data ---
+echo "TEST 4: URL fallback... ";
+$remote = new WooSuite_Image_Input( 5 );
+$ok = $remote->get_hash() === sha1( 'remote bytes' )
+    && $remote->get_data_url() === data_url( 'image/webp', 'remote bytes' )
+    && $remote_gets === 1;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+array_map( 'unlink', array_merge( glob( "$dir/a/*" ), glob( "$dir/b/*" ) ) );
+rmdir( "$dir/a" );
+rmdir( "$dir/b" );
+rmdir( $dir );
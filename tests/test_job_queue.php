@@ -0,0 +1,67 @@
+<?php
+// Job queue: exclusive claims, expired leases reclaimed, heartbeats and releases, failing tasks whose worker keeps dying, completion.
+
+function wp_json_encode( $data ) { return json_encode( $data ); }
+
+require_once __DIR__ . '/mock_job_queue.php';
+require_once __DIR__ . '/../includes/class-woosuite-job-queue.php';
+
+$wpdb = new Mock_Queue_WPDB();
+
+$job_id = WooSuite_Job_Queue::create_job( 'seo', array( 'type' => 'product' ) );
+WooSuite_Job_Queue::add_tasks( $job_id, range( 101, 110 ) );
+
+function item_ids( $tasks ) { return array_map( 'intval', array_column( $tasks, 'item_id' ) ); }
+
+// --- TEST 1: Concurrent claims never share a task ---
+echo "TEST 1: Exclusive claims... ";
+$a = WooSuite_Job_Queue::claim( $job_id, 4 );
+$b = WooSuite_Job_Queue::claim( $job_id, 4 );
+$c = WooSuite_Job_Queue::claim( $job_id, 4 );
+$counts = WooSuite_Job_Queue::count_tasks( $job_id );
+$ok = item_ids( $a ) === range( 101, 104 ) && item_ids( $b ) === range( 105, 108 ) && item_ids( $c ) === array( 109, 110 )
+    && WooSuite_Job_Queue::claim( $job_id, 4 ) === array()
+    && $counts === array( 'free' => 0, 'leased' => 10, 'workers' => 3 )
+    && WooSuite_Job_Queue::get_job( $job_id )['total'] === 10;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 2: An expired lease is claimed again; the old holder can no longer finish its tasks ---
+echo "TEST 2: Expired lease reclaimed... ";
+foreach ( $a as $task ) {
+    $wpdb->tasks[ $task['id'] ]['lease'] = time() - 1; // Worker A died
+}
+$d = WooSuite_Job_Queue::claim( $job_id, 4 );
+$stale = WooSuite_Job_Queue::finish( $job_id, $a[0], 'done' );
+$fresh = WooSuite_Job_Queue::finish( $job_id, $d[0], 'done' );
+$job = WooSuite_Job_Queue::get_job( $job_id );
+$ok = item_ids( $d ) === range( 101, 104 ) && (int) $d[0]['attempts'] === 2
+    && ! $stale && $fresh && $job['done'] === 1 && $job['failed'] === 0;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 3: Heartbeats extend a claim; a released task goes back without using an attempt ---
+echo "TEST 3: Heartbeat and release... ";
+$wpdb->tasks[ $b[0]['id'] ]['lease'] = time() + 5;
+WooSuite_Job_Queue::heartbeat( $b[0]['owner'] );
+$extended = $wpdb->tasks[ $b[0]['id'] ]['lease'] >= time() + WooSuite_Job_Queue::LEASE - 1;
+WooSuite_Job_Queue::release( $b[1] );
+$again = WooSuite_Job_Queue::claim( $job_id, 10 );
+$ok = $extended && item_ids( $again ) === array( 106 ) && (int) $again[0]['attempts'] === 1;
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 4: A task whose lease ran out MAX_ATTEMPTS times is failed; the job completes once ---
+echo "TEST 4: Reap and complete... ";
+$task = $c[0];
+$wpdb->tasks[ $task['id'] ]['attempts'] = WooSuite_Job_Queue::MAX_ATTEMPTS;
+$wpdb->tasks[ $task['id'] ]['lease'] = time() - 1;
+$reaped = WooSuite_Job_Queue::reap( $job_id );
+foreach ( array_merge( array_slice( $d, 1 ), array_slice( $b, 0, 1 ), array_slice( $b, 2 ), $again, array_slice( $c, 1 ) ) as $held ) {
+    WooSuite_Job_Queue::finish( $job_id, $held, 'done' );
+}
+$left = WooSuite_Job_Queue::count_tasks( $job_id );
+$first = WooSuite_Job_Queue::complete_job( $job_id, 'Done' );
+$second = WooSuite_Job_Queue::complete_job( $job_id, 'Done' );
+$job = WooSuite_Job_Queue::get_job( $job_id );
+$ok = $reaped === array( 109 ) && $left['free'] + $left['leased'] === 0
+    && $first && ! $second && $job['status'] === 'complete' && $job['done'] === 9 && $job['failed'] === 1
+    && count( $wpdb->tasks ) === 1 && reset( $wpdb->tasks )['status'] === 'failed';
+echo $ok ? "PASSED\n" : "FAILED\n";
@@ -0,0 +1,110 @@
+<?php
+// Deep link classifier: URL extraction from HTML, block JSON and serialized text, and the local same-path / resolved / ambiguous decisions.
+
+$uploads = sys_get_temp_dir() . '/woosuite-links-test-' . getmypid();
+@mkdir( $uploads . '/2023/05', 0777, true );
+file_put_contents( $uploads . '/2023/05/shirt.jpg', 'x' );
+
+define( 'ABSPATH', $uploads . '/' );
+define( 'WP_CONTENT_DIR', $uploads . '/wp-content' );
+
+class WP_Error {}
+function is_wp_error( $thing ) { return $thing instanceof WP_Error; }
+function home_url( $path = '' ) { return 'https://new.example' . $path; }
+function untrailingslashit( $value ) { return rtrim( $value, '/\\' ); }
+function wp_parse_url( $url, $component = -1 ) { return parse_url( $url, $component ); }
+function wp_upload_dir() { global $uploads; return array( 'basedir' => $uploads ); }
+function sanitize_title( $title ) { return strtolower( trim( preg_replace( '/[^A-Za-z0-9-]+/', '-', $title ), '-' ) ); }
+
+// Posts 1-3 and term 7 on the new site
+function get_permalink( $id ) {
+    $links = array( 1 => '/shop/blue-shirt/', 2 => '/about/', 3 => '/news/about/' );
+    return isset( $links[ $id ] ) ? home_url( $links[ $id ] ) : false;
+}
+function get_term_link( $id, $taxonomy ) {
+    return $id === 7 ? home_url( '/product-category/shirts/' ) : new WP_Error();
+}
+
+require_once __DIR__ . '/../includes/backup/class-woosuite-link-classifier.php';
+
+$index = array(
+    'blue-shirt' => array( 'p:1' ),
+    'about' => array( 'p:2', 'p:3' ),
+    'shirts' => array( 't:7:product_cat' ),
+);
+$classifier = new WooSuite_Link_Classifier( 'www.old.example', $index );
+
+// --- TEST 1: Extraction from HTML, srcset, block JSON and serialized text; other hosts ignored ---
+echo "TEST 1: Link extraction... ";
+$text = '<a href="https://old.example/shop/blue-shirt/?color=red&amp;size=m">Shirt</a> '
+    . '<img srcset="//www.old.example/wp-content/uploads/2023/05/shirt-300x300.jpg 300w, https://old.example/wp-content/uploads/2023/05/shirt.jpg 800w"> '
+    . '<!-- wp:image {"url":"https:\/\/old.example\/wp-content\/uploads\/2023\/05\/shirt.jpg"} --> '
+    . 's:29:"https://old.example/about/";. See https://old.example/2019/04/blue-shirt/. '
+    . 'Not ours: https://old.example.org/x https://notold.example/y';
+$expected = array(
+    'https://old.example/shop/blue-shirt/?color=red&amp;size=m',
+    '//www.old.example/wp-content/uploads/2023/05/shirt-300x300.jpg',
+    'https://old.example/wp-content/uploads/2023/05/shirt.jpg',
+    'https:\/\/old.example\/wp-content\/uploads\/2023\/05\/shirt.jpg',
+    'https://old.example/about/',
+    'https://old.example/2019/04/blue-shirt/',
+);
+$found = $classifier->extract( $text );
+if ( $found === $expected ) {
+    echo "PASSED\n";
+} else {
+    echo "FAILED\n";
+    var_dump( $found );
+}
+
+// --- TEST 2: Local decisions ---
+echo "TEST 2: Classification... ";
+$cases = array(
+    // same path on the new site, query kept with its encoding
+    'https://old.example/shop/blue-shirt/?color=red&amp;size=m' => array( 'same_path', 'https://new.example/shop/blue-shirt/?color=red&amp;size=m' ),
+    // upload that exists, JSON escaping kept
+    'https:\/\/old.example\/wp-content\/uploads\/2023\/05\/shirt.jpg' => array( 'same_path', 'https:\/\/new.example\/wp-content\/uploads\/2023\/05\/shirt.jpg' ),
+    // resized copy missing, original exists; scheme-relative stays scheme-relative
+    '//www.old.example/wp-content/uploads/2023/05/shirt-300x300.jpg' => array( 'resolved', '//new.example/wp-content/uploads/2023/05/shirt.jpg' ),
+    // permalink structure changed: one post with that slug
+    'https://old.example/2019/04/blue-shirt/' => array( 'resolved', 'https://new.example/shop/blue-shirt/' ),
+    // term archive, pagination dropped
+    'https://old.example/category/shirts/page/2/' => array( 'resolved', 'https://new.example/product-category/shirts/' ),
+    // one of two posts with the slug has exactly this path
+    'https://old.example/news/about/' => array( 'same_path', 'https://new.example/news/about/' ),
+    'https://old.example/' => array( 'same_path', 'https://new.example/' ),
+);
+$ok = true;
+foreach ( $cases as $url => $want ) {
+    $result = $classifier->classify( $url );
+    if ( $result['kind'] !== $want[0] || $result['fix'] !== $want[1] ) {
+        $ok = false;
+        var_dump( $url, $result );
+    }
+}
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 3: Ambiguous links keep their candidates for the AI ---
+echo "TEST 3: Ambiguous links... ";
+$two = $classifier->classify( 'https://old.example/company/about/' );
+$none = $classifier->classify( 'https://old.example/wp-content/uploads/2020/01/gone.png' );
+$unknown = $classifier->classify( 'https://old.example/landing-2019/' );
+echo ( $two['kind'] === 'ambiguous' && count( $two['candidates'] ) === 2 && $none['kind'] === 'ambiguous' && $unknown['candidates'] === array() ) ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 4: AI answers map back to every occurrence, with the original escaping ---
+echo "TEST 4: AI answers to issues... ";
+$ambiguous = array(
+    'https://old.example/company/about/' => array( 'occurrences' => array( array( 'source_id' => 4, 'location' => 'post_content' ), array( 'source_id' => 9, 'location' => 'postmeta' ) ) ),
+    'https:\/\/old.example\/landing-2019\/' => array( 'occurrences' => array( array( 'source_id' => 5, 'location' => 'post_content' ) ) ),
+);
+$issues = WooSuite_Link_Classifier::issues_from_answers( $ambiguous, array(
+    array( 'id' => 0, 'suggested_fix' => 'https://new.example/about/', 'confidence' => 'High' ),
+    array( 'id' => 1, 'suggested_fix' => 'https://new.example/landing/' ),
+    array( 'id' => 7, 'suggested_fix' => 'https://new.example/x/' ),
+) );
+echo ( count( $issues ) === 3 && $issues[1]['location'] === 'postmeta' && $issues[2]['suggested_fix'] === 'https:\/\/new.example\/landing\/' && $issues[2]['method'] === 'ai' ) ? "PASSED\n" : "FAILED\n";
+
+unlink( $uploads . '/2023/05/shirt.jpg' );
+rmdir( $uploads . '/2023/05' );
+rmdir( $uploads . '/2023' );
+rmdir( $uploads );
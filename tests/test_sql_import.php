@@ -0,0 +1,108 @@
+<?php
+// SQL import engine: statement tokenizer (quotes, escapes, comments, read boundaries, gzip, resume, member checkpoints) and the serialized-aware domain rewrite.
+
+require_once __DIR__ . '/../includes/backup/class-woosuite-sql-import.php';
+
+$dir = sys_get_temp_dir() . '/woosuite-import-test-' . getmypid();
+@mkdir( $dir );
+
+$dump = "-- MySQL dump\n"
+    . "/*!40101 SET NAMES utf8mb4 */;\n"
+    . "# hash comment with 'quote;\n"
+    . "DROP TABLE IF EXISTS `wp_x`;\n"
+    . "/* block; comment */\n"
+    . "CREATE TABLE `wp_x` (id int, `we;ird` text);\n"
+    . "INSERT INTO `wp_x` VALUES (1,'multi\nline; value'),(2,'it\\'s \\\\'),(3,'a''b;'),(4,\"dq;\\\"x\"),(5, 1--1);\n"
+    . "INSERT INTO `wp_x` VALUES (6,'-- not a comment')\n";
+$expected = array(
+    "/*!40101 SET NAMES utf8mb4 */",
+    "DROP TABLE IF EXISTS `wp_x`",
+    "CREATE TABLE `wp_x` (id int, `we;ird` text)",
+    "INSERT INTO `wp_x` VALUES (1,'multi\nline; value'),(2,'it\\'s \\\\'),(3,'a''b;'),(4,\"dq;\\\"x\"),(5, 1--1)",
+    "INSERT INTO `wp_x` VALUES (6,'-- not a comment')",
+);
+
+function read_all( $file, $offset = 0, $block = WooSuite_Sql_Import::READ_BLOCK, $checkpoint = null ) {
+    $reader = new WooSuite_Sql_Import( $file, $offset, $block, $checkpoint );
+    $statements = array();
+    while ( ( $sql = $reader->next_statement() ) !== null ) {
+        $statements[] = array( $sql, $reader->offset() );
+    }
+    $reader->close();
+    return $statements;
+}
+
+// --- TEST 1: Statements split on ; outside quotes and comments, whatever the read size ---
+echo "TEST 1: Tokenizer across read boundaries... ";
+$plain = $dir . '/dump.sql';
+file_put_contents( $plain, $dump );
+$ok = true;
+for ( $block = 1; $block <= 40; $block++ ) {
+    $ok = $ok && array_column( read_all( $plain, 0, $block ), 0 ) === $expected;
+}
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 2: gzip input reads the same; resuming from any returned offset gives the rest ---
+echo "TEST 2: gzip input and resume offsets... ";
+$gz = $dir . '/dump.sql.gz';
+file_put_contents( $gz, gzencode( substr( $dump, 0, 100 ) ) . gzencode( substr( $dump, 100 ) ) );
+$statements = read_all( $gz, 0, 7 );
+$ok = array_column( $statements, 0 ) === $expected;
+foreach ( $statements as $i => $statement ) {
+    $ok = $ok && array_column( read_all( $gz, $statement[1], 7 ), 0 ) === array_slice( $expected, $i + 1 );
+}
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 3: Domain rewrite fixes serialized lengths in escaped SQL, nested too ---
+echo "TEST 3: Serialized-aware rewrite... ";
+$escape = 'addslashes'; // What the dump's escaping does to these values
+$meta = serialize( array( 'url' => 'http://old.com/x', 'note' => "it's \"old.com\"" ) );
+$nested = serialize( $meta );
+$broken = 's:99:"old.com";';
+$sql = "INSERT INTO `wp_postmeta` VALUES (1,'" . $escape( $nested ) . "'),(2,'http://old.com'),(3,'" . $escape( $broken ) . "')";
+$rewritten = WooSuite_Sql_Import::rewrite( $sql, 'old.com', 'new-site.org' );
+
+$meta_new = serialize( array( 'url' => 'http://new-site.org/x', 'note' => "it's \"new-site.org\"" ) );
+$expected_sql = "INSERT INTO `wp_postmeta` VALUES (1,'" . $escape( serialize( $meta_new ) ) . "'),(2,'http://new-site.org'),(3,'" . $escape( 's:99:"new-site.org";' ) . "')";
+$ok = $rewritten === $expected_sql;
+echo $ok ? "PASSED\n" : "FAILED\n";
+if ( ! $ok ) {
+    var_dump( $rewritten, $expected_sql );
+}
+
+// --- TEST 4: Statements without the old domain pass through untouched ---
+echo "TEST 4: Rewrite leaves other statements alone... ";
+$other = "INSERT INTO `wp_options` VALUES (1,'" . $escape( serialize( array( 'a' => 'b' ) ) ) . "')";
+echo WooSuite_Sql_Import::rewrite( $other, 'old.com', 'new-site.org' ) === $other ? "PASSED\n" : "FAILED\n";
+
+// --- TEST 5: Resuming from a checkpoint inflates only the member holding the offset ---
+echo "TEST 5: gzip checkpoint resume... ";
+$rows = array();
+for ( $i = 0; $i < 400; $i++ ) {
+    $rows[] = "INSERT INTO `wp_x` VALUES ($i,'" . str_repeat( chr( 97 + $i % 26 ), 40 ) . "')";
+}
+$sql = implode( ";\n", $rows ) . ";\n";
+$members = '';
+foreach ( str_split( $sql, 1500 ) as $piece ) {
+    $members .= gzencode( $piece );
+}
+$multi = $dir . '/multi.sql.gz';
+file_put_contents( $multi, $members );
+
+$reader = new WooSuite_Sql_Import( $multi, 0, 4096 );
+for ( $i = 0; $i < 300; $i++ ) {
+    $reader->next_statement();
+}
+$offset = $reader->offset();
+$checkpoint = $reader->checkpoint();
+$reader->close();
+
+// Everything before the checkpoint is overwritten: reading it would fail
+$damaged = $dir . '/damaged.sql.gz';
+file_put_contents( $damaged, str_repeat( "\0", $checkpoint['at'] ) . substr( $members, $checkpoint['at'] ) );
+$resumed = array_column( read_all( $damaged, $offset, 4096, $checkpoint ), 0 );
+$ok = $checkpoint['at'] > 0 && $checkpoint['base'] <= $offset && $resumed === array_slice( $rows, 300 );
+echo $ok ? "PASSED\n" : "FAILED\n";
+
+array_map( 'unlink', glob( $dir . '/*' ) );
+rmdir( $dir );
@@ -1,37 +1,5 @@
 <?php
-// Mock WordPress Environment
-
-$wp_options = [];
-function get_option($key, $default = false) {
-    global $wp_options;
-    return isset($wp_options[$key]) ? $wp_options[$key] : $default;
-}
-function update_option($key, $value) {
-    global $wp_options;
-    $wp_options[$key] = $value;
-}
-function is_user_logged_in() { return false; }
-function current_time($type) { return date('Y-m-d H:i:s'); }
-function esc_html($s) { return htmlspecialchars($s); }
-
-// Mock WPDB
-class MockWPDB {
-    public $prefix = 'wp_';
-    public $logs = [];
-    public function insert($table, $data) {
-        $this->logs[] = $data;
-    }
-}
-$wpdb = new MockWPDB();
-
-// Mock wp_die
-class WPDieException extends Exception {}
-function wp_die($message = '', $title = '', $args = []) {
-    throw new WPDieException($message);
-}
-
-// Load the class (assuming we are running from root)
-require_once __DIR__ . '/../includes/class-woosuite-security.php';
+require_once __DIR__ . '/mock_waf_env.php';
 
 // --- TEST 1: WAF Enabled, Simulation OFF, SQLi Attack ---
 echo "TEST 1: Blocking SQLi... ";
@@ -50,6 +18,8 @@ try {
 } catch (WPDieException $e) {
     echo "PASSED (Blocked as expected)\n";
 }
+// Events are buffered per request and written at shutdown
+WooSuite_Security_Log::flush();
 
 // --- TEST 2: WAF Enabled, Simulation ON, SQLi Attack ---
 echo "TEST 2: Simulation Mode (SQLi)... ";
@@ -58,6 +28,7 @@ $wp_options['woosuite_firewall_simulation_mode'] = 'yes';
 $wpdb->logs = [];
 try {
     $security->firewall_check();
+    WooSuite_Security_Log::flush();
     // Should NOT throw exception
     if (count($wpdb->logs) > 0 && strpos($wpdb->logs[0]['event'], '[Simulated]') !== false) {
          echo "PASSED (Logged but not blocked)\n";
@@ -81,3 +52,85 @@ try {
 } catch (WPDieException $e) {
     echo "FAILED (Blocked but SQLi blocking was disabled)\n";
 }
+
+// --- TEST 4: Single pass reports each rule set once (nested values included) ---
+echo "TEST 4: SQLi + nested XSS in one request (Simulation)... ";
+$wp_options['woosuite_firewall_simulation_mode'] = 'yes';
+$wp_options['woosuite_firewall_block_sqli'] = 'yes';
+$wp_options['woosuite_firewall_block_xss'] = 'yes';
+$_GET = ['q' => 'union%20select 1', 'p' => 'or 1=1'];
+$_COOKIE = ['prefs' => ['theme' => '<SCRIPT>alert(1)</script>']];
+$wpdb->logs = [];
+
+try {
+    $security->firewall_check();
+    WooSuite_Security_Log::flush();
+    $events = array_column($wpdb->logs, 'event');
+    if ($events === ['SQL Injection Attempt [Simulated]', 'XSS Attempt [Simulated]']) {
+        echo "PASSED (Both logged once)\n";
+    } else {
+        echo "FAILED (Unexpected log entries)\n";
+        print_r($events);
+    }
+} catch (WPDieException $e) {
+    echo "FAILED (Blocked but should be simulation)\n";
+}
+$_COOKIE = [];
+
+// --- TEST 5: Buffered logging writes a request's events in one INSERT ---
+echo "TEST 5: Buffered log flush (3 failed logins)... ";
+$wpdb->logs = [];
+$wpdb->queries = 0;
+foreach (['admin', 'shop', "o'brien"] as $username) {
+    $security->log_failed_login($username);
+}
+$written = count($wpdb->logs);
+WooSuite_Security_Log::flush();
+if ($written === 0 && count($wpdb->logs) === 3 && $wpdb->queries === 1 && $wpdb->logs[2]['event'] === "Failed Login Attempt (o'brien)") {
+    echo "PASSED (One multi-row insert)\n";
+} else {
+    echo "FAILED (Expected 3 rows in 1 query, got " . count($wpdb->logs) . " rows in {$wpdb->queries})\n";
+}
+
+// --- TEST 6: CIDR ban blocks every IP in the range, one index lookup ---
+echo "TEST 6: CIDR range ban (198.51.100.0/24)... ";
+$_GET = [];
+WooSuite_Ip_Store::ban('198.51.100.0/24', 0, 'AS64500');
+$results = [];
+foreach (['198.51.100.77', '198.51.101.1'] as $ip) {
+    $_SERVER['REMOTE_ADDR'] = $ip;
+    try {
+        $security->firewall_check();
+        $results[$ip] = 'allowed';
+    } catch (WPDieException $e) {
+        $results[$ip] = 'blocked';
+    }
+}
+if ($results === ['198.51.100.77' => 'blocked', '198.51.101.1' => 'allowed']) {
+    echo "PASSED (Range blocked, neighbour allowed)\n";
+} else {
+    echo "FAILED\n";
+    print_r($results);
+}
+$_SERVER['REMOTE_ADDR'] = '127.0.0.1';
+
+// --- TEST 7: Automatic ban after 5 violations stays out of the autoloaded index ---
+echo "TEST 7: Automatic ban (5 violations)... ";
+$wp_options['woosuite_firewall_simulation_mode'] = 'yes';
+$_GET = ['q' => 'union select 1'];
+$_SERVER['REMOTE_ADDR'] = '203.0.113.9';
+$index_before = $wp_options['woosuite_ip_ban_index'];
+for ($i = 0; $i < 5; $i++) {
+    $security->firewall_check();
+}
+WooSuite_Security_Log::flush();
+$banned = WooSuite_Ip_Store::is_banned('203.0.113.9');
+$neighbour = WooSuite_Ip_Store::is_banned('203.0.113.10');
+WooSuite_Ip_Store::rebuild_index();
+if ($banned && !$neighbour && $wp_options['woosuite_ip_ban_index'] === $index_before && isset($wpdb->bans['cb007109/32'])) {
+    echo "PASSED (IP banned, index unchanged)\n";
+} else {
+    echo "FAILED\n";
+}
+$_GET = [];
+$_SERVER['REMOTE_ADDR'] = '127.0.0.1';
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""HTTP load driver for measuring the WAF's cost on a real site.
+
+Fires clean storefront traffic (search / filter / UTM query strings, WooCommerce
+session, analytics and consent cookies) at a WordPress site and reports req/s and
+latency percentiles. Run it once with the firewall on and once with it off:
+
+    wp option update woosuite_firewall_enabled yes
+    python3 tests/waf_load.py --url http://shop.test/ --label waf-on
+    wp option update woosuite_firewall_enabled no
+    python3 tests/waf_load.py --url http://shop.test/ --label waf-off
+
+--attack-rate mixes in requests that must be blocked (403) to check the rules
+still fire under load; keep it at 0 for throughput numbers, since blocked
+requests skip the page render. Only needs the Python standard library.
+"""
+
+import argparse
+import random
+import string
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+SEARCH_TERMS = ["blue running shoes", "organic cotton t-shirt", "gift card", "wireless headphones", "kids rain jacket"]
+ATTACKS = [
+    {"s": "1' union select user_login,user_pass from wp_users--"},
+    {"q": "<script>alert(document.cookie)</script>"},
+    {"id": "1 or 1=1"},
+]
+
+
+def _token(rng, length):
+    return "".join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(length))
+
+
+def build_request(rng, base_url, cookie_bytes, attack_rate):
+    params = {"s": rng.choice(SEARCH_TERMS), "post_type": "product"}
+    if rng.random() < 0.5:
+        params.update(orderby="popularity", paged=str(rng.randint(1, 20)), filter_color="blue,black", min_price="20", max_price="150")
+    if rng.random() < 0.33:
+        params.update(utm_source="newsletter", utm_medium="email", utm_campaign="spring_sale_2024", fbclid=_token(rng, 64))
+    attack = rng.random() < attack_rate
+    if attack:
+        params.update(rng.choice(ATTACKS))
+
+    now = int(time.time())
+    cookies = {
+        "wordpress_test_cookie": "WP+Cookie+check",
+        "wp_woocommerce_session_" + _token(rng, 32): "%d%%7C%%7C%d%%7C%%7C%d%%7C%%7C%s" % (rng.randint(1000, 9999), now, now, _token(rng, 32)),
+        "woocommerce_items_in_cart": "1",
+        "woocommerce_cart_hash": _token(rng, 32),
+        "_ga": "GA1.2.%d.%d" % (rng.randint(1, 2**31), now),
+        "_gid": "GA1.2.%d.%d" % (rng.randint(1, 2**31), now),
+        "_fbp": "fb.1.%d.%d" % (now, rng.randint(1, 2**31)),
+        "cookieyes-consent": "consentid:%s,consent:yes,action:yes,necessary:yes,analytics:yes,advertisement:no" % _token(rng, 32),
+        "_analytics_state": urllib.parse.quote('{"v":3,"events":"%s"}' % _token(rng, cookie_bytes)),
+    }
+    url = base_url + ("&" if "?" in base_url else "?") + urllib.parse.urlencode(params)
+    headers = {
+        "Cookie": "; ".join("%s=%s" % item for item in cookies.items()),
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) woosuite-waf-load",
+        "Accept": "text/html",
+    }
+    return url, headers, attack
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    requests = [build_request(rng, args.url, args.cookie_bytes, args.attack_rate) for _ in range(args.requests)]
+    lock = threading.Lock()
+    latencies, statuses, misses = [], {}, []
+
+    def fire(request):
+        url, headers, attack = request
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=args.timeout) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            status = error.code
+        except (urllib.error.URLError, OSError):
+            status = "error"
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+            if attack != (status == 403):
+                misses.append((status, url))
+
+    # Warm up opcache / object cache before timing
+    for request in requests[: args.warmup]:
+        fire(request)
+    latencies.clear()
+    statuses.clear()
+    misses.clear()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(fire, requests))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    print("%-10s %6d req  c=%-3d %8.1f req/s  p50 %6.1f ms  p95 %6.1f ms  p99 %6.1f ms  %s" % (
+        args.label, len(latencies), args.concurrency, len(latencies) / wall,
+        percentile(latencies, 50) * 1000, percentile(latencies, 95) * 1000, percentile(latencies, 99) * 1000,
+        " ".join("%s:%d" % (k, v) for k, v in sorted(statuses.items(), key=lambda kv: str(kv[0]))),
+    ))
+    if misses:
+        print("%d requests not blocked/allowed as expected, e.g. %s %s" % (len(misses), misses[0][0], misses[0][1]))
+    return 1 if misses and args.attack_rate > 0 else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--url", required=True, help="Storefront URL, e.g. http://shop.test/")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--cookie-bytes", type=int, default=2048, help="Size of the analytics cookie payload")
+    parser.add_argument("--attack-rate", type=float, default=0.0, help="Share of requests carrying an attack pattern")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    raise SystemExit(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()